@@ -4,21 +4,37 @@
 Находит видео и транскрипт в папке и обрабатывает их
 """
 
-import os
 import sys
+import time
 import logging
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from pathlib import Path
+from typing import Optional
 
 # Добавляем src в путь
 sys.path.insert(0, str(Path(__file__).parent / 'src'))
 
-from src.video_processor import VideoProcessor
 from src.transcript_parser import TranscriptParser
 from src.markdown_generator import MarkdownGenerator
+from src.metrics import RunMetrics, metrics_path_for
+from src.batch import (
+    BatchJob, FolderWatcher, discover_jobs, init_worker_process, is_partial_range, output_stem,
+    probe_duration, range_key, schedule_longest_first, warm_up_worker
+)
+from src.job_queue import JobQueue
+from src.main import parse_time_arg, resolve_time_range, validate_processing_options
 from src.config import (
     DEFAULT_SAMPLE_RATE, 
     DEFAULT_THRESHOLD, 
     DEFAULT_CROP_REGION,
+    DEFAULT_BATCH_WORKERS,
+    DEFAULT_DECODER,
+    DEFAULT_COMPARE_WORKERS,
+    DECODERS,
+    WATCH_POLL_INTERVAL,
+    WATCH_STABLE_POLLS,
+    VIDEO_EXTENSIONS,
+    TRANSCRIPT_EXTENSIONS,
     CROP_REGION_BOTTOM_LEFT,
     CROP_REGION_BOTTOM_RIGHT,
     CROP_REGION_TOP_RIGHT,
@@ -92,20 +108,55 @@ def choose_crop_region() -> str:
 class FolderProcessor:
     """Обработчик видео из указанной папки"""
     
-    VIDEO_EXTENSIONS = ['.mp4', '.mov', '.avi', '.mkv', '.m4v']
-    TRANSCRIPT_EXTENSIONS = ['.txt']
+    VIDEO_EXTENSIONS = VIDEO_EXTENSIONS
+    TRANSCRIPT_EXTENSIONS = TRANSCRIPT_EXTENSIONS
     
     def __init__(
         self,
         sample_rate: float = DEFAULT_SAMPLE_RATE,
         threshold: float = DEFAULT_THRESHOLD,
         crop_region: str = DEFAULT_CROP_REGION,
-        force: bool = False
+        force: bool = False,
+        interactive: bool = True,
+        start_time: float = 0.0,
+        end_time: Optional[float] = None,
+        memory_budget_mb: Optional[float] = None,
+        time_budget: Optional[float] = None,
+        luma_decode: bool = False,
+        decoder: str = DEFAULT_DECODER,
+        decode_process: bool = False,
+        compare_workers: int = DEFAULT_COMPARE_WORKERS,
+        tile_compare: bool = False,
+        analysis_width: Optional[int] = None,
+        two_pass: bool = False,
+        keyframes: bool = False,
+        packet_prefilter: bool = False,
+        seek_index: bool = False
     ):
         self.sample_rate = sample_rate
         self.threshold = threshold
         self.crop_region = crop_region
         self.force = force
+        self.interactive = interactive  # False - не задавать вопросов (пакетный режим)
+        self.start_time = start_time    # Отрезок видео [start_time, end_time) в секундах
+        self.end_time = end_time
+        self.memory_budget_mb = memory_budget_mb  # Бюджет памяти на одно видео (None - без учёта памяти)
+        self.time_budget = time_budget            # Бюджет времени на одно видео в секундах (None - без ограничения)
+        self.luma_decode = luma_decode            # Анализ по яркостной плоскости без преобразования в BGR
+        self.decoder = decoder                    # Декодер кадров (opencv / ffmpeg)
+        self.decode_process = decode_process      # Декодирование в отдельном процессе (разделяемая память)
+        self.compare_workers = compare_workers    # Потоков сравнения кадров (больше 1 - двухфазный детектор)
+        self.tile_compare = tile_compare          # Сравнение по сетке плиток с ранним выходом
+        self.analysis_width = analysis_width      # Ширина анализа (None - исходное разрешение обрезки)
+        self.two_pass = two_pass                  # Двухпроходное детектирование
+        self.keyframes = keyframes                # Поиск смен по ключевым кадрам
+        self.packet_prefilter = packet_prefilter  # Фильтр по размерам пакетов
+        self.seek_index = seek_index              # Индекс перемотки рядом с видео
+    
+    @property
+    def is_partial(self) -> bool:
+        """Обрабатывается только часть видео (предпросмотр или отрезок)"""
+        return is_partial_range(self.start_time, self.end_time)
     
     def find_video_file(self, folder: Path) -> Path:
         """Находит видеофайл в папке"""
@@ -153,8 +204,22 @@ class FolderProcessor:
         
         logger.info(f"✓ Найден транскрипт: {transcript_file.name}")
         
+        return self.process_video(folder, video_file, transcript_file)
+    
+    def process_video(self, folder: Path, video_file: Path, transcript_file: Path) -> bool:
+        """
+        Обрабатывает одну пару видео/транскрипт, результаты пишутся в folder
+        
+        Args:
+            folder: Папка для результатов
+            video_file: Путь к видео
+            transcript_file: Путь к транскрипту
+        
+        Returns:
+            True если успешно, False если ошибка или пропуск
+        """
         # Определяем имена выходных файлов (по имени видео)
-        video_basename = video_file.stem  # Имя без расширения
+        video_basename = output_stem(video_file, self.is_partial)
         output_md = folder / f"{video_basename}.md"
         slides_dir = folder / f"{video_basename}_slides"
         
@@ -162,6 +227,9 @@ class FolderProcessor:
         if output_md.exists():
             if self.force:
                 logger.info(f"⚠ Файл {output_md.name} уже существует - автоматическая перезапись")
+            elif not self.interactive:
+                logger.info(f"⚠ Файл {output_md.name} уже существует - пропускаем")
+                return False
             else:
                 logger.info(f"⚠ Файл {output_md.name} уже существует")
                 response = input("  Перезаписать? (y/n): ").lower()
@@ -170,15 +238,32 @@ class FolderProcessor:
                     return False
         
         try:
-            # 1. Обработка видео
+            metrics = RunMetrics(memory_budget_mb=self.memory_budget_mb)
+            
+            # 1. Обработка видео (cv2 и scikit-image загружаются только здесь)
             logger.info(f"\n[1/3] Обработка видео...")
-            video_processor = VideoProcessor(
+            from src.video_processor import VideoProcessor
+            with VideoProcessor(
                 video_path=str(video_file),
                 sample_rate=self.sample_rate,
                 threshold=self.threshold,
-                crop_region=self.crop_region
-            )
-            slides_data = video_processor.process(str(slides_dir))
+                crop_region=self.crop_region,
+                start_time=self.start_time,
+                end_time=self.end_time,
+                metrics=metrics,
+                time_budget=self.time_budget,
+                luma_decode=self.luma_decode,
+                decoder=self.decoder,
+                decode_process=self.decode_process,
+                compare_workers=self.compare_workers,
+                tile_compare=self.tile_compare,
+                analysis_width=self.analysis_width,
+                two_pass=self.two_pass,
+                keyframes=self.keyframes,
+                packet_prefilter=self.packet_prefilter,
+                seek_index=self.seek_index
+            ) as video_processor:
+                slides_data = video_processor.process(str(slides_dir))
             
             if not slides_data:
                 logger.error("Не удалось извлечь слайды!")
@@ -188,8 +273,11 @@ class FolderProcessor:
             
             # 2. Парсинг транскрипта
             logger.info(f"\n[2/3] Парсинг транскрипта...")
-            transcript_parser = TranscriptParser()
+            transcript_parser = TranscriptParser(metrics)
             transcript_entries = transcript_parser.parse_transcript(str(transcript_file))
+            transcript_entries = transcript_parser.filter_by_time(
+                transcript_entries, self.start_time, self.end_time
+            )
             
             logger.info(f"✓ Распарсено сегментов: {len(transcript_entries)}")
             
@@ -207,6 +295,7 @@ class FolderProcessor:
                 slides_dir=slides_dir.name,  # Относительное имя папки
                 title=title
             )
+            metrics.write(metrics_path_for(str(output_md)))
             
             logger.info("\n" + "=" * 80)
             logger.info(f"✓ УСПЕШНО ОБРАБОТАНО: {folder.name}")
@@ -219,9 +308,297 @@ class FolderProcessor:
             return True
             
         except Exception as e:
-            logger.error(f"❌ Ошибка при обработке {folder.name}: {e}")
+            logger.error(f"❌ Ошибка при обработке {video_file.name}: {e}")
             return False
+
+
+def _run_batch_job(job: BatchJob, settings: dict) -> bool:
+    """Обрабатывает одно задание пакета (выполняется в дочернем процессе)"""
+    logger.info(f"▶ Обработка: {job.video_path} ({job.duration / 60:.1f} мин)")
+    processor = FolderProcessor(interactive=False, **settings)
+    return processor.process_video(job.folder, job.video_path, job.transcript_path)
+
+
+def process_tree(root: Path, settings: dict, workers: int = DEFAULT_BATCH_WORKERS) -> bool:
+    """
+    Пакетная обработка: находит все пары видео/транскрипт в дереве папок
+    и обрабатывает их в пуле процессов, начиная с самых длинных видео
+    
+    Args:
+        root: Корневая папка курса
+        settings: Параметры конструктора FolderProcessor (sample_rate, threshold, crop_region, force, ...)
+        workers: Количество параллельных процессов
+    
+    Returns:
+        True если все задания обработаны без ошибок
+    """
+    jobs = discover_jobs(root)
+    logger.info(f"Найдено пар видео/транскрипт: {len(jobs)}")
+    
+    # Уже обработанные видео не планируем (если не указан --force)
+    # (у частичной обработки результат свой - {видео}_preview.md)
+    if not settings.get('force'):
+        partial = is_partial_range(settings.get('start_time', 0.0), settings.get('end_time'))
+        done = [job for job in jobs if job.output_md_for(partial).exists()]
+        if done:
+            logger.info(f"Пропускаем уже обработанные: {len(done)}")
+        jobs = [job for job in jobs if job not in done]
+    
+    if not jobs:
+        logger.info("Нет заданий для обработки")
+        return True
+    
+    # Длительность по метаданным - для планирования от длинных к коротким
+    for job in jobs:
+        job.duration = probe_duration(job.video_path)
+    jobs = schedule_longest_first(jobs)
+    
+    total_duration = sum(job.duration for job in jobs)
+    logger.info(f"Заданий: {len(jobs)}, суммарная длительность видео: {total_duration / 60:.1f} мин, "
+                f"процессов: {workers}")
+    
+    failed = []
+    
+    if workers <= 1:
+        for job in jobs:
+            if not _run_batch_job(job, settings):
+                failed.append(job)
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=init_worker_process) as executor:
+            # Executor раздаёт задания в порядке отправки - длинные уходят первыми
+            futures = {executor.submit(_run_batch_job, job, settings): job for job in jobs}
+            
+            for completed, future in enumerate(as_completed(futures), start=1):
+                job = futures[future]
+                try:
+                    success = future.result()
+                except Exception as e:
+                    logger.error(f"❌ Ошибка процесса при обработке {job.video_path}: {e}")
+                    success = False
+                
+                if not success:
+                    failed.append(job)
+                logger.info(f"Готово заданий: {completed}/{len(jobs)}")
+    
+    logger.info("=" * 80)
+    logger.info(f"ПАКЕТ ЗАВЕРШЁН: успешно {len(jobs) - len(failed)}, с ошибками {len(failed)}")
+    for job in failed:
+        logger.info(f"  ❌ {job.video_path}")
+    logger.info("=" * 80)
+    
+    return not failed
+
+
+def estimate_tree(root: Path, settings: dict, recursive: bool = False) -> bool:
+    """
+    Оценивает время и пиковую память обработки каждого видео, не обрабатывая их
+    
+    Оценка каждого видео пишется в {видео}.estimate.json, в лог - сводка по пакету.
+    
+    Args:
+        root: Папка с видео (или корень курса при recursive)
+        settings: Параметры FolderProcessor (используются sample_rate, crop_region, start_time, end_time)
+        recursive: Оценивать все пары видео/транскрипт в подпапках
+    
+    Returns:
+        True если все видео удалось оценить
+    """
+    from src.estimator import estimate_path_for, estimate_video
+    
+    jobs = discover_jobs(root)
+    if not recursive:
+        jobs = [job for job in jobs if job.folder == root]
+    if not jobs:
+        logger.info("Нет видео для оценки")
+        return True
+    
+    rows = []
+    failed = 0
+    for job in jobs:
+        try:
+            estimate = estimate_video(
+                str(job.video_path),
+                sample_rate=settings['sample_rate'],
+                crop_region=settings['crop_region'],
+                start_time=settings.get('start_time', 0.0),
+                end_time=settings.get('end_time'),
+                luma_decode=settings.get('luma_decode', False),
+                decoder=settings.get('decoder', DEFAULT_DECODER),
+                decode_process=settings.get('decode_process', False),
+                analysis_width=settings.get('analysis_width')
+            )
+        except Exception as e:
+            logger.error(f"❌ Не удалось оценить {job.video_path}: {e}")
+            failed += 1
+            continue
+        estimate.write(estimate_path_for(str(job.output_md)))
+        rows.append((job, estimate.predict(settings['sample_rate'])))
+    
+    logger.info("=" * 80)
+    logger.info(f"ОЦЕНКА ПАКЕТА (sample rate {settings['sample_rate']}s)")
+    for job, prediction in sorted(rows, key=lambda row: -row[1]['runtime_s']):
+        logger.info(f"  {prediction['runtime_s'] / 60:7.1f} мин  {prediction['peak_memory_mb']:7.0f} МБ  {job.video_path}")
+    if rows:
+        logger.info(f"Итого: {sum(p['runtime_s'] for _, p in rows) / 60:.1f} мин в один процесс, "
+                    f"максимум памяти на процесс: {max(p['peak_memory_mb'] for _, p in rows):.0f} МБ")
+    logger.info("=" * 80)
+    return not failed
+
+
+def _run_queue_worker(root: Path, queue_dir, settings: dict) -> int:
+    """
+    Цикл рабочего процесса общей очереди: захватить задание, обработать, завершить
+    
+    Работает, пока в очереди есть незавершённые задания. Если все свободные
+    задания разобраны другими узлами, ждёт: брошенные захваты (узел упал)
+    освобождаются по истечении аренды и забираются здесь.
+    
+    Returns:
+        Количество обработанных этим процессом заданий
+    """
+    queue = JobQueue(root, queue_dir, scope=range_key(settings.get('start_time', 0.0), settings.get('end_time')))
+    processor = FolderProcessor(interactive=False, **settings)
+    processed = 0
     
+    while True:
+        claim = queue.claim_next()
+        if claim is None:
+            if not queue.has_unfinished():
+                return processed
+            time.sleep(queue.heartbeat_interval)
+            continue
+        
+        with claim:
+            job = claim.job
+            output_md = job.output_md_for(processor.is_partial)
+            if not processor.force and output_md.exists():
+                # Результат успел записать другой узел или обычный запуск - это не ошибка
+                logger.info(f"⚠ [{queue.worker_id}] {output_md.name} уже существует - пропускаем")
+                claim.complete(True)
+                continue
+            logger.info(f"▶ [{queue.worker_id}] Захвачено: {job.video_path} ({job.duration / 60:.1f} мин)")
+            success = processor.process_video(job.folder, job.video_path, job.transcript_path)
+            claim.complete(success)
+            processed += 1
+
+
+def process_queue(root: Path, settings: dict, workers: int = DEFAULT_BATCH_WORKERS, queue_dir=None) -> bool:
+    """
+    Обработка через общую очередь на сетевом диске
+    
+    Одну и ту же команду можно запустить на нескольких машинах: каждый узел
+    добавляет найденные задания в очередь (повторно не добавляются) и
+    разбирает их своими процессами, пока очередь не опустеет. С --force
+    завершённые задания (готовые или с ошибкой) возвращаются в очередь.
+    
+    Args:
+        root: Корневая папка курса (на общем диске)
+        settings: Параметры конструктора FolderProcessor (sample_rate, threshold, crop_region, force, ...)
+        workers: Количество рабочих процессов на этом узле
+        queue_dir: Папка очереди (по умолчанию root/.lse_queue)
+    
+    Returns:
+        True если среди заданий текущих видео курса нет заданий с ошибкой
+    """
+    start_time, end_time = settings.get('start_time', 0.0), settings.get('end_time')
+    queue = JobQueue(root, queue_dir, scope=range_key(start_time, end_time))
+    
+    partial = is_partial_range(start_time, end_time)
+    force = settings.get('force', False)
+    added = 0
+    job_ids = []
+    for job in discover_jobs(root):
+        job_ids.append(queue.job_id(job))
+        if not force and (queue.is_enqueued(job) or job.output_md_for(partial).exists()):
+            continue
+        job.duration = probe_duration(job.video_path)
+        if queue.enqueue(job, force=force):
+            added += 1
+    
+    logger.info(f"Очередь: {queue.queue_dir} (добавлено заданий: {added})")
+    
+    if workers <= 1:
+        processed = _run_queue_worker(root, queue_dir, settings)
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=init_worker_process) as executor:
+            futures = [executor.submit(_run_queue_worker, root, queue_dir, settings) for _ in range(workers)]
+            processed = sum(future.result() for future in futures)
+    
+    # Задания заменённых с тех пор видео в итог не входят
+    status = queue.status(job_ids)
+    logger.info("=" * 80)
+    logger.info(f"ОЧЕРЕДЬ ПУСТА: этим узлом обработано {processed}, всего заданий {status['total']}, "
+                f"готово {status['done']}, с ошибкой {status['failed']}")
+    logger.info("=" * 80)
+    
+    return status['failed'] == 0
+
+
+def watch_tree(
+    root: Path,
+    settings: dict,
+    workers: int = DEFAULT_BATCH_WORKERS,
+    poll_interval: float = WATCH_POLL_INTERVAL,
+    stable_polls: int = WATCH_STABLE_POLLS
+):
+    """
+    Режим наблюдения: опрашивает папку и отправляет докопированные видео
+    в постоянный пул прогретых процессов
+    
+    Работает до прерывания (Ctrl+C).
+    
+    Args:
+        root: Корневая папка для наблюдения
+        settings: Параметры конструктора FolderProcessor (sample_rate, threshold, crop_region, force, ...)
+        workers: Количество процессов в пуле
+        poll_interval: Интервал опроса в секундах
+        stable_polls: Сколько опросов подряд размер видео должен не меняться
+    """
+    watcher = FolderWatcher(root, stable_polls=stable_polls, force=settings.get('force', False),
+                            partial=is_partial_range(settings.get('start_time', 0.0), settings.get('end_time')))
+    
+    logger.info("=" * 80)
+    logger.info(f"НАБЛЮДЕНИЕ ЗА ПАПКОЙ: {root}")
+    logger.info(f"Опрос каждые {poll_interval}s, видео готово после {stable_polls} опросов без изменений")
+    logger.info("=" * 80)
+    
+    with ProcessPoolExecutor(max_workers=workers, initializer=init_worker_process) as executor:
+        # Запускаем и прогреваем процессы сразу, а не при первом задании
+        for future in [executor.submit(warm_up_worker) for _ in range(workers)]:
+            future.result()
+        logger.info(f"✓ Пул из {workers} процессов готов")
+        
+        running = {}
+        processed = 0
+        
+        try:
+            while True:
+                for job in watcher.poll():
+                    job.duration = probe_duration(job.video_path)
+                    logger.info(f"➕ В очередь: {job.video_path} ({job.duration / 60:.1f} мин)")
+                    running[executor.submit(_run_batch_job, job, settings)] = job
+                
+                for future in [f for f in running if f.done()]:
+                    job = running.pop(future)
+                    try:
+                        success = future.result()
+                    except Exception as e:
+                        logger.error(f"❌ Ошибка процесса при обработке {job.video_path}: {e}")
+                        success = False
+                    
+                    if not success:
+                        watcher.failed(job)  # Та же версия видео будет выдана снова
+                    processed += 1
+                    status = "✓ Готово" if success else "❌ Не обработано"
+                    logger.info(f"{status}: {job.video_path} (всего обработано: {processed}, "
+                                f"в работе: {len(running)})")
+                
+                time.sleep(poll_interval)
+        
+        except KeyboardInterrupt:
+            logger.warning(f"\n\nНаблюдение остановлено, отменяем заданий в очереди: {len(running)}")
+            executor.shutdown(wait=False, cancel_futures=True)
+            raise
 
 
 def main():
@@ -240,6 +617,18 @@ def main():
     ├── video.mp4
     └── transcript.txt
 
+Пакетная обработка всего курса (рекурсивно, 4 процесса):
+  python3 auto_process.py material --recursive --workers 4 --force
+
+Несколько машин с общим сетевым диском (запустить одну команду на каждой):
+  python3 auto_process.py /mnt/nfs/course --queue --workers 4
+
+Предпросмотр первых 5 минут (проверить область анализа и порог):
+  python3 auto_process.py material/one-one-decomposition --preview 5 --crop-region center
+
+Наблюдение за папкой (новые записи обрабатываются автоматически):
+  python3 auto_process.py /shared/lectures --watch --workers 2
+
 Результат:
   material/one-one-decomposition/
     ├── video.mp4
@@ -287,6 +676,157 @@ def main():
         help='Автоматически перезаписывать существующие файлы без подтверждения'
     )
     
+    parser.add_argument(
+        '--start',
+        type=parse_time_arg,
+        default=0.0,
+        help='Начало обрабатываемого отрезка: секунды или MM:SS / H:MM:SS (по умолчанию: начало видео)'
+    )
+    
+    parser.add_argument(
+        '--end',
+        type=parse_time_arg,
+        default=None,
+        help='Конец обрабатываемого отрезка: секунды или MM:SS / H:MM:SS (по умолчанию: конец видео)'
+    )
+    
+    parser.add_argument(
+        '--preview',
+        type=float,
+        default=None,
+        metavar='N',
+        help='Предпросмотр: обработать только N минут начиная с --start. '
+             'Результат пишется в {видео}_preview.md, полный результат не затирается'
+    )
+    
+    parser.add_argument(
+        '--recursive', '-r',
+        action='store_true',
+        help='Пакетный режим: обработать все пары видео/транскрипт во всех подпапках'
+    )
+    
+    parser.add_argument(
+        '--workers',
+        type=int,
+        default=DEFAULT_BATCH_WORKERS,
+        help=f'Количество параллельных процессов в пакетном режиме (по умолчанию: {DEFAULT_BATCH_WORKERS})'
+    )
+    
+    parser.add_argument(
+        '--watch',
+        action='store_true',
+        help='Режим наблюдения: опрашивать папку и обрабатывать новые видео, как только они докопированы'
+    )
+    
+    parser.add_argument(
+        '--poll-interval',
+        type=float,
+        default=WATCH_POLL_INTERVAL,
+        help=f'Интервал опроса папки в режиме наблюдения, секунды (по умолчанию: {WATCH_POLL_INTERVAL})'
+    )
+    
+    parser.add_argument(
+        '--queue',
+        action='store_true',
+        help='Пакетный режим через общую очередь на диске: команду можно запустить на нескольких машинах'
+    )
+    
+    parser.add_argument(
+        '--queue-dir',
+        type=str,
+        default=None,
+        help='Папка общей очереди (по умолчанию: <папка>/.lse_queue)'
+    )
+    
+    parser.add_argument(
+        '--memory-budget',
+        type=float,
+        default=None,
+        metavar='MB',
+        help='Бюджет памяти на один процесс в МБ: предупреждать при приближении, '
+             'RSS по этапам пишется в {видео}.metrics.json'
+    )
+    
+    parser.add_argument(
+        '--time-budget',
+        type=parse_time_arg,
+        default=None,
+        help='Бюджет времени на одно видео: секунды или MM:SS / H:MM:SS. При нехватке времени '
+             'анализируемые кадры прореживаются (участки - в {видео}.metrics.json)'
+    )
+    
+    parser.add_argument(
+        '--luma-decode',
+        action='store_true',
+        help='Анализировать яркость (Y) кадра без преобразования в BGR (быстрее, меньше памяти)'
+    )
+    
+    parser.add_argument(
+        '--decoder',
+        type=str,
+        default=DEFAULT_DECODER,
+        choices=DECODERS,
+        help='Декодер кадров: opencv (по умолчанию) или ffmpeg (нужен ffmpeg в PATH)'
+    )
+    
+    parser.add_argument(
+        '--decode-process',
+        action='store_true',
+        help='Декодировать в отдельном процессе (кадры анализа - через разделяемую память)'
+    )
+    
+    parser.add_argument(
+        '--compare-workers',
+        type=int,
+        default=DEFAULT_COMPARE_WORKERS,
+        help='Потоков для сравнения кадров одного видео (по умолчанию 1); больше 1 - двухфазный детектор '
+             'с теми же слайдами'
+    )
+    
+    parser.add_argument(
+        '--tile-compare',
+        action='store_true',
+        help='Сравнивать кадры по сетке плиток с ранним выходом (те же слайды)'
+    )
+    
+    parser.add_argument(
+        '--analysis-width',
+        type=int,
+        default=None,
+        help='Ширина анализа в пикселях (например 320): скорость и пороги не зависят от разрешения видео'
+    )
+    
+    parser.add_argument(
+        '--two-pass',
+        action='store_true',
+        help='Двухпроходное детектирование: частая сетка декодируется только в окнах смены слайдов'
+    )
+    
+    parser.add_argument(
+        '--keyframes',
+        action='store_true',
+        help='Искать смены по ключевым кадрам видео (PyAV или ffprobe): частая сетка - только в GOP со сменой'
+    )
+    
+    parser.add_argument(
+        '--packet-prefilter',
+        action='store_true',
+        help='Искать места смен по всплескам размеров пакетов (ffprobe или PyAV): частая сетка - у всплесков'
+    )
+    
+    parser.add_argument(
+        '--seek-index',
+        action='store_true',
+        help='Индекс ключевых кадров рядом с каждым видео (PyAV или ffprobe): быстрая и надёжная перемотка'
+    )
+    
+    parser.add_argument(
+        '--estimate',
+        action='store_true',
+        help='Только оценить время и пиковую память обработки каждого видео (с --recursive - всего курса), '
+             'оценки пишутся в {видео}.estimate.json'
+    )
+    
     args = parser.parse_args()
     
     # Проверяем существование папки
@@ -299,17 +839,92 @@ def main():
         logger.error(f"Это не папка: {folder_path}")
         sys.exit(1)
     
+    # Те же проверки параметров, что у main.py
+    errors = validate_processing_options(args)
+    if errors:
+        logger.error("Ошибки в параметрах:")
+        for error in errors:
+            logger.error(f"  - {error}")
+        sys.exit(1)
+    
+    # Обрабатываемый отрезок
+    start_time, end_time = resolve_time_range(args)
+    
     # Выбор области анализа (если не указана в аргументах)
     crop_region = args.crop_region
     if crop_region is None:
-        crop_region = choose_crop_region()
+        # Для оценки область не важна - не спрашиваем
+        crop_region = DEFAULT_CROP_REGION if args.estimate else choose_crop_region()
+    
+    if args.estimate:
+        settings = {
+            'sample_rate': args.sample_rate,
+            'crop_region': crop_region,
+            'start_time': start_time,
+            'end_time': end_time,
+            'luma_decode': args.luma_decode,
+            'decoder': args.decoder,
+            'decode_process': args.decode_process,
+            'analysis_width': args.analysis_width
+        }
+        success = estimate_tree(folder_path, settings, recursive=args.recursive)
+        sys.exit(0 if success else 1)
+    
+    if args.recursive or args.watch or args.queue:
+        settings = {
+            'sample_rate': args.sample_rate,
+            'threshold': args.threshold,
+            'crop_region': crop_region,
+            'force': args.force,
+            'start_time': start_time,
+            'end_time': end_time,
+            'memory_budget_mb': args.memory_budget,
+            'time_budget': args.time_budget,
+            'luma_decode': args.luma_decode,
+            'decoder': args.decoder,
+            'decode_process': args.decode_process,
+            'compare_workers': args.compare_workers,
+            'tile_compare': args.tile_compare,
+            'analysis_width': args.analysis_width,
+            'two_pass': args.two_pass,
+            'keyframes': args.keyframes,
+            'packet_prefilter': args.packet_prefilter,
+            'seek_index': args.seek_index
+        }
+        try:
+            if args.watch:
+                # Работает до Ctrl+C
+                watch_tree(folder_path, settings, workers=args.workers, poll_interval=args.poll_interval)
+            elif args.queue:
+                success = process_queue(folder_path, settings, workers=args.workers, queue_dir=args.queue_dir)
+                sys.exit(0 if success else 1)
+            else:
+                success = process_tree(folder_path, settings, workers=args.workers)
+                sys.exit(0 if success else 1)
+        except KeyboardInterrupt:
+            logger.warning("\n\nОбработка прервана пользователем")
+            sys.exit(130)
     
     # Создаём процессор
     processor = FolderProcessor(
         sample_rate=args.sample_rate,
         threshold=args.threshold,
         crop_region=crop_region,
-        force=args.force
+        force=args.force,
+        start_time=start_time,
+        end_time=end_time,
+        memory_budget_mb=args.memory_budget,
+        time_budget=args.time_budget,
+        luma_decode=args.luma_decode,
+        decoder=args.decoder,
+        decode_process=args.decode_process,
+        compare_workers=args.compare_workers,
+        tile_compare=args.tile_compare,
+        analysis_width=args.analysis_width,
+        two_pass=args.two_pass,
+        keyframes=args.keyframes,
+        packet_prefilter=args.packet_prefilter,
+        seek_index=args.seek_index
     )
     
     try:
@@ -0,0 +1,231 @@
+#!/usr/bin/env python3
+"""
+Воспроизводимый бенчмарк VideoProcessor на синтетических видео
+
+Для каждого сценария (разрешение/длительность) и режима обработки измеряет
+скорость (кадров видео в секунду), пиковую память (RSS) и точность
+детектирования (precision/recall относительно известных моментов смены
+слайдов). Каждый прогон выполняется в отдельном процессе, чтобы пиковая
+память не смешивалась между режимами. Пик основного процесса и пик
+дочернего (декодер --decode-process) пишутся отдельно: они достигаются в
+разные моменты, и их сумма завышала бы память.
+
+Примеры:
+    python -m benchmarks.run --output bench_results.json
+    python -m benchmarks.run --quick
+    python -m benchmarks.run --compare old.json new.json
+"""
+
+import argparse
+import json
+import multiprocessing
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from benchmarks.synthetic import SyntheticLectureSpec, get_or_generate, match_detections
+from src.config import PROCESSING_MODES, CROP_REGION_BOTTOM_LEFT, DECODER_FFMPEG, FFMPEG_BINARY
+
+DEFAULT_CACHE_DIR = Path(__file__).resolve().parent / ".cache"
+
+# Сценарии: разные разрешения, одинаковая структура лекции
+SCENARIOS = {
+    "540p": SyntheticLectureSpec(duration=300, width=960, height=540, fps=15),
+    "1080p": SyntheticLectureSpec(duration=240, width=1920, height=1080, fps=10),
+}
+
+QUICK_SCENARIOS = {
+    "quick": SyntheticLectureSpec(duration=150, width=640, height=360, fps=10),
+}
+
+# Режимы бенчмарка: имя -> параметры VideoProcessor
+BENCHMARK_MODES = {name: dict(params) for name, params in PROCESSING_MODES.items()}
+BENCHMARK_MODES["balanced-luma"] = dict(PROCESSING_MODES["balanced"], luma_decode=True)
+BENCHMARK_MODES["balanced-process"] = dict(PROCESSING_MODES["balanced"], decode_process=True)
+BENCHMARK_MODES["balanced-two-phase"] = dict(PROCESSING_MODES["balanced"], compare_workers=4)
+BENCHMARK_MODES["balanced-tiles"] = dict(PROCESSING_MODES["balanced"], tile_compare=True)
+BENCHMARK_MODES["balanced-320"] = dict(PROCESSING_MODES["balanced"], analysis_width=320)
+BENCHMARK_MODES["precise-two-pass"] = dict(PROCESSING_MODES["precise"], two_pass=True)
+BENCHMARK_MODES["precise-keyframes"] = dict(PROCESSING_MODES["precise"], keyframes=True)
+BENCHMARK_MODES["precise-prefilter"] = dict(PROCESSING_MODES["precise"], packet_prefilter=True)
+BENCHMARK_MODES["precise-prefilter-index"] = dict(PROCESSING_MODES["precise"], packet_prefilter=True, seek_index=True)
+if shutil.which(FFMPEG_BINARY):
+    BENCHMARK_MODES["balanced-ffmpeg"] = dict(PROCESSING_MODES["balanced"], decoder=DECODER_FFMPEG)
+
+
+def _peak_rss_mb(who: int) -> float:
+    """
+    Пиковый RSS в МБ
+
+    Args:
+        who: resource.RUSAGE_SELF - текущий процесс, resource.RUSAGE_CHILDREN -
+             самый большой из завершённых дочерних (декодер)
+    """
+    import resource
+    peak = resource.getrusage(who).ru_maxrss
+    # Linux отдаёт килобайты, macOS - байты
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def _run_mode(video_path: str, mode_params: dict, crop_region: str) -> dict:
+    """Один прогон VideoProcessor (выполняется в отдельном процессе)"""
+    import logging
+    import resource
+    logging.disable(logging.INFO)
+
+    from src.video_processor import VideoProcessor
+
+    with tempfile.TemporaryDirectory() as slides_dir:
+        started = time.perf_counter()
+        with VideoProcessor(video_path, crop_region=crop_region, **mode_params) as processor:
+            slides = processor.process(slides_dir)
+        elapsed = time.perf_counter() - started
+
+    return {
+        'elapsed': elapsed,
+        'total_frames': processor.total_frames,
+        'slides': [timestamp for _, timestamp in slides],
+        'peak_rss_mb': _peak_rss_mb(resource.RUSAGE_SELF),
+        'child_peak_rss_mb': _peak_rss_mb(resource.RUSAGE_CHILDREN)
+    }
+
+
+def run_benchmarks(scenarios: Dict[str, SyntheticLectureSpec], modes: Dict[str, dict],
+                   cache_dir: str, crop_region: str = CROP_REGION_BOTTOM_LEFT) -> dict:
+    """
+    Прогоняет все режимы на всех сценариях
+
+    Returns:
+        Словарь результатов (сохраняется в JSON)
+    """
+    context = multiprocessing.get_context('spawn')
+    results = []
+
+    for scenario_name, spec in scenarios.items():
+        print(f"Сценарий {scenario_name}: {spec}")
+        video_path, truth = get_or_generate(spec, cache_dir)
+        expected = truth['change_times']
+
+        for mode_name, params in modes.items():
+            # Свежий процесс на каждый режим (чистый пиковый RSS); не Pool - его процессы
+            # демонические и не могут запустить декодер в отдельном процессе
+            with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+                run = executor.submit(_run_mode, video_path, params, crop_region).result()
+
+            # Детектор видит смену на ближайшем следующем анализируемом кадре
+            tolerance = params.get('sample_rate', 1.0) + 1.0 / spec.fps
+            accuracy = match_detections(run['slides'], expected, tolerance)
+            entry = {
+                'scenario': scenario_name,
+                'mode': mode_name,
+                'params': params,
+                'spec': spec.to_dict(),
+                'elapsed_s': round(run['elapsed'], 3),
+                'frames_per_s': round(run['total_frames'] / run['elapsed'], 1),
+                'realtime_factor': round(spec.duration / run['elapsed'], 1),
+                'peak_rss_mb': round(run['peak_rss_mb'], 1),
+                'child_peak_rss_mb': round(run['child_peak_rss_mb'], 1),
+                'precision': round(accuracy['precision'], 4),
+                'recall': round(accuracy['recall'], 4),
+                'detected': len(run['slides']),
+                'expected': len(expected),
+                'missed': accuracy['missed'],
+                'false': accuracy['false']
+            }
+            results.append(entry)
+            child = f" (+декодер {entry['child_peak_rss_mb']} МБ)" if entry['child_peak_rss_mb'] else ""
+            print(f"  {mode_name:<16} {entry['frames_per_s']:>8} кадр/с  x{entry['realtime_factor']:<6} "
+                  f"RSS {entry['peak_rss_mb']:>7} МБ{child}  P={entry['precision']:.2f} R={entry['recall']:.2f}")
+
+    return {
+        'commit': _git_commit(),
+        'created_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'platform': {
+            'system': platform.system(),
+            'machine': platform.machine(),
+            'python': platform.python_version(),
+            'opencv': _opencv_version()
+        },
+        'results': results
+    }
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              cwd=Path(__file__).resolve().parent, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def _opencv_version() -> str:
+    import cv2
+    return cv2.__version__
+
+
+def compare_results(old_path: str, new_path: str):
+    """Печатает сравнение двух файлов результатов"""
+    with open(old_path, 'r', encoding='utf-8') as f:
+        old = json.load(f)
+    with open(new_path, 'r', encoding='utf-8') as f:
+        new = json.load(f)
+
+    old_index = {(r['scenario'], r['mode']): r for r in old['results']}
+    print(f"{old.get('commit')} -> {new.get('commit')}")
+    print(f"{'сценарий/режим':<22} {'кадр/с':>16} {'RSS, МБ':>18} {'precision':>14} {'recall':>14}")
+    for entry in new['results']:
+        before = old_index.get((entry['scenario'], entry['mode']))
+        if before is None:
+            continue
+        name = f"{entry['scenario']}/{entry['mode']}"
+        speedup = entry['frames_per_s'] / before['frames_per_s'] if before['frames_per_s'] else 0
+        print(f"{name:<22} {before['frames_per_s']:>7}->{entry['frames_per_s']:<7}x{speedup:<4.2f}"
+              f"{before['peak_rss_mb']:>8}->{entry['peak_rss_mb']:<8}"
+              f"{before['precision']:>6.2f}->{entry['precision']:<6.2f}"
+              f"{before['recall']:>6.2f}->{entry['recall']:<6.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Бенчмарк Lecture Slides Extractor на синтетических видео')
+    parser.add_argument('--output', default='bench_results.json', help='Файл результатов JSON')
+    parser.add_argument('--cache-dir', default=str(DEFAULT_CACHE_DIR), help='Папка для сгенерированных видео')
+    parser.add_argument('--quick', action='store_true', help='Один короткий сценарий низкого разрешения')
+    parser.add_argument('--modes', nargs='+', choices=sorted(BENCHMARK_MODES), default=None,
+                        help='Режимы для прогона (по умолчанию: все)')
+    parser.add_argument('--duration', type=float, default=None, help='Свой сценарий: длительность, с')
+    parser.add_argument('--width', type=int, default=1280, help='Свой сценарий: ширина кадра')
+    parser.add_argument('--height', type=int, default=720, help='Свой сценарий: высота кадра')
+    parser.add_argument('--fps', type=float, default=25.0, help='Свой сценарий: частота кадров')
+    parser.add_argument('--compare', nargs=2, metavar=('OLD', 'NEW'), help='Сравнить два файла результатов')
+    args = parser.parse_args()
+
+    if args.compare:
+        compare_results(*args.compare)
+        return
+
+    if args.duration is not None:
+        scenarios = {"custom": SyntheticLectureSpec(duration=args.duration, width=args.width,
+                                                    height=args.height, fps=args.fps)}
+    elif args.quick:
+        scenarios = QUICK_SCENARIOS
+    else:
+        scenarios = SCENARIOS
+
+    modes = {name: BENCHMARK_MODES[name] for name in (args.modes or BENCHMARK_MODES)}
+    report = run_benchmarks(scenarios, modes, args.cache_dir)
+
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"✓ Результаты сохранены: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,224 @@
+"""
+Генератор синтетических видео лекций с известными моментами смены слайдов
+
+Видео содержит отрисованные слайды (заголовок, пункты, номер страницы в
+левом нижнем углу), движущегося "лектора" справа внизу и шум сжатия.
+Рядом с видео сохраняется JSON с эталонными моментами смены слайдов.
+"""
+
+import hashlib
+import json
+from pathlib import Path
+from typing import List, Optional
+
+import cv2
+import numpy as np
+
+
+class SyntheticLectureSpec:
+    """Параметры синтетического видео"""
+
+    def __init__(
+        self,
+        duration: float = 300.0,
+        width: int = 960,
+        height: int = 540,
+        fps: float = 15.0,
+        min_slide_duration: float = 35.0,
+        max_slide_duration: float = 90.0,
+        noise: float = 3.0,
+        seed: int = 0
+    ):
+        """
+        Args:
+            duration: Длительность в секундах
+            width: Ширина кадра
+            height: Высота кадра
+            fps: Частота кадров
+            min_slide_duration: Минимальная длительность слайда (больше MIN_SLIDE_DURATION детектора)
+            max_slide_duration: Максимальная длительность слайда
+            noise: СКО гауссова шума, добавляемого к каждому кадру (имитация шума сжатия)
+            seed: Зерно генератора случайных чисел
+        """
+        self.duration = duration
+        self.width = width
+        self.height = height
+        self.fps = fps
+        self.min_slide_duration = min_slide_duration
+        self.max_slide_duration = max_slide_duration
+        self.noise = noise
+        self.seed = seed
+
+    def to_dict(self) -> dict:
+        return dict(self.__dict__)
+
+    @property
+    def key(self) -> str:
+        """Ключ для кеша сгенерированных видео"""
+        payload = json.dumps(self.to_dict(), sort_keys=True).encode('utf-8')
+        return hashlib.sha1(payload).hexdigest()[:12]
+
+    def __repr__(self):
+        return f"SyntheticLectureSpec({self.width}x{self.height}, {self.duration:.0f}s, {self.fps}fps)"
+
+
+def change_times(spec: SyntheticLectureSpec) -> List[float]:
+    """Моменты появления слайдов (первый - 0), кратные кадру"""
+    rng = np.random.default_rng(spec.seed)
+    times = [0.0]
+    while True:
+        next_time = times[-1] + rng.uniform(spec.min_slide_duration, spec.max_slide_duration)
+        next_time = round(next_time * spec.fps) / spec.fps
+        if next_time >= spec.duration - spec.min_slide_duration:
+            return times
+        times.append(next_time)
+
+
+def render_slide(spec: SyntheticLectureSpec, index: int) -> np.ndarray:
+    """Рисует слайд: фон, заголовок, пункты, номер страницы в левом нижнем углу"""
+    rng = np.random.default_rng(spec.seed * 1000 + index)
+    w, h = spec.width, spec.height
+    scale = h / 540
+
+    background = tuple(int(c) for c in rng.integers(170, 250, 3))
+    slide = np.full((h, w, 3), background, dtype=np.uint8)
+    ink = tuple(int(c) for c in rng.integers(0, 90, 3))
+
+    cv2.putText(slide, f"Topic {index + 1}: synthetic lecture", (int(40 * scale), int(70 * scale)),
+                cv2.FONT_HERSHEY_SIMPLEX, 1.4 * scale, ink, max(1, int(3 * scale)), cv2.LINE_AA)
+
+    y = int(140 * scale)
+    while y < h - 60 * scale:
+        words = rng.integers(2, 6)
+        text = " ".join(f"item{rng.integers(10, 999)}" for _ in range(words))
+        cv2.circle(slide, (int(60 * scale), y - int(8 * scale)), max(2, int(6 * scale)), ink, -1)
+        cv2.putText(slide, text, (int(80 * scale), y), cv2.FONT_HERSHEY_SIMPLEX,
+                    0.9 * scale, ink, max(1, int(2 * scale)), cv2.LINE_AA)
+        y += int(rng.integers(45, 70) * scale)
+
+    # Диаграмма на части слайдов
+    if index % 2 == 1:
+        x0, y0 = int(w * 0.08), int(h * 0.72)
+        for bar in range(5):
+            bar_h = int(rng.integers(20, 110) * scale)
+            color = tuple(int(c) for c in rng.integers(0, 255, 3))
+            cv2.rectangle(slide, (x0 + bar * int(45 * scale), y0 - bar_h),
+                          (x0 + bar * int(45 * scale) + int(30 * scale), y0), color, -1)
+
+    cv2.putText(slide, f"{index + 1}", (int(30 * scale), h - int(25 * scale)),
+                cv2.FONT_HERSHEY_SIMPLEX, 1.0 * scale, ink, max(1, int(2 * scale)), cv2.LINE_AA)
+    return slide
+
+
+def _draw_lecturer(frame: np.ndarray, t: float):
+    """Движущийся "лектор" в правом нижнем углу"""
+    h, w = frame.shape[:2]
+    cx = int(w * (0.82 + 0.06 * np.sin(t * 0.7)))
+    cy = int(h * (0.78 + 0.03 * np.sin(t * 1.3)))
+    axes = (int(w * 0.07), int(h * 0.2))
+    cv2.ellipse(frame, (cx, cy), axes, 0, 0, 360, (70, 90, 140), -1)
+    cv2.circle(frame, (cx, cy - axes[1] - int(h * 0.04)), int(h * 0.06), (120, 150, 200), -1)
+
+
+def generate_lecture_video(spec: SyntheticLectureSpec, output_path: str) -> dict:
+    """
+    Генерирует видео и файл с эталоном (<видео>.json)
+
+    Args:
+        spec: Параметры видео
+        output_path: Путь к выходному .mp4
+
+    Returns:
+        Эталон: {'spec': ..., 'change_times': [...], 'total_frames': N}
+    """
+    output_path = Path(output_path)
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+
+    times = change_times(spec)
+    slides = [render_slide(spec, index) for index in range(len(times))]
+    rng = np.random.default_rng(spec.seed + 1)
+
+    writer = cv2.VideoWriter(str(output_path), cv2.VideoWriter_fourcc(*'mp4v'), spec.fps,
+                             (spec.width, spec.height))
+    if not writer.isOpened():
+        raise RuntimeError(f"Не удалось создать видео: {output_path}")
+
+    total_frames = int(round(spec.duration * spec.fps))
+    noise = np.empty((spec.height, spec.width, 3), dtype=np.int16)
+    slide_index = 0
+    try:
+        for frame_number in range(total_frames):
+            t = frame_number / spec.fps
+            while slide_index + 1 < len(times) and t >= times[slide_index + 1]:
+                slide_index += 1
+
+            frame = slides[slide_index].copy()
+            _draw_lecturer(frame, t)
+            if spec.noise > 0:
+                noise[...] = rng.normal(0, spec.noise, noise.shape)
+                frame = np.clip(frame.astype(np.int16) + noise, 0, 255).astype(np.uint8)
+            writer.write(frame)
+    finally:
+        writer.release()
+
+    truth = {'spec': spec.to_dict(), 'change_times': times, 'total_frames': total_frames}
+    with open(output_path.with_suffix('.json'), 'w', encoding='utf-8') as f:
+        json.dump(truth, f, indent=2)
+    return truth
+
+
+def get_or_generate(spec: SyntheticLectureSpec, cache_dir: str) -> tuple:
+    """
+    Возвращает (путь_к_видео, эталон), генерируя видео только если его нет в кеше
+
+    Args:
+        spec: Параметры видео
+        cache_dir: Папка кеша
+    """
+    video_path = Path(cache_dir) / f"lecture_{spec.key}.mp4"
+    truth_path = video_path.with_suffix('.json')
+    if video_path.exists() and truth_path.exists():
+        with open(truth_path, 'r', encoding='utf-8') as f:
+            return str(video_path), json.load(f)
+    return str(video_path), generate_lecture_video(spec, str(video_path))
+
+
+def match_detections(
+    detected: List[float],
+    expected: List[float],
+    tolerance: float
+) -> dict:
+    """
+    Сопоставляет найденные моменты смены слайдов с эталоном (жадно, в пределах допуска)
+
+    Args:
+        detected: Время найденных слайдов
+        expected: Эталонное время смены слайдов
+        tolerance: Допустимое отставание найденного слайда от эталона (секунды)
+
+    Returns:
+        {'true_positives', 'precision', 'recall', 'missed', 'false'}
+    """
+    unmatched = list(expected)
+    true_positives = 0
+    false_detections = []
+    for time in sorted(detected):
+        match: Optional[float] = None
+        for candidate in unmatched:
+            # Детектор видит смену не раньше эталона и не позже чем через tolerance
+            if -1e-6 <= time - candidate <= tolerance:
+                match = candidate
+                break
+        if match is None:
+            false_detections.append(time)
+        else:
+            unmatched.remove(match)
+            true_positives += 1
+
+    return {
+        'true_positives': true_positives,
+        'precision': true_positives / len(detected) if detected else 0.0,
+        'recall': true_positives / len(expected) if expected else 0.0,
+        'missed': unmatched,
+        'false': false_detections
+    }
@@ -1,163 +1,152 @@
 #!/usr/bin/env python3
 """
-Тестовый скрипт для отладки проблемы с одинаковыми слайдами 6, 7, 8
+Отладка ошибок детектирования: сходство обрезок вокруг подозрительного момента
+
+    # Сходство соседних моментов вокруг 12:34 (шаг 0.5s, ±5s)
+    python debug_slides.py lecture.mp4 --at 12:34
+
+    # Попарное сравнение моментов (полные кадры и обрезки, карты различий в debug_crops/)
+    python debug_slides.py lecture.mp4 --compare 5:10 6:02 7:30
+
+    # Интерактивно: вводите время, кадры берутся из кэша FrameServer
+    python debug_slides.py lecture.mp4 -i
 """
 
-import cv2
-import numpy as np
+import argparse
 from pathlib import Path
-from skimage.metrics import structural_similarity as ssim
 import sys
 
+import cv2
+import numpy as np
+
 # Добавляем src в путь
 sys.path.insert(0, str(Path(__file__).parent / 'src'))
 
+from src.config import (CROP_REGION_BOTTOM_LEFT, CROP_REGION_BOTTOM_RIGHT, CROP_REGION_CENTER,
+                        CROP_REGION_TOP_LEFT, CROP_REGION_TOP_RIGHT, DEFAULT_CROP_REGION,
+                        DEFAULT_THRESHOLD, FRAME_CACHE_MB)
+from src.frame_server import FrameServer
+from src.main import parse_time_arg
+from src.transcript_parser import TranscriptParser
 from src.video_processor import VideoProcessor
 
-def crop_bottom_left(frame, ratio=0.30):
-    """Обрезка левого нижнего угла (как в VideoProcessor)"""
-    height, width = frame.shape[:2]
-    crop_width = int(width * ratio)
-    crop_height = int(height * ratio)
-    x_start = 0
-    y_start = height - crop_height
-    return frame[y_start:y_start+crop_height, x_start:x_start+crop_width]
-
-def compare_frames_ssim(frame1, frame2):
-    """Сравнение кадров через SSIM"""
-    gray1 = cv2.cvtColor(frame1, cv2.COLOR_BGR2GRAY)
-    gray2 = cv2.cvtColor(frame2, cv2.COLOR_BGR2GRAY)
-    
-    if gray1.shape != gray2.shape:
-        gray2 = cv2.resize(gray2, (gray1.shape[1], gray1.shape[0]))
-    
-    similarity, _ = ssim(gray1, gray2, full=True)
-    return similarity
-
-def test_slides_6_7_8():
-    """Тест слайдов 6, 7, 8"""
-    
-    slides_dir = Path("materials/1_1 decomposing /2.1 Понимание бизнес-задачи_slides")
-    
-    # Загружаем слайды
-    slide6 = cv2.imread(str(slides_dir / "slide_006.png"))
-    slide7 = cv2.imread(str(slides_dir / "slide_007.png"))
-    slide8 = cv2.imread(str(slides_dir / "slide_008.png"))
-    
-    if slide6 is None or slide7 is None or slide8 is None:
-        print("❌ Ошибка: не удалось загрузить слайды")
+
+def print_profile(server: FrameServer, timestamp: float, radius: float, step: float, threshold: float):
+    """Сходство каждого момента с предыдущим; провал ниже порога - смена слайда"""
+    print(f"\nСходство обрезок вокруг {TranscriptParser.format_timestamp(timestamp)} "
+          f"(шаг {step}s, порог {threshold})")
+    for current, similarity in server.profile(timestamp, radius, step):
+        if similarity is None:
+            continue
+        bar = '#' * int(round(similarity * 40))
+        mark = "  <- смена слайда" if similarity < threshold else ""
+        print(f"  {current:9.2f}s  {similarity:.4f}  {bar}{mark}")
+    cache = server.cache
+    print(f"  кэш: {len(cache)} записей, {cache.nbytes / 1024 / 1024:.1f} МБ, "
+          f"попаданий {cache.hits}, промахов {cache.misses}")
+
+
+def compare_moments(server: FrameServer, timestamps: list, threshold: float, debug_dir: Path):
+    """Попарное сравнение моментов: полные кадры, обрезки, различия пикселей"""
+    frames = {t: server.frame_at(t) for t in timestamps}
+    missing = [t for t, frame in frames.items() if frame is None]
+    if missing:
+        print(f"❌ Ошибка: нет кадров на {', '.join(f'{t:.2f}s' for t in missing)}")
         return
-    
-    print("=" * 80)
-    print("ТЕСТ 1: Сравнение ПОЛНЫХ слайдов")
-    print("=" * 80)
-    
-    # Сравнение полных слайдов
-    sim_6_7_full = compare_frames_ssim(slide6, slide7)
-    sim_7_8_full = compare_frames_ssim(slide7, slide8)
-    sim_6_8_full = compare_frames_ssim(slide6, slide8)
-    
-    print(f"SSIM (6 vs 7, полные): {sim_6_7_full:.6f}")
-    print(f"SSIM (7 vs 8, полные): {sim_7_8_full:.6f}")
-    print(f"SSIM (6 vs 8, полные): {sim_6_8_full:.6f}")
-    
-    print("\n" + "=" * 80)
-    print("ТЕСТ 2: Сравнение ОБРЕЗАННЫХ областей (левый нижний угол 30%)")
-    print("=" * 80)
-    
-    # Обрезка левого нижнего угла
-    crop6 = crop_bottom_left(slide6)
-    crop7 = crop_bottom_left(slide7)
-    crop8 = crop_bottom_left(slide8)
-    
-    print(f"Размер обрезки slide6: {crop6.shape}")
-    print(f"Размер обрезки slide7: {crop7.shape}")
-    print(f"Размер обрезки slide8: {crop8.shape}")
-    
-    # Сравнение обрезанных областей
-    sim_6_7_crop = compare_frames_ssim(crop6, crop7)
-    sim_7_8_crop = compare_frames_ssim(crop7, crop8)
-    sim_6_8_crop = compare_frames_ssim(crop6, crop8)
-    
-    print(f"\nSSIM (6 vs 7, обрезка): {sim_6_7_crop:.6f}")
-    print(f"SSIM (7 vs 8, обрезка): {sim_7_8_crop:.6f}")
-    print(f"SSIM (6 vs 8, обрезка): {sim_6_8_crop:.6f}")
-    
-    # Сохраняем обрезанные области для визуального сравнения
-    debug_dir = Path("debug_crops")
+
     debug_dir.mkdir(exist_ok=True)
-    cv2.imwrite(str(debug_dir / "crop_006.png"), crop6)
-    cv2.imwrite(str(debug_dir / "crop_007.png"), crop7)
-    cv2.imwrite(str(debug_dir / "crop_008.png"), crop8)
-    print(f"\n✓ Обрезанные области сохранены в {debug_dir}/")
-    
-    print("\n" + "=" * 80)
-    print("ТЕСТ 3: Проверка различий в обрезанных областях")
+    pairs = list(zip(timestamps, timestamps[1:]))
+
     print("=" * 80)
-    
-    # Вычисляем разницу
-    diff_6_7 = cv2.absdiff(crop6, crop7)
-    diff_7_8 = cv2.absdiff(crop7, crop8)
-    
-    # Подсчитываем количество разных пикселей
-    diff_pixels_6_7 = np.count_nonzero(diff_6_7)
-    diff_pixels_7_8 = np.count_nonzero(diff_7_8)
-    total_pixels = crop6.shape[0] * crop6.shape[1] * crop6.shape[2]
-    
-    print(f"Разных пикселей (6 vs 7): {diff_pixels_6_7} из {total_pixels} ({100*diff_pixels_6_7/total_pixels:.2f}%)")
-    print(f"Разных пикселей (7 vs 8): {diff_pixels_7_8} из {total_pixels} ({100*diff_pixels_7_8/total_pixels:.2f}%)")
-    
-    # Сохраняем разницу
-    cv2.imwrite(str(debug_dir / "diff_6_7.png"), diff_6_7)
-    cv2.imwrite(str(debug_dir / "diff_7_8.png"), diff_7_8)
-    print(f"✓ Карты различий сохранены в {debug_dir}/")
-    
-    print("\n" + "=" * 80)
-    print("ТЕСТ 4: Проверка через VideoProcessor")
+    print("Сравнение ПОЛНЫХ кадров (SSIM без размытия)")
     print("=" * 80)
-    
-    video_path = "materials/1_1 decomposing /2.1 Понимание бизнес-задачи.mp4"
-    if not Path(video_path).exists():
-        print(f"⚠ Видео не найдено: {video_path}")
-        return
-    
-    processor = VideoProcessor(
-        video_path=video_path,
-        sample_rate=2.0,
-        threshold=0.92,
-        crop_ratio=0.30
-    )
-    
-    # Обрезаем через VideoProcessor
-    crop6_proc = processor.crop_center_region(slide6)
-    crop7_proc = processor.crop_center_region(slide7)
-    crop8_proc = processor.crop_center_region(slide8)
-    
-    sim_6_7_proc = processor.compare_frames(crop6_proc, crop7_proc)
-    sim_7_8_proc = processor.compare_frames(crop7_proc, crop8_proc)
-    
-    print(f"SSIM через VideoProcessor (6 vs 7): {sim_6_7_proc:.6f}")
-    print(f"SSIM через VideoProcessor (7 vs 8): {sim_7_8_proc:.6f}")
-    
-    processor.cap.release()
-    
+    for first, second in pairs:
+        similarity = VideoProcessor.structural_similarity(cv2.cvtColor(frames[first], cv2.COLOR_BGR2GRAY),
+                                                          cv2.cvtColor(frames[second], cv2.COLOR_BGR2GRAY))
+        print(f"SSIM ({first:.2f}s vs {second:.2f}s, полные): {similarity:.6f}")
+
     print("\n" + "=" * 80)
-    print("ВЫВОДЫ")
+    print(f"Сравнение ОБРЕЗОК ({server.crop_region}) - как в детекторе")
     print("=" * 80)
-    
-    threshold = 0.92
-    if sim_6_7_crop >= threshold and sim_7_8_crop >= threshold:
-        print("✅ Обрезанные области ОДИНАКОВЫЕ (SSIM >= 0.92)")
-        print("   Проблема в логике обновления prev_frame_cropped!")
-    elif sim_6_7_crop < threshold or sim_7_8_crop < threshold:
-        print("❌ Обрезанные области РАЗНЫЕ (SSIM < 0.92)")
-        print("   Возможные причины:")
-        print("   1. В левом нижнем углу есть различия (анимация, тень, шум)")
-        print("   2. Проблема с обрезкой (разные координаты)")
-        print("   3. Проблема с SSIM (неправильное сравнение)")
-    
+    for timestamp in timestamps:
+        cropped = server.crop_at(timestamp)
+        cv2.imwrite(str(debug_dir / f"crop_{timestamp:.2f}.png"), cropped)
+        print(f"Размер обрезки {timestamp:.2f}s: {cropped.shape}")
+    for first, second in pairs:
+        similarity = server.similarity(first, second)
+        verdict = "тот же слайд" if similarity >= threshold else "смена слайда"
+        print(f"Сходство ({first:.2f}s vs {second:.2f}s, обрезка): {similarity:.6f} - {verdict}")
+
     print("\n" + "=" * 80)
+    print("Различия в обрезках")
+    print("=" * 80)
+    for first, second in pairs:
+        diff = cv2.absdiff(server.crop_at(first), server.crop_at(second))
+        changed = np.count_nonzero(diff)
+        print(f"Разных значений ({first:.2f}s vs {second:.2f}s): {changed} из {diff.size} "
+              f"({100 * changed / diff.size:.2f}%)")
+        cv2.imwrite(str(debug_dir / f"diff_{first:.2f}_{second:.2f}.png"), diff)
+    print(f"✓ Обрезки и карты различий сохранены в {debug_dir}/")
 
-if __name__ == "__main__":
-    test_slides_6_7_8()
 
+def interactive(server: FrameServer, radius: float, step: float, threshold: float, debug_dir: Path):
+    """Цикл ввода: одно время - профиль сходства вокруг, несколько - попарное сравнение"""
+    print(f"Видео {server.video_path}: {TranscriptParser.format_timestamp(server.duration)}, {server.fps:.2f} fps")
+    print("Введите время (секунды, MM:SS или H:MM:SS) или несколько через пробел; пустая строка - выход")
+    while True:
+        try:
+            line = input("> ").strip()
+        except (EOFError, KeyboardInterrupt):
+            print()
+            return
+        if not line:
+            return
+        try:
+            timestamps = [parse_time_arg(value) for value in line.split()]
+        except argparse.ArgumentTypeError as e:
+            print(f"⚠ {e}")
+            continue
+        if len(timestamps) == 1:
+            print_profile(server, timestamps[0], radius, step, threshold)
+        else:
+            compare_moments(server, timestamps, threshold, debug_dir)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Отладка детектирования смен слайдов в видео')
+    parser.add_argument('video', help='Путь к видео')
+    parser.add_argument('--at', type=parse_time_arg, help='Профиль сходства вокруг момента')
+    parser.add_argument('--compare', type=parse_time_arg, nargs='+', metavar='TIME',
+                        help='Попарно сравнить моменты (например слайды, которые не должны совпадать)')
+    parser.add_argument('-i', '--interactive', action='store_true', help='Вводить моменты интерактивно')
+    parser.add_argument('--radius', type=float, default=5.0, help='Секунд в каждую сторону от --at (по умолчанию: 5)')
+    parser.add_argument('--step', type=float, default=0.5, help='Шаг профиля в секундах (по умолчанию: 0.5)')
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help=f'Порог сходства (по умолчанию: {DEFAULT_THRESHOLD})')
+    parser.add_argument('--crop-region', default=DEFAULT_CROP_REGION,
+                        choices=[CROP_REGION_BOTTOM_LEFT, CROP_REGION_BOTTOM_RIGHT,
+                                 CROP_REGION_TOP_RIGHT, CROP_REGION_TOP_LEFT, CROP_REGION_CENTER],
+                        help=f'Область анализа (по умолчанию: {DEFAULT_CROP_REGION})')
+    parser.add_argument('--analysis-width', type=int, default=None, help='Ширина анализа, как у обработки')
+    parser.add_argument('--seek-index', action='store_true',
+                        help='Построить индекс перемотки рядом с видео, если его нет (готовый читается всегда)')
+    parser.add_argument('--cache-mb', type=float, default=FRAME_CACHE_MB,
+                        help=f'Бюджет кэша кадров в МБ (по умолчанию: {FRAME_CACHE_MB})')
+    parser.add_argument('--save', type=Path, default=Path("debug_crops"),
+                        help='Куда сохранять обрезки и карты различий (по умолчанию: debug_crops)')
+    args = parser.parse_args()
+    if args.at is None and not args.compare and not args.interactive:
+        parser.error("нужен --at, --compare или --interactive")
+
+    with FrameServer(args.video, crop_region=args.crop_region, analysis_width=args.analysis_width,
+                     cache_mb=args.cache_mb, seek_index=args.seek_index) as server:
+        if args.at is not None:
+            print_profile(server, args.at, args.radius, args.step, args.threshold)
+        if args.compare:
+            compare_moments(server, args.compare, args.threshold, args.save)
+        if args.interactive:
+            interactive(server, args.radius, args.step, args.threshold, args.save)
+
+
+if __name__ == "__main__":
+    main()
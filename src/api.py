@@ -0,0 +1,287 @@
+"""
+Программный интерфейс: извлечение слайдов и текста лекции внутри процесса
+
+Для сервисов, которые обрабатывают много лекций и не хотят запускать
+main.py отдельным процессом на каждое видео.
+
+Пример:
+    from src.api import ExtractionOptions, extract_lecture
+
+    result = extract_lecture(
+        "lecture.mp4", "lecture.txt",
+        ExtractionOptions(slides_dir="out/slides", output_path="out/lecture.md"),
+        on_slide=lambda slide: print(slide.index, slide.timestamp)
+    )
+    for slide in result.slides:
+        print(slide.path, slide.text[:80])
+"""
+
+import threading
+from pathlib import Path
+from typing import Callable, List, Optional, Union
+import logging
+
+from .config import (DEFAULT_SAMPLE_RATE, DEFAULT_THRESHOLD, DEFAULT_CROP_REGION, DEFAULT_DECODER,
+                     DEFAULT_COMPARE_WORKERS, DEFAULT_ANALYSIS_WIDTH)
+from .markdown_generator import MarkdownGenerator
+from .metrics import RunMetrics
+from .options import validate_options
+from .transcript_parser import TranscriptParser
+from .video_processor import ExtractionCancelled, VideoProcessor
+
+logger = logging.getLogger(__name__)
+
+__all__ = [
+    'ExtractionCancelled',
+    'ExtractionOptions',
+    'ExtractedSlide',
+    'LectureResult',
+    'extract_lecture',
+]
+
+
+class ExtractionOptions:
+    """Параметры извлечения (те же, что у командной строки)"""
+
+    def __init__(
+        self,
+        sample_rate: float = DEFAULT_SAMPLE_RATE,
+        threshold: float = DEFAULT_THRESHOLD,
+        crop_region: str = DEFAULT_CROP_REGION,
+        start_time: float = 0.0,
+        end_time: Optional[float] = None,
+        slides_dir: Optional[str] = None,
+        output_path: Optional[str] = None,
+        title: str = "Лекция",
+        track_memory: bool = False,
+        memory_budget_mb: Optional[float] = None,
+        time_budget: Optional[float] = None,
+        luma_decode: bool = False,
+        decoder: str = DEFAULT_DECODER,
+        decode_process: bool = False,
+        compare_workers: int = DEFAULT_COMPARE_WORKERS,
+        tile_compare: bool = False,
+        analysis_width: Optional[int] = DEFAULT_ANALYSIS_WIDTH,
+        two_pass: bool = False,
+        keyframes: bool = False,
+        packet_prefilter: bool = False,
+        seek_index: bool = False
+    ):
+        """
+        Args:
+            sample_rate: Частота анализа кадров в секундах
+            threshold: Порог сходства для детектирования смены слайдов (0.5-1)
+            crop_region: Область анализа (bottom_left, bottom_right, top_right, top_left, center)
+            start_time: Начало обрабатываемого отрезка в секундах
+            end_time: Конец отрезка в секундах (None - до конца видео)
+            slides_dir: Папка для слайдов (None - {видео}_slides рядом с видео)
+            output_path: Путь к Markdown документу (None - документ не пишется)
+            title: Заголовок Markdown документа
+            track_memory: Записывать память по этапам в метрики
+            memory_budget_mb: Бюджет памяти в МБ (предупреждение в лог при приближении)
+            time_budget: Бюджет времени на обработку в секундах (None - без ограничения)
+            luma_decode: Анализировать яркость (Y) кадра без преобразования в BGR
+            decoder: Декодер кадров ('opencv' или 'ffmpeg')
+            decode_process: Декодировать в отдельном процессе (кадры - через разделяемую память)
+            compare_workers: Потоков для сравнения кадров (больше 1 - двухфазный детектор, те же слайды)
+            tile_compare: Сравнивать по сетке плиток с ранним выходом (те же слайды)
+            analysis_width: Ширина анализа: обрезка уменьшается до неё перед сравнением (None - исходная)
+            two_pass: Двухпроходное детектирование (частая сетка - только в окнах смены слайдов)
+            keyframes: Искать смены по ключевым кадрам (частая сетка - только в GOP со сменой)
+            packet_prefilter: Искать места смен по всплескам размеров пакетов (частая сетка - у всплесков)
+            seek_index: Индекс ключевых кадров рядом с видео для перемотки ({видео}.seekindex.json)
+        """
+        self.sample_rate = sample_rate
+        self.threshold = threshold
+        self.crop_region = crop_region
+        self.start_time = start_time
+        self.end_time = end_time
+        self.slides_dir = slides_dir
+        self.output_path = output_path
+        self.title = title
+        self.track_memory = track_memory
+        self.memory_budget_mb = memory_budget_mb
+        self.time_budget = time_budget
+        self.luma_decode = luma_decode
+        self.decoder = decoder
+        self.decode_process = decode_process
+        self.compare_workers = compare_workers
+        self.tile_compare = tile_compare
+        self.analysis_width = analysis_width
+        self.two_pass = two_pass
+        self.keyframes = keyframes
+        self.packet_prefilter = packet_prefilter
+        self.seek_index = seek_index
+
+    def validate(self):
+        """
+        Проверяет параметры (те же правила, что у командной строки, см. options.py)
+
+        Raises:
+            ValueError: Если параметры вне допустимых диапазонов
+        """
+        errors = validate_options(self.to_dict())
+        if errors:
+            raise ValueError("; ".join(errors))
+
+    def to_dict(self) -> dict:
+        return dict(self.__dict__)
+
+
+class ExtractedSlide:
+    """Слайд в результате извлечения"""
+
+    def __init__(self, index: int, path: str, timestamp: float, frame_number: int, text: str = ""):
+        self.index = index                # Номер слайда (с 1)
+        self.path = path                  # Путь к PNG
+        self.timestamp = timestamp        # Время появления в секундах (абсолютное)
+        self.frame_number = frame_number  # Номер кадра в видео
+        self.text = text                  # Текст транскрипта для слайда
+
+    def to_dict(self) -> dict:
+        return dict(self.__dict__)
+
+    def __repr__(self):
+        return f"ExtractedSlide(#{self.index}, time={self.timestamp:.2f}s, {Path(self.path).name})"
+
+
+class LectureResult:
+    """Результат extract_lecture"""
+
+    def __init__(
+        self,
+        video_path: str,
+        slides: List[ExtractedSlide],
+        slides_dir: str,
+        markdown_path: Optional[str],
+        transcript_segments: int,
+        metrics: dict
+    ):
+        self.video_path = video_path
+        self.slides = slides
+        self.slides_dir = slides_dir
+        self.markdown_path = markdown_path            # None - документ не писался
+        self.transcript_segments = transcript_segments
+        self.metrics = metrics                        # Отчёт RunMetrics.to_dict()
+
+    def to_dict(self) -> dict:
+        return {
+            'video_path': self.video_path,
+            'slides': [slide.to_dict() for slide in self.slides],
+            'slides_dir': self.slides_dir,
+            'markdown_path': self.markdown_path,
+            'transcript_segments': self.transcript_segments,
+            'metrics': self.metrics
+        }
+
+
+def extract_lecture(
+    video_path: str,
+    transcript_path: Optional[str] = None,
+    options: Union[ExtractionOptions, dict, None] = None,
+    on_slide: Optional[Callable[[ExtractedSlide], None]] = None,
+    on_progress: Optional[Callable[[float, float], None]] = None,
+    cancel_event: Optional[threading.Event] = None
+) -> LectureResult:
+    """
+    Извлекает слайды из видео и распределяет между ними текст транскрипта
+
+    Видео освобождается сразу после обработки (в том числе при ошибке или отмене),
+    поэтому функцию можно вызывать в долгоживущем процессе сколько угодно раз.
+
+    Args:
+        video_path: Путь к видео
+        transcript_path: Путь к транскрипту (None - только слайды)
+        options: ExtractionOptions или словарь с его параметрами (None - по умолчанию)
+        on_slide: Вызывается для каждого сохранённого слайда (текст ещё не заполнен)
+        on_progress: Вызывается для каждого анализируемого кадра: (время_кадра, конец_отрезка)
+        cancel_event: Событие отмены; если установлено - обработка прерывается
+
+    Returns:
+        LectureResult
+
+    Raises:
+        FileNotFoundError: Видео или транскрипт не найдены
+        ValueError: Неверные параметры или видео не открывается
+        ExtractionCancelled: Обработка отменена через cancel_event
+    """
+    if options is None:
+        options = ExtractionOptions()
+    elif isinstance(options, dict):
+        options = ExtractionOptions(**options)
+    options.validate()
+
+    if not Path(video_path).exists():
+        raise FileNotFoundError(f"Видеофайл не найден: {video_path}")
+    if transcript_path is not None and not Path(transcript_path).exists():
+        raise FileNotFoundError(f"Файл транскрипта не найден: {transcript_path}")
+
+    video = Path(video_path)
+    slides_dir = options.slides_dir or str(video.with_name(f"{video.stem}_slides"))
+    metrics = RunMetrics(track_memory=options.track_memory, memory_budget_mb=options.memory_budget_mb)
+
+    slides: List[ExtractedSlide] = []
+
+    def handle_slide(index: int, path: str, timestamp: float):
+        slide = ExtractedSlide(index, path, timestamp, processor.saved_slides[-1][2])
+        slides.append(slide)
+        if on_slide is not None:
+            on_slide(slide)
+
+    with VideoProcessor(
+        video_path=str(video_path),
+        sample_rate=options.sample_rate,
+        threshold=options.threshold,
+        crop_region=options.crop_region,
+        start_time=options.start_time,
+        end_time=options.end_time,
+        metrics=metrics,
+        on_progress=on_progress,
+        on_slide=handle_slide,
+        should_cancel=cancel_event.is_set if cancel_event is not None else None,
+        time_budget=options.time_budget,
+        luma_decode=options.luma_decode,
+        decoder=options.decoder,
+        decode_process=options.decode_process,
+        compare_workers=options.compare_workers,
+        tile_compare=options.tile_compare,
+        analysis_width=options.analysis_width,
+        two_pass=options.two_pass,
+        keyframes=options.keyframes,
+        packet_prefilter=options.packet_prefilter,
+        seek_index=options.seek_index
+    ) as processor:
+        slides_data = processor.process(slides_dir)
+
+    transcript_parser = TranscriptParser(metrics)
+    entries = []
+    if transcript_path is not None:
+        entries = transcript_parser.parse_transcript(str(transcript_path))
+        entries = transcript_parser.filter_by_time(entries, options.start_time, options.end_time)
+        texts = transcript_parser.distribute_text_proportionally(slides_data, entries)
+        for slide in slides:
+            slide.text = texts.get(slide.timestamp, "")
+
+    if options.output_path is not None:
+        # Markdown ссылается на слайды относительно документа
+        relative_dir = Path(slides_dir)
+        try:
+            relative_dir = relative_dir.resolve().relative_to(Path(options.output_path).resolve().parent)
+        except ValueError:
+            pass
+        MarkdownGenerator(transcript_parser).generate_markdown(
+            slides_data=slides_data,
+            transcript_entries=entries,
+            output_path=options.output_path,
+            slides_dir=relative_dir.as_posix(),
+            title=options.title
+        )
+
+    return LectureResult(
+        video_path=str(video_path),
+        slides=slides,
+        slides_dir=slides_dir,
+        markdown_path=options.output_path,
+        transcript_segments=len(entries),
+        metrics=metrics.to_dict()
+    )
@@ -0,0 +1,290 @@
+"""
+Модуль пакетной обработки: поиск пар видео/транскрипт в дереве папок
+и планирование заданий
+"""
+
+import os
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+import logging
+
+from .config import VIDEO_EXTENSIONS, TRANSCRIPT_EXTENSIONS, WATCH_STABLE_POLLS, WATCH_MAX_ATTEMPTS, PREVIEW_SUFFIX
+
+logger = logging.getLogger(__name__)
+
+
+def is_partial_range(start_time: float, end_time: Optional[float]) -> bool:
+    """Обрабатывается только часть видео (предпросмотр или отрезок)"""
+    return start_time > 0 or end_time is not None
+
+
+def range_key(start_time: float, end_time: Optional[float]) -> str:
+    """Метка обрабатываемого отрезка: пустая для всего видео, иначе 'начало-конец'"""
+    if not is_partial_range(start_time, end_time):
+        return ""
+    return f"{start_time:g}-{'' if end_time is None else f'{end_time:g}'}"
+
+
+def output_stem(video_path: Path, partial: bool = False) -> str:
+    """Имя результатов по имени видео; у частичной обработки - с PREVIEW_SUFFIX"""
+    return Path(video_path).stem + (PREVIEW_SUFFIX if partial else "")
+
+
+class BatchJob:
+    """Задание пакетной обработки: одно видео и его транскрипт"""
+
+    def __init__(self, video_path: Path, transcript_path: Path, duration: float = 0.0):
+        self.video_path = Path(video_path)
+        self.transcript_path = Path(transcript_path)
+        self.duration = duration  # Длительность видео в секундах (для планирования)
+
+    @property
+    def folder(self) -> Path:
+        """Папка, в которой лежит видео (туда же пишутся результаты)"""
+        return self.video_path.parent
+
+    @property
+    def output_md(self) -> Path:
+        """Путь к выходному Markdown файлу (по имени видео)"""
+        return self.output_md_for(partial=False)
+
+    def output_md_for(self, partial: bool) -> Path:
+        """Путь к выходному Markdown файлу - тот же, что напишет FolderProcessor"""
+        return self.folder / f"{output_stem(self.video_path, partial)}.md"
+
+    @property
+    def slides_dir(self) -> Path:
+        """Папка со слайдами (по имени видео)"""
+        return self.folder / f"{self.video_path.stem}_slides"
+
+    def __repr__(self):
+        return f"BatchJob({self.video_path.name}, {self.duration:.0f}s)"
+
+
+def _list_files(folder: Path, extensions: List[str]) -> List[Path]:
+    """Возвращает отсортированный список файлов папки с указанными расширениями"""
+    return sorted(
+        path for path in folder.iterdir()
+        if path.is_file() and path.suffix.lower() in extensions
+    )
+
+
+def match_transcript(video_path: Path, transcripts: List[Path], videos_in_folder: int) -> Optional[Path]:
+    """
+    Подбирает транскрипт для видео
+
+    Сначала ищется транскрипт с тем же именем, что и видео. Если в папке одно
+    видео, берётся первый найденный транскрипт (как в обычном режиме auto_process).
+
+    Args:
+        video_path: Путь к видеофайлу
+        transcripts: Транскрипты из той же папки
+        videos_in_folder: Количество видео в папке
+
+    Returns:
+        Путь к транскрипту или None
+    """
+    for transcript in transcripts:
+        if transcript.stem == video_path.stem:
+            return transcript
+
+    if videos_in_folder == 1 and transcripts:
+        return transcripts[0]
+
+    return None
+
+
+def discover_jobs(root: Path, warn_missing: bool = True) -> List[BatchJob]:
+    """
+    Рекурсивно обходит дерево папок и находит все пары видео/транскрипт
+
+    Папки со слайдами ({видео}_slides) пропускаются.
+
+    Args:
+        root: Корневая папка курса
+        warn_missing: Предупреждать о видео без транскрипта
+
+    Returns:
+        Список заданий BatchJob (без длительностей)
+    """
+    jobs = []
+
+    for dirpath, dirnames, _ in os.walk(root):
+        # Не заходим в папки со слайдами и скрытые папки
+        dirnames[:] = sorted(
+            name for name in dirnames
+            if not name.endswith('_slides') and not name.startswith('.')
+        )
+
+        folder = Path(dirpath)
+        videos = _list_files(folder, VIDEO_EXTENSIONS)
+        if not videos:
+            continue
+
+        transcripts = _list_files(folder, TRANSCRIPT_EXTENSIONS)
+
+        for video in videos:
+            transcript = match_transcript(video, transcripts, len(videos))
+            if transcript is None:
+                if warn_missing:
+                    logger.warning(f"Транскрипт для {video} не найден - пропускаем")
+                continue
+            jobs.append(BatchJob(video, transcript))
+
+    return jobs
+
+
+def probe_duration(video_path: Path) -> float:
+    """
+    Определяет длительность видео по метаданным (CAP_PROP_FRAME_COUNT / FPS)
+
+    Args:
+        video_path: Путь к видеофайлу
+
+    Returns:
+        Длительность в секундах (0, если метаданные недоступны)
+    """
+    import cv2
+
+    cap = cv2.VideoCapture(str(video_path))
+    try:
+        if not cap.isOpened():
+            return 0.0
+        fps = cap.get(cv2.CAP_PROP_FPS)
+        total_frames = cap.get(cv2.CAP_PROP_FRAME_COUNT)
+        return total_frames / fps if fps > 0 else 0.0
+    finally:
+        cap.release()
+
+
+def schedule_longest_first(jobs: List[BatchJob]) -> List[BatchJob]:
+    """
+    Упорядочивает задания от самого длинного видео к самому короткому
+
+    Длинные видео запускаются первыми, чтобы короткие заполняли простаивающие
+    процессы в конце и общее время пакета было минимальным.
+
+    Args:
+        jobs: Задания с заполненной длительностью
+
+    Returns:
+        Новый отсортированный список
+    """
+    return sorted(jobs, key=lambda job: job.duration, reverse=True)
+
+
+def init_worker_process():
+    """
+    Инициализация процесса пула (пакетная обработка, сервер)
+
+    OpenCV по умолчанию использует все ядра внутри одного процесса. Когда
+    параллельно работает несколько процессов, это только мешает, поэтому
+    оставляем по одному потоку OpenCV на процесс.
+
+    Заодно один раз прогоняем сравнение кадров на маленьком изображении:
+    scikit-image подгружает модули лениво, и без прогрева эта цена
+    платилась бы в первом задании каждого процесса.
+    """
+    import cv2
+    import numpy as np
+    from skimage.metrics import structural_similarity as ssim
+
+    cv2.setNumThreads(1)
+
+    dummy = np.zeros((32, 32), dtype=np.uint8)
+    ssim(cv2.GaussianBlur(dummy, (5, 5), 0), dummy, data_range=255)
+
+
+def warm_up_worker() -> int:
+    """Пустое задание: заставляет пул запустить процесс заранее"""
+    return os.getpid()
+
+
+class FolderWatcher:
+    """
+    Наблюдение за папкой через периодический опрос
+
+    Видео считается готовым к обработке, когда рядом есть транскрипт, а размер
+    и время изменения файла не менялись stable_polls опросов подряд (файл
+    докопирован). Каждая версия видео (размер, mtime) выдаётся один раз:
+    заменённое видео выдаётся снова, а после неудачи (failed) - повторно,
+    пока не кончатся max_attempts попыток.
+    """
+
+    def __init__(self, root: Path, stable_polls: int = WATCH_STABLE_POLLS, force: bool = False,
+                 partial: bool = False, max_attempts: int = WATCH_MAX_ATTEMPTS):
+        """
+        Args:
+            root: Корневая папка для наблюдения
+            stable_polls: Сколько опросов подряд размер должен не меняться
+            force: Обрабатывать и видео, для которых результат уже существует
+            partial: Обрабатывается часть видео (результат - {видео}_preview.md)
+            max_attempts: Сколько раз выдавать одну версию видео, если обработка не удалась
+        """
+        self.root = Path(root)
+        self.stable_polls = stable_polls
+        self.force = force
+        self.partial = partial
+        self.max_attempts = max_attempts
+        self._observed: Dict[Path, Tuple[int, float, int]] = {}  # видео -> (размер, mtime, опросов без изменений)
+        self._enqueued: Dict[Path, Tuple[int, float]] = {}       # видео -> выданная или пропущенная версия
+        self._failures: Dict[Tuple[Path, int, float], int] = {}  # версия видео -> неудачных попыток
+
+    def failed(self, job: BatchJob):
+        """
+        Обработка задания не удалась: та же версия видео будет выдана снова
+        (после stable_polls опросов - например, транскрипт ещё дописывается)
+        """
+        video = job.video_path
+        version = self._enqueued.get(video)
+        if version is None:
+            return
+        key = (video, *version)
+        self._failures[key] = self._failures.get(key, 0) + 1
+        if self._failures[key] < self.max_attempts:
+            del self._enqueued[video]
+        else:
+            logger.warning(f"⚠ {video}: попыток {self._failures[key]} - ждём, пока видео изменится")
+
+    def poll(self) -> List[BatchJob]:
+        """
+        Один опрос папки
+
+        Returns:
+            Задания, ставшие готовыми с момента предыдущего опроса
+        """
+        ready = []
+
+        for job in discover_jobs(self.root, warn_missing=False):
+            video = job.video_path
+            try:
+                stat = video.stat()
+            except OSError:
+                # Файл удалили или переименовали между обходом и stat
+                self._observed.pop(video, None)
+                continue
+
+            version = (stat.st_size, stat.st_mtime)
+            if self._enqueued.get(video) == version:
+                continue
+            self._enqueued.pop(video, None)  # Видео заменили - наблюдаем заново
+
+            output_md = job.output_md_for(self.partial)
+            if not self.force and output_md.exists() and output_md.stat().st_mtime >= stat.st_mtime:
+                self._enqueued[video] = version
+                continue
+
+            previous = self._observed.get(video)
+            if previous and previous[:2] == version:
+                stable_count = previous[2] + 1
+            else:
+                stable_count = 0
+
+            if stable_count >= self.stable_polls and stat.st_size > 0:
+                ready.append(job)
+                self._enqueued[video] = version
+                self._observed.pop(video, None)
+            else:
+                self._observed[video] = (*version, stable_count)
+
+        return ready
@@ -0,0 +1,223 @@
+"""
+Модуль пакетного сравнения кадров с одним эталоном
+
+VideoProcessor.compare_frames сравнивает одну пару кадров: на каждую пару -
+свои временные массивы, вызовы cv2 и накладные расходы Python. BatchComparator
+сравнивает с эталоном сразу пачку серых обрезок (N, H, W) и возвращает массив
+сходств. Все буферы выделяются один раз под размер пачки.
+
+Результат совпадает с compare_frames / compare_frames_fast:
+- размытие - тот же cv2.GaussianBlur (5x5), в заранее выделенный буфер;
+- процент совпадающих пикселей считается по целой разности (значения целые,
+  поэтому порог < 3 даёт то же, что и в float32);
+- SSIM (окно 7x7, как в skimage.metrics.structural_similarity) считается по
+  интегральным изображениям в int64: суммы по окну точные, в float64 остаётся
+  только сама формула SSIM. Буферы SSIM (int64/float64, в 8 раз больше кадра)
+  рассчитаны на COMPARE_SSIM_CHUNK кадров - пачка проходит ими по частям.
+"""
+
+from typing import Tuple
+
+import cv2
+import numpy as np
+
+from .config import COMPARE_BATCH_SIZE, COMPARE_SSIM_CHUNK
+
+SSIM_WINDOW = 7          # Окно SSIM по умолчанию в skimage
+SSIM_DATA_RANGE = 255
+SSIM_K1 = 0.01
+SSIM_K2 = 0.03
+PIXEL_TOLERANCE = 3      # Пиксели с разницей меньше этого считаются совпадающими
+
+
+def ssim_map(reference: np.ndarray, frame: np.ndarray) -> np.ndarray:
+    """
+    Карта SSIM по всем окнам 7x7 внутри пары размытых кадров
+
+    Среднее карты - SSIM пары (как у skimage); для части кадра карта
+    считается по блоку с запасом в 6 пикселей справа и снизу.
+    """
+    x = reference.astype(np.int64)
+    y = frame.astype(np.int64)
+    height, width = x.shape
+    integral = np.zeros((height + 1, width + 1), dtype=np.int64)
+    w = SSIM_WINDOW
+
+    def window_sums(values: np.ndarray) -> np.ndarray:
+        np.cumsum(values, axis=0, out=integral[1:, 1:])
+        np.cumsum(integral[1:, 1:], axis=1, out=integral[1:, 1:])
+        return (integral[w:, w:] - integral[:-w, w:] - integral[w:, :-w] + integral[:-w, :-w]).astype(np.float64)
+
+    area = w * w
+    cov_norm = area / (area - 1)
+    c1 = (SSIM_K1 * SSIM_DATA_RANGE) ** 2
+    c2 = (SSIM_K2 * SSIM_DATA_RANGE) ** 2
+    ux = window_sums(x) / area
+    uy = window_sums(y) / area
+    vx = cov_norm * (window_sums(x * x) / area - ux * ux)
+    vy = cov_norm * (window_sums(y * y) / area - uy * uy)
+    vxy = cov_norm * (window_sums(x * y) / area - ux * uy)
+    return ((2 * ux * uy + c1) * (2 * vxy + c2)) / ((ux * ux + uy * uy + c1) * (vx + vy + c2))
+
+
+class BatchComparator:
+    """Сравнение пачек серых обрезок с одним эталоном векторными операциями"""
+
+    def __init__(self, shape: Tuple[int, int], capacity: int = COMPARE_BATCH_SIZE):
+        """
+        Args:
+            shape: Размер обрезки (высота, ширина)
+            capacity: Максимальный размер пачки
+        """
+        height, width = shape
+        if min(height, width) < SSIM_WINDOW:
+            raise ValueError(f"Обрезка {width}x{height} меньше окна SSIM {SSIM_WINDOW}x{SSIM_WINDOW}")
+        self.shape = (height, width)
+        self.capacity = capacity
+        self._inner = (height - SSIM_WINDOW + 1, width - SSIM_WINDOW + 1)
+
+        # Размытые кадры пачки и промежуточные буферы
+        self.blurred = np.empty((capacity, height, width), dtype=np.uint8)
+        self._diff = np.empty((capacity, height, width), dtype=np.int16)
+        chunk = min(capacity, COMPARE_SSIM_CHUNK)
+        self._chunk = chunk
+        self._values = np.empty((chunk, height, width), dtype=np.int64)
+        self._integral = np.zeros((chunk, height + 1, width + 1), dtype=np.int64)
+        self._sum_y = np.empty((chunk,) + self._inner, dtype=np.float64)
+        self._sum_yy = np.empty((chunk,) + self._inner, dtype=np.float64)
+        self._sum_xy = np.empty((chunk,) + self._inner, dtype=np.float64)
+
+        self._reference = None
+        self._reference_wide = None
+        self._sum_x = None
+        self._sum_xx = None
+
+    @property
+    def reference(self) -> np.ndarray:
+        """Размытый эталон"""
+        return self._reference
+
+    def _window_sums(self, values: np.ndarray, out: np.ndarray):
+        """Суммы по всем окнам SSIM внутри кадров (края, как и в skimage, отбрасываются)"""
+        count = values.shape[0]
+        integral = self._integral[:count]
+        np.cumsum(values, axis=1, out=integral[:, 1:, 1:])
+        np.cumsum(integral[:, 1:, 1:], axis=2, out=integral[:, 1:, 1:])
+        w = SSIM_WINDOW
+        np.subtract(integral[:, w:, w:], integral[:, :-w, w:], out=out)
+        out -= integral[:, w:, :-w]
+        out += integral[:, :-w, :-w]
+
+    def set_reference(self, reference: np.ndarray, prepared: bool = False):
+        """
+        Задаёт эталон, с которым сравниваются следующие пачки
+
+        Args:
+            reference: Серая обрезка эталона (H, W)
+            prepared: Обрезка уже размыта (VideoProcessor.prepare_frame)
+        """
+        if reference.shape != self.shape:
+            raise ValueError(f"Эталон {reference.shape} не совпадает с размером обрезки {self.shape}")
+        self._reference = reference.copy() if prepared else cv2.GaussianBlur(reference, (5, 5), 0)
+        self._reference_wide = self._reference.astype(np.int64)
+
+        sums = np.empty((2,) + self._inner, dtype=np.float64)
+        self._window_sums(self._reference_wide[np.newaxis], sums[:1])
+        self._window_sums((self._reference_wide * self._reference_wide)[np.newaxis], sums[1:])
+        self._sum_x, self._sum_xx = sums
+
+    def load(self, crops: np.ndarray, prepared: bool = False) -> np.ndarray:
+        """
+        Кладёт пачку обрезок в буфер размытых кадров
+
+        Args:
+            crops: Серые обрезки (N, H, W) uint8 (или список таких обрезок), N <= capacity
+            prepared: Обрезки уже размыты
+
+        Returns:
+            Размытые кадры пачки (вид на внутренний буфер)
+        """
+        count = len(crops)
+        if count > self.capacity:
+            raise ValueError(f"Пачка из {count} кадров больше {self.capacity}")
+        blurred = self.blurred[:count]
+        for crop, out in zip(crops, blurred):
+            if prepared:
+                np.copyto(out, crop)
+            else:
+                cv2.GaussianBlur(crop, (5, 5), 0, dst=out)
+        return blurred
+
+    def pixel_similarity(self, blurred: np.ndarray) -> np.ndarray:
+        """Доля пикселей каждого кадра, отличающихся от эталона меньше чем на 3 единицы"""
+        count = blurred.shape[0]
+        diff = self._diff[:count]
+        np.subtract(blurred, self._reference, out=diff, dtype=np.int16)
+        np.abs(diff, out=diff)
+        similar = np.count_nonzero((diff < PIXEL_TOLERANCE).reshape(count, -1), axis=1)
+        return similar / (self.shape[0] * self.shape[1])
+
+    def structural_similarity(self, blurred: np.ndarray) -> np.ndarray:
+        """SSIM каждого кадра с эталоном (как skimage с окном 7x7 и data_range=255)"""
+        return np.concatenate([self._structural_similarity(blurred[start:start + self._chunk])
+                               for start in range(0, blurred.shape[0], self._chunk)])
+
+    def _structural_similarity(self, blurred: np.ndarray) -> np.ndarray:
+        """SSIM для части пачки, помещающейся в буферы"""
+        count = blurred.shape[0]
+        values = self._values[:count]
+        sum_y, sum_yy, sum_xy = self._sum_y[:count], self._sum_yy[:count], self._sum_xy[:count]
+
+        np.copyto(values, blurred)
+        self._window_sums(values, sum_y)
+        np.multiply(values, self._reference_wide, out=values)
+        self._window_sums(values, sum_xy)
+        np.copyto(values, blurred)
+        np.multiply(values, values, out=values)
+        self._window_sums(values, sum_yy)
+
+        area = SSIM_WINDOW * SSIM_WINDOW
+        cov_norm = area / (area - 1)
+        c1 = (SSIM_K1 * SSIM_DATA_RANGE) ** 2
+        c2 = (SSIM_K2 * SSIM_DATA_RANGE) ** 2
+        ux = self._sum_x / area
+        vx = cov_norm * (self._sum_xx / area - ux * ux)
+
+        # Средние и (со)дисперсии по окну - на месте сумм
+        uy = np.divide(sum_y, area, out=sum_y)
+        uyy = np.divide(sum_yy, area, out=sum_yy)
+        uxy = np.divide(sum_xy, area, out=sum_xy)
+        vy = uyy
+        vy -= uy * uy
+        vy *= cov_norm
+        vxy = uxy
+        vxy -= ux * uy
+        vxy *= cov_norm
+
+        # S = (2 ux uy + C1)(2 vxy + C2) / ((ux^2 + uy^2 + C1)(vx + vy + C2))
+        numerator = 2 * ux * uy + c1
+        numerator *= 2 * vxy + c2
+        vy += vx + c2
+        np.multiply(uy, uy, out=uy)
+        uy += ux * ux + c1
+        uy *= vy
+        numerator /= uy
+        return numerator.reshape(count, -1).mean(axis=1, dtype=np.float64)
+
+    def compare(self, crops: np.ndarray, prepared: bool = False, fast: bool = False) -> np.ndarray:
+        """
+        Сходство каждой обрезки пачки с эталоном
+
+        Args:
+            crops: Серые обрезки (N, H, W) uint8
+            prepared: Обрезки уже размыты
+            fast: Только процент совпадающих пикселей (как compare_frames_fast)
+
+        Returns:
+            Массив сходств (0-1) - то же, что compare_frames(эталон, обрезка)
+        """
+        blurred = self.load(crops, prepared)
+        pixel = self.pixel_similarity(blurred)
+        if fast:
+            return pixel
+        return np.maximum(self.structural_similarity(blurred), pixel)
@@ -6,6 +6,24 @@
 DEFAULT_SAMPLE_RATE = 1.0  # Анализировать 1 кадр в 1 секунду (чаще = ловим быстрые переключения слайдов)
 DEFAULT_THRESHOLD = 0.92   # Порог SSIM для детектирования смены слайда (строже!)
 
+# Декодеры видео (--decoder)
+DECODER_OPENCV = "opencv"   # cv2.VideoCapture (по умолчанию)
+DECODER_FFMPEG = "ffmpeg"   # Отдельный процесс ffmpeg: сетка кадров и обрезка в его фильтрах, серые кадры по pipe
+DECODERS = (DECODER_OPENCV, DECODER_FFMPEG)
+DEFAULT_DECODER = DECODER_OPENCV
+FFMPEG_BINARY = "ffmpeg"    # Исполняемый файл ffmpeg (ищется в PATH)
+FFMPEG_FPS_MODE_VERSION = (5, 1)  # С этой версии -fps_mode; у более старых ffmpeg - -vsync
+FFPROBE_BINARY = "ffprobe"  # Метаданные пакетов без PyAV (ищется в PATH)
+FFPROBE_TIMEOUT = 120       # Секунд на чтение пакетов через ffprobe
+FRAME_RING_SLOTS = 8        # Слотов в разделяемой памяти при декодировании в отдельном процессе (--decode-process)
+
+# Режимы обработки (см. OPTIMIZATION.md): частота анализа и порог
+PROCESSING_MODES = {
+    "fast": {"sample_rate": 2.0, "threshold": 0.90},
+    "balanced": {"sample_rate": 1.0, "threshold": 0.92},
+    "precise": {"sample_rate": 0.5, "threshold": 0.95},
+}
+
 # Варианты области анализа
 CROP_REGION_BOTTOM_LEFT = "bottom_left"      # Левый нижний угол (по умолчанию)
 CROP_REGION_BOTTOM_RIGHT = "bottom_right"    # Правый нижний угол
@@ -25,10 +43,86 @@ DEFAULT_SLIDES_DIR = "slides"
 SLIDE_IMAGE_FORMAT = "png"
 SLIDE_IMAGE_QUALITY = 95
 
+# Расширения входных файлов
+VIDEO_EXTENSIONS = ['.mp4', '.mov', '.avi', '.mkv', '.m4v']
+TRANSCRIPT_EXTENSIONS = ['.txt']
+
+# Параметры пакетной обработки
+DEFAULT_BATCH_WORKERS = 2  # Количество параллельных процессов в пакетном режиме
+PREVIEW_SUFFIX = "_preview"  # Суффикс результатов частичной обработки (полный результат не затирается)
+
+# Параметры режима наблюдения за папкой
+WATCH_POLL_INTERVAL = 10.0  # Интервал опроса папки в секундах
+WATCH_STABLE_POLLS = 3      # Сколько опросов подряд размер видео должен не меняться
+WATCH_MAX_ATTEMPTS = 3      # Сколько раз обрабатывать одну версию видео, если обработка не удалась
+
+# Параметры общей очереди заданий (несколько машин на одном сетевом диске)
+QUEUE_DIR_NAME = ".lse_queue"   # Папка очереди внутри корня курса
+QUEUE_LEASE_SECONDS = 120.0     # Срок аренды задания: без heartbeat дольше - захват считается брошенным
+QUEUE_HEARTBEAT_INTERVAL = 30.0 # Как часто продлевать аренду
+QUEUE_MAX_ATTEMPTS = 2          # Сколько раз пробовать задание перед пометкой "ошибка"
+
+# Параметры HTTP-сервера (python -m src.main --serve)
+SERVER_HOST = "127.0.0.1"       # По умолчанию только localhost
+SERVER_PORT = 8765
+SERVER_PROGRESS_INTERVAL = 0.5  # Как часто процесс пула сообщает прогресс задания, секунды
+SERVER_JOB_TTL = 3600.0         # Сколько хранить статус завершённого задания, секунды
+SERVER_MAX_FINISHED_JOBS = 1000 # Больше завершённых заданий не храним (сначала удаляются самые старые)
+
 # Параметры обработки
 MIN_SLIDE_DURATION = 30  # Минимальная длительность слайда в секундах (для лекций обычно слайд держится долго)
 MAX_FRAMES_IN_MEMORY = 100  # Максимальное количество кадров в памяти
 
+# Двухфазное детектирование (--compare-workers)
+DEFAULT_COMPARE_WORKERS = 1  # 1 - обычный последовательный детектор
+TWO_PHASE_LOOKAHEAD = 32     # На сколько кадров вперёд считаются подписи кадров в пуле потоков
+
+# Пакетное сравнение кадров с одним эталоном (batch_compare.py)
+COMPARE_BATCH_SIZE = 64   # Кадров в пачке по умолчанию
+COMPARE_SSIM_CHUNK = 8    # Кадров за один проход SSIM (буферы int64/float64 в 8 раз больше кадра)
+
+# Сравнение по сетке плиток с ранним выходом (--tile-compare)
+TILE_GRID = (4, 4)  # Строк и столбцов плиток в области анализа
+
+# Разрешение анализа (--analysis-width)
+DEFAULT_ANALYSIS_WIDTH = None  # None - анализ в исходном разрешении обрезки
+ANALYSIS_WIDTH_MIN = 64        # Меньше - слишком мало пикселей для окна SSIM и сетки плиток
+
+# Двухпроходное детектирование (--two-pass)
+TWO_PASS_COARSE_FACTOR = 4     # Шаг грубого прохода в шагах сетки анализа
+TWO_PASS_ANALYSIS_WIDTH = 160  # Ширина обрезки в грубом проходе
+TWO_PASS_MARGIN = 0.03         # Насколько порог грубого прохода строже (выше) порога детектора
+TWO_PASS_MAX_THRESHOLD = 0.99  # Выше - грубый проход срабатывал бы на шум сжатия
+
+# Поиск смен по ключевым кадрам (--keyframes)
+KEYFRAME_MIN_GAP = 2           # Средний интервал ключевых кадров в шагах сетки: меньше - обычный просмотр выгоднее
+
+# Фильтр по размерам пакетов (--packet-prefilter)
+PACKET_BASELINE_SECONDS = 20.0   # Окно скользящей медианы размеров пакетов
+PACKET_BURST_FACTOR = 4.0        # Всплеск: самый большой разностный пакет шага сетки во столько раз больше медианы
+PACKET_BURST_MIN_BYTES = 1024    # ... и больше неё хотя бы на столько байт (шум почти пустых кадров)
+PACKET_KEYFRAME_CHANGE = 0.05    # Ключевой кадр отличается по размеру от предыдущего больше чем на эту долю
+PACKET_SAFETY_INTERVAL = 15.0    # Секунд между страховочными кадрами вне всплесков
+
+# Индекс перемотки (--seek-index)
+SEEK_INDEX_SUFFIX = ".seekindex.json"  # Файл индекса рядом с видео: lecture.mp4 -> lecture.seekindex.json
+SEEK_INDEX_VERSION = 1                 # Меняется вместе с форматом файла: старые индексы строятся заново
+
+# Произвольный доступ к кадрам для отладки (frame_server.py)
+FRAME_CACHE_MB = 256  # Бюджет LRU-кэша кадров и обрезок: ~90 кадров 1080p
+
+# Контроль памяти (--memory-report / --memory-budget)
+MEMORY_BUDGET_WARN_FRACTION = 0.9  # Предупреждать, когда RSS (с учётом прогноза) достигает этой доли бюджета
+MEMORY_CHECK_EVERY = 100           # Как часто (в анализируемых кадрах) проверять память
+
+# Обработка в пределах бюджета времени (--time-budget)
+TIME_BUDGET_FACTORS = (1, 2, 4, 8, 16)  # Допустимые прореживания сетки анализируемых кадров
+TIME_BUDGET_RESERVE = 0.1               # Доля бюджета на сохранение слайдов и погрешность прогноза
+TIME_BUDGET_CHECK_EVERY = 10            # Как часто (в анализируемых кадрах) пересматривать прореживание
+
+# Предварительная оценка стоимости (--estimate)
+ESTIMATE_CALIBRATION_SECONDS = 10.0  # Сколько секунд видео декодируется для замера скорости
+
 # Логирование
 LOG_LEVEL = "INFO"
 
@@ -0,0 +1,442 @@
+"""
+Модуль декодеров видео: откуда VideoProcessor берёт кадры
+
+- OpenCVDecoder - cv2.VideoCapture (по умолчанию), полные кадры BGR или
+  плоскость Y при luma_decode
+- FFmpegDecoder - отдельный процесс ffmpeg: сетка анализируемых кадров,
+  обрезка и перевод в оттенки серого делаются в его графе фильтров, в
+  Python по pipe приходят только серые обрезки в заранее выделенные буферы
+
+Все декодеры читают кадры последовательно и нумеруют их от начала видео,
+как cv2.VideoCapture: read() и grab() сдвигают позицию на один кадр.
+"""
+
+import re
+import shutil
+import subprocess
+import tempfile
+from contextlib import contextmanager
+from functools import lru_cache
+from typing import Optional, Tuple
+import logging
+
+import cv2
+import numpy as np
+
+from .config import DECODER_OPENCV, DECODER_FFMPEG, DECODERS, FFMPEG_BINARY, FFMPEG_FPS_MODE_VERSION
+
+logger = logging.getLogger(__name__)
+
+
+@contextmanager
+def quiet_opencv():
+    """
+    Только ошибки в логе OpenCV на время блока
+
+    OpenCV 5 на каждый кадр без преобразования в BGR пишет "retrieveFrame
+    Unknown/unsupported picture format", хотя кадр отдаёт (luma_decode).
+    """
+    opencv_logging = getattr(getattr(cv2, 'utils', None), 'logging', None)
+    if opencv_logging is None:
+        yield
+        return
+    previous = opencv_logging.getLogLevel()
+    opencv_logging.setLogLevel(opencv_logging.LOG_LEVEL_ERROR)
+    try:
+        yield
+    finally:
+        opencv_logging.setLogLevel(previous)
+
+
+class FrameDecoder:
+    """Интерфейс декодера"""
+
+    name = None
+    analysis_only = False   # Кадры годятся только для анализа (не BGR) - слайды перечитываются в цвете
+    crops_region = False    # Кадры уже обрезаны до области анализа
+    grid_only = False       # Читать можно только кадры сетки анализа, остальные - только пропускать
+
+    def __init__(self, video_path: str):
+        self.video_path = video_path
+        self.fps = 0.0
+        self.total_frames = 0
+        self.width = 0
+        self.height = 0
+
+    def set_analysis(self, interval: int, crop: Tuple[int, int, int, int], analysis_width: Optional[int] = None):
+        """
+        Сообщает сетку анализируемых кадров, область анализа (x, y, ширина, высота)
+        и ширину анализа
+
+        Бэкенд может применить их при декодировании; кадры вне сетки после
+        этого можно только пропускать (grab).
+        """
+
+    def is_opened(self) -> bool:
+        raise NotImplementedError
+
+    def seek(self, target_frame: int) -> int:
+        """
+        Перематывает к кадру target_frame
+
+        Returns:
+            Номер кадра, который будет прочитан следующим (не больше target_frame)
+        """
+        raise NotImplementedError
+
+    def read(self) -> Tuple[bool, Optional[np.ndarray]]:
+        """Читает следующий кадр: (успех, кадр)"""
+        raise NotImplementedError
+
+    def grab(self) -> bool:
+        """Пропускает следующий кадр"""
+        raise NotImplementedError
+
+    def close(self):
+        """Освобождает видео (повторный вызов безопасен)"""
+        raise NotImplementedError
+
+
+class OpenCVDecoder(FrameDecoder):
+    """Чтение через cv2.VideoCapture"""
+
+    name = DECODER_OPENCV
+
+    def __init__(self, video_path: str, luma: bool = False):
+        """
+        Args:
+            video_path: Путь к видеофайлу
+            luma: Отдавать плоскость Y без преобразования в BGR (если бэкенд OpenCV умеет)
+
+        Raises:
+            ValueError: Если видео не открывается
+        """
+        super().__init__(video_path)
+        self.luma = False
+        self.cap = cv2.VideoCapture(video_path)
+        if not self.cap.isOpened():
+            raise ValueError(f"Не удалось открыть видеофайл: {video_path}")
+
+        self.fps = self.cap.get(cv2.CAP_PROP_FPS)
+        self.total_frames = int(self.cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        self.width = int(self.cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+        self.height = int(self.cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+        self.position = 0        # Номер следующего кадра
+        self.seek_index = None   # Ключевые кадры видео (seek_index.SeekIndex), если известны
+
+        if luma:
+            self.luma = self._enable_luma()
+            self.analysis_only = self.luma
+
+    def _open_capture(self) -> cv2.VideoCapture:
+        """Открывает видео заново (в исходном формате кадров, если включён luma)"""
+        cap = cv2.VideoCapture(self.video_path)
+        if self.luma:
+            cap.set(cv2.CAP_PROP_CONVERT_RGB, 0)
+        return cap
+
+    def _enable_luma(self) -> bool:
+        """
+        Отключает преобразование в BGR и проверяет, что из кадра можно взять плоскость Y
+
+        Returns:
+            True если кадры будут отдаваться плоскостью Y
+        """
+        if not self.cap.set(cv2.CAP_PROP_CONVERT_RGB, 0):
+            logger.warning("⚠ Бэкенд не умеет отдавать кадры без преобразования в BGR - обычное декодирование")
+            return False
+
+        with quiet_opencv():
+            ret, frame = self.cap.read()
+        # Пробный кадр прочитан - открываем видео заново, чтобы чтение началось с начала
+        self.cap.release()
+        self.cap = cv2.VideoCapture(self.video_path)
+        if ret and self.luma_plane(frame) is not None:
+            self.cap.set(cv2.CAP_PROP_CONVERT_RGB, 0)
+            logger.info("Анализ по яркостной плоскости (Y) без преобразования в BGR")
+            return True
+
+        shape = frame.shape if ret else None
+        logger.warning(f"⚠ Неподдерживаемый формат кадра без преобразования ({shape}) - обычное декодирование")
+        return False
+
+    def luma_plane(self, frame: np.ndarray) -> Optional[np.ndarray]:
+        """
+        Плоскость Y кадра, прочитанного без преобразования в BGR
+
+        Планарные форматы (yuv420p, nv12) приходят одним 8-битным массивом, в
+        котором первые height строк - это Y; упакованные 4:2:2 (yuyv) - двумя
+        каналами, Y в первом. Копирования нет - возвращается срез.
+
+        Returns:
+            Массив height x width или None, если формат не распознан
+        """
+        if frame.dtype != np.uint8:
+            return None
+        if frame.ndim == 2 and frame.shape[1] == self.width and frame.shape[0] >= self.height:
+            return frame[:self.height]
+        if frame.ndim == 3 and frame.shape[2] == 2 and frame.shape[:2] == (self.height, self.width):
+            return frame[:, :, 0]
+        if frame.ndim == 3 and frame.shape[2] == 3:
+            # Бэкенд проигнорировал CONVERT_RGB и отдал BGR
+            return cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        return None
+
+    def is_opened(self) -> bool:
+        return self.cap.isOpened()
+
+    def _set_position(self, frame_number: int) -> bool:
+        """Перемотка средствами OpenCV; True если встали ровно на frame_number"""
+        if self.cap.set(cv2.CAP_PROP_POS_FRAMES, frame_number) and \
+                int(self.cap.get(cv2.CAP_PROP_POS_FRAMES)) == frame_number:
+            self.position = frame_number
+            return True
+        return False
+
+    def seek(self, target_frame: int) -> int:
+        """
+        Перемотка без декодирования предыдущих кадров; если не вышло - видео открывается с начала
+
+        Без индекса - перемотка прямо к цели: позиции, которую сообщает OpenCV,
+        приходится верить. С индексом перемотки - точная перемотка: к
+        предыдущему ключевому кадру, а до цели вызывающий докручивает grab(),
+        считая кадры. Цель в том же GOP впереди - перемотки нет вовсе
+        (перемотка всё равно декодирует от ключевого кадра).
+        """
+        if target_frame <= 0 and self.position == 0:
+            return 0
+        target_frame = max(target_frame, 0)
+
+        if self.seek_index is not None:
+            keyframe = self.seek_index.preceding(target_frame) or 0
+            if keyframe <= self.position <= target_frame:
+                return self.position
+            if keyframe and self._set_position(keyframe):
+                logger.info(f"Перемотка к ключевому кадру {keyframe}, докрутка до кадра {target_frame}")
+                return keyframe
+        elif self._set_position(target_frame):
+            logger.info(f"Перемотка к {target_frame / self.fps:.2f}s (кадр {target_frame})")
+            return target_frame
+
+        if self.seek_index is None or keyframe:
+            logger.warning(f"⚠ Перемотка к кадру {target_frame} не удалась - читаем с начала")
+        self.cap.release()
+        self.cap = self._open_capture()
+        self.position = 0
+        return 0
+
+    def read(self) -> Tuple[bool, Optional[np.ndarray]]:
+        if self.luma:
+            with quiet_opencv():
+                ret, frame = self.cap.read()
+        else:
+            ret, frame = self.cap.read()
+        if ret:
+            self.position += 1
+        if ret and self.luma:
+            frame = self.luma_plane(frame)
+            ret = frame is not None
+        return ret, frame
+
+    def grab(self) -> bool:
+        grabbed = self.cap.grab()
+        if grabbed:
+            self.position += 1
+        return grabbed
+
+    def close(self):
+        if self.cap.isOpened():
+            self.cap.release()
+
+
+@lru_cache(maxsize=None)
+def ffmpeg_version(binary: str) -> Optional[Tuple[int, int]]:
+    """
+    (мажор, минор) версии ffmpeg или None, если её не разобрать
+
+    Сборки из git ("ffmpeg version N-112345-g...") новее любого релиза - тоже None.
+    """
+    try:
+        output = subprocess.run([binary, '-version'], capture_output=True, text=True, timeout=10).stdout
+    except (OSError, subprocess.SubprocessError):
+        return None
+    match = re.match(r"ffmpeg version n?(\d+)\.(\d+)", output)
+    return (int(match.group(1)), int(match.group(2))) if match else None
+
+
+class FFmpegDecoder(FrameDecoder):
+    """
+    Чтение серых кадров области анализа из процесса ffmpeg
+
+    Кадры сетки выбираются фильтром select по абсолютному номеру кадра
+    (n + начало), поэтому сетка та же, что у OpenCVDecoder. Обрезка шире
+    ширины анализа уменьшается фильтром scale до того же размера, что
+    normalize_crop. Перемотка
+    перезапускает ffmpeg с точным -ss. Кадр пишется в один из двух заранее
+    выделенных буферов по очереди: он действителен до следующего чтения
+    через одно.
+    """
+
+    name = DECODER_FFMPEG
+    analysis_only = True
+    crops_region = True
+    grid_only = True
+
+    def __init__(self, video_path: str):
+        """
+        Raises:
+            ValueError: Если ffmpeg не найден или видео не открывается
+        """
+        super().__init__(video_path)
+        self.binary = shutil.which(FFMPEG_BINARY)
+        if self.binary is None:
+            raise ValueError(f"Декодер ffmpeg: исполняемый файл {FFMPEG_BINARY} не найден в PATH")
+        version = ffmpeg_version(self.binary)
+        # -fps_mode появился в ffmpeg 5.1, раньше то же делал -vsync
+        self.fps_mode = '-vsync' if version is not None and version < FFMPEG_FPS_MODE_VERSION else '-fps_mode'
+
+        # Метаданные - через OpenCV, чтобы нумерация кадров совпадала с OpenCVDecoder
+        cap = cv2.VideoCapture(video_path)
+        try:
+            if not cap.isOpened():
+                raise ValueError(f"Не удалось открыть видеофайл: {video_path}")
+            self.fps = cap.get(cv2.CAP_PROP_FPS)
+            self.total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+            self.width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+            self.height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+        finally:
+            cap.release()
+
+        self.interval = None
+        self.crop = None
+        self.size = None        # (ширина, высота) кадров на выходе
+        self.position = 0
+        self._process = None
+        self._errors = None
+        self._buffers = []
+        self._next_buffer = 0
+        self._closed = False
+
+    def set_analysis(self, interval: int, crop: Tuple[int, int, int, int], analysis_width: Optional[int] = None):
+        from .video_processor import analysis_size   # video_processor сам импортирует декодеры
+        self._stop()
+        self.interval = interval
+        self.crop = crop
+        _, _, crop_width, crop_height = crop
+        self.size = analysis_size(crop_width, crop_height, analysis_width)
+        width, height = self.size or (crop_width, crop_height)
+        self._buffers = [np.empty((height, width), dtype=np.uint8) for _ in range(2)]
+
+    def _command(self, start_frame: int) -> list:
+        x, y, crop_width, crop_height = self.crop
+        command = [self.binary, '-nostdin', '-v', 'error']
+        if start_frame > 0:
+            # Полкадра назад: первым гарантированно будет кадр start_frame, а не соседний
+            command += ['-ss', f"{(start_frame - 0.5) / self.fps:.6f}"]
+        filters = (f"select=not(mod(n+{start_frame}\\,{self.interval})),"
+                   f"crop={crop_width}:{crop_height}:{x}:{y}")
+        if self.size is not None:
+            # Точный размер normalize_crop, а не scale=N:-2: у -2 высота округляется до чётной
+            filters += f",scale={self.size[0]}:{self.size[1]}:flags=area"
+        filters += ",format=gray"
+        command += [
+            '-i', self.video_path,
+            '-map', '0:v:0', '-an', '-sn',
+            '-vf', filters,
+            self.fps_mode, 'passthrough',
+            '-f', 'rawvideo', '-pix_fmt', 'gray', 'pipe:1'
+        ]
+        return command
+
+    def _start(self):
+        if self.interval is None:
+            raise ValueError("Декодер ffmpeg: не задана сетка анализа (set_analysis)")
+        # stderr - во временный файл: pipe мог бы переполниться и остановить ffmpeg
+        self._errors = tempfile.TemporaryFile()
+        self._process = subprocess.Popen(
+            self._command(self.position), stdout=subprocess.PIPE, stderr=self._errors
+        )
+
+    def _stop(self):
+        """Останавливает ffmpeg (при остановке до конца видео он пишет о разрыве pipe - это не ошибка)"""
+        if self._process is None:
+            return
+        process, self._process = self._process, None
+        process.stdout.close()
+        if process.poll() is None:
+            process.terminate()
+        try:
+            process.wait(timeout=5)
+        except subprocess.TimeoutExpired:
+            process.kill()
+            process.wait()
+        self._errors.close()
+        self._errors = None
+
+    def _check_exit(self):
+        """Вызывается на конце потока кадров: если ffmpeg завершился с ошибкой - пишем её в лог"""
+        if self._process.wait() != 0:
+            self._errors.seek(0)
+            errors = self._errors.read().decode('utf-8', 'replace').strip()
+            logger.warning(f"⚠ ffmpeg завершился с кодом {self._process.returncode}: {errors[-500:]}")
+
+    def is_opened(self) -> bool:
+        return not self._closed
+
+    def seek(self, target_frame: int) -> int:
+        self._stop()
+        self.position = max(0, target_frame)
+        if self.position > 0:
+            logger.info(f"Перемотка к {self.position / self.fps:.2f}s (кадр {self.position}, ffmpeg)")
+        return self.position
+
+    def read(self) -> Tuple[bool, Optional[np.ndarray]]:
+        if self.interval is not None and self.position % self.interval != 0:
+            raise ValueError(f"Декодер ffmpeg отдаёт только кадры сетки анализа, запрошен кадр {self.position}")
+        if self._process is None:
+            self._start()
+
+        buffer = self._buffers[self._next_buffer]
+        view = memoryview(buffer).cast('B')
+        filled = 0
+        while filled < len(view):
+            count = self._process.stdout.readinto(view[filled:])
+            if not count:
+                self._check_exit()
+                return False, None
+            filled += count
+
+        self._next_buffer = 1 - self._next_buffer
+        self.position += 1
+        return True, buffer
+
+    def grab(self) -> bool:
+        # Кадры вне сетки ffmpeg отбросил сам; кадр сетки приходится вычитать из pipe
+        if self.interval is not None and self.position % self.interval == 0:
+            ret, _ = self.read()
+            return ret
+        self.position += 1
+        return self.position <= self.total_frames
+
+    def close(self):
+        self._stop()
+        self._closed = True
+
+
+def create_decoder(name: str, video_path: str, luma: bool = False) -> FrameDecoder:
+    """
+    Создаёт декодер по имени из DECODERS
+
+    Args:
+        name: 'opencv' или 'ffmpeg'
+        video_path: Путь к видеофайлу
+        luma: Для OpenCV - отдавать плоскость Y (ffmpeg всегда отдаёт серые кадры)
+
+    Raises:
+        ValueError: Неизвестный декодер, нет ffmpeg или видео не открывается
+    """
+    if name == DECODER_OPENCV:
+        return OpenCVDecoder(video_path, luma=luma)
+    if name == DECODER_FFMPEG:
+        return FFmpegDecoder(video_path)
+    raise ValueError(f"Неизвестный декодер: {name} (доступны: {', '.join(DECODERS)})")
@@ -0,0 +1,269 @@
+"""
+Модуль для предварительной оценки стоимости обработки (--estimate)
+
+По метаданным видео (FPS, число кадров, разрешение) и короткому
+контрольному декодированию из середины отрезка прогнозирует время
+обработки и пиковую память для заданной частоты анализа - без обработки
+всего видео. Нужен, чтобы до постановки пакета в очередь понять, на какую
+машину отправить каждое задание.
+"""
+
+import json
+import math
+import time
+from pathlib import Path
+from typing import Optional
+import logging
+
+import cv2
+import numpy as np
+
+from .config import (
+    PROCESSING_MODES,
+    DEFAULT_SAMPLE_RATE,
+    DEFAULT_CROP_REGION,
+    MIN_SLIDE_DURATION,
+    ESTIMATE_CALIBRATION_SECONDS,
+    DEFAULT_DECODER
+)
+from .metrics import MB, current_rss_bytes
+from .video_processor import VideoProcessor
+
+logger = logging.getLogger(__name__)
+
+
+class CostEstimate:
+    """Замеренная стоимость обработки одного кадра и прогноз на весь отрезок"""
+
+    def __init__(
+        self,
+        video_path: str,
+        fps: float,
+        width: int,
+        height: int,
+        start_frame: int,
+        end_frame: int,
+        sample_rate: float
+    ):
+        self.video_path = video_path
+        self.fps = fps
+        self.width = width
+        self.height = height
+        self.start_frame = start_frame
+        self.end_frame = end_frame
+        self.sample_rate = sample_rate
+
+        # Заполняются контрольным декодированием (секунды на кадр)
+        self.read_cost = 0.0      # Чтение анализируемого кадра (декодирование + BGR)
+        self.grab_cost = 0.0      # Пропуск кадра (grab)
+        self.copy_cost = 0.0      # Копия полного кадра в список кадров
+        self.compare_cost = 0.0   # Обрезка + сравнение с предыдущим кадром
+        self.save_cost = 0.0      # Кодирование слайда в PNG
+        self.frame_bytes = width * height * 3
+        self.baseline_rss = 0     # RSS процесса после открытия видео и декодирования
+        self.calibration_frames = 0
+        self.calibration_seconds = 0.0
+
+    @property
+    def duration(self) -> float:
+        """Длительность обрабатываемого отрезка в секундах"""
+        return (self.end_frame - self.start_frame) / self.fps if self.fps > 0 else 0.0
+
+    def predict(self, sample_rate: float) -> dict:
+        """
+        Прогноз для частоты анализа sample_rate
+
+        Число слайдов заранее неизвестно, поэтому берётся верхняя граница:
+        не чаще одного слайда за MIN_SLIDE_DURATION.
+
+        Returns:
+            Словарь: анализируемые кадры, время в секундах, пиковая память в МБ
+        """
+        interval = max(1, int(self.fps * sample_rate))
+        # Анализируются кадры с номером, кратным интервалу (см. VideoProcessor.iter_frames)
+        samples = max(0, math.ceil(self.end_frame / interval) - math.ceil(self.start_frame / interval))
+        skipped = self.end_frame - self.start_frame - samples
+        slides_max = min(samples, int(self.duration // MIN_SLIDE_DURATION) + 1)
+
+        runtime = (samples * (self.read_cost + self.copy_cost + self.compare_cost)
+                   + skipped * self.grab_cost
+                   + slides_max * self.save_cost)
+        # Все анализируемые кадры хранятся целиком до конца детектирования, плюс копии слайдов
+        peak = self.baseline_rss + (samples + slides_max) * self.frame_bytes
+        return {
+            'sample_rate': sample_rate,
+            'frames_analyzed': samples,
+            'slides_max': slides_max,
+            'runtime_s': round(runtime, 1),
+            'peak_memory_mb': round(peak / MB, 1)
+        }
+
+    def to_dict(self) -> dict:
+        return {
+            'video': self.video_path,
+            'fps': self.fps,
+            'width': self.width,
+            'height': self.height,
+            'duration_s': round(self.duration, 2),
+            'range_frames': [self.start_frame, self.end_frame],
+            'calibration': {
+                'frames': self.calibration_frames,
+                'seconds': round(self.calibration_seconds, 3),
+                'read_ms': round(self.read_cost * 1000, 3),
+                'grab_ms': round(self.grab_cost * 1000, 3),
+                'copy_ms': round(self.copy_cost * 1000, 3),
+                'compare_ms': round(self.compare_cost * 1000, 3),
+                'save_ms': round(self.save_cost * 1000, 3),
+                'baseline_rss_mb': round(self.baseline_rss / MB, 1)
+            },
+            'estimate': self.predict(self.sample_rate),
+            'modes': {name: self.predict(params['sample_rate']) for name, params in PROCESSING_MODES.items()}
+        }
+
+    def log_summary(self):
+        """Выводит прогноз в лог"""
+        logger.info("-" * 60)
+        logger.info(f"ОЦЕНКА: {Path(self.video_path).name}")
+        logger.info(f"  {self.width}x{self.height}, {self.fps:.2f} fps, отрезок {self.duration:.0f}s")
+        logger.info(f"  Замер на {self.calibration_frames} кадрах: чтение {self.read_cost * 1000:.1f}ms, "
+                    f"пропуск {self.grab_cost * 1000:.1f}ms, сравнение {self.compare_cost * 1000:.1f}ms на кадр")
+        chosen = self.predict(self.sample_rate)
+        logger.info(f"  Sample rate {self.sample_rate}s: ~{_format_duration(chosen['runtime_s'])}, "
+                    f"пик памяти ~{chosen['peak_memory_mb']:.0f} МБ ({chosen['frames_analyzed']} кадров)")
+        for name, params in PROCESSING_MODES.items():
+            mode = self.predict(params['sample_rate'])
+            logger.info(f"    {name:<9} (sample rate {params['sample_rate']}s): ~{_format_duration(mode['runtime_s'])}, "
+                        f"~{mode['peak_memory_mb']:.0f} МБ")
+        logger.info("-" * 60)
+
+    def write(self, path: str):
+        """Сохраняет оценку в JSON"""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f, ensure_ascii=False, indent=2)
+        logger.info(f"✓ Оценка сохранена: {path}")
+
+
+def _format_duration(seconds: float) -> str:
+    minutes, secs = divmod(int(round(seconds)), 60)
+    return f"{minutes}m{secs:02d}s" if minutes else f"{secs}s"
+
+
+def estimate_path_for(output_path: str) -> str:
+    """Путь к оценке рядом с выходным файлом: lecture.md -> lecture.estimate.json"""
+    output_path = Path(output_path)
+    return str(output_path.with_name(f"{output_path.stem}.estimate.json"))
+
+
+def estimate_video(
+    video_path: str,
+    sample_rate: float = DEFAULT_SAMPLE_RATE,
+    crop_region: str = DEFAULT_CROP_REGION,
+    start_time: float = 0.0,
+    end_time: Optional[float] = None,
+    calibration_seconds: float = ESTIMATE_CALIBRATION_SECONDS,
+    luma_decode: bool = False,
+    decoder: str = DEFAULT_DECODER,
+    decode_process: bool = False,
+    analysis_width: Optional[int] = None
+) -> CostEstimate:
+    """
+    Оценивает время и память обработки видео, декодируя только calibration_seconds
+
+    В окне замера кадры поочерёдно читаются и пропускаются, поэтому
+    стоимость чтения и пропуска замеряется при любой частоте анализа.
+    Декодер, отдающий только кадры сетки (ffmpeg), читает их по сетке:
+    пропуски у него бесплатны, а декодирование входит в чтение.
+
+    Args:
+        video_path: Путь к видеофайлу
+        sample_rate: Частота анализа, для которой нужен прогноз
+        crop_region: Область анализа (влияет на стоимость сравнения)
+        start_time: Начало отрезка в секундах
+        end_time: Конец отрезка (None - до конца видео)
+        calibration_seconds: Длительность окна замера в секундах видео
+        luma_decode: Оценивать анализ по яркостной плоскости (см. VideoProcessor)
+        decoder: Декодер кадров ('opencv' или 'ffmpeg')
+        decode_process: Оценивать декодирование в отдельном процессе
+        analysis_width: Ширина анализа (влияет на стоимость сравнения, None - исходная)
+
+    Returns:
+        CostEstimate
+    """
+    with VideoProcessor(
+        video_path, sample_rate=sample_rate, crop_region=crop_region,
+        start_time=start_time, end_time=end_time, luma_decode=luma_decode, decoder=decoder,
+        decode_process=decode_process, analysis_width=analysis_width
+    ) as processor:
+        info = processor.metrics.info
+        estimate = CostEstimate(
+            str(video_path), processor.fps, info['width'], info['height'],
+            processor.start_frame, processor.end_frame, sample_rate
+        )
+        if processor.fps <= 0 or processor.end_frame <= processor.start_frame:
+            logger.warning(f"⚠ Нет кадров для оценки: {video_path}")
+            return estimate
+
+        # Окно замера - из середины отрезка, начало часто нетипично (заставка)
+        grid = processor.frame_interval if processor.decoder.grid_only else 2
+        window = min(processor.end_frame - processor.start_frame,
+                     max(2, int(calibration_seconds * processor.fps), 3 * grid))
+        target = processor.start_frame + (processor.end_frame - processor.start_frame - window) // 2
+        frame_number = processor.decoder.seek(target)
+
+        read_times, grab_times, copy_times, compare_times = [], [], [], []
+        previous_cropped = None
+        frame = None
+        frame_read = None
+        started = time.perf_counter()
+        for _ in range(window):
+            step_started = time.perf_counter()
+            if frame_number % grid == 0:
+                ret, current = processor.decoder.read()
+                read_times.append(time.perf_counter() - step_started)
+                if not ret:
+                    break
+                frame, frame_read = current, frame_number
+
+                step_started = time.perf_counter()
+                frame.copy()
+                copy_times.append(time.perf_counter() - step_started)
+
+                step_started = time.perf_counter()
+                cropped = processor._crop_frame_region(frame)
+                if previous_cropped is not None:
+                    processor.compare_frames(previous_cropped, cropped)
+                    compare_times.append(time.perf_counter() - step_started)
+                previous_cropped = cropped
+            else:
+                grabbed = processor.decoder.grab()
+                grab_times.append(time.perf_counter() - step_started)
+                if not grabbed:
+                    break
+            frame_number += 1
+
+        estimate.calibration_seconds = time.perf_counter() - started
+        estimate.calibration_frames = len(read_times) + len(grab_times)
+        # Первое чтение после перемотки дороже (декодирование с ключевого кадра) - в среднее не берём
+        estimate.read_cost = float(np.mean(read_times[1:] or read_times)) if read_times else 0.0
+        if processor.decoder.grid_only:
+            estimate.grab_cost = float(np.mean(grab_times)) if grab_times else 0.0
+        else:
+            estimate.grab_cost = float(np.mean(grab_times)) if grab_times else estimate.read_cost
+        estimate.copy_cost = float(np.mean(copy_times)) if copy_times else 0.0
+        estimate.compare_cost = float(np.mean(compare_times)) if compare_times else 0.0
+
+        if frame is not None:
+            estimate.frame_bytes = frame.nbytes
+            step_started = time.perf_counter()
+            color = frame
+            if processor.decoder.analysis_only:
+                # Кадры анализа не BGR - слайд перечитывается в цвете, это тоже стоимость сохранения
+                color = processor._read_bgr_frame(frame_read)
+            cv2.imencode('.png', color, [cv2.IMWRITE_PNG_COMPRESSION, 3])
+            estimate.save_cost = time.perf_counter() - step_started
+
+        estimate.baseline_rss = current_rss_bytes()
+
+    return estimate
@@ -0,0 +1,302 @@
+"""
+Модуль передачи кадров между процессами через разделяемую память
+
+FrameRing - кольцо слотов фиксированного размера (серая обрезка области
+анализа) в multiprocessing.shared_memory. Процесс-декодер пишет кадр в
+свободный слот, а по очереди передаёт только номер слота и номер кадра;
+читатели работают со слотом на месте, без pickle и копирования.
+
+SharedMemoryDecoder - декодер для VideoProcessor, который запускает
+обычный декодер (opencv / ffmpeg) в отдельном процессе: декодирование,
+обрезка и перевод в оттенки серого идут параллельно со сравнением кадров.
+"""
+
+import multiprocessing
+import queue
+from multiprocessing import shared_memory
+from typing import Optional, Tuple
+import logging
+
+import cv2
+import numpy as np
+
+from .config import FRAME_RING_SLOTS
+from .decoders import FrameDecoder, create_decoder
+
+logger = logging.getLogger(__name__)
+
+_QUEUE_POLL_SECONDS = 0.5  # Как часто ожидающая сторона проверяет, жив ли процесс на другом конце
+
+
+class FrameRing:
+    """Кольцо слотов uint8 одинаковой формы в разделяемой памяти"""
+
+    def __init__(self, slots: int, shape: Tuple[int, ...], name: Optional[str] = None):
+        """
+        Args:
+            slots: Количество слотов
+            shape: Форма кадра в слоте (например, (высота, ширина) серой обрезки)
+            name: Имя существующего кольца (None - создать новое)
+        """
+        self.slots = slots
+        self.shape = tuple(shape)
+        self.slot_bytes = int(np.prod(self.shape))
+        self.owner = name is None
+        self._memory = shared_memory.SharedMemory(
+            name=name, create=self.owner, size=max(1, slots * self.slot_bytes)
+        )
+        self._frames = np.ndarray((slots,) + self.shape, dtype=np.uint8, buffer=self._memory.buf)
+
+    @property
+    def name(self) -> str:
+        """Имя сегмента разделяемой памяти (для подключения из другого процесса)"""
+        return self._memory.name
+
+    def slot(self, index: int) -> np.ndarray:
+        """Кадр в слоте index (представление разделяемой памяти, без копирования)"""
+        return self._frames[index]
+
+    def close(self):
+        """Отключается от разделяемой памяти; создатель кольца также удаляет сегмент"""
+        if self._memory is None:
+            return
+        memory, self._memory = self._memory, None
+        self._frames = None
+        memory.close()
+        if self.owner:
+            memory.unlink()
+
+
+def _next_free_slot(free_slots, stop) -> Optional[int]:
+    """Ждёт свободный слот; None - если производителя остановили"""
+    while not stop.is_set():
+        try:
+            return free_slots.get(timeout=_QUEUE_POLL_SECONDS)
+        except queue.Empty:
+            continue
+    return None
+
+
+def _produce_frames(
+    ring_name: str,
+    slots: int,
+    shape: Tuple[int, int],
+    decoder_name: str,
+    video_path: str,
+    luma: bool,
+    interval: int,
+    crop: Tuple[int, int, int, int],
+    start_frame: int,
+    free_slots,
+    ready,
+    stop
+):
+    """
+    Процесс-декодер: пишет серые обрезки кадров сетки в слоты кольца
+
+    В очередь ready уходят (слот, номер_кадра); конец потока - (None, None),
+    ошибка - (None, текст_ошибки).
+    """
+    ring = FrameRing(slots, shape, name=ring_name)
+    decoder = None
+    try:
+        decoder = create_decoder(decoder_name, video_path, luma=luma)
+        decoder.set_analysis(interval, crop)
+        x, y, crop_width, crop_height = crop
+        position = decoder.seek(start_frame)
+
+        while not stop.is_set():
+            if position < start_frame or position % interval != 0:
+                if not decoder.grab():
+                    break
+                position += 1
+                continue
+
+            slot = _next_free_slot(free_slots, stop)
+            if slot is None:
+                break
+            ret, frame = decoder.read()
+            if not ret:
+                break
+            if not decoder.crops_region:
+                frame = frame[y:y+crop_height, x:x+crop_width]
+            target = ring.slot(slot)
+            if frame.ndim == 3:
+                cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY, dst=target)
+            else:
+                target[...] = frame
+            ready.put((slot, position))
+            position += 1
+
+        ready.put((None, None))
+    except Exception as e:
+        ready.put((None, f"{type(e).__name__}: {e}"))
+    finally:
+        if decoder is not None:
+            decoder.close()
+        ring.close()
+
+
+class SharedMemoryDecoder(FrameDecoder):
+    """
+    Декодер в отдельном процессе с передачей кадров через FrameRing
+
+    Внутри процесса работает обычный декодер (create_decoder), поэтому
+    сетка кадров и их нумерация те же. Процесс запускается через spawn
+    (форк процесса с загруженным OpenCV может зависнуть) и перезапускается
+    при перемотке. Прочитанный кадр - слот кольца: он действителен до
+    следующего read()/grab(), после чего слот возвращается декодеру.
+    """
+
+    analysis_only = True
+    crops_region = True
+    grid_only = True
+
+    def __init__(self, decoder_name: str, video_path: str, luma: bool = False, slots: int = FRAME_RING_SLOTS):
+        """
+        Args:
+            decoder_name: Декодер внутри процесса ('opencv' или 'ffmpeg')
+            video_path: Путь к видеофайлу
+            luma: Для OpenCV - читать плоскость Y
+            slots: Сколько кадров процесс-декодер может прочитать впрок
+
+        Raises:
+            ValueError: Неизвестный декодер, нет ffmpeg или видео не открывается
+        """
+        super().__init__(video_path)
+        # Метаданные и проверка параметров - тем же декодером, что будет работать в процессе
+        probe = create_decoder(decoder_name, video_path, luma=luma)
+        try:
+            self.name = probe.name
+            self.luma = getattr(probe, 'luma', False)
+            self.fps = probe.fps
+            self.total_frames = probe.total_frames
+            self.width = probe.width
+            self.height = probe.height
+        finally:
+            probe.close()
+
+        self.decoder_name = decoder_name
+        self.slots = slots
+        self.interval = None
+        self.crop = None
+        self.ring: Optional[FrameRing] = None
+        self.position = 0
+        self._context = multiprocessing.get_context('spawn')
+        self._process = None
+        self._free_slots = None
+        self._ready = None
+        self._stop_event = None
+        self._held = None       # Слот, отданный последним read()
+        self._closed = False
+
+    def set_analysis(self, interval: int, crop: Tuple[int, int, int, int], analysis_width: Optional[int] = None):
+        # Кольцо хранит обрезки в исходном разрешении, до ширины анализа их уменьшает VideoProcessor
+        self._stop()
+        if self.ring is not None:
+            self.ring.close()
+        self.interval = interval
+        self.crop = crop
+        _, _, crop_width, crop_height = crop
+        self.ring = FrameRing(self.slots, (crop_height, crop_width))
+
+    def _start(self):
+        if self.ring is None:
+            raise ValueError("Декодер в отдельном процессе: не задана сетка анализа (set_analysis)")
+        self._free_slots = self._context.Queue()
+        for slot in range(self.slots):
+            self._free_slots.put(slot)
+        self._ready = self._context.Queue()
+        self._stop_event = self._context.Event()
+        process = self._context.Process(
+            target=_produce_frames,
+            args=(self.ring.name, self.slots, self.ring.shape, self.decoder_name, self.video_path,
+                  self.luma, self.interval, self.crop, self.position,
+                  self._free_slots, self._ready, self._stop_event),
+            daemon=True
+        )
+        process.start()
+        # Только запущенный процесс: _stop() ждёт его завершения
+        self._process = process
+
+    def _stop(self):
+        """Останавливает процесс-декодер (кадры, прочитанные впрок, отбрасываются)"""
+        if self._process is None:
+            return
+        process, self._process = self._process, None
+        self._stop_event.set()
+        process.join(timeout=5)
+        if process.is_alive():
+            process.terminate()
+            process.join()
+        for channel in (self._free_slots, self._ready):
+            channel.close()
+            channel.cancel_join_thread()
+        self._free_slots = self._ready = self._stop_event = None
+        self._held = None
+
+    def _release(self):
+        """Возвращает процессу-декодеру слот, отданный последним read()"""
+        if self._held is not None:
+            self._free_slots.put(self._held)
+            self._held = None
+
+    def _next_ready(self) -> Tuple[Optional[int], object]:
+        """Следующий (слот, номер_кадра) от процесса-декодера"""
+        while True:
+            try:
+                return self._ready.get(timeout=_QUEUE_POLL_SECONDS)
+            except queue.Empty:
+                if not self._process.is_alive():
+                    # Сообщение могло прийти между таймаутом и проверкой
+                    try:
+                        return self._ready.get_nowait()
+                    except queue.Empty:
+                        return None, f"процесс завершился с кодом {self._process.exitcode}"
+
+    def is_opened(self) -> bool:
+        return not self._closed
+
+    def seek(self, target_frame: int) -> int:
+        self._stop()
+        self.position = max(0, target_frame)
+        if self.position > 0:
+            logger.info(f"Перемотка к {self.position / self.fps:.2f}s (кадр {self.position}, отдельный процесс)")
+        return self.position
+
+    def read(self) -> Tuple[bool, Optional[np.ndarray]]:
+        """
+        Следующий кадр сетки из кольца; (False, None) - только при конце видео
+
+        Raises:
+            RuntimeError: Процесс-декодер упал или сообщил об ошибке
+        """
+        if self.interval is not None and self.position % self.interval != 0:
+            raise ValueError(f"Декодер в отдельном процессе отдаёт только кадры сетки, запрошен кадр {self.position}")
+        if self._process is None:
+            self._start()
+        self._release()
+
+        slot, frame_number = self._next_ready()
+        if slot is None:
+            if frame_number is not None:
+                # Ошибка - не конец видео: иначе обработка молча оборвалась бы на этом кадре
+                raise RuntimeError(f"Ошибка декодера в отдельном процессе: {frame_number}")
+            return False, None
+        self._held = slot
+        self.position = frame_number + 1
+        return True, self.ring.slot(slot)
+
+    def grab(self) -> bool:
+        if self.interval is not None and self.position % self.interval == 0:
+            ret, _ = self.read()
+            return ret
+        self.position += 1
+        return self.position <= self.total_frames
+
+    def close(self):
+        self._stop()
+        if self.ring is not None:
+            self.ring.close()
+            self.ring = None
+        self._closed = True
@@ -0,0 +1,214 @@
+"""
+Модуль произвольного доступа к кадрам видео для отладочных инструментов
+
+FrameServer отдаёт полный кадр или обрезку анализа (та же область и ширина
+анализа, что у VideoProcessor) на любой момент видео. Прочитанные кадры и
+обрезки хранятся в LRU-кэше с бюджетом в байтах, поэтому повторный взгляд на
+то же место видео не декодирует его заново. Кадры читает OpenCVDecoder -
+тем же декодером, что и обработка, пиксель в пиксель; с индексом перемотки
+(seek_index.py) чтение вперёд внутри GOP идёт без перемотки. Готовый индекс
+рядом с видео читается всегда, а строится и записывается только по запросу
+(seek_index=True, как --seek-index у обработки).
+
+    with FrameServer("lecture.mp4", crop_region="center") as server:
+        for timestamp, similarity in server.profile(754.0, radius=5):
+            print(timestamp, similarity)
+"""
+
+from collections import OrderedDict
+from typing import Hashable, List, Optional, Tuple
+import logging
+
+import numpy as np
+
+from .config import DEFAULT_ANALYSIS_WIDTH, DEFAULT_CROP_REGION, FRAME_CACHE_MB
+from .decoders import OpenCVDecoder
+from .seek_index import load_seek_index, read_seek_index
+from .video_processor import VideoProcessor, crop_frame_region
+
+logger = logging.getLogger(__name__)
+
+
+class FrameCache:
+    """LRU-кэш массивов с бюджетом в байтах"""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.nbytes = 0        # Сколько байт занято сейчас
+        self.hits = 0
+        self.misses = 0
+        self._items = OrderedDict()
+
+    def __len__(self):
+        return len(self._items)
+
+    def get(self, key: Hashable) -> Optional[np.ndarray]:
+        item = self._items.get(key)
+        if item is None:
+            self.misses += 1
+            return None
+        self._items.move_to_end(key)
+        self.hits += 1
+        return item
+
+    def put(self, key: Hashable, array: np.ndarray) -> np.ndarray:
+        """
+        Кладёт массив в кэш, вытесняя давно не использованные
+
+        Массив становится только для чтения: его получат и следующие
+        обращения. Массив больше всего бюджета не кэшируется.
+
+        Returns:
+            Тот же массив
+        """
+        array.flags.writeable = False
+        if array.nbytes > self.max_bytes:
+            return array
+        previous = self._items.pop(key, None)
+        if previous is not None:
+            self.nbytes -= previous.nbytes
+        self._items[key] = array
+        self.nbytes += array.nbytes
+        while self.nbytes > self.max_bytes:
+            _, evicted = self._items.popitem(last=False)
+            self.nbytes -= evicted.nbytes
+        return array
+
+    def clear(self):
+        self._items.clear()
+        self.nbytes = 0
+
+
+class FrameServer:
+    """
+    Кадры и обрезки анализа по времени или номеру кадра
+
+    Не потокобезопасен. Используйте как контекстный менеджер или вызовите close().
+    """
+
+    def __init__(
+        self,
+        video_path: str,
+        crop_region: str = DEFAULT_CROP_REGION,
+        analysis_width: Optional[int] = DEFAULT_ANALYSIS_WIDTH,
+        cache_mb: float = FRAME_CACHE_MB,
+        seek_index: bool = False
+    ):
+        """
+        Args:
+            video_path: Путь к видеофайлу
+            crop_region: Область анализа (как у VideoProcessor)
+            analysis_width: Ширина анализа (None - исходное разрешение обрезки)
+            cache_mb: Бюджет кэша кадров и обрезок в МБ
+            seek_index: Построить индекс перемотки и записать его рядом с видео, если его
+                        нет (False - только прочитать готовый)
+
+        Raises:
+            ValueError: Если видео не открывается
+        """
+        self.video_path = video_path
+        self.crop_region = crop_region
+        self.analysis_width = analysis_width
+        self.cache = FrameCache(int(cache_mb * 1024 * 1024))
+        self.decoder = OpenCVDecoder(video_path)
+        self.fps = self.decoder.fps
+        self.total_frames = self.decoder.total_frames
+        self.width = self.decoder.width
+        self.height = self.decoder.height
+        if seek_index:
+            self.decoder.seek_index = load_seek_index(video_path, self.fps)
+        else:
+            index = read_seek_index(video_path)
+            if index is not None and abs(index.fps - self.fps) < 1e-6:
+                self.decoder.seek_index = index
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+        return False
+
+    def close(self):
+        self.decoder.close()
+        self.cache.clear()
+
+    @property
+    def duration(self) -> float:
+        return self.total_frames / self.fps if self.fps > 0 else 0.0
+
+    def frame_number(self, timestamp: float) -> int:
+        """Номер кадра, показанного в момент timestamp (в пределах видео)"""
+        return min(max(int(round(timestamp * self.fps)), 0), max(self.total_frames - 1, 0))
+
+    def frame(self, frame_number: int) -> Optional[np.ndarray]:
+        """
+        Полный кадр в BGR (только для чтения)
+
+        Returns:
+            Кадр или None, если видео закончилось раньше
+        """
+        key = ('frame', frame_number)
+        frame = self.cache.get(key)
+        if frame is not None:
+            return frame
+        frame = self._decode(frame_number)
+        return None if frame is None else self.cache.put(key, frame)
+
+    def crop(self, frame_number: int) -> Optional[np.ndarray]:
+        """Обрезка анализа кадра (только для чтения) или None, если кадра нет"""
+        key = ('crop', frame_number)
+        cropped = self.cache.get(key)
+        if cropped is not None:
+            return cropped
+        frame = self.frame(frame_number)
+        if frame is None:
+            return None
+        # Копия, а не срез: срез держал бы в памяти весь кадр и после его вытеснения
+        return self.cache.put(key, crop_frame_region(frame, self.crop_region, self.analysis_width).copy())
+
+    def frame_at(self, timestamp: float) -> Optional[np.ndarray]:
+        """Полный кадр в момент timestamp (секунды)"""
+        return self.frame(self.frame_number(timestamp))
+
+    def crop_at(self, timestamp: float) -> Optional[np.ndarray]:
+        """Обрезка анализа в момент timestamp (секунды)"""
+        return self.crop(self.frame_number(timestamp))
+
+    def similarity(self, first: float, second: float) -> Optional[float]:
+        """Сходство обрезок в моменты first и second - как его считает детектор"""
+        first_crop, second_crop = self.crop_at(first), self.crop_at(second)
+        if first_crop is None or second_crop is None:
+            return None
+        return VideoProcessor.compare_frames(first_crop, second_crop)
+
+    def profile(self, timestamp: float, radius: float = 5.0, step: float = 0.5) -> List[Tuple[float, float]]:
+        """
+        Сходство соседних моментов вокруг timestamp
+
+        Args:
+            timestamp: Центр в секундах
+            radius: Сколько секунд смотреть в каждую сторону
+            step: Шаг в секундах (как sample_rate детектора)
+
+        Returns:
+            [(время, сходство с предыдущим моментом)] от timestamp - radius + step
+            до timestamp + radius; провал ниже порога - смена слайда
+        """
+        count = int(round(2 * radius / step))
+        times = [max(0.0, timestamp - radius) + k * step for k in range(count + 1)]
+        times = [t for t in times if t * self.fps < self.total_frames]
+        return [(current, self.similarity(previous, current)) for previous, current in zip(times, times[1:])]
+
+    def _decode(self, frame_number: int) -> Optional[np.ndarray]:
+        """Кадр с декодера: перемотка (или докрутка внутри GOP) и чтение"""
+        decoder = self.decoder
+        position = decoder.position
+        if position != frame_number:
+            position = decoder.seek(frame_number)
+        while position < frame_number:
+            if not decoder.grab():
+                return None
+            position += 1
+        ret, frame = decoder.read()
+        return frame if ret else None
@@ -0,0 +1,393 @@
+"""
+Общая очередь заданий на сетевом диске для нескольких машин
+
+Очередь - это папка с файлами, без внешнего брокера:
+
+    .lse_queue/
+        jobs/<id>.json     - задание (пути относительно корня курса)
+        claims/<id>.lock   - захват задания: кто, до какого времени аренда
+        done/<id>.json     - результат
+
+Захват делается атомарным созданием файла (O_CREAT | O_EXCL), аренда
+продлевается heartbeat-потоком. Если узел упал, его аренда истекает, и
+любой другой узел забирает задание себе.
+
+Задание - это видео вместе с обрабатываемым отрезком (scope): предпросмотр
+и полная обработка одного видео - разные задания, и каждый запуск разбирает
+только задания своего отрезка. В идентификатор входят размер и время
+изменения видео, поэтому заменённое видео попадает в очередь заново.
+"""
+
+import json
+import os
+import socket
+import threading
+import time
+import uuid
+import hashlib
+from pathlib import Path
+from typing import Iterable, List, Optional
+import logging
+
+from .batch import BatchJob
+from .config import (
+    QUEUE_DIR_NAME,
+    QUEUE_LEASE_SECONDS,
+    QUEUE_HEARTBEAT_INTERVAL,
+    QUEUE_MAX_ATTEMPTS
+)
+
+logger = logging.getLogger(__name__)
+
+
+def _write_json_atomic(path: Path, data: dict):
+    """Записывает JSON через временный файл и rename (читатели не видят половину файла)"""
+    tmp_path = path.with_name(f".{path.name}.{uuid.uuid4().hex}.tmp")
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+
+def _read_json(path: Path) -> Optional[dict]:
+    """Читает JSON, None если файла нет (его могли удалить параллельно)"""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+
+
+class JobClaim:
+    """
+    Захваченное задание
+
+    Пока захват активен, фоновый поток продлевает аренду. Используется как
+    контекстный менеджер: при выходе без complete() задание освобождается.
+    """
+
+    def __init__(self, queue: 'JobQueue', job_id: str, job: BatchJob, token: str):
+        self.queue = queue
+        self.job_id = job_id
+        self.job = job
+        self.token = token  # Уникальный идентификатор именно этого захвата
+        self.lost = False   # Аренду забрал другой узел (например, мы зависли дольше срока)
+        self._stop = threading.Event()
+        self._heartbeat = threading.Thread(target=self._heartbeat_loop, daemon=True)
+
+    def __enter__(self):
+        self._heartbeat.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if not self._stop.is_set():
+            self.release()
+        return False
+
+    def _heartbeat_loop(self):
+        while not self._stop.wait(self.queue.heartbeat_interval):
+            if not self.queue._renew(self):
+                self.lost = True
+                logger.warning(f"⚠ Аренда задания {self.job.video_path.name} перехвачена другим узлом")
+                return
+
+    def _stop_heartbeat(self):
+        self._stop.set()
+        if self._heartbeat.is_alive():
+            self._heartbeat.join()
+
+    def complete(self, success: bool) -> bool:
+        """
+        Завершает задание (при неудаче - возвращает в очередь, пока есть попытки)
+
+        Returns:
+            False если аренду перехватил другой узел: результат не записан,
+            задание считается его
+        """
+        self._stop_heartbeat()
+        return self.queue._complete(self, success)
+
+    def release(self):
+        """Освобождает задание без результата (например, при прерывании)"""
+        self._stop_heartbeat()
+        self.queue._release(self)
+
+
+class JobQueue:
+    """Очередь заданий в папке на общем диске"""
+
+    def __init__(
+        self,
+        root: Path,
+        queue_dir: Optional[Path] = None,
+        lease_seconds: float = QUEUE_LEASE_SECONDS,
+        heartbeat_interval: float = QUEUE_HEARTBEAT_INTERVAL,
+        max_attempts: int = QUEUE_MAX_ATTEMPTS,
+        scope: str = ""
+    ):
+        """
+        Args:
+            root: Корень курса (пути заданий хранятся относительно него,
+                  поэтому узлы могут монтировать диск в разные места)
+            queue_dir: Папка очереди (по умолчанию root/.lse_queue)
+            lease_seconds: Срок аренды захвата
+            heartbeat_interval: Интервал продления аренды
+            max_attempts: Количество попыток на задание
+            scope: Обрабатываемый отрезок (batch.range_key), пустой - всё видео
+        """
+        self.root = Path(root)
+        self.queue_dir = Path(queue_dir) if queue_dir else self.root / QUEUE_DIR_NAME
+        self.lease_seconds = lease_seconds
+        self.heartbeat_interval = heartbeat_interval
+        self.max_attempts = max_attempts
+        self.scope = scope
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}"
+
+        self.jobs_dir = self.queue_dir / "jobs"
+        self.claims_dir = self.queue_dir / "claims"
+        self.done_dir = self.queue_dir / "done"
+        for directory in (self.jobs_dir, self.claims_dir, self.done_dir):
+            directory.mkdir(parents=True, exist_ok=True)
+
+    def job_id(self, job: BatchJob) -> str:
+        """Идентификатор задания - хеш пути видео относительно корня, отрезка, размера и времени изменения видео"""
+        relative = job.video_path.resolve().relative_to(self.root.resolve()).as_posix()
+        stat = job.video_path.stat()
+        key = f"{relative}|{self.scope}|{stat.st_size}|{int(stat.st_mtime)}"
+        return hashlib.sha1(key.encode('utf-8')).hexdigest()[:16]
+
+    def _to_job(self, data: dict) -> BatchJob:
+        return BatchJob(self.root / data['video'], self.root / data['transcript'], data.get('duration', 0.0))
+
+    def is_enqueued(self, job: BatchJob) -> bool:
+        """Есть ли уже такое задание в очереди"""
+        return (self.jobs_dir / f"{self.job_id(job)}.json").exists()
+
+    def enqueue(self, job: BatchJob, force: bool = False) -> bool:
+        """
+        Добавляет задание, если его ещё нет (безопасно вызывать с нескольких узлов)
+
+        Args:
+            job: Задание
+            force: Завершённое задание (готово или с ошибкой) вернуть в очередь
+                   со сброшенными попытками (--force)
+
+        Returns:
+            True если задание добавлено (или возвращено в очередь) этим вызовом
+        """
+        job_id = self.job_id(job)
+        root = self.root.resolve()
+        data = {
+            'id': job_id,
+            'video': job.video_path.resolve().relative_to(root).as_posix(),
+            'transcript': job.transcript_path.resolve().relative_to(root).as_posix(),
+            'duration': job.duration,
+            'scope': self.scope,
+            'attempts': 0
+        }
+        try:
+            fd = os.open(self.jobs_dir / f"{job_id}.json", os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+        except FileExistsError:
+            return force and self._reset_finished(job_id)
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False)
+        return True
+
+    def _reset_finished(self, job_id: str) -> bool:
+        """
+        Возвращает завершённое задание в очередь: попытки с нуля, отметка о результате удаляется
+
+        Незавершённое задание не трогаем - оно и так будет обработано
+        (возможно, прямо сейчас другим узлом).
+        """
+        done_path = self.done_dir / f"{job_id}.json"
+        job_path = self.jobs_dir / f"{job_id}.json"
+        data = _read_json(job_path)
+        if data is None or not done_path.exists():
+            return False
+        # Сначала попытки, потом отметка: пока отметка есть, задание не захватывают
+        data['attempts'] = 0
+        _write_json_atomic(job_path, data)
+        done_path.unlink(missing_ok=True)
+        logger.info(f"Задание {job_id} возвращено в очередь (--force)")
+        return True
+
+    def _jobs(self) -> List[dict]:
+        """Все задания отрезка этой очереди"""
+        jobs = []
+        for path in self.jobs_dir.glob("*.json"):
+            data = _read_json(path)
+            if data is not None and data.get('scope', "") == self.scope:
+                jobs.append(data)
+        return jobs
+
+    def _pending_jobs(self) -> List[dict]:
+        """Незавершённые задания, от самых длинных к коротким"""
+        pending = [data for data in self._jobs() if not (self.done_dir / f"{data['id']}.json").exists()]
+        return sorted(pending, key=lambda data: data.get('duration', 0.0), reverse=True)
+
+    def _claim_path(self, job_id: str) -> Path:
+        return self.claims_dir / f"{job_id}.lock"
+
+    def _try_create_claim(self, job_id: str, token: str) -> bool:
+        claim = {
+            'token': token,
+            'worker': self.worker_id,
+            'claimed_at': time.time(),
+            'lease_until': time.time() + self.lease_seconds
+        }
+        try:
+            fd = os.open(self._claim_path(job_id), os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+        except FileExistsError:
+            return False
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(claim, f)
+        return True
+
+    def _reclaim_if_stale(self, job_id: str) -> bool:
+        """
+        Убирает брошенный захват (аренда истекла)
+
+        Захват переименовывается (rename атомарен, побеждает один узел), затем
+        проверяется, что переименован именно просроченный захват. Если в гонке
+        утащили свежий захват - он возвращается на место.
+
+        Returns:
+            True если захват убран и задание можно пробовать захватить
+        """
+        claim_path = self._claim_path(job_id)
+        claim = _read_json(claim_path)
+        if claim is None:
+            # Захват исчез сам (или ещё дописывается) - попробуем захватить заново
+            return not claim_path.exists()
+        if claim.get('lease_until', 0) >= time.time():
+            return False
+
+        stale_path = claim_path.with_name(f"{claim_path.name}.{uuid.uuid4().hex}.stale")
+        try:
+            os.rename(claim_path, stale_path)
+        except FileNotFoundError:
+            return True  # Другой узел успел раньше
+
+        moved = _read_json(stale_path)
+        if moved is not None and moved.get('token') != claim.get('token'):
+            # Утащили чужой свежий захват - возвращаем (link не перезаписывает существующий файл)
+            try:
+                os.link(stale_path, claim_path)
+            except FileExistsError:
+                pass
+            stale_path.unlink(missing_ok=True)
+            return False
+
+        logger.warning(f"⚠ Забираем брошенное задание {job_id} у {claim.get('worker')}")
+        stale_path.unlink(missing_ok=True)
+        return True
+
+    def claim_next(self) -> Optional[JobClaim]:
+        """
+        Захватывает следующее свободное задание (или с просроченной арендой)
+
+        Returns:
+            JobClaim или None, если свободных заданий нет
+        """
+        for data in self._pending_jobs():
+            job_id = data['id']
+            if data.get('attempts', 0) >= self.max_attempts:
+                continue
+
+            token = uuid.uuid4().hex
+            if not self._try_create_claim(job_id, token):
+                if not self._reclaim_if_stale(job_id) or not self._try_create_claim(job_id, token):
+                    continue
+
+            # Задание могли завершить, пока мы его захватывали
+            if (self.done_dir / f"{job_id}.json").exists():
+                self._claim_path(job_id).unlink(missing_ok=True)
+                continue
+
+            return JobClaim(self, job_id, self._to_job(data), token)
+
+        return None
+
+    def has_unfinished(self) -> bool:
+        """Есть ли незавершённые задания (свободные или захваченные кем-то)"""
+        return any(data.get('attempts', 0) < self.max_attempts for data in self._pending_jobs())
+
+    def _owns(self, claim: JobClaim) -> bool:
+        current = _read_json(self._claim_path(claim.job_id))
+        return current is not None and current.get('token') == claim.token
+
+    def _renew(self, claim: JobClaim) -> bool:
+        """
+        Продлевает аренду. False - захват больше нам не принадлежит
+
+        Просроченную аренду не продлеваем: её уже может забирать другой узел
+        (_reclaim_if_stale). Между проверкой и записью захват всё равно могут
+        перехватить, поэтому после записи владелец проверяется ещё раз: из
+        двух одновременных записей остаётся одна, и второй узел увидит чужой
+        токен.
+        """
+        current = _read_json(self._claim_path(claim.job_id))
+        if current is None or current.get('token') != claim.token or current.get('lease_until', 0) < time.time():
+            return False
+        _write_json_atomic(self._claim_path(claim.job_id), {
+            'token': claim.token,
+            'worker': self.worker_id,
+            'claimed_at': time.time(),
+            'lease_until': time.time() + self.lease_seconds
+        })
+        return self._owns(claim)
+
+    def _complete(self, claim: JobClaim, success: bool) -> bool:
+        if claim.lost or not self._owns(claim):
+            # Задание уже у другого узла: его результат и счётчик попыток не трогаем
+            logger.warning(f"⚠ Аренда задания {claim.job.video_path.name} потеряна - результат не записан")
+            return False
+
+        job_path = self.jobs_dir / f"{claim.job_id}.json"
+        data = _read_json(job_path) or {}
+
+        if success:
+            _write_json_atomic(self.done_dir / f"{claim.job_id}.json", {
+                'id': claim.job_id,
+                'status': 'done',
+                'worker': self.worker_id,
+                'finished_at': time.time()
+            })
+        else:
+            data['attempts'] = data.get('attempts', 0) + 1
+            _write_json_atomic(job_path, data)
+            if data['attempts'] >= self.max_attempts:
+                _write_json_atomic(self.done_dir / f"{claim.job_id}.json", {
+                    'id': claim.job_id,
+                    'status': 'failed',
+                    'worker': self.worker_id,
+                    'finished_at': time.time()
+                })
+
+        self._release(claim)
+        return True
+
+    def _release(self, claim: JobClaim):
+        if self._owns(claim):
+            self._claim_path(claim.job_id).unlink(missing_ok=True)
+
+    def status(self, job_ids: Optional[Iterable[str]] = None) -> dict:
+        """
+        Сводка по заданиям отрезка: сколько всего, в работе, готово, с ошибкой
+
+        Args:
+            job_ids: Считать только эти задания (например, текущие версии видео курса)
+        """
+        if job_ids is None:
+            job_ids = [data['id'] for data in self._jobs()]
+        summary = {'total': 0, 'claimed': 0, 'done': 0, 'failed': 0}
+        for job_id in set(job_ids):
+            if not (self.jobs_dir / f"{job_id}.json").exists():
+                continue
+            summary['total'] += 1
+            if self._claim_path(job_id).exists():
+                summary['claimed'] += 1
+            result = _read_json(self.done_dir / f"{job_id}.json")
+            if result is not None:
+                summary['failed' if result.get('status') == 'failed' else 'done'] += 1
+        return summary
@@ -0,0 +1,172 @@
+"""
+Модуль поиска смен слайдов по ключевым кадрам (--keyframes)
+
+Кодировщик сам отмечает места, где картинка сильно изменилась: на смене
+сцены (слайда) он обычно ставит ключевой кадр, а между ключевыми кадрами -
+только разностные. Ключевые кадры декодируются независимо от соседей, поэтому
+их можно прочитать, не декодируя остальной поток.
+
+1. Индекс: номера ключевых кадров из пакетов контейнера (флаг keyframe и
+   pts) без декодирования - через PyAV или ffprobe, что найдётся.
+2. Грубый проход: сравниваются только ключевые кадры (правило эталона и
+   порог, как в двухпроходном режиме). Смена между двумя ключевыми кадрами
+   даёт окно - GOP, в котором она произошла, плюс шаг сетки после него.
+3. Точный проход - тот же, что в two_pass.py: частая сетка внутри окон.
+
+Если ни PyAV, ни ffprobe нет или ключевые кадры не реже сетки анализа
+(например, видео только из ключевых кадров), обработка идёт обычным
+просмотром сетки.
+"""
+
+import time
+from typing import Iterator, List, Optional, Tuple
+import logging
+
+import cv2
+import numpy as np
+
+from . import packets
+from .config import KEYFRAME_MIN_GAP
+from .metrics import STAGE_DECODE, STAGE_CROP
+from .packets import KeyframeIndex, frame_number_at, load_packets
+from .seek_index import read_seek_index
+from .two_pass import TwoPassScanner
+from .video_processor import VideoProcessor, crop_frame_region
+
+logger = logging.getLogger(__name__)
+
+
+def load_keyframe_index(video_path: str, fps: float) -> Optional[KeyframeIndex]:
+    """
+    Индекс ключевых кадров: из индекса перемотки рядом с видео (seek_index.py)
+    или по пакетам контейнера (PyAV или ffprobe)
+
+    Returns:
+        KeyframeIndex или None, если ни PyAV, ни ffprobe нет или контейнер не
+        отмечает ключевые кадры
+    """
+    saved = read_seek_index(video_path)
+    if saved is not None and abs(saved.fps - fps) < 1e-6:
+        return saved
+    index = load_packets(video_path, fps)
+    if index is None or not index.keyframes.any():
+        return None
+    return KeyframeIndex(index.keyframe_numbers(), index.backend, index.start_time)
+
+
+def iter_keyframes(video_path: str, index: KeyframeIndex, frames: List[int],
+                   fps: float) -> Iterator[Tuple[np.ndarray, int]]:
+    """
+    Декодирует только ключевые кадры из списка (номера - из index)
+
+    С PyAV декодер пропускает разностные кадры (skip_frame), остальной поток
+    только читается; без PyAV - перемотка OpenCV к каждому ключевому кадру.
+
+    Yields:
+        Кортежи (BGR_кадр, номер_кадра)
+    """
+    if not frames:
+        return
+    av = packets.av
+    if av is not None:
+        wanted = set(frames)
+        with av.open(video_path) as container:
+            stream = container.streams.video[0]
+            stream.codec_context.skip_frame = "NONKEY"
+            if frames[0] > 0:
+                target = index.start_time + frames[0] / fps
+                container.seek(int(target / stream.time_base), stream=stream, backward=True)
+            for frame in container.decode(stream):
+                if frame.pts is None:
+                    continue
+                frame_number = frame_number_at(float(frame.pts * stream.time_base), index.start_time, fps)
+                if frame_number > frames[-1]:
+                    break
+                if frame_number in wanted:
+                    yield frame.to_ndarray(format='bgr24'), frame_number
+        return
+
+    cap = cv2.VideoCapture(video_path)
+    try:
+        for frame_number in frames:
+            cap.set(cv2.CAP_PROP_POS_FRAMES, frame_number)
+            ret, frame = cap.read()
+            if not ret:
+                break
+            yield frame, frame_number
+    finally:
+        cap.release()
+
+
+class KeyframeScanner(TwoPassScanner):
+    """Двухпроходное детектирование, в котором грубый проход - ключевые кадры"""
+
+    name = "поиск смен по ключевым кадрам"
+    report_key = 'keyframe_scan'
+
+    def __init__(self, processor: VideoProcessor, index: KeyframeIndex, **kwargs):
+        """
+        Args:
+            processor: VideoProcessor, чьи отрезок, сетка, область и порог используются
+            index: Ключевые кадры видео
+            **kwargs: Ширина и запас порога грубого прохода (см. TwoPassScanner)
+        """
+        super().__init__(processor, **kwargs)
+        self.index = index
+
+    def describe(self) -> str:
+        return (f"{len(self.index)} ключевых кадров ({self.index.backend}), "
+                f"ширина {self.coarse_width}px, порог {self.coarse_threshold:.3f}")
+
+    def coarse_report(self) -> dict:
+        return {'keyframes': len(self.index), 'backend': self.index.backend}
+
+    def window_end(self, frame_number: int) -> int:
+        # Смена между ключевыми кадрами попадает на сетку не позже шага после ключевого кадра
+        return frame_number + self.processor.frame_interval
+
+    def iter_coarse(self, first_frame: np.ndarray, first_number: int) -> Iterator[Tuple[np.ndarray, float, int]]:
+        """
+        Обрезки ключевых кадров отрезка; эталон - последний ключевой кадр не позже
+        первого кадра отрезка (все обрезки - из BGR-кадров одного декодера)
+        """
+        processor = self.processor
+        metrics = processor.metrics
+        start = self.index.preceding(first_number)
+        frames = self.index.between(first_number if start is None else start, processor.end_frame)
+
+        keyframes = iter_keyframes(processor.video_path, self.index, frames, processor.fps)
+        while True:
+            started = time.perf_counter()
+            item = next(keyframes, None)
+            metrics.add_time(STAGE_DECODE, time.perf_counter() - started)
+            if item is None:
+                return
+            frame, frame_number = item
+            metrics.count('keyframes_decoded')
+
+            started = time.perf_counter()
+            cropped = crop_frame_region(frame, processor.crop_region, self.coarse_width)
+            metrics.add_time(STAGE_CROP, time.perf_counter() - started)
+            yield cropped, frame_number / processor.fps, frame_number
+
+
+def keyframe_scanner(processor: VideoProcessor) -> Optional[KeyframeScanner]:
+    """
+    Сканер по ключевым кадрам для processor или None, если он не применим
+    (обработка тогда идёт обычным просмотром сетки)
+    """
+    started = time.perf_counter()
+    index = processor.seek_index or load_keyframe_index(processor.video_path, processor.fps)
+    processor.metrics.add_time(STAGE_DECODE, time.perf_counter() - started)
+    if index is None:
+        logger.warning("⚠ Ключевые кадры недоступны (нужен PyAV или ffprobe) - обычный просмотр сетки")
+        return None
+
+    keyframes = index.between(processor.start_frame, processor.end_frame)
+    span = processor.end_frame - processor.start_frame
+    if len(keyframes) > 1 and span / len(keyframes) < processor.frame_interval * KEYFRAME_MIN_GAP:
+        logger.info(f"Ключевые кадры чаще {KEYFRAME_MIN_GAP} шагов сетки ({len(keyframes)} на отрезке) - "
+                    f"обычный просмотр сетки")
+        return None
+    return KeyframeScanner(processor, index)
@@ -9,9 +9,12 @@ import sys
 import logging
 from pathlib import Path
 
-from .video_processor import VideoProcessor
+# video_processor и shards тянут cv2 и scikit-image (~0.5s импорта) -
+# они импортируются в main() только когда обработка видео действительно начинается
 from .transcript_parser import TranscriptParser
 from .markdown_generator import MarkdownGenerator
+from .metrics import RunMetrics, metrics_path_for, profile_path_for, profile_run
+from .options import validate_options
 from .config import (
     DEFAULT_SAMPLE_RATE,
     DEFAULT_THRESHOLD,
@@ -22,7 +25,15 @@ from .config import (
     CROP_REGION_BOTTOM_RIGHT,
     CROP_REGION_TOP_RIGHT,
     CROP_REGION_TOP_LEFT,
-    CROP_REGION_CENTER
+    CROP_REGION_CENTER,
+    DEFAULT_BATCH_WORKERS,
+    SERVER_HOST,
+    SERVER_PORT,
+    DECODERS,
+    DEFAULT_DECODER,
+    DEFAULT_COMPARE_WORKERS,
+    DEFAULT_ANALYSIS_WIDTH,
+    DECODER_OPENCV
 )
 
 
@@ -90,6 +101,24 @@ def choose_crop_region() -> str:
             return DEFAULT_CROP_REGION
 
 
+def parse_time_arg(value: str) -> float:
+    """
+    Парсит время из командной строки: секунды ("90", "90.5") или "MM:SS" / "H:MM:SS"
+    
+    Args:
+        value: Строка времени
+    
+    Returns:
+        Время в секундах
+    """
+    try:
+        if ':' in value:
+            return float(TranscriptParser.parse_timestamp(value))
+        return float(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"неверный формат времени: {value} (ожидается секунды, MM:SS или H:MM:SS)")
+
+
 def parse_arguments():
     """Парсинг аргументов командной строки"""
     parser = argparse.ArgumentParser(
@@ -100,6 +129,11 @@ def parse_arguments():
   %(prog)s --video lecture.mp4 --transcript transcript.txt
   %(prog)s --video lecture.mp4 --transcript transcript.txt --output result.md --threshold 0.9
   %(prog)s --video lecture.mp4 --transcript transcript.txt --sample-rate 2.0 --crop-region center
+  %(prog)s --video lecture.mp4 --transcript transcript.txt --preview 5 --crop-region center
+  %(prog)s --video lecture.mp4 --transcript transcript.txt --start 30:00 --end 45:00
+  %(prog)s --video stream.mp4 --start 0 --end 2:00:00 --slides-dir part1 --shard-manifest part1.json
+  %(prog)s --serve --port 8765 --workers 4
+  %(prog)s --video lecture.mp4 --estimate
 
 Автор: AI Lab
         """
@@ -109,15 +143,15 @@ def parse_arguments():
     parser.add_argument(
         '--video',
         type=str,
-        required=True,
-        help='Путь к видеофайлу лекции (обязательный)'
+        default=None,
+        help='Путь к видеофайлу лекции (обязательный, кроме режима --serve)'
     )
     
     parser.add_argument(
         '--transcript',
         type=str,
-        required=True,
-        help='Путь к файлу транскрипта с таймкодами (обязательный)'
+        default=None,
+        help='Путь к файлу транскрипта с таймкодами (обязательный, кроме режима --shard-manifest)'
     )
     
     # Опциональные параметры
@@ -166,6 +200,173 @@ def parse_arguments():
         help='Заголовок для Markdown документа (по умолчанию: Лекция)'
     )
     
+    parser.add_argument(
+        '--start',
+        type=parse_time_arg,
+        default=0.0,
+        help='Начало обрабатываемого отрезка: секунды или MM:SS / H:MM:SS (по умолчанию: начало видео)'
+    )
+    
+    parser.add_argument(
+        '--end',
+        type=parse_time_arg,
+        default=None,
+        help='Конец обрабатываемого отрезка: секунды или MM:SS / H:MM:SS (по умолчанию: конец видео)'
+    )
+    
+    parser.add_argument(
+        '--preview',
+        type=float,
+        default=None,
+        metavar='N',
+        help='Предпросмотр: обработать только N минут начиная с --start (для проверки области и порога)'
+    )
+    
+    parser.add_argument(
+        '--time-budget',
+        type=parse_time_arg,
+        default=None,
+        help='Бюджет времени на обработку: секунды или MM:SS / H:MM:SS. При нехватке времени анализируемые '
+             'кадры прореживаются (участки попадают в отчёт о метриках)'
+    )
+    
+    parser.add_argument(
+        '--luma-decode',
+        action='store_true',
+        help='Анализировать яркость (Y) декодированного кадра без преобразования в BGR; '
+             'в цвете заново читаются только принятые слайды'
+    )
+    
+    parser.add_argument(
+        '--decoder',
+        type=str,
+        default=DEFAULT_DECODER,
+        choices=DECODERS,
+        help='Декодер кадров: opencv (по умолчанию) или ffmpeg - отдельный процесс ffmpeg, который сам '
+             'выбирает кадры сетки и вырезает область анализа (нужен ffmpeg в PATH)'
+    )
+    
+    parser.add_argument(
+        '--decode-process',
+        action='store_true',
+        help='Декодировать в отдельном процессе: серые обрезки области анализа передаются через '
+             'разделяемую память, декодирование идёт параллельно со сравнением кадров'
+    )
+    
+    parser.add_argument(
+        '--compare-workers',
+        type=int,
+        default=DEFAULT_COMPARE_WORKERS,
+        help='Потоков для сравнения кадров (по умолчанию 1). Больше 1 - двухфазный детектор: подписи '
+             'кадров и SSIM считаются в пуле потоков, решения принимаются последовательно, слайды те же'
+    )
+    
+    parser.add_argument(
+        '--tile-compare',
+        action='store_true',
+        help='Сравнивать кадры по сетке плиток и заканчивать сравнение, как только решение гарантировано '
+             '(те же слайды; изменившиеся плитки принятых слайдов пишутся в отчёт о метриках)'
+    )
+    
+    parser.add_argument(
+        '--analysis-width',
+        type=int,
+        default=DEFAULT_ANALYSIS_WIDTH,
+        help='Ширина анализа в пикселях (например 320): обрезка уменьшается до неё сразу после '
+             'декодирования, поэтому скорость и пороги не зависят от разрешения видео '
+             '(по умолчанию - исходное разрешение обрезки)'
+    )
+    
+    parser.add_argument(
+        '--two-pass',
+        action='store_true',
+        help='Двухпроходное детектирование: грубый просмотр в низком разрешении находит окна смены '
+             'слайдов, частая сетка (--sample-rate) декодируется и сравнивается только в них'
+    )
+    
+    parser.add_argument(
+        '--keyframes',
+        action='store_true',
+        help='Искать смены слайдов по ключевым кадрам видео (нужен PyAV или ffprobe): частая сетка '
+             'декодируется только в GOP со сменой; без них - обычный просмотр'
+    )
+    
+    parser.add_argument(
+        '--packet-prefilter',
+        action='store_true',
+        help='Искать места смен по всплескам размеров пакетов (нужен ffprobe или PyAV): частая сетка '
+             'декодируется у всплесков и в редких страховочных кадрах; без них - обычный просмотр'
+    )
+    
+    parser.add_argument(
+        '--seek-index',
+        action='store_true',
+        help='Индекс ключевых кадров рядом с видео ({видео}.seekindex.json, строится один раз, нужен '
+             'PyAV или ffprobe): перемотка не повторяется внутри GOP и при неудаче не читает видео с начала'
+    )
+    
+    parser.add_argument(
+        '--shard-manifest',
+        type=str,
+        default=None,
+        help='Режим шарда: обработать только видео (отрезок --start/--end) и сохранить манифест шарда '
+             'для последующего объединения (python -m src.shards merge ...)'
+    )
+    
+    parser.add_argument(
+        '--profile',
+        action='store_true',
+        help='Профилировать обработку через cProfile (статистика сохраняется рядом с --output в .prof)'
+    )
+    
+    parser.add_argument(
+        '--memory-report',
+        action='store_true',
+        help='Записывать в отчёт о метриках RSS и объём аллокаций NumPy по этапам (замедляет обработку)'
+    )
+    
+    parser.add_argument(
+        '--memory-budget',
+        type=float,
+        default=None,
+        metavar='MB',
+        help='Бюджет памяти в МБ: предупреждать, когда обработка близка к его превышению (включает --memory-report)'
+    )
+    
+    parser.add_argument(
+        '--estimate',
+        action='store_true',
+        help='Только оценить время и пиковую память обработки (по метаданным и замеру на нескольких '
+             'секундах видео), результат - в <output>.estimate.json'
+    )
+    
+    parser.add_argument(
+        '--serve',
+        action='store_true',
+        help='Режим сервера: принимать задания по HTTP и обрабатывать их в пуле прогретых процессов'
+    )
+    
+    parser.add_argument(
+        '--host',
+        type=str,
+        default=SERVER_HOST,
+        help=f'Адрес сервера (по умолчанию: {SERVER_HOST})'
+    )
+    
+    parser.add_argument(
+        '--port',
+        type=int,
+        default=SERVER_PORT,
+        help=f'Порт сервера (по умолчанию: {SERVER_PORT})'
+    )
+    
+    parser.add_argument(
+        '--workers',
+        type=int,
+        default=DEFAULT_BATCH_WORKERS,
+        help=f'Количество процессов обработки в режиме сервера (по умолчанию: {DEFAULT_BATCH_WORKERS})'
+    )
+    
     parser.add_argument(
         '--verbose', '-v',
         action='store_true',
@@ -175,27 +376,91 @@ def parse_arguments():
     return parser.parse_args()
 
 
+def processing_options(args) -> dict:
+    """Параметры обработки из аргументов командной строки - с именами как у api.ExtractionOptions"""
+    return {
+        'sample_rate': args.sample_rate,
+        'threshold': args.threshold,
+        'crop_region': args.crop_region,
+        'start_time': args.start,
+        'end_time': args.end,
+        'time_budget': args.time_budget,
+        'memory_budget_mb': args.memory_budget,
+        'decoder': args.decoder,
+        'compare_workers': args.compare_workers,
+        'analysis_width': args.analysis_width,
+        'two_pass': args.two_pass,
+        'keyframes': args.keyframes,
+        'packet_prefilter': args.packet_prefilter
+    }
+
+
+def validate_processing_options(args):
+    """
+    Проверка параметров обработки, общих для main.py и auto_process.py
+    
+    Правила - в options.validate_options (те же у API и сервера), здесь
+    добавляется только --preview, которого у API нет.
+    
+    Returns:
+        Список ошибок (пустой - параметры корректны)
+    """
+    errors = validate_options(processing_options(args), cli=True)
+    
+    if args.preview is not None:
+        if args.preview <= 0:
+            errors.append(f"preview должен быть больше 0, получено: {args.preview}")
+        if args.end is not None:
+            errors.append("preview и end нельзя указывать вместе")
+    
+    return errors
+
+
 def validate_arguments(args):
     """Проверка корректности аргументов"""
     errors = []
     
     # Проверка существования файлов
-    if not Path(args.video).exists():
+    if args.video is None:
+        errors.append("Не указан --video (обязателен, кроме режима --serve)")
+    elif not Path(args.video).exists():
         errors.append(f"Видеофайл не найден: {args.video}")
     
-    if not Path(args.transcript).exists():
+    if args.transcript is None:
+        if not args.shard_manifest and not args.estimate:
+            errors.append("Не указан --transcript (обязателен, кроме режимов --shard-manifest и --estimate)")
+    elif not Path(args.transcript).exists():
         errors.append(f"Файл транскрипта не найден: {args.transcript}")
     
-    # Проверка диапазонов параметров
-    if not 0.1 <= args.sample_rate <= 10:
-        errors.append(f"sample-rate должен быть в диапазоне 0.1-10, получено: {args.sample_rate}")
+    errors.extend(validate_processing_options(args))
     
-    if not 0.5 <= args.threshold <= 1.0:
-        errors.append(f"threshold должен быть в диапазоне 0.5-1.0, получено: {args.threshold}")
+    if args.time_budget is not None and args.shard_manifest:
+        # Шарды сводятся по общей сетке кадров, а бюджет её прореживает
+        errors.append("time-budget и shard-manifest нельзя указывать вместе")
+    
+    if args.shard_manifest and (args.luma_decode or args.decoder != DECODER_OPENCV or args.decode_process):
+        # Стыки шардов сводятся по BGR-кадрам OpenCV, другие кадры анализа дали бы другие решения
+        errors.append("shard-manifest работает только с декодером opencv без luma-decode и decode-process")
+    
+    if args.shard_manifest and (args.two_pass or args.keyframes or args.packet_prefilter):
+        # Стык сводится повтором полной сетки, а эти режимы выбирают кадры иначе
+        errors.append("shard-manifest нельзя указывать вместе с two-pass, keyframes и packet-prefilter")
     
     return errors
 
 
+def resolve_time_range(args):
+    """
+    Возвращает обрабатываемый отрезок (start, end) в секундах с учётом --preview
+    
+    Returns:
+        Кортеж (start, end), end = None - до конца видео
+    """
+    if args.preview is not None:
+        return args.start, args.start + args.preview * 60
+    return args.start, args.end
+
+
 def main():
     """Главная функция"""
     # Парсинг аргументов
@@ -205,6 +470,15 @@ def main():
     setup_logging(args.verbose)
     logger = logging.getLogger(__name__)
     
+    # Режим сервера: видео и транскрипты приходят в HTTP-запросах
+    if args.serve:
+        if args.workers < 1:
+            logger.error(f"workers должен быть не меньше 1, получено: {args.workers}")
+            sys.exit(1)
+        from .server import serve
+        serve(args.host, args.port, args.workers)
+        return
+    
     # Валидация аргументов
     errors = validate_arguments(args)
     if errors:
@@ -213,6 +487,25 @@ def main():
             logger.error(f"  - {error}")
         sys.exit(1)
     
+    # Оценка стоимости: видео не обрабатывается
+    if args.estimate:
+        from .estimator import estimate_path_for, estimate_video
+        start_time, end_time = resolve_time_range(args)
+        estimate = estimate_video(
+            args.video,
+            sample_rate=args.sample_rate,
+            crop_region=args.crop_region or DEFAULT_CROP_REGION,
+            start_time=start_time,
+            end_time=end_time,
+            luma_decode=args.luma_decode,
+            decoder=args.decoder,
+            decode_process=args.decode_process,
+            analysis_width=args.analysis_width
+        )
+        estimate.log_summary()
+        estimate.write(estimate_path_for(args.output))
+        return
+    
     try:
         logger.info("=" * 80)
         logger.info("LECTURE SLIDES EXTRACTOR")
@@ -231,44 +524,81 @@ def main():
         logger.info(f"  - Sample rate: {args.sample_rate}s")
         logger.info(f"  - Threshold: {args.threshold}")
         logger.info(f"  - Область анализа: {crop_region}")
+        start_time, end_time = resolve_time_range(args)
+        if start_time > 0 or end_time is not None:
+            end_str = f"{end_time:.1f}s" if end_time is not None else "конец"
+            logger.info(f"  - Отрезок: {start_time:.1f}s - {end_str}")
+        if args.time_budget is not None:
+            logger.info(f"  - Бюджет времени: {args.time_budget:.0f}s")
         logger.info("=" * 80)
         
-        # 1. Обработка видео
-        logger.info("\n[ШАГ 1/3] ОБРАБОТКА ВИДЕО")
-        video_processor = VideoProcessor(
-            video_path=args.video,
-            sample_rate=args.sample_rate,
-            threshold=args.threshold,
-            crop_region=crop_region
-        )
-        slides_data = video_processor.process(args.slides_dir)
+        metrics = RunMetrics(track_memory=args.memory_report, memory_budget_mb=args.memory_budget)
+        profile_path = profile_path_for(args.output) if args.profile else None
+        with profile_run(profile_path):
+            # 1. Обработка видео
+            logger.info("\n[ШАГ 1/3] ОБРАБОТКА ВИДЕО")
+            from .video_processor import VideoProcessor
+            with VideoProcessor(
+                video_path=args.video,
+                sample_rate=args.sample_rate,
+                threshold=args.threshold,
+                crop_region=crop_region,
+                start_time=start_time,
+                end_time=end_time,
+                metrics=metrics,
+                time_budget=args.time_budget,
+                luma_decode=args.luma_decode,
+                decoder=args.decoder,
+                decode_process=args.decode_process,
+                compare_workers=args.compare_workers,
+                tile_compare=args.tile_compare,
+                analysis_width=args.analysis_width,
+                two_pass=args.two_pass,
+                keyframes=args.keyframes,
+                packet_prefilter=args.packet_prefilter,
+                seek_index=args.seek_index
+            ) as video_processor:
+                slides_data = video_processor.process(args.slides_dir)
         
-        if not slides_data:
-            logger.error("Не удалось извлечь ни одного слайда из видео!")
-            sys.exit(1)
+            if not slides_data:
+                logger.error("Не удалось извлечь ни одного слайда из видео!")
+                sys.exit(1)
         
-        logger.info(f"✓ Извлечено слайдов: {len(slides_data)}")
+            logger.info(f"✓ Извлечено слайдов: {len(slides_data)}")
         
-        # 2. Парсинг транскрипта
-        logger.info("\n[ШАГ 2/3] ПАРСИНГ ТРАНСКРИПТА")
-        transcript_parser = TranscriptParser()
-        transcript_entries = transcript_parser.parse_transcript(args.transcript)
+            # Режим шарда: только манифест, транскрипт и Markdown - после объединения
+            if args.shard_manifest:
+                from .shards import write_shard_manifest
+                write_shard_manifest(video_processor, args.slides_dir, args.shard_manifest)
+                metrics.write(metrics_path_for(args.shard_manifest))
+                logger.info("Шард обработан. Объединение: python -m src.shards merge <манифесты> --slides-dir <папка>")
+                return
         
-        if not transcript_entries:
-            logger.warning("Транскрипт пуст или не удалось распарсить!")
-        else:
-            logger.info(f"✓ Распарсено сегментов транскрипта: {len(transcript_entries)}")
+            # 2. Парсинг транскрипта
+            logger.info("\n[ШАГ 2/3] ПАРСИНГ ТРАНСКРИПТА")
+            transcript_parser = TranscriptParser(metrics)
+            transcript_entries = transcript_parser.parse_transcript(args.transcript)
+            # Время везде абсолютное - оставляем только текст обработанного отрезка
+            transcript_entries = transcript_parser.filter_by_time(transcript_entries, start_time, end_time)
         
-        # 3. Генерация Markdown
-        logger.info("\n[ШАГ 3/3] ГЕНЕРАЦИЯ MARKDOWN")
-        markdown_generator = MarkdownGenerator(transcript_parser)
-        markdown_generator.generate_markdown(
-            slides_data=slides_data,
-            transcript_entries=transcript_entries,
-            output_path=args.output,
-            slides_dir=args.slides_dir,
-            title=args.title
-        )
+            if not transcript_entries:
+                logger.warning("Транскрипт пуст или не удалось распарсить!")
+            else:
+                logger.info(f"✓ Распарсено сегментов транскрипта: {len(transcript_entries)}")
+        
+            # 3. Генерация Markdown
+            logger.info("\n[ШАГ 3/3] ГЕНЕРАЦИЯ MARKDOWN")
+            markdown_generator = MarkdownGenerator(transcript_parser)
+            markdown_generator.generate_markdown(
+                slides_data=slides_data,
+                transcript_entries=transcript_entries,
+                output_path=args.output,
+                slides_dir=args.slides_dir,
+                title=args.title
+            )
+        
+        metrics.log_summary()
+        metrics.write(metrics_path_for(args.output))
         
         # Итоговая информация
         logger.info("\n" + "=" * 80)
@@ -279,6 +609,7 @@ def main():
         logger.info(f"  - Слайдов извлечено: {len(slides_data)}")
         logger.info(f"  - Папка со слайдами: {args.slides_dir}/")
         logger.info(f"  - Сегментов транскрипта: {len(transcript_entries)}")
+        logger.info(f"  - Метрики: {metrics_path_for(args.output)}")
         logger.info("=" * 80)
         
     except KeyboardInterrupt:
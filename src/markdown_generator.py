@@ -7,6 +7,7 @@ from typing import List, Tuple
 import logging
 
 from .transcript_parser import TranscriptParser
+from .metrics import STAGE_MARKDOWN
 
 logger = logging.getLogger(__name__)
 
@@ -17,9 +18,10 @@ class MarkdownGenerator:
     def __init__(self, transcript_parser: TranscriptParser):
         """
         Args:
-            transcript_parser: Экземпляр TranscriptParser
+            transcript_parser: Экземпляр TranscriptParser (его накопитель метрик общий с генератором)
         """
         self.parser = transcript_parser
+        self.metrics = transcript_parser.metrics
     
     def format_slide_section(
         self,
@@ -76,6 +78,29 @@ class MarkdownGenerator:
         """
         logger.info(f"Генерация Markdown документа: {output_path}")
         
+        with self.metrics.stage(STAGE_MARKDOWN):
+            markdown = self._render(slides_data, transcript_entries, slides_dir, title)
+            
+            # Сохраняем файл
+            output_file = Path(output_path)
+            output_file.parent.mkdir(parents=True, exist_ok=True)
+            
+            with open(output_file, 'w', encoding='utf-8') as f:
+                f.write(markdown)
+        
+        self.metrics.count('bytes_written', output_file.stat().st_size)
+        
+        logger.info(f"✓ Markdown документ сохранён: {output_path}")
+        logger.info(f"  Размер файла: {len(markdown)} символов")
+    
+    def _render(
+        self,
+        slides_data: List[Tuple[str, float]],
+        transcript_entries,
+        slides_dir: str,
+        title: str
+    ) -> str:
+        """Собирает текст Markdown документа"""
         # Начало документа
         markdown = f"# {title}\n\n"
         markdown += f"_Автоматически сгенерировано с помощью Lecture Slides Extractor_\n\n"
@@ -104,15 +129,7 @@ class MarkdownGenerator:
             
             logger.info(f"Добавлен слайд {i}/{len(slides_data)} ({len(text)} символов текста)")
         
-        # Сохраняем файл
-        output_file = Path(output_path)
-        output_file.parent.mkdir(parents=True, exist_ok=True)
-        
-        with open(output_file, 'w', encoding='utf-8') as f:
-            f.write(markdown)
-        
-        logger.info(f"✓ Markdown документ сохранён: {output_path}")
-        logger.info(f"  Размер файла: {len(markdown)} символов")
+        return markdown
 
 
 if __name__ == "__main__":
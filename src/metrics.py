@@ -0,0 +1,307 @@
+"""
+Модуль для сбора метрик обработки: время по этапам и счётчики
+"""
+
+import json
+import logging
+import sys
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Optional
+
+from .config import MEMORY_BUDGET_WARN_FRACTION
+
+logger = logging.getLogger(__name__)
+
+MB = 1024 * 1024
+
+REPORT_VERSION = 1
+
+# Этапы обработки (порядок вывода в отчёте)
+STAGE_DECODE = "decode"          # Чтение/пропуск кадров видео
+STAGE_CROP = "crop"              # Обрезка области анализа
+STAGE_COMPARE = "compare"        # compare_frames
+STAGE_SAVE = "save_slides"       # Запись PNG слайдов
+STAGE_TRANSCRIPT = "transcript"  # Парсинг транскрипта
+STAGE_MARKDOWN = "markdown"      # Распределение текста и запись Markdown
+
+STAGES_ORDER = [STAGE_DECODE, STAGE_CROP, STAGE_COMPARE, STAGE_SAVE, STAGE_TRANSCRIPT, STAGE_MARKDOWN]
+
+
+def peak_rss_bytes() -> int:
+    """Пиковый RSS процесса с момента запуска"""
+    import resource
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux отдаёт килобайты, macOS - байты
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+def current_rss_bytes() -> int:
+    """
+    Текущий RSS процесса
+    
+    На Linux читается из /proc, на других системах без внешних зависимостей
+    текущее значение недоступно - возвращается пиковое.
+    """
+    try:
+        with open('/proc/self/statm', 'r') as f:
+            resident_pages = int(f.read().split()[1])
+        import resource
+        return resident_pages * resource.getpagesize()
+    except (OSError, IndexError, ValueError):
+        return peak_rss_bytes()
+
+
+def _numpy_traced_bytes() -> int:
+    """Объём памяти NumPy-массивов, живых в данный момент (по tracemalloc)"""
+    import tracemalloc
+    import numpy as np
+    snapshot = tracemalloc.take_snapshot().filter_traces(
+        [tracemalloc.DomainFilter(True, np.lib.tracemalloc_domain)]
+    )
+    return sum(trace.size for trace in snapshot.traces)
+
+
+class _MemoryStage:
+    """Замеры памяти одного этапа"""
+    
+    def __init__(self, name: str):
+        self.name = name
+        self.rss_start = current_rss_bytes()
+        self.rss_peak = self.rss_start
+        self.rss_end = self.rss_start
+        self.process_peak_start = peak_rss_bytes()
+        self.traced_peak = 0     # Пик аллокаций Python/NumPy за этап
+        self.numpy_retained = 0  # NumPy-массивы, созданные за этап и живые в его конце
+    
+    def to_dict(self) -> dict:
+        return {
+            'rss_start_mb': round(self.rss_start / MB, 1),
+            'rss_end_mb': round(self.rss_end / MB, 1),
+            'peak_rss_mb': round(self.rss_peak / MB, 1),
+            'traced_peak_mb': round(self.traced_peak / MB, 1),
+            'numpy_retained_mb': round(self.numpy_retained / MB, 1)
+        }
+
+
+class RunMetrics:
+    """
+    Накопитель метрик одного запуска
+
+    Один экземпляр передаётся в VideoProcessor, TranscriptParser и
+    MarkdownGenerator; каждый добавляет время своих этапов и счётчики.
+    
+    Учёт памяти включается отдельно (track_memory или memory_budget_mb):
+    для крупных этапов записываются RSS и объём аллокаций NumPy (через
+    tracemalloc, что замедляет аллокации Python), а при приближении к
+    бюджету в лог пишется предупреждение.
+    """
+
+    def __init__(self, track_memory: bool = False, memory_budget_mb: Optional[float] = None):
+        """
+        Args:
+            track_memory: Записывать память по этапам
+            memory_budget_mb: Бюджет памяти процесса в МБ (включает учёт памяти)
+        """
+        self.stage_seconds: Dict[str, float] = {}
+        self.stage_calls: Dict[str, int] = {}
+        self.counters: Dict[str, int] = {}
+        self.info: Dict[str, object] = {}
+        self.started_at = time.time()
+        self._started = time.perf_counter()
+        
+        self.memory_budget_mb = memory_budget_mb
+        self.track_memory = track_memory or memory_budget_mb is not None
+        self.memory_stages: Dict[str, _MemoryStage] = {}
+        self._memory_stage: Optional[_MemoryStage] = None
+        self._budget_warned = False
+
+    def add_time(self, stage: str, seconds: float, calls: int = 1):
+        """Добавляет время этапа (для горячих циклов, где контекстный менеджер дорог)"""
+        self.stage_seconds[stage] = self.stage_seconds.get(stage, 0.0) + seconds
+        self.stage_calls[stage] = self.stage_calls.get(stage, 0) + calls
+
+    @contextmanager
+    def stage(self, stage: str):
+        """Контекстный менеджер: замеряет время блока и добавляет его к этапу"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_time(stage, time.perf_counter() - started)
+
+    def count(self, name: str, value: int = 1):
+        """Увеличивает счётчик"""
+        self.counters[name] = self.counters.get(name, 0) + value
+
+    @contextmanager
+    def memory_stage(self, name: str):
+        """
+        Контекстный менеджер: замеряет память крупного этапа (если учёт включён)
+        
+        Args:
+            name: Название этапа (extract_frames, detect_slide_changes, save_slides)
+        """
+        if not self.track_memory:
+            yield
+            return
+        
+        import tracemalloc
+        started_tracing = not tracemalloc.is_tracing()
+        if started_tracing:
+            tracemalloc.start()
+        tracemalloc.reset_peak()
+        
+        stage = _MemoryStage(name)
+        self.memory_stages[name] = stage
+        self._memory_stage = stage
+        try:
+            yield
+        finally:
+            stage.rss_end = current_rss_bytes()
+            stage.rss_peak = max(stage.rss_peak, stage.rss_end)
+            # Если пик процесса вырос за время этапа - он пришёлся на этот этап
+            process_peak = peak_rss_bytes()
+            if process_peak > stage.process_peak_start:
+                stage.rss_peak = max(stage.rss_peak, process_peak)
+            stage.traced_peak = tracemalloc.get_traced_memory()[1]
+            stage.numpy_retained = _numpy_traced_bytes()
+            self._memory_stage = None
+            if started_tracing:
+                tracemalloc.stop()
+            logger.info(f"Память [{name}]: RSS {stage.rss_start / MB:.0f} -> {stage.rss_end / MB:.0f} МБ "
+                        f"(пик {stage.rss_peak / MB:.0f} МБ), аллокации до {stage.traced_peak / MB:.0f} МБ")
+            self.check_memory()
+
+    def check_memory(self, projected_bytes: int = 0) -> bool:
+        """
+        Проверяет память процесса относительно бюджета
+        
+        Args:
+            projected_bytes: Сколько ещё памяти этап ожидаемо займёт (прогноз)
+        
+        Returns:
+            True, если RSS с учётом прогноза укладывается в бюджет
+        """
+        if not self.track_memory:
+            return True
+        
+        rss = current_rss_bytes()
+        if self._memory_stage is not None:
+            self._memory_stage.rss_peak = max(self._memory_stage.rss_peak, rss)
+        if self.memory_budget_mb is None:
+            return True
+        
+        budget = self.memory_budget_mb * MB
+        if rss + projected_bytes < budget * MEMORY_BUDGET_WARN_FRACTION:
+            return True
+        
+        if not self._budget_warned:
+            self._budget_warned = True
+            stage = self._memory_stage.name if self._memory_stage is not None else "-"
+            logger.warning(f"⚠ Память близка к бюджету {self.memory_budget_mb:.0f} МБ [{stage}]: "
+                           f"RSS {rss / MB:.0f} МБ, ожидается ещё {projected_bytes / MB:.0f} МБ. "
+                           f"Увеличьте --sample-rate или обрабатывайте видео по частям (--start/--end)")
+        return False
+
+    @property
+    def elapsed(self) -> float:
+        """Время с момента создания в секундах"""
+        return time.perf_counter() - self._started
+
+    def to_dict(self) -> dict:
+        """Отчёт в виде словаря (для JSON)"""
+        ordered = [s for s in STAGES_ORDER if s in self.stage_seconds]
+        ordered += sorted(s for s in self.stage_seconds if s not in STAGES_ORDER)
+        return {
+            'version': REPORT_VERSION,
+            'started_at': time.strftime('%Y-%m-%dT%H:%M:%S', time.localtime(self.started_at)),
+            'wall_seconds': round(self.elapsed, 4),
+            'stages': {
+                name: {
+                    'seconds': round(self.stage_seconds[name], 4),
+                    'calls': self.stage_calls.get(name, 0)
+                }
+                for name in ordered
+            },
+            'counters': dict(sorted(self.counters.items())),
+            'memory': self._memory_report(),
+            'info': self.info
+        }
+
+    def _memory_report(self) -> Optional[dict]:
+        """Раздел отчёта о памяти (None - учёт выключен)"""
+        if not self.track_memory:
+            return None
+        return {
+            'budget_mb': self.memory_budget_mb,
+            'budget_warning': self._budget_warned,
+            'peak_rss_mb': round(peak_rss_bytes() / MB, 1),
+            'stages': {name: stage.to_dict() for name, stage in self.memory_stages.items()}
+        }
+
+    def write(self, path: str):
+        """Сохраняет отчёт в JSON"""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f, ensure_ascii=False, indent=2)
+        logger.info(f"✓ Отчёт о метриках сохранён: {path}")
+
+    def log_summary(self):
+        """Краткая сводка по этапам в лог"""
+        report = self.to_dict()
+        logger.info(f"Время по этапам (всего {report['wall_seconds']:.2f}s):")
+        for name, stage in report['stages'].items():
+            logger.info(f"  - {name}: {stage['seconds']:.2f}s ({stage['calls']} вызовов)")
+        for name, value in report['counters'].items():
+            logger.info(f"  - {name}: {value}")
+        if report['memory'] is not None:
+            logger.info(f"  - Пиковый RSS: {report['memory']['peak_rss_mb']:.0f} МБ")
+
+
+def metrics_path_for(output_path: str) -> str:
+    """Путь к отчёту о метриках рядом с выходным файлом: lecture.md -> lecture.metrics.json"""
+    output_path = Path(output_path)
+    return str(output_path.with_name(f"{output_path.stem}.metrics.json"))
+
+
+def profile_path_for(output_path: str) -> str:
+    """Путь к файлу cProfile рядом с выходным файлом: lecture.md -> lecture.prof"""
+    output_path = Path(output_path)
+    return str(output_path.with_name(f"{output_path.stem}.prof"))
+
+
+@contextmanager
+def profile_run(path: Optional[str], top: int = 25):
+    """
+    Оборачивает блок в cProfile (если указан путь)
+    
+    Статистика сохраняется в path (смотреть: python -m pstats file.prof или snakeviz),
+    самые дорогие по накопленному времени функции выводятся в лог.
+    
+    Args:
+        path: Файл для статистики (None - профилирование выключено)
+        top: Сколько функций вывести в лог
+    """
+    if path is None:
+        yield
+        return
+    
+    import cProfile
+    import io
+    import pstats
+    
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        profiler.dump_stats(path)
+        stream = io.StringIO()
+        pstats.Stats(profiler, stream=stream).sort_stats('cumulative').print_stats(top)
+        logger.info(f"✓ Профиль cProfile сохранён: {path}")
+        logger.info(stream.getvalue())
@@ -0,0 +1,117 @@
+"""
+Модуль проверки параметров обработки
+
+Одни и те же правила для командной строки (main.py, auto_process.py),
+программного интерфейса (api.ExtractionOptions) и HTTP-сервера. Параметры
+передаются обычным словарём с именами как у ExtractionOptions; отсутствующие
+ключи не проверяются.
+"""
+
+import shutil
+from typing import List, Mapping
+
+from .config import (
+    CROP_REGION_BOTTOM_LEFT,
+    CROP_REGION_BOTTOM_RIGHT,
+    CROP_REGION_TOP_RIGHT,
+    CROP_REGION_TOP_LEFT,
+    CROP_REGION_CENTER,
+    DECODERS,
+    DECODER_FFMPEG,
+    FFMPEG_BINARY,
+    ANALYSIS_WIDTH_MIN
+)
+
+CROP_REGIONS = (CROP_REGION_BOTTOM_LEFT, CROP_REGION_BOTTOM_RIGHT, CROP_REGION_TOP_RIGHT,
+                CROP_REGION_TOP_LEFT, CROP_REGION_CENTER)
+
+# Режимы, заменяющие просмотр сетки (не больше одного)
+SCAN_MODES = ('two_pass', 'keyframes', 'packet_prefilter')
+
+NUMERIC_OPTIONS = ('sample_rate', 'threshold', 'start_time', 'end_time', 'time_budget',
+                   'memory_budget_mb', 'compare_workers', 'analysis_width')
+INTEGER_OPTIONS = ('compare_workers', 'analysis_width')
+
+# Имена флагов командной строки, которые не получаются заменой '_' на '-'
+CLI_NAMES = {'start_time': 'start', 'end_time': 'end', 'memory_budget_mb': 'memory-budget'}
+
+
+def validate_options(options: Mapping, cli: bool = False) -> List[str]:
+    """
+    Проверяет параметры обработки
+
+    Args:
+        options: Параметры с именами как у ExtractionOptions (sample_rate, threshold, ...)
+        cli: Называть параметры в сообщениях как флаги командной строки
+
+    Returns:
+        Список ошибок (пустой - параметры корректны)
+    """
+    def name(key: str) -> str:
+        return CLI_NAMES.get(key, key.replace('_', '-')) if cli else key
+
+    errors = []
+
+    # Типы: словарь мог прийти из JSON
+    for key in NUMERIC_OPTIONS:
+        value = options.get(key)
+        if value is None:
+            continue
+        integer = key in INTEGER_OPTIONS
+        if isinstance(value, bool) or not isinstance(value, int if integer else (int, float)):
+            errors.append(f"{name(key)} должен быть {'целым ' if integer else ''}числом, получено: {value!r}")
+    if errors:
+        return errors
+
+    sample_rate = options.get('sample_rate')
+    if sample_rate is not None and not 0.1 <= sample_rate <= 10:
+        errors.append(f"{name('sample_rate')} должен быть в диапазоне 0.1-10, получено: {sample_rate}")
+
+    threshold = options.get('threshold')
+    if threshold is not None and not 0.5 <= threshold <= 1.0:
+        errors.append(f"{name('threshold')} должен быть в диапазоне 0.5-1.0, получено: {threshold}")
+
+    start_time = options.get('start_time') or 0.0
+    if start_time < 0:
+        errors.append(f"{name('start_time')} не может быть отрицательным, получено: {start_time}")
+
+    end_time = options.get('end_time')
+    if end_time is not None and end_time <= start_time:
+        errors.append(f"{name('end_time')} должен быть больше {name('start_time')}, "
+                      f"получено: {start_time} - {end_time}")
+
+    time_budget = options.get('time_budget')
+    if time_budget is not None and time_budget <= 0:
+        errors.append(f"{name('time_budget')} должен быть больше 0, получено: {time_budget}")
+
+    # Режимы, заменяющие просмотр сетки, - не больше одного, и без бюджета времени (он сам меняет сетку)
+    scan_modes = [name(key) for key in SCAN_MODES if options.get(key)]
+    if len(scan_modes) > 1:
+        errors.append(f"{' и '.join(scan_modes)} нельзя указывать вместе")
+    if scan_modes and time_budget is not None:
+        errors.append(f"{name('time_budget')} и {scan_modes[0]} нельзя указывать вместе")
+
+    crop_region = options.get('crop_region')
+    if crop_region is not None and crop_region not in CROP_REGIONS:
+        errors.append(f"{name('crop_region')} должен быть одним из {', '.join(CROP_REGIONS)}, получено: {crop_region}")
+
+    decoder = options.get('decoder')
+    if decoder is not None and decoder not in DECODERS:
+        errors.append(f"{name('decoder')} должен быть одним из {', '.join(DECODERS)}, получено: {decoder}")
+    elif decoder == DECODER_FFMPEG and shutil.which(FFMPEG_BINARY) is None:
+        errors.append(f"Декодер ffmpeg: {FFMPEG_BINARY} не найден в PATH")
+
+    memory_budget = options.get('memory_budget_mb')
+    if memory_budget is not None and memory_budget <= 0:
+        errors.append(f"{name('memory_budget_mb')} должен быть больше 0, получено: {memory_budget}")
+
+    compare_workers = options.get('compare_workers')
+    if compare_workers is not None and compare_workers < 1:
+        errors.append(f"{name('compare_workers')} должен быть не меньше 1, получено: {compare_workers}")
+
+    analysis_width = options.get('analysis_width')
+    if analysis_width is not None and analysis_width < ANALYSIS_WIDTH_MIN:
+        errors.append(f"{name('analysis_width')} должен быть не меньше {ANALYSIS_WIDTH_MIN}, "
+                      f"получено: {analysis_width}")
+
+    return errors
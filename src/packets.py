@@ -0,0 +1,143 @@
+"""
+Модуль чтения метаданных пакетов видеопотока без декодирования
+
+Флаги ключевых кадров, pts и размеры пакетов читаются из контейнера через
+PyAV, а без него - через ffprobe. Этим пользуются поиск смен по ключевым
+кадрам (keyframes.py), фильтр по размерам пакетов (prefilter.py) и индекс
+перемотки (seek_index.py).
+"""
+
+import bisect
+import json
+import shutil
+import subprocess
+from typing import List, Optional, Tuple
+import logging
+
+import numpy as np
+
+from .config import FFPROBE_BINARY, FFPROBE_TIMEOUT
+
+logger = logging.getLogger(__name__)
+
+try:
+    import av
+except ImportError:  # PyAV необязателен: без него пакеты читаются через ffprobe
+    av = None
+
+BACKEND_PYAV = "pyav"
+BACKEND_FFPROBE = "ffprobe"
+
+
+def frame_number_at(timestamp: float, start_time: float, fps: float) -> int:
+    """pts в секундах -> номер кадра от первого кадра видео"""
+    return int(round((timestamp - start_time) * fps))
+
+
+class PacketIndex:
+    """Пакеты видеопотока в порядке показа: номер кадра, размер, ключевой ли кадр"""
+
+    def __init__(self, times: List[float], sizes: List[int], keyframes: List[bool], fps: float, backend: str):
+        """
+        Args:
+            times: pts пакетов в секундах
+            sizes: Размеры пакетов в байтах
+            keyframes: Флаги ключевых кадров
+            fps: Частота кадров (номера кадров - в нумерации OpenCV)
+            backend: Чем прочитаны пакеты: 'pyav' или 'ffprobe'
+        """
+        order = np.argsort(times, kind='stable')
+        self.times = np.asarray(times, dtype=np.float64)[order]   # pts в секундах
+        self.start_time = float(self.times[0])                     # pts первого кадра видео (кадр 0)
+        self.frames = np.round((self.times - self.start_time) * fps).astype(np.int64)
+        self.sizes = np.asarray(sizes, dtype=np.int64)[order]
+        self.keyframes = np.asarray(keyframes, dtype=bool)[order]
+        self.backend = backend
+
+    def __len__(self):
+        return len(self.frames)
+
+    def keyframe_numbers(self) -> List[int]:
+        """Номера ключевых кадров"""
+        return sorted(set(self.frames[self.keyframes].tolist()))
+
+
+class KeyframeIndex:
+    """Номера ключевых кадров видео (в нумерации кадров OpenCV)"""
+
+    def __init__(self, frames: List[int], backend: str, start_time: float = 0.0):
+        self.frames = sorted(set(frames))
+        self.backend = backend          # Чем построен индекс: 'pyav' или 'ffprobe'
+        self.start_time = start_time    # pts первого кадра видео в секундах (кадр 0)
+
+    def __len__(self):
+        return len(self.frames)
+
+    def __repr__(self):
+        return f"KeyframeIndex({len(self.frames)} кадров, {self.backend})"
+
+    def between(self, start_frame: int, end_frame: int) -> List[int]:
+        """Ключевые кадры из [start_frame, end_frame)"""
+        return self.frames[bisect.bisect_left(self.frames, start_frame):bisect.bisect_left(self.frames, end_frame)]
+
+    def preceding(self, frame_number: int) -> Optional[int]:
+        """Последний ключевой кадр не позже frame_number"""
+        position = bisect.bisect_right(self.frames, frame_number)
+        return self.frames[position - 1] if position else None
+
+
+def _read_pyav(video_path: str) -> Tuple[List[float], List[int], List[bool]]:
+    """pts, размеры и флаги пакетов через PyAV (только демультиплексирование)"""
+    times, sizes, keyframes = [], [], []
+    with av.open(video_path) as container:
+        stream = container.streams.video[0]
+        for packet in container.demux(stream):
+            if packet.pts is None:
+                continue
+            times.append(float(packet.pts * stream.time_base))
+            sizes.append(packet.size)
+            keyframes.append(packet.is_keyframe)
+    return times, sizes, keyframes
+
+
+def _read_ffprobe(binary: str, video_path: str) -> Tuple[List[float], List[int], List[bool]]:
+    """pts, размеры и флаги пакетов через ffprobe (флаг K в packet.flags)"""
+    command = [binary, '-v', 'error', '-select_streams', 'v:0',
+               '-show_entries', 'packet=pts_time,size,flags', '-of', 'json', video_path]
+    result = subprocess.run(command, capture_output=True, timeout=FFPROBE_TIMEOUT)
+    if result.returncode != 0:
+        raise ValueError(f"ffprobe завершился с кодом {result.returncode}: "
+                         f"{result.stderr.decode('utf-8', 'replace').strip()[-500:]}")
+    times, sizes, keyframes = [], [], []
+    for packet in json.loads(result.stdout or b'{}').get('packets', []):
+        if packet.get('pts_time') in (None, 'N/A'):
+            continue
+        times.append(float(packet['pts_time']))
+        sizes.append(int(packet.get('size', 0)))
+        keyframes.append('K' in packet.get('flags', ''))
+    return times, sizes, keyframes
+
+
+def load_packets(video_path: str, fps: float) -> Optional[PacketIndex]:
+    """
+    Читает метаданные пакетов через PyAV или ffprobe
+
+    Returns:
+        PacketIndex или None, если ни PyAV, ни ffprobe нет или пакеты не прочитались
+    """
+    readers = []
+    if av is not None:
+        readers.append((BACKEND_PYAV, lambda: _read_pyav(video_path)))
+    binary = shutil.which(FFPROBE_BINARY)
+    if binary is not None:
+        readers.append((BACKEND_FFPROBE, lambda: _read_ffprobe(binary, video_path)))
+
+    for backend, read in readers:
+        try:
+            times, sizes, keyframes = read()
+        except Exception as e:  # Ошибки PyAV и ffprobe: пробуем следующий способ
+            logger.warning(f"⚠ {backend} не прочитал пакеты {video_path}: {e}")
+            continue
+        if times:
+            return PacketIndex(times, sizes, keyframes, fps, backend)
+    return None
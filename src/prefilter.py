@@ -0,0 +1,156 @@
+"""
+Модуль фильтра смен слайдов по размерам пакетов (--packet-prefilter)
+
+Статичный слайд сжимается в крошечные разностные кадры, а смена слайда даёт
+всплеск: первый кадр нового слайда кодируется почти целиком. Размеры пакетов
+известны без декодирования (packets.py), поэтому места смен можно найти
+заранее:
+
+1. Всплески: самый большой разностный пакет каждого шага сетки сравнивается
+   со скользящей медианой за PACKET_BASELINE_SECONDS - больше в
+   PACKET_BURST_FACTOR раз значит всплеск. Если кодировщик поставил на смену
+   ключевой кадр, всплеска может не быть, зато размер ключевого кадра
+   заметно отличается от предыдущего (PACKET_KEYFRAME_CHANGE).
+2. Окна: шаг сетки до и после каждого всплеска - туда попадают кадр сетки
+   со старым слайдом и кадр с новым. Ключевой кадр другого размера говорит
+   лишь о смене где-то в предыдущем GOP - окно на весь GOP.
+3. Страховка: кадры через PACKET_SAFETY_INTERVAL (с перемоткой к каждому)
+   служат грубым проходом two_pass.py.
+4. Точный проход - тот же, что в two_pass.py, с тем же эталоном и выдержкой
+   MIN_SLIDE_DURATION: окна всплесков декодируются всегда, а страховочный
+   кадр, всё ещё отличающийся от эталона, открывает окно на весь промежуток
+   до предыдущего (смена без всплеска или внутри выдержки).
+
+Размеры пакетов зависят от всего кадра, а не от области анализа: движение
+лектора поднимает медиану, но не даёт всплесков в несколько раз. Если ни
+PyAV, ни ffprobe нет или видео состоит из одних ключевых кадров, фильтр
+отключается и обработка идёт обычным просмотром сетки.
+"""
+
+import time
+from typing import Iterator, List, Optional, Tuple
+import logging
+
+import numpy as np
+
+from .config import (PACKET_BASELINE_SECONDS, PACKET_BURST_FACTOR, PACKET_BURST_MIN_BYTES,
+                     PACKET_KEYFRAME_CHANGE, PACKET_SAFETY_INTERVAL)
+from .metrics import STAGE_DECODE, STAGE_CROP
+from .packets import PacketIndex, load_packets
+from .two_pass import TwoPassScanner, merge_windows
+from .video_processor import VideoProcessor
+
+logger = logging.getLogger(__name__)
+
+
+def burst_windows(index: PacketIndex, step: int, fps: float) -> List[Tuple[int, int]]:
+    """
+    Окна [начало, конец), в которых размер пакетов выдаёт смену картинки
+
+    Args:
+        index: Пакеты видео
+        step: Шаг сетки анализа в кадрах
+        fps: Частота кадров (для окна медианы)
+
+    Returns:
+        Отсортированные окна (не объединённые): шаг сетки до и после каждого
+        всплеска разностного пакета и GOP перед ключевым кадром с резко
+        изменившимся размером (смена где-то в нём) плюс шаг сетки после
+    """
+    windows = set()
+
+    delta = ~index.keyframes
+    if delta.any():
+        frames, sizes = index.frames[delta], index.sizes[delta]
+        bins = frames // step
+        # Самый большой пакет каждого шага и его кадр: последний в шаге при сортировке по (шаг, размер)
+        order = np.lexsort((sizes, bins))
+        sorted_bins = bins[order]
+        last = np.append(sorted_bins[1:] != sorted_bins[:-1], True)
+        peaks = np.zeros(int(bins.max()) + 1, dtype=np.int64)
+        peak_frames = np.zeros_like(peaks)
+        peaks[sorted_bins[last]] = sizes[order][last]
+        peak_frames[sorted_bins[last]] = frames[order][last]
+
+        window = max(1, int(round(PACKET_BASELINE_SECONDS * fps / step)))
+        for k in range(1, len(peaks)):
+            baseline = float(np.median(peaks[max(0, k - window):k]))
+            if peaks[k] > PACKET_BURST_FACTOR * baseline and peaks[k] > baseline + PACKET_BURST_MIN_BYTES:
+                frame_number = int(peak_frames[k])
+                windows.add((frame_number - step, frame_number + step + 1))
+
+    key_frames, key_sizes = index.frames[index.keyframes], index.sizes[index.keyframes]
+    for previous, size, previous_frame, frame_number in zip(key_sizes[:-1], key_sizes[1:],
+                                                            key_frames[:-1], key_frames[1:]):
+        if abs(int(size) - int(previous)) > PACKET_KEYFRAME_CHANGE * previous:
+            windows.add((int(previous_frame), int(frame_number) + step + 1))
+
+    return sorted(windows)
+
+
+class PacketPrefilterScanner(TwoPassScanner):
+    """Двухпроходное детектирование, в котором окна дают всплески размеров пакетов"""
+
+    name = "фильтр по размерам пакетов"
+    report_key = 'packet_prefilter_scan'
+
+    def __init__(self, processor: VideoProcessor, index: PacketIndex, **kwargs):
+        """
+        Args:
+            processor: VideoProcessor, чьи отрезок, сетка, область и порог используются
+            index: Пакеты видео
+            **kwargs: Ширина и запас порога страховочных кадров (см. TwoPassScanner)
+        """
+        super().__init__(processor, **kwargs)
+        self.index = index
+        step = processor.frame_interval
+        self.coarse_interval = step * max(1, int(round(PACKET_SAFETY_INTERVAL * processor.fps / step)))
+        self.bursts = [(max(start, processor.start_frame), min(end, processor.end_frame))
+                       for start, end in burst_windows(index, step, processor.fps)
+                       if start < processor.end_frame and end > processor.start_frame]
+        self.burst_windows = merge_windows(self.bursts)
+
+    def describe(self) -> str:
+        return (f"{len(self.bursts)} всплесков ({self.index.backend}), страховочный шаг "
+                f"{self.coarse_interval / self.processor.fps:.1f}s, порог {self.coarse_threshold:.3f}")
+
+    def coarse_report(self) -> dict:
+        return {
+            'backend': self.index.backend,
+            'bursts': len(self.bursts),
+            'safety_interval_s': round(self.coarse_interval / self.processor.fps, 3),
+            'safety_windows': self.coarse_windows
+        }
+
+    def iter_coarse(self, first_frame: np.ndarray, first_number: int) -> Iterator[Tuple[np.ndarray, float, int]]:
+        """Первый кадр отрезка и страховочные кадры (перемотка к каждому, без декодирования промежутков)"""
+        processor = self.processor
+        yield self._coarse_crop(first_frame), first_number / processor.fps, first_number
+        first_sample = (first_number // self.coarse_interval + 1) * self.coarse_interval
+        for sample in range(first_sample, processor.end_frame, self.coarse_interval):
+            for frame, timestamp, frame_number in processor.iter_range(sample, sample + 1):
+                started = time.perf_counter()
+                cropped = self._coarse_crop(frame)
+                processor.metrics.add_time(STAGE_CROP, time.perf_counter() - started)
+                yield cropped, timestamp, frame_number
+
+    def fixed_windows(self) -> List[Tuple[int, int]]:
+        """Окна всплесков: точный проход декодирует их всегда, страховочные кадры - только смены без всплеска"""
+        return self.burst_windows
+
+
+def packet_prefilter(processor: VideoProcessor) -> Optional[PacketPrefilterScanner]:
+    """
+    Сканер по размерам пакетов для processor или None, если он не применим
+    (обработка тогда идёт обычным просмотром сетки)
+    """
+    started = time.perf_counter()
+    index = load_packets(processor.video_path, processor.fps)
+    processor.metrics.add_time(STAGE_DECODE, time.perf_counter() - started)
+    if index is None:
+        logger.warning("⚠ Размеры пакетов недоступны (нужен ffprobe или PyAV) - фильтр отключён")
+        return None
+    if index.keyframes.all():
+        logger.info("Видео только из ключевых кадров - фильтр по размерам пакетов отключён")
+        return None
+    return PacketPrefilterScanner(processor, index)
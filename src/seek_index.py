@@ -0,0 +1,248 @@
+"""
+Модуль постоянного индекса перемотки (--seek-index)
+
+Перемотка cv2.VideoCapture (CAP_PROP_POS_FRAMES) стоит одинаково дорого,
+куда бы она ни вела: декодер возвращается к ключевому кадру и декодирует
+вперёд до цели. Если перемотка не удаётся, видео читается с начала. Индекс
+перемотки хранит номера и pts ключевых кадров видео:
+
+- строится один раз по пакетам контейнера (packets.py) и пишется рядом с
+  видео в {видео}.seekindex.json вместе с размером и временем изменения
+  файла - изменившееся видео индексируется заново;
+- OpenCVDecoder с индексом перематывает точно: к предыдущему ключевому
+  кадру и дальше счётом кадров, а если цель в том же GOP впереди - не
+  перематывает вовсе (докрутка дешевле перемотки);
+- IndexedFrameReader читает произвольный кадр точно: перемотка к
+  предыдущему ключевому кадру и декодирование вперёд до нужного pts.
+"""
+
+import json
+import os
+import uuid
+from pathlib import Path
+from typing import List, Optional
+import logging
+
+import cv2
+import numpy as np
+
+from . import packets
+from .config import SEEK_INDEX_SUFFIX, SEEK_INDEX_VERSION
+from .packets import KeyframeIndex, frame_number_at, load_packets
+
+logger = logging.getLogger(__name__)
+
+
+def seek_index_path(video_path: str) -> Path:
+    """Путь к индексу рядом с видео: lecture.mp4 -> lecture.seekindex.json"""
+    video_path = Path(video_path)
+    return video_path.with_name(f"{video_path.stem}{SEEK_INDEX_SUFFIX}")
+
+
+def video_identity(video_path: str) -> dict:
+    """Признаки файла, при изменении которых индекс строится заново"""
+    stat = os.stat(video_path)
+    return {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+
+
+class SeekIndex(KeyframeIndex):
+    """Ключевые кадры видео с их pts, привязанные к содержимому файла"""
+
+    def __init__(self, frames: List[int], times: List[float], backend: str, start_time: float,
+                 fps: float, identity: dict):
+        """
+        Args:
+            frames: Номера ключевых кадров
+            times: pts ключевых кадров в секундах (в порядке frames)
+            backend: Чем прочитаны пакеты: 'pyav' или 'ffprobe'
+            start_time: pts первого кадра видео в секундах
+            fps: Частота кадров, по которой считались номера
+            identity: Признаки файла (video_identity)
+        """
+        super().__init__(frames, backend, start_time)
+        self.times = dict(zip(frames, times))
+        self.fps = fps
+        self.identity = identity
+
+    def time_of(self, keyframe: int) -> float:
+        """pts ключевого кадра в секундах"""
+        return self.times.get(keyframe, self.start_time + keyframe / self.fps)
+
+    def to_dict(self) -> dict:
+        return {
+            'version': SEEK_INDEX_VERSION,
+            **self.identity,
+            'fps': self.fps,
+            'backend': self.backend,
+            'start_time': self.start_time,
+            'keyframes': self.frames,
+            'times': [self.time_of(frame) for frame in self.frames]
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> 'SeekIndex':
+        return cls(data['keyframes'], data['times'], data['backend'], data['start_time'], data['fps'],
+                   {'size': data['size'], 'mtime_ns': data['mtime_ns']})
+
+    def save(self, path: Path):
+        """Записывает индекс через временный файл и rename (читатели не видят половину файла)"""
+        tmp_path = path.with_name(f".{path.name}.{uuid.uuid4().hex}.tmp")
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f)
+        os.replace(tmp_path, path)
+
+
+def build_seek_index(video_path: str, fps: float) -> Optional[SeekIndex]:
+    """
+    Строит индекс по пакетам контейнера (без декодирования)
+
+    Returns:
+        SeekIndex или None, если ни PyAV, ни ffprobe нет или ключевые кадры не отмечены
+    """
+    identity = video_identity(video_path)
+    index = load_packets(video_path, fps)
+    if index is None or not index.keyframes.any():
+        return None
+    frames, times = [], []
+    for frame_number, timestamp in zip(index.frames[index.keyframes].tolist(),
+                                       index.times[index.keyframes].tolist()):
+        if frames and frame_number == frames[-1]:
+            continue
+        frames.append(frame_number)
+        times.append(timestamp)
+    return SeekIndex(frames, times, index.backend, index.start_time, fps, identity)
+
+
+def read_seek_index(video_path: str) -> Optional[SeekIndex]:
+    """Индекс из файла рядом с видео, если он есть и построен для этого же файла"""
+    path = seek_index_path(video_path)
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        identity = video_identity(video_path)
+    except (OSError, json.JSONDecodeError):
+        return None
+    if data.get('version') != SEEK_INDEX_VERSION or any(data.get(key) != value for key, value in identity.items()):
+        return None
+    try:
+        return SeekIndex.from_dict(data)
+    except (KeyError, TypeError):
+        return None
+
+
+def load_seek_index(video_path: str, fps: float) -> Optional[SeekIndex]:
+    """
+    Индекс перемотки видео: из файла рядом с видео или построенный заново (и записанный)
+
+    Returns:
+        SeekIndex или None, если индекс построить нельзя
+    """
+    index = read_seek_index(video_path)
+    if index is not None:
+        if abs(index.fps - fps) < 1e-6:
+            return index
+        logger.info(f"Индекс перемотки построен для {index.fps} fps, а видео {fps} fps - строим заново")
+
+    index = build_seek_index(video_path, fps)
+    if index is None:
+        logger.warning("⚠ Индекс перемотки не построить (нужен PyAV или ffprobe)")
+        return None
+    path = seek_index_path(video_path)
+    try:
+        index.save(path)
+        logger.info(f"Индекс перемотки: {len(index)} ключевых кадров ({index.backend}) -> {path}")
+    except OSError as e:
+        logger.warning(f"⚠ Индекс перемотки не записан ({e}) - используется только в этом запуске")
+    return index
+
+
+class IndexedFrameReader:
+    """
+    Точное чтение кадров по номеру через индекс перемотки
+
+    Для каждого кадра - перемотка к предыдущему ключевому кадру и
+    декодирование вперёд; если кадр в том же GOP впереди последнего
+    прочитанного, перемотки нет. С PyAV кадр находится по pts, без него -
+    перемотка OpenCV к ключевому кадру и счёт кадров. Не потокобезопасен.
+    """
+
+    def __init__(self, video_path: str, index: SeekIndex):
+        self.video_path = video_path
+        self.index = index
+        self.seeks = 0            # Сколько раз пришлось перематывать
+        self._av = packets.av
+        self._container = None
+        self._frames = None       # Итератор декодирования PyAV
+        self._cap = None
+        self._position = None     # Номер следующего кадра (OpenCV) / последнего декодированного (PyAV)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def _need_seek(self, frame_number: int, ahead_of: Optional[int]) -> bool:
+        """Нужна ли перемотка: цель позади или между ней и текущей позицией есть ключевой кадр"""
+        keyframe = self.index.preceding(frame_number) or 0
+        return ahead_of is None or not keyframe <= ahead_of <= frame_number
+
+    def read(self, frame_number: int) -> Optional[np.ndarray]:
+        """
+        Кадр frame_number в BGR
+
+        Returns:
+            Кадр или None, если видео закончилось раньше
+        """
+        if self._av is not None:
+            return self._read_pyav(frame_number)
+        return self._read_opencv(frame_number)
+
+    def _read_pyav(self, frame_number: int) -> Optional[np.ndarray]:
+        if self._container is None:
+            self._container = self._av.open(self.video_path)
+        stream = self._container.streams.video[0]
+        following = None if self._position is None else self._position + 1
+        if self._frames is None or self._need_seek(frame_number, following):
+            keyframe = self.index.preceding(frame_number) or 0
+            self._container.seek(int(self.index.time_of(keyframe) / stream.time_base), stream=stream, backward=True)
+            self._frames = self._container.decode(stream)
+            self._position = None
+            self.seeks += 1
+
+        for frame in self._frames:
+            if frame.pts is None:
+                continue
+            self._position = frame_number_at(float(frame.pts * stream.time_base), self.index.start_time,
+                                             self.index.fps)
+            if self._position >= frame_number:
+                return frame.to_ndarray(format='bgr24')
+        self._frames = None
+        return None
+
+    def _read_opencv(self, frame_number: int) -> Optional[np.ndarray]:
+        if self._cap is None:
+            self._cap = cv2.VideoCapture(self.video_path)
+        if self._need_seek(frame_number, self._position):
+            keyframe = self.index.preceding(frame_number) or 0
+            self._cap.set(cv2.CAP_PROP_POS_FRAMES, keyframe)
+            self._position = keyframe
+            self.seeks += 1
+        while self._position < frame_number:
+            if not self._cap.grab():
+                return None
+            self._position += 1
+        ret, frame = self._cap.read()
+        if not ret:
+            return None
+        self._position += 1
+        return frame
+
+    def close(self):
+        if self._container is not None:
+            self._container.close()
+            self._container = None
+            self._frames = None
+        if self._cap is not None:
+            self._cap.release()
+            self._cap = None
@@ -0,0 +1,424 @@
+"""
+HTTP-сервер: приём заданий на извлечение слайдов и пул прогретых процессов
+
+Сервер держит фиксированный пул процессов, в которых OpenCV и scikit-image
+уже загружены, поэтому задание не платит за запуск Python и импорты.
+Только стандартная библиотека, слушает localhost по умолчанию.
+
+API (JSON):
+    POST /jobs                {"video": "...", "transcript": "...", "options": {...}}
+                              -> 202 {"id": "...", ...статус}
+    GET  /jobs                -> [статус, ...]
+    GET  /jobs/<id>           -> статус; после завершения в "result" - слайды и путь к Markdown
+    GET  /jobs/<id>/events    -> поток статусов (NDJSON, по строке на изменение) до завершения
+    GET  /health              -> {"workers": N, "queued": N, "running": N}
+
+Завершённые задания хранятся SERVER_JOB_TTL секунд и не больше
+SERVER_MAX_FINISHED_JOBS штук, потом их статус удаляется (GET вернёт 404).
+
+Запуск:
+    python -m src.main --serve --port 8765 --workers 2
+"""
+
+import json
+import multiprocessing
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+import logging
+
+from .batch import init_worker_process, warm_up_worker
+from .options import validate_options
+from .config import (DEFAULT_BATCH_WORKERS, SERVER_HOST, SERVER_PORT, SERVER_PROGRESS_INTERVAL,
+                     SERVER_JOB_TTL, SERVER_MAX_FINISHED_JOBS)
+
+logger = logging.getLogger(__name__)
+
+STATE_QUEUED = "queued"
+STATE_RUNNING = "running"
+STATE_DONE = "done"
+STATE_FAILED = "failed"
+
+FINISHED_STATES = (STATE_DONE, STATE_FAILED)
+
+# Сколько ждать изменений в потоке событий, прежде чем повторить текущий статус
+EVENTS_KEEPALIVE = 15.0
+
+
+class ServerJob:
+    """Задание сервера и его текущее состояние"""
+
+    def __init__(self, video: str, transcript: Optional[str], options: dict):
+        self.id = uuid.uuid4().hex[:12]
+        self.video = video
+        self.transcript = transcript
+        self.options = options
+        self.state = STATE_QUEUED
+        self.current_time = 0.0   # Время последнего проанализированного кадра
+        self.end_time = 0.0       # Конец обрабатываемого отрезка
+        self.slides_found = 0
+        self.result: Optional[dict] = None
+        self.error: Optional[str] = None
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.version = 0          # Увеличивается при каждом изменении (для потока событий)
+
+    @property
+    def progress(self) -> float:
+        """Доля обработанного видео (0-1)"""
+        if self.state == STATE_DONE:
+            return 1.0
+        return min(1.0, self.current_time / self.end_time) if self.end_time > 0 else 0.0
+
+    def to_dict(self) -> dict:
+        return {
+            'id': self.id,
+            'state': self.state,
+            'video': self.video,
+            'transcript': self.transcript,
+            'progress': round(self.progress, 4),
+            'current_time': round(self.current_time, 2),
+            'slides_found': self.slides_found,
+            'created_at': self.created_at,
+            'started_at': self.started_at,
+            'finished_at': self.finished_at,
+            'error': self.error,
+            'result': self.result
+        }
+
+
+class _EventReporter:
+    """Отправляет события задания из процесса пула в очередь сервера (прогресс - не чаще interval)"""
+
+    def __init__(self, job_id: str, events, interval: float):
+        self.job_id = job_id
+        self.events = events
+        self.interval = interval
+        self._last_sent = 0.0
+
+    def send(self, kind: str, data=None):
+        self.events.put((self.job_id, kind, data))
+
+    def progress(self, current: float, total: float):
+        now = time.monotonic()
+        if now - self._last_sent >= self.interval:
+            self._last_sent = now
+            self.send('progress', (current, total))
+
+    def slide(self, slide):
+        self.send('slide', slide.index)
+
+
+def _run_job(job_id: str, video: str, transcript: Optional[str], options: dict, events,
+             progress_interval: float) -> dict:
+    """Выполняет задание в процессе пула"""
+    from .api import extract_lecture
+
+    reporter = _EventReporter(job_id, events, progress_interval)
+    reporter.send('started', os.getpid())
+    logger.info(f"▶ Задание {job_id}: {video}")
+    result = extract_lecture(video, transcript, options,
+                             on_slide=reporter.slide, on_progress=reporter.progress)
+    return result.to_dict()
+
+
+class LectureServer:
+    """Очередь заданий, пул процессов и HTTP-сервер"""
+
+    def __init__(
+        self,
+        host: str = SERVER_HOST,
+        port: int = SERVER_PORT,
+        workers: int = DEFAULT_BATCH_WORKERS,
+        progress_interval: float = SERVER_PROGRESS_INTERVAL,
+        job_ttl: float = SERVER_JOB_TTL,
+        max_finished_jobs: int = SERVER_MAX_FINISHED_JOBS
+    ):
+        """
+        Args:
+            host: Адрес для прослушивания
+            port: Порт (0 - любой свободный, см. self.port)
+            workers: Количество процессов пула
+            progress_interval: Как часто процесс пула сообщает прогресс, секунды
+            job_ttl: Сколько хранить статус завершённого задания, секунды
+            max_finished_jobs: Сколько завершённых заданий хранить самое большее
+        """
+        self.workers = workers
+        self.progress_interval = progress_interval
+        self.job_ttl = job_ttl
+        self.max_finished_jobs = max_finished_jobs
+        self.jobs: Dict[str, ServerJob] = {}
+        self._changed = threading.Condition()
+
+        self._manager = multiprocessing.Manager()
+        self._events = self._manager.Queue()
+        self._executor = ProcessPoolExecutor(max_workers=workers, initializer=init_worker_process)
+        # Запускаем процессы сразу, чтобы первое задание не ждало инициализации
+        for future in [self._executor.submit(warm_up_worker) for _ in range(workers)]:
+            future.result()
+
+        self._pump = threading.Thread(target=self._pump_events, daemon=True)
+        self._pump.start()
+
+        self.httpd = ThreadingHTTPServer((host, port), _RequestHandler)
+        self.httpd.daemon_threads = True
+        self.httpd.app = self
+
+    @property
+    def port(self) -> int:
+        return self.httpd.server_address[1]
+
+    @property
+    def url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def submit(self, payload: dict) -> ServerJob:
+        """
+        Ставит задание в очередь
+
+        Raises:
+            ValueError: Неверный запрос (нет видео, файл не найден, неверные параметры)
+        """
+        from .api import ExtractionOptions
+
+        if not isinstance(payload, dict) or not payload.get('video'):
+            raise ValueError("Не указан 'video'")
+        if not isinstance(payload['video'], str):
+            raise ValueError("'video' должен быть строкой")
+        video = Path(payload['video']).resolve()
+        if not video.exists():
+            raise ValueError(f"Видеофайл не найден: {video}")
+        transcript = payload.get('transcript')
+        if transcript is not None and not isinstance(transcript, str):
+            raise ValueError("'transcript' должен быть строкой")
+        if not isinstance(payload.get('options') or {}, dict):
+            raise ValueError("'options' должен быть объектом")
+        if transcript:
+            transcript = Path(transcript).resolve()
+            if not transcript.exists():
+                raise ValueError(f"Файл транскрипта не найден: {transcript}")
+
+        options = dict(payload.get('options') or {})
+        # По умолчанию результаты пишутся рядом с видео, как в auto_process.py
+        options.setdefault('output_path', str(video.with_suffix('.md')))
+        options.setdefault('slides_dir', str(video.with_name(f"{video.stem}_slides")))
+        # Те же правила, что у командной строки и API (options.py)
+        errors = validate_options(options)
+        if errors:
+            raise ValueError(f"Неверные параметры: {'; '.join(errors)}")
+        try:
+            ExtractionOptions(**options)
+        except TypeError as e:
+            raise ValueError(f"Неверные параметры: {e}")
+
+        job = ServerJob(str(video), str(transcript) if transcript else None, options)
+        with self._changed:
+            self._evict_finished()
+            self.jobs[job.id] = job
+        future = self._executor.submit(_run_job, job.id, job.video, job.transcript, options,
+                                       self._events, self.progress_interval)
+        future.add_done_callback(lambda f, job=job: self._finish(job, f))
+        logger.info(f"Задание {job.id} в очереди: {video.name}")
+        return job
+
+    def _update(self, job: ServerJob, **changes) -> bool:
+        """
+        Меняет задание и будит ожидающих; завершённое задание не меняется
+
+        Проверка и запись под одной блокировкой: запоздавшее событие из
+        процесса пула не вернёт выполненное задание в running.
+
+        Returns:
+            False если задание уже завершено
+        """
+        with self._changed:
+            if job.state in FINISHED_STATES:
+                return False
+            for name, value in changes.items():
+                setattr(job, name, value)
+            job.version += 1
+            self._changed.notify_all()
+            return True
+
+    def _evict_finished(self):
+        """Удаляет завершённые задания старше job_ttl и самые старые сверх max_finished_jobs (под блокировкой)"""
+        now = time.time()
+        finished = sorted((job for job in self.jobs.values() if job.state in FINISHED_STATES),
+                          key=lambda job: job.finished_at or job.created_at)
+        expired = [job for job in finished if now - (job.finished_at or job.created_at) > self.job_ttl]
+        excess = finished[:max(0, len(finished) - self.max_finished_jobs)]
+        for job in expired + excess:
+            self.jobs.pop(job.id, None)
+
+    def _finish(self, job: ServerJob, future):
+        error = future.exception()
+        if error is None:
+            result = future.result()
+            self._update(job, state=STATE_DONE, result=result, slides_found=len(result['slides']),
+                         started_at=job.started_at or job.created_at, finished_at=time.time())
+            logger.info(f"✓ Задание {job.id} выполнено: {len(result['slides'])} слайдов")
+        else:
+            self._update(job, state=STATE_FAILED, error=f"{type(error).__name__}: {error}",
+                         finished_at=time.time())
+            logger.error(f"❌ Задание {job.id}: {error}")
+        with self._changed:
+            self._evict_finished()
+
+    def _pump_events(self):
+        """Переносит события из процессов пула в состояние заданий"""
+        while True:
+            try:
+                job_id, kind, data = self._events.get()
+            except (EOFError, OSError):
+                return  # Менеджер остановлен
+            job = self.jobs.get(job_id)
+            if job is None:
+                continue
+            if kind == 'started':
+                self._update(job, state=STATE_RUNNING, started_at=time.time())
+            elif kind == 'progress':
+                self._update(job, current_time=data[0], end_time=data[1])
+            elif kind == 'slide':
+                self._update(job, slides_found=data)
+
+    def status(self, job_id: str) -> Optional[dict]:
+        with self._changed:
+            job = self.jobs.get(job_id)
+            return job.to_dict() if job is not None else None
+
+    def list_jobs(self) -> List[dict]:
+        with self._changed:
+            return [job.to_dict() for job in self.jobs.values()]
+
+    def health(self) -> dict:
+        with self._changed:
+            states = [job.state for job in self.jobs.values()]
+        return {
+            'workers': self.workers,
+            'queued': states.count(STATE_QUEUED),
+            'running': states.count(STATE_RUNNING),
+            'done': states.count(STATE_DONE),
+            'failed': states.count(STATE_FAILED)
+        }
+
+    def wait_for_change(self, job_id: str, version: int, timeout: float) -> Tuple[int, dict]:
+        """
+        Ждёт, пока версия задания станет больше version (или истечёт timeout)
+
+        Returns:
+            Кортеж (версия, статус); статус None, если задание уже удалено
+        """
+        with self._changed:
+            job = self.jobs.get(job_id)
+            if job is None:
+                return version, None
+            self._changed.wait_for(lambda: job.version > version, timeout=timeout)
+            return job.version, job.to_dict()
+
+    def serve_forever(self):
+        logger.info(f"Сервер слушает {self.url} (процессов: {self.workers})")
+        self.httpd.serve_forever()
+
+    def shutdown(self):
+        """Останавливает HTTP-сервер и пул (незавершённые задания отменяются)"""
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        self._executor.shutdown(wait=True, cancel_futures=True)
+        self._manager.shutdown()
+
+
+class _RequestHandler(BaseHTTPRequestHandler):
+    """Обработчик HTTP-запросов (состояние - в self.server.app)"""
+
+    server_version = "LectureSlidesExtractor/1.0"
+
+    @property
+    def app(self) -> LectureServer:
+        return self.server.app
+
+    def log_message(self, format, *args):
+        logger.debug("%s - %s" % (self.address_string(), format % args))
+
+    def _send_json(self, status: int, payload):
+        body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _path_parts(self) -> List[str]:
+        return [part for part in self.path.split('?')[0].split('/') if part]
+
+    def do_POST(self):
+        if self._path_parts() != ['jobs']:
+            self._send_json(404, {'error': 'not found'})
+            return
+        try:
+            length = int(self.headers.get('Content-Length', 0))
+            payload = json.loads(self.rfile.read(length) or b'{}')
+            job = self.app.submit(payload)
+        except (ValueError, TypeError, json.JSONDecodeError) as e:
+            self._send_json(400, {'error': str(e)})
+            return
+        self._send_json(202, job.to_dict())
+
+    def do_GET(self):
+        parts = self._path_parts()
+        if parts == ['health']:
+            self._send_json(200, self.app.health())
+        elif parts == ['jobs']:
+            self._send_json(200, self.app.list_jobs())
+        elif len(parts) == 2 and parts[0] == 'jobs':
+            status = self.app.status(parts[1])
+            if status is None:
+                self._send_json(404, {'error': 'job not found'})
+            else:
+                self._send_json(200, status)
+        elif len(parts) == 3 and parts[0] == 'jobs' and parts[2] == 'events':
+            self._stream_events(parts[1])
+        else:
+            self._send_json(404, {'error': 'not found'})
+
+    def _stream_events(self, job_id: str):
+        """Поток статусов задания: строка JSON на каждое изменение, до завершения"""
+        if self.app.status(job_id) is None:
+            self._send_json(404, {'error': 'job not found'})
+            return
+
+        # HTTP/1.0 без Content-Length: конец потока - закрытие соединения
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/x-ndjson; charset=utf-8')
+        self.send_header('Cache-Control', 'no-cache')
+        self.end_headers()
+
+        version = -1
+        while True:
+            version, status = self.app.wait_for_change(job_id, version, EVENTS_KEEPALIVE)
+            if status is None:
+                return
+            try:
+                self.wfile.write(json.dumps(status, ensure_ascii=False).encode('utf-8') + b'\n')
+                self.wfile.flush()
+            except (BrokenPipeError, ConnectionResetError):
+                return
+            if status['state'] in FINISHED_STATES:
+                return
+
+
+def serve(host: str = SERVER_HOST, port: int = SERVER_PORT, workers: int = DEFAULT_BATCH_WORKERS):
+    """Запускает сервер до Ctrl+C"""
+    server = LectureServer(host, port, workers)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        logger.info("Остановка сервера...")
+    finally:
+        server.shutdown()
@@ -0,0 +1,382 @@
+"""
+Модуль для обработки видео по частям (шардам) и объединения результатов
+
+Каждый шард - это VideoProcessor с границами start_time/end_time и манифест
+(JSON) со слайдами и состоянием на границе. Команда объединения склеивает
+манифесты, убирает дубли на стыках и перенумеровывает slide_NNN.
+
+Пример:
+    python -m src.shards merge part1.json part2.json --slides-dir slides \\
+        --transcript transcript.txt --output lecture.md
+"""
+
+import argparse
+import json
+import shutil
+import sys
+from pathlib import Path
+from typing import List, Optional, Tuple
+import logging
+
+import cv2
+import numpy as np
+
+from .config import MIN_SLIDE_DURATION
+from .video_processor import VideoProcessor, crop_frame_region
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_VERSION = 1
+
+
+def average_hash(image: np.ndarray, size: int = 8) -> str:
+    """
+    Компактная подпись кадра: average hash (size x size бит) в hex
+
+    Args:
+        image: Кадр BGR или grayscale
+
+    Returns:
+        Строка hex
+    """
+    gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY) if image.ndim == 3 else image
+    small = cv2.resize(gray, (size, size), interpolation=cv2.INTER_AREA)
+    bits = (small > small.mean()).flatten()
+    value = 0
+    for bit in bits:
+        value = (value << 1) | int(bit)
+    return f"{value:0{size * size // 4}x}"
+
+
+def build_shard_manifest(processor: VideoProcessor, slides_dir: str) -> dict:
+    """
+    Собирает манифест шарда после processor.process()
+
+    Args:
+        processor: VideoProcessor, обработавший свой отрезок
+        slides_dir: Папка, куда шард сохранил слайды
+
+    Returns:
+        Словарь манифеста
+
+    Raises:
+        ValueError: Шард обработан режимом, выбирающим кадры не по полной сетке
+                    (two_pass, keyframes, packet_prefilter): стык сводится
+                    повтором полной сетки и мог бы разойтись с решениями шарда
+    """
+    if processor.two_pass or processor.keyframes or processor.packet_prefilter:
+        raise ValueError("Шарды обрабатываются только просмотром полной сетки "
+                         "(без two_pass, keyframes и packet_prefilter)")
+
+    slides = [
+        {
+            'file': Path(path).name,
+            'timestamp': timestamp,
+            'frame_number': frame_number
+        }
+        for path, timestamp, frame_number in processor.saved_slides
+    ]
+
+    # Эталон сравнения на конце шарда - это всегда последний принятый слайд
+    reference = None
+    if processor.saved_slides:
+        path, timestamp, frame_number = processor.saved_slides[-1]
+        reference_frame = cv2.imread(path)
+        reference = {
+            'slide_index': len(slides) - 1,
+            'timestamp': timestamp,
+            'frame_number': frame_number,
+            'signature': average_hash(crop_frame_region(reference_frame, processor.crop_region))
+        }
+
+    return {
+        'version': MANIFEST_VERSION,
+        'video': {
+            'path': str(Path(processor.video_path).resolve()),
+            'fps': processor.fps,
+            'total_frames': processor.total_frames
+        },
+        'settings': {
+            'sample_rate': processor.sample_rate,
+            'threshold': processor.threshold,
+            'crop_region': processor.crop_region,
+            'frame_interval': processor.frame_interval,
+            'analysis_width': processor.analysis_width,
+            'min_slide_duration': MIN_SLIDE_DURATION
+        },
+        'range': {
+            'start_frame': processor.start_frame,
+            'end_frame': processor.end_frame,
+            'start_time': processor.start_frame / processor.fps,
+            'end_time': processor.end_frame / processor.fps
+        },
+        'slides_dir': str(Path(slides_dir).resolve()),
+        'slides': slides,
+        'boundary': {
+            'reference': reference,
+            'last_slide_time': slides[-1]['timestamp'] if slides else None
+        }
+    }
+
+
+def write_shard_manifest(processor: VideoProcessor, slides_dir: str, manifest_path: str) -> dict:
+    """Собирает и сохраняет манифест шарда"""
+    manifest = build_shard_manifest(processor, slides_dir)
+    path = Path(manifest_path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    logger.info(f"✓ Манифест шарда сохранён: {manifest_path} ({len(manifest['slides'])} слайдов)")
+    return manifest
+
+
+def load_shard_manifest(manifest_path: str) -> dict:
+    """Загружает манифест шарда"""
+    with open(manifest_path, 'r', encoding='utf-8') as f:
+        manifest = json.load(f)
+    if manifest.get('version') != MANIFEST_VERSION:
+        raise ValueError(f"Неподдерживаемая версия манифеста: {manifest_path}")
+    return manifest
+
+
+def _check_shards(manifests: List[dict]):
+    """Проверяет, что шарды относятся к одному видео, с одинаковыми настройками и идут встык"""
+    first = manifests[0]
+    for previous, current in zip(manifests, manifests[1:]):
+        if current['settings'] != first['settings']:
+            raise ValueError("Шарды обработаны с разными параметрами (sample_rate/threshold/crop_region)")
+        if current['video']['total_frames'] != first['video']['total_frames']:
+            raise ValueError("Шарды относятся к разным видео")
+        if current['range']['start_frame'] != previous['range']['end_frame']:
+            raise ValueError(
+                f"Шарды не идут встык: {previous['range']['end_time']:.2f}s -> "
+                f"{current['range']['start_time']:.2f}s"
+            )
+
+
+def _check_seam_references(manifests: List[dict]):
+    """
+    Проверяет, что PNG эталонов на стыках те же, что видел шард (подпись из манифеста)
+
+    Эталон стыка читается из PNG последнего слайда шарда. Если папку слайдов
+    после шарда перезаписали, стык пересчитался бы с чужим эталоном.
+    """
+    for manifest in manifests[:-1]:
+        reference = manifest['boundary']['reference']
+        if reference is None:
+            continue
+        path = Path(manifest['slides_dir']) / manifest['slides'][reference['slide_index']]['file']
+        frame = cv2.imread(str(path))
+        if frame is None:
+            raise ValueError(f"Нет слайда-эталона на стыке: {path}")
+        signature = average_hash(crop_frame_region(frame, manifest['settings']['crop_region']))
+        if signature != reference['signature']:
+            raise ValueError(f"Слайд-эталон на стыке изменился после обработки шарда: {path}")
+
+
+class _MergedSlide:
+    """Слайд итогового результата: файл из шарда или кадр, найденный при пересчёте стыка"""
+
+    def __init__(self, timestamp: float, frame_number: int, source: Optional[Path] = None,
+                 frame: Optional[np.ndarray] = None):
+        self.timestamp = timestamp
+        self.frame_number = frame_number
+        self.source = source
+        self.frame = frame
+
+
+def _shard_slides(manifest: dict, start_index: int = 0) -> List[_MergedSlide]:
+    slides_dir = Path(manifest['slides_dir'])
+    return [
+        _MergedSlide(slide['timestamp'], slide['frame_number'], source=slides_dir / slide['file'])
+        for slide in manifest['slides'][start_index:]
+    ]
+
+
+def _replay_seam(
+    processor: VideoProcessor,
+    manifests: List[dict],
+    shard_index: int,
+    reference_cropped: np.ndarray,
+    reference_time: float
+) -> Tuple[List[_MergedSlide], int, Optional[int]]:
+    """
+    Точный пересчёт стыка: прогоняет кадры со стыка с настоящим состоянием
+    детектора (эталон из предыдущего шарда), пока решение не совпадёт с шардом
+
+    Как только пересчёт принимает кадр, который шард тоже принял как слайд,
+    состояния детектора совпадают и дальше результаты шарда верны без изменений.
+
+    Returns:
+        (новые слайды до точки схождения, индекс шарда схождения, индекс слайда
+        схождения в этом шарде или None, если схождения не было до конца видео)
+    """
+    slide_positions = {}
+    for index, manifest in enumerate(manifests[shard_index:], start=shard_index):
+        for position, slide in enumerate(manifest['slides']):
+            slide_positions[slide['frame_number']] = (index, position)
+
+    new_slides = []
+    for frame, timestamp, frame_number in processor.iter_frames():
+        frame_cropped = processor._crop_frame_region(frame)
+        is_new, similarity = processor.is_slide_change(frame_cropped, timestamp, reference_cropped, reference_time)
+        if not is_new:
+            continue
+
+        if frame_number in slide_positions:
+            owner, position = slide_positions[frame_number]
+            return new_slides, owner, position
+
+        logger.info(f"  Стык: новый слайд на {timestamp:.2f}s (SSIM: {similarity:.3f})")
+        new_slides.append(_MergedSlide(timestamp, frame_number, frame=frame.copy()))
+        reference_cropped, reference_time = frame_cropped, timestamp
+
+    return new_slides, len(manifests) - 1, None
+
+
+def merge_shards(
+    manifest_paths: List[str],
+    output_dir: str,
+    video_path: Optional[str] = None
+) -> List[Tuple[str, float]]:
+    """
+    Объединяет результаты шардов в один набор слайдов
+
+    Если видео доступно, стыки пересчитываются точно (результат совпадает с
+    обработкой целого видео): декодируется только участок от стыка до первой
+    смены слайда, которую видел и шард. Без видео дубли на стыках убираются
+    сравнением сохранённых слайдов с эталоном предыдущего шарда.
+
+    Args:
+        manifest_paths: Пути к манифестам шардов (в любом порядке)
+        output_dir: Папка для итоговых слайдов slide_NNN.png
+        video_path: Путь к видео (по умолчанию - из манифеста)
+
+    Returns:
+        Список кортежей (путь_к_слайду, timestamp), как у VideoProcessor.process()
+    """
+    manifests = sorted((load_shard_manifest(path) for path in manifest_paths),
+                       key=lambda manifest: manifest['range']['start_frame'])
+    _check_shards(manifests)
+    _check_seam_references(manifests)
+
+    output_path = Path(output_dir)
+    if any(Path(manifest['slides_dir']) == output_path.resolve() for manifest in manifests):
+        raise ValueError("Итоговая папка слайдов должна отличаться от папок шардов")
+
+    settings = manifests[0]['settings']
+    video_path = video_path or manifests[0]['video']['path']
+    exact = Path(video_path).exists()
+    if not exact:
+        logger.warning(f"⚠ Видео недоступно ({video_path}) - стыки сводятся по сохранённым слайдам")
+
+    def make_processor(start_frame: int) -> VideoProcessor:
+        fps = manifests[0]['video']['fps']
+        return VideoProcessor(
+            video_path=video_path,
+            sample_rate=settings['sample_rate'],
+            threshold=settings['threshold'],
+            crop_region=settings['crop_region'],
+            analysis_width=settings.get('analysis_width'),
+            start_time=start_frame / fps,
+            end_time=manifests[-1]['range']['end_frame'] / fps
+        )
+
+    merged = _shard_slides(manifests[0])
+
+    index = 1
+    while index < len(manifests):
+        manifest = manifests[index]
+        if not merged:
+            merged.extend(_shard_slides(manifest))
+            index += 1
+            continue
+
+        # Эталон на стыке - последний принятый слайд (обрезка полного кадра из PNG)
+        last = merged[-1]
+        reference_frame = last.frame if last.frame is not None else cv2.imread(str(last.source))
+        reference_cropped = crop_frame_region(reference_frame, settings['crop_region'], settings.get('analysis_width'))
+
+        logger.info(f"Стык на {manifest['range']['start_time']:.2f}s")
+
+        if exact:
+            with make_processor(manifest['range']['start_frame']) as processor:
+                new_slides, owner, position = _replay_seam(
+                    processor, manifests, index, reference_cropped, last.timestamp
+                )
+
+            merged.extend(new_slides)
+            if position is None:
+                break
+            merged.extend(_shard_slides(manifests[owner], position))
+            index = owner + 1
+        else:
+            reference_time = last.timestamp
+            for slide in _shard_slides(manifest):
+                slide_cropped = crop_frame_region(cv2.imread(str(slide.source)), settings['crop_region'],
+                                                  settings.get('analysis_width'))
+                similarity = VideoProcessor.compare_frames(reference_cropped, slide_cropped)
+                # То же правило, что в VideoProcessor.is_slide_change
+                is_new = (similarity < settings['threshold']
+                          and slide.timestamp - reference_time >= settings['min_slide_duration'])
+                if is_new:
+                    merged.append(slide)
+                    reference_cropped, reference_time = slide_cropped, slide.timestamp
+                else:
+                    logger.info(f"  Дубль на стыке убран: {slide.source.name} ({slide.timestamp:.2f}s)")
+            index += 1
+
+    # Перенумерация и сохранение
+    output_path.mkdir(parents=True, exist_ok=True)
+    saved_slides = []
+    for number, slide in enumerate(merged, start=1):
+        filepath = output_path / f"slide_{number:03d}.png"
+        if slide.frame is not None:
+            cv2.imwrite(str(filepath), slide.frame, [cv2.IMWRITE_PNG_COMPRESSION, 3])
+        else:
+            shutil.copyfile(slide.source, filepath)
+        saved_slides.append((str(filepath), slide.timestamp))
+
+    logger.info(f"✓ Объединено шардов: {len(manifests)}, слайдов: {len(saved_slides)}")
+    return saved_slides
+
+
+def main():
+    """Командная строка: объединение шардов"""
+    from .transcript_parser import TranscriptParser
+    from .markdown_generator import MarkdownGenerator
+
+    parser = argparse.ArgumentParser(description='Объединение результатов шардов Lecture Slides Extractor')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    merge_parser = subparsers.add_parser('merge', help='Объединить манифесты шардов')
+    merge_parser.add_argument('manifests', nargs='+', help='Манифесты шардов (JSON)')
+    merge_parser.add_argument('--slides-dir', required=True, help='Папка для итоговых слайдов')
+    merge_parser.add_argument('--video', default=None, help='Путь к видео (если отличается от манифеста)')
+    merge_parser.add_argument('--transcript', default=None, help='Транскрипт - сгенерировать Markdown')
+    merge_parser.add_argument('--output', default=None, help='Выходной Markdown файл')
+    merge_parser.add_argument('--title', default='Лекция', help='Заголовок Markdown документа')
+
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s', datefmt='%H:%M:%S')
+
+    try:
+        slides_data = merge_shards(args.manifests, args.slides_dir, video_path=args.video)
+    except (OSError, ValueError) as e:
+        logger.error(f"Ошибка объединения: {e}")
+        sys.exit(1)
+
+    if args.transcript and args.output:
+        transcript_parser = TranscriptParser()
+        transcript_entries = transcript_parser.parse_transcript(args.transcript)
+        MarkdownGenerator(transcript_parser).generate_markdown(
+            slides_data=slides_data,
+            transcript_entries=transcript_entries,
+            output_path=args.output,
+            slides_dir=Path(args.slides_dir).name,
+            title=args.title
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+"""
+Модуль сравнения кадров по сетке плиток с ранним выходом (--tile-compare)
+
+Смена слайда обычно меняет большую часть области анализа, а compare_frames
+всегда обрабатывает все пиксели. TileComparator делит обрезку на сетку плиток
+и обходит их от грубого к мелкому (сначала плитки, разнесённые по всей
+обрезке). После каждой плитки известны точные границы итогового сходства
+max(SSIM, процент совпадающих пикселей): процент пикселей дёшев и известен
+сразу для всей обрезки, а SSIM окон необработанных плиток лежит в [-1, 1].
+Как только граница гарантирует решение относительно порога, сравнение
+заканчивается:
+
+- нижняя граница не ниже порога - точно не новый слайд;
+- верхняя граница ниже порога - точно новый слайд.
+
+Если обойдены все плитки, сходство то же, что у compare_frames.
+"""
+
+from typing import List, Tuple
+
+import numpy as np
+
+from .batch_compare import PIXEL_TOLERANCE, SSIM_WINDOW, ssim_map
+from .config import TILE_GRID
+
+
+def _bit_reverse_ranks(count: int) -> List[int]:
+    """Ранги индексов 0..count-1 в порядке от грубого к мелкому (обращение битов)"""
+    bits = max(1, (count - 1).bit_length())
+    order = sorted(range(count), key=lambda index: int(format(index, f'0{bits}b')[::-1], 2))
+    ranks = [0] * count
+    for rank, index in enumerate(order):
+        ranks[index] = rank
+    return ranks
+
+
+def coarse_to_fine_order(rows: int, cols: int) -> List[Tuple[int, int]]:
+    """Порядок обхода плиток: сначала разреженная подсетка по всей обрезке, затем всё более плотные"""
+    row_ranks, col_ranks = _bit_reverse_ranks(rows), _bit_reverse_ranks(cols)
+    tiles = [(row, col) for row in range(rows) for col in range(cols)]
+    return sorted(tiles, key=lambda tile: (max(row_ranks[tile[0]], col_ranks[tile[1]]),
+                                           row_ranks[tile[0]], col_ranks[tile[1]]))
+
+
+def _bounds(length: int, parts: int) -> List[int]:
+    """Границы parts почти равных отрезков [0, length)"""
+    return [length * part // parts for part in range(parts + 1)]
+
+
+class TileResult:
+    """Результат сравнения по плиткам"""
+
+    def __init__(self, is_change: bool, similarity: float, exact: bool,
+                 tiles_evaluated: int, tiles_total: int, changed_tiles: List[Tuple[int, int]]):
+        self.is_change = is_change              # Сходство ниже порога
+        self.similarity = similarity            # Точное сходство (exact) или решившая граница
+        self.exact = exact                      # Сходство посчитано полностью, как в compare_frames
+        self.tiles_evaluated = tiles_evaluated  # Плиток, для которых посчитан SSIM
+        self.tiles_total = tiles_total
+        self.changed_tiles = changed_tiles      # (строка, столбец) плиток, сходство которых посчитано и ниже порога
+
+    def __repr__(self):
+        return (f"TileResult(change={self.is_change}, similarity={self.similarity:.3f}, "
+                f"tiles={self.tiles_evaluated}/{self.tiles_total}, changed={self.changed_tiles})")
+
+
+class TileComparator:
+    """Сравнение размытых серых обрезок по сетке плиток с ранним выходом"""
+
+    def __init__(self, threshold: float, grid: Tuple[int, int] = TILE_GRID):
+        """
+        Args:
+            threshold: Порог сходства: ниже - новый слайд
+            grid: Сетка плиток (строки, столбцы)
+        """
+        self.threshold = threshold
+        self.grid = grid
+        self.order = coarse_to_fine_order(*grid)
+        self._layouts = {}
+
+    def _layout(self, shape: Tuple[int, int]):
+        """Границы плиток для обрезки этого размера: по пикселям и по окнам SSIM"""
+        layout = self._layouts.get(shape)
+        if layout is None:
+            height, width = shape
+            rows, cols = self.grid
+            inner_height, inner_width = height - SSIM_WINDOW + 1, width - SSIM_WINDOW + 1
+            if inner_height < rows or inner_width < cols:
+                raise ValueError(f"Обрезка {width}x{height} слишком мала для сетки {rows}x{cols}")
+            layout = (_bounds(height, rows), _bounds(width, cols),
+                      _bounds(inner_height, rows), _bounds(inner_width, cols))
+            self._layouts[shape] = layout
+        return layout
+
+    def compare(self, reference: np.ndarray, frame: np.ndarray, fast: bool = False,
+                early_exit: bool = True) -> TileResult:
+        """
+        Сравнивает кадр с эталоном
+
+        Процент совпадающих пикселей дешёвый и считается сразу для всей обрезки:
+        если он не ниже порога, кадр точно не новый слайд и SSIM не нужен. Иначе
+        по плиткам считается SSIM, пока границы не решат исход.
+
+        Args:
+            reference: Размытая серая обрезка эталона (VideoProcessor.prepare_frame)
+            frame: Размытая серая обрезка кадра того же размера
+            fast: Только процент совпадающих пикселей (как compare_frames_fast)
+            early_exit: Заканчивать, как только решение гарантировано
+
+        Returns:
+            TileResult
+        """
+        pixel_rows, pixel_cols, window_rows, window_cols = self._layout(reference.shape)
+        similar = np.abs(reference.astype(np.int16) - frame) < PIXEL_TOLERANCE
+        pixel = np.count_nonzero(similar) / similar.size
+        tile_pixel = {
+            (row, col): np.count_nonzero(similar[pixel_rows[row]:pixel_rows[row + 1],
+                                                 pixel_cols[col]:pixel_cols[col + 1]])
+            / ((pixel_rows[row + 1] - pixel_rows[row]) * (pixel_cols[col + 1] - pixel_cols[col]))
+            for row, col in self.order
+        }
+
+        if fast or (early_exit and pixel >= self.threshold):
+            # Без SSIM сходство плитки известно только в быстром режиме
+            changed_tiles = [tile for tile in self.order if tile_pixel[tile] < self.threshold] if fast else []
+            return TileResult(pixel < self.threshold, pixel, fast, 0, len(self.order), changed_tiles)
+
+        total_windows = window_rows[-1] * window_cols[-1]
+        windows_left = total_windows
+        ssim_sum = 0.0
+        halo = SSIM_WINDOW - 1
+        changed_tiles = []
+        evaluated = 0
+
+        for row, col in self.order:
+            # SSIM окон, левый верхний угол которых лежит в плитке
+            top, bottom = window_rows[row], window_rows[row + 1]
+            left, right = window_cols[col], window_cols[col + 1]
+            tile_map = ssim_map(reference[top:bottom + halo, left:right + halo],
+                                frame[top:bottom + halo, left:right + halo])
+            ssim_sum += float(tile_map.sum())
+            windows_left -= tile_map.size
+            evaluated += 1
+            if max(tile_pixel[(row, col)], float(tile_map.mean())) < self.threshold:
+                changed_tiles.append((row, col))
+
+            if evaluated == len(self.order):
+                similarity = max(pixel, ssim_sum / total_windows)
+                return TileResult(similarity < self.threshold, similarity, True,
+                                  evaluated, len(self.order), changed_tiles)
+            if not early_exit:
+                continue
+            low = max(pixel, (ssim_sum - windows_left) / total_windows)
+            high = max(pixel, (ssim_sum + windows_left) / total_windows)
+            if low >= self.threshold:
+                return TileResult(False, low, False, evaluated, len(self.order), changed_tiles)
+            if high < self.threshold:
+                return TileResult(True, high, False, evaluated, len(self.order), changed_tiles)
@@ -0,0 +1,117 @@
+"""
+Модуль для обработки видео в пределах заданного времени (--time-budget)
+
+Контроллер измеряет скорость по ходу обработки и решает, во сколько раз
+проредить анализируемые кадры на оставшейся части видео, а при нехватке
+времени на этапе сравнения - перейти на быстрое сравнение. Все участки с
+пониженной плотностью анализа попадают в отчёт.
+"""
+
+import time
+from typing import List, Optional
+import logging
+
+from .config import TIME_BUDGET_FACTORS, TIME_BUDGET_RESERVE
+
+logger = logging.getLogger(__name__)
+
+
+class DensitySegment:
+    """Участок видео, проанализированный с прореживанием factor"""
+
+    def __init__(self, start_time: float, factor: int, interval: float):
+        self.start_time = start_time
+        self.end_time = start_time
+        self.factor = factor        # Во сколько раз реже обычного анализировались кадры
+        self.interval = interval    # Интервал между анализируемыми кадрами, секунды
+
+    def to_dict(self) -> dict:
+        return {
+            'start': round(self.start_time, 2),
+            'end': round(self.end_time, 2),
+            'factor': self.factor,
+            'interval_s': round(self.interval, 3)
+        }
+
+
+class TimeBudget:
+    """Контроллер времени обработки одного видео"""
+
+    def __init__(self, budget_seconds: float, reserve: float = TIME_BUDGET_RESERVE):
+        """
+        Args:
+            budget_seconds: Сколько секунд отведено на обработку
+            reserve: Доля бюджета, оставляемая на сохранение слайдов и погрешность прогноза
+        """
+        self.budget = budget_seconds
+        self.reserve = reserve
+        self.started = time.perf_counter()
+        self.factor = 1
+        self.segments: List[DensitySegment] = []
+        self.fast_compare_from: Optional[float] = None  # С какого времени видео включено быстрое сравнение
+
+    @property
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started
+
+    @property
+    def available(self) -> float:
+        """Сколько ещё секунд можно потратить (за вычетом резерва)"""
+        return self.budget * (1 - self.reserve) - self.elapsed
+
+    def choose_factor(
+        self,
+        remaining_frames: int,
+        frame_interval: int,
+        skip_cost: float,
+        sample_cost: float
+    ) -> int:
+        """
+        Выбирает минимальное прореживание, при котором оставшаяся часть укладывается в бюджет
+
+        Args:
+            remaining_frames: Сколько кадров видео осталось до конца отрезка
+            frame_interval: Обычный интервал анализа в кадрах
+            skip_cost: Время на пропуск (grab) одного кадра, секунды
+            sample_cost: Время на анализируемый кадр (чтение + сравнение), секунды
+
+        Returns:
+            Множитель интервала из TIME_BUDGET_FACTORS
+        """
+        available = self.available
+        for factor in TIME_BUDGET_FACTORS:
+            samples = remaining_frames / (frame_interval * factor)
+            projected = (remaining_frames - samples) * skip_cost + samples * sample_cost
+            if projected <= available:
+                return factor
+        return TIME_BUDGET_FACTORS[-1]
+
+    def set_factor(self, factor: int, timestamp: float, interval: float):
+        """Запоминает смену прореживания с момента timestamp"""
+        if factor == self.factor:
+            return
+        self.mark_position(timestamp)
+        logger.info(f"Бюджет времени: с {timestamp:.1f}s анализируется каждый {factor}-й кадр сетки "
+                    f"(интервал {interval:.1f}s)")
+        self.factor = factor
+        if factor > 1:
+            self.segments.append(DensitySegment(timestamp, factor, interval))
+
+    def mark_position(self, timestamp: float):
+        """Продлевает текущий участок с пониженной плотностью до timestamp"""
+        if self.segments and self.factor > 1:
+            self.segments[-1].end_time = timestamp
+
+    def need_fast_compare(self, remaining_comparisons: int, compare_cost: float) -> bool:
+        """Хватит ли времени на оставшиеся сравнения полным методом"""
+        return remaining_comparisons * compare_cost > self.available
+
+    def report(self) -> dict:
+        """Раздел отчёта о метриках"""
+        return {
+            'budget_s': self.budget,
+            'elapsed_s': round(self.elapsed, 2),
+            'met': self.elapsed <= self.budget,
+            'reduced_density': [segment.to_dict() for segment in self.segments if segment.end_time > segment.start_time],
+            'fast_compare_from': self.fast_compare_from
+        }
@@ -3,8 +3,11 @@
 """
 
 import re
+from pathlib import Path
 from typing import List, Tuple, Optional
 
+from .metrics import RunMetrics, STAGE_TRANSCRIPT
+
 
 class TranscriptEntry:
     """Класс для хранения одного сегмента транскрипта"""
@@ -21,6 +24,13 @@ class TranscriptEntry:
 class TranscriptParser:
     """Парсер транскриптов с таймкодами"""
     
+    def __init__(self, metrics: Optional[RunMetrics] = None):
+        """
+        Args:
+            metrics: Общий накопитель метрик запуска (None - свой)
+        """
+        self.metrics = metrics if metrics is not None else RunMetrics()
+    
     @staticmethod
     def parse_timestamp(timestamp_str: str) -> float:
         """
@@ -82,10 +92,18 @@ class TranscriptParser:
         Returns:
             Список TranscriptEntry
         """
-        entries = []
+        with self.metrics.stage(STAGE_TRANSCRIPT):
+            with open(file_path, 'r', encoding='utf-8') as f:
+                content = f.read()
+            entries = self._parse_content(content)
         
-        with open(file_path, 'r', encoding='utf-8') as f:
-            content = f.read()
+        self.metrics.count('transcript_bytes_read', Path(file_path).stat().st_size)
+        self.metrics.count('transcript_entries', len(entries))
+        return entries
+    
+    def _parse_content(self, content: str) -> List[TranscriptEntry]:
+        """Разбирает текст транскрипта на сегменты"""
+        entries = []
         
         # Паттерн для поиска временных меток: |(MM:SS - MM:SS)
         pattern = r'\|?\((\d+:\d+(?::\d+)?)\s*-\s*(\d+:\d+(?::\d+)?)\)'
@@ -134,6 +152,28 @@ class TranscriptParser:
         
         return entries
     
+    @staticmethod
+    def filter_by_time(
+        entries: List[TranscriptEntry],
+        start_time: float = 0.0,
+        end_time: Optional[float] = None
+    ) -> List[TranscriptEntry]:
+        """
+        Оставляет сегменты, пересекающиеся с отрезком видео [start_time, end_time)
+        
+        Args:
+            entries: Сегменты транскрипта
+            start_time: Начало отрезка в секундах
+            end_time: Конец отрезка в секундах (None - до конца)
+        
+        Returns:
+            Отфильтрованный список (время сегментов не меняется)
+        """
+        return [
+            entry for entry in entries
+            if entry.end_time > start_time and (end_time is None or entry.start_time < end_time)
+        ]
+    
     @staticmethod
     def _split_text_proportionally(text: str, start_time: float, end_time: float, 
                                    slide_times: List[float]) -> List[Tuple[float, str]]:
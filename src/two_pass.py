@@ -0,0 +1,300 @@
+"""
+Модуль двухпроходного детектирования: грубый просмотр, точная проверка (--two-pass)
+
+Точный режим (частый шаг и строгий порог) сравнивает в полном разрешении
+каждый кадр частой сетки, хотя слайд меняется раз в минуту. Двухпроходный
+режим делит работу:
+
+1. Грубый проход: кадры через TWO_PASS_COARSE_FACTOR шагов сетки, обрезка
+   уменьшена до TWO_PASS_ANALYSIS_WIDTH (хранится серой), полные кадры не
+   копируются.
+2. Точный проход идёт по грубым кадрам и держит то же состояние, что
+   детектор: эталон - последний принятый слайд, новый слайд принимается не
+   раньше MIN_SLIDE_DURATION после него. Грубый кадр, отличающийся от
+   эталона (порог поднят на TWO_PASS_MARGIN), открывает окно - частую сетку
+   от предыдущего грубого кадра, но не раньше конца выдержки. Смена, которая
+   случилась во время выдержки, принимается детектором на её границе, поэтому
+   отличие, замеченное до границы, открывает окно на первом грубом кадре
+   после неё. Окна декодируются в полном разрешении анализа, решение по их
+   кадрам сразу двигает эталон.
+
+Кадры окон вместе с первым кадром отрезка уходят в обычный
+detect_slide_changes. Между окнами слайд не меняется (это и проверил грубый
+проход), поэтому решения детектора те же, что при полном просмотре частой
+сетки, если смена не прячется между грубыми кадрами ниже ослабленного порога.
+"""
+
+import time
+from typing import Iterator, List, Tuple
+import logging
+
+import cv2
+import numpy as np
+
+from .config import (MIN_SLIDE_DURATION, TWO_PASS_COARSE_FACTOR, TWO_PASS_ANALYSIS_WIDTH, TWO_PASS_MARGIN,
+                     TWO_PASS_MAX_THRESHOLD)
+from .metrics import STAGE_CROP, STAGE_COMPARE
+from .video_processor import VideoProcessor, normalize_crop
+
+logger = logging.getLogger(__name__)
+
+
+def merge_windows(windows: List[Tuple[int, int]]) -> List[Tuple[int, int]]:
+    """Объединяет пересекающиеся и соседние окна [начало, конец)"""
+    merged = []
+    for start, end in sorted(windows):
+        if merged and start <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+class FinePass:
+    """
+    Точный проход по окнам с состоянием детектора (эталон и время принятого слайда)
+
+    Окна декодируются строго по порядку кадров; кадры копятся в frames для
+    detect_slide_changes, решение "новый слайд" - то же, что у детектора.
+    """
+
+    def __init__(self, scanner: 'TwoPassScanner', first_frame: np.ndarray, first_time: float, first_number: int):
+        processor = scanner.processor
+        self.scanner = scanner
+        self.processor = processor
+        self.frames = [(first_frame, first_time, first_number)]
+        self.windows = []                       # Декодированные окна [начало, конец)
+        self.decoded_end = first_number + 1     # Кадры до этого номера уже пройдены
+        self.hold_off = int(MIN_SLIDE_DURATION * processor.fps) - 1  # Выдержка в кадрах (с запасом в кадр)
+        self._accept(first_frame, first_time, first_number)
+
+    def _accept(self, frame: np.ndarray, timestamp: float, frame_number: int, cropped: np.ndarray = None):
+        """Новый эталон: принятый слайд"""
+        self.reference = self.processor._crop_frame_region(frame) if cropped is None else cropped
+        self.reference_time = timestamp
+        self.reference_number = frame_number
+        self.coarse_reference = self.scanner._coarse_gray(frame)
+
+    @property
+    def hold_end(self) -> int:
+        """Первый кадр, который детектор может принять после текущего эталона (с запасом)"""
+        return self.reference_number + self.hold_off
+
+    def decode(self, start: int, end: int) -> bool:
+        """
+        Декодирует частую сетку [start, end), пропуская пройденное и выдержку
+
+        Returns:
+            True если окно не пустое
+        """
+        processor = self.processor
+        metrics = processor.metrics
+        start = max(start, self.decoded_end, self.hold_end)
+        end = min(end, processor.end_frame)
+        if start >= end:
+            return False
+        self.windows.append((start, end))
+        self.decoded_end = end
+
+        for frame, timestamp, frame_number in processor.iter_range(start, end):
+            processor._check_cancelled()
+            frame = frame.copy()
+            self.frames.append((frame, timestamp, frame_number))
+            if timestamp - self.reference_time < MIN_SLIDE_DURATION:
+                continue
+
+            started = time.perf_counter()
+            cropped = processor._crop_frame_region(frame)
+            metrics.add_time(STAGE_CROP, time.perf_counter() - started)
+            started = time.perf_counter()
+            similarity = processor._comparator(self.reference, cropped)
+            metrics.add_time(STAGE_COMPARE, time.perf_counter() - started)
+            if similarity < processor.threshold:
+                self._accept(frame, timestamp, frame_number, cropped)
+                if end <= self.hold_end:
+                    # Остаток окна - в выдержке нового слайда, детектор его не примет
+                    break
+        return True
+
+    def rollback(self, frame_number: int):
+        """Забывает кадры после frame_number (эталон на них не менялся), чтобы пройти их заново по порядку"""
+        while len(self.frames) > 1 and self.frames[-1][2] > frame_number:
+            self.frames.pop()
+        self.windows = [(start, min(end, frame_number + 1)) for start, end in self.windows if start <= frame_number]
+        self.decoded_end = min(self.decoded_end, frame_number + 1)
+
+
+class TwoPassScanner:
+    """Отбор кадров для детектора: грубый проход находит окна, точный декодирует только их"""
+
+    name = "двухпроходное детектирование"
+    report_key = 'two_pass_scan'   # Раздел отчёта о метриках (info)
+
+    def __init__(
+        self,
+        processor: VideoProcessor,
+        coarse_factor: int = TWO_PASS_COARSE_FACTOR,
+        coarse_width: int = TWO_PASS_ANALYSIS_WIDTH,
+        margin: float = TWO_PASS_MARGIN
+    ):
+        """
+        Args:
+            processor: VideoProcessor, чьи отрезок, сетка, область и порог используются
+            coarse_factor: Во сколько раз шаг грубого прохода больше шага сетки
+            coarse_width: Ширина обрезки в грубом проходе
+            margin: Насколько порог грубого прохода выше порога детектора
+        """
+        self.processor = processor
+        self.coarse_interval = processor.frame_interval * coarse_factor
+        self.coarse_width = coarse_width
+        self.coarse_threshold = min(processor.threshold + margin, TWO_PASS_MAX_THRESHOLD)
+        self.coarse_windows = 0   # Сколько окон открыли грубые кадры
+
+    def _coarse_crop(self, frame: np.ndarray) -> np.ndarray:
+        return normalize_crop(self.processor._crop_frame_region(frame), self.coarse_width)
+
+    def _coarse_gray(self, frame: np.ndarray) -> np.ndarray:
+        """Уменьшенная серая обрезка кадра - так хранятся эталон и кадры грубого прохода"""
+        return self._gray(self._coarse_crop(frame))
+
+    @staticmethod
+    def _gray(cropped: np.ndarray) -> np.ndarray:
+        # Сравнение всё равно идёт по яркости; копия не держит в памяти весь кадр
+        return cropped.copy() if cropped.ndim == 2 else cv2.cvtColor(cropped, cv2.COLOR_BGR2GRAY)
+
+    def describe(self) -> str:
+        """Параметры грубого прохода для лога"""
+        return (f"грубый шаг {self.coarse_interval / self.processor.fps:.1f}s, "
+                f"ширина {self.coarse_width}px, порог {self.coarse_threshold:.3f}")
+
+    def coarse_report(self) -> dict:
+        """Параметры грубого прохода для отчёта о метриках"""
+        return {'coarse_interval_s': round(self.coarse_interval / self.processor.fps, 3)}
+
+    def iter_coarse(self, first_frame: np.ndarray, first_number: int) -> Iterator[Tuple[np.ndarray, float, int]]:
+        """
+        Обрезки грубого прохода: первая - эталон на начало отрезка, дальше грубая сетка
+
+        Yields:
+            Кортежи (уменьшенная_обрезка, время, номер_кадра)
+        """
+        processor = self.processor
+        yield self._coarse_crop(first_frame), first_number / processor.fps, first_number
+        for frame, timestamp, frame_number in processor.iter_range(first_number + 1, processor.end_frame,
+                                                                   self.coarse_interval):
+            started = time.perf_counter()
+            cropped = self._coarse_crop(frame)
+            processor.metrics.add_time(STAGE_CROP, time.perf_counter() - started)
+            yield cropped, timestamp, frame_number
+
+    def window_end(self, frame_number: int) -> int:
+        """Конец окна (не включается) для смены, замеченной на грубом кадре frame_number"""
+        return frame_number + 1
+
+    def fixed_windows(self) -> List[Tuple[int, int]]:
+        """Окна, которые точный проход декодирует всегда, не дожидаясь грубого прохода"""
+        return []
+
+    def coarse_pass(self, first_frame: np.ndarray, first_number: int) -> List[Tuple[np.ndarray, int]]:
+        """
+        Грубый проход целиком (до точного: оба читают видео одним декодером)
+
+        Returns:
+            [(серая уменьшенная обрезка, номер_кадра)] без эталона на начало отрезка
+        """
+        processor = self.processor
+        end_time = processor.end_frame / processor.fps
+        samples = []
+        coarse = self.iter_coarse(first_frame, first_number)
+        next(coarse, None)   # Эталон на начало отрезка: точный проход берёт его из первого кадра
+        for cropped, timestamp, frame_number in coarse:
+            processor._check_cancelled()
+            samples.append((self._gray(cropped), frame_number))
+            if processor.on_progress is not None:
+                processor.on_progress(timestamp, end_time)
+        return samples
+
+    def _coarse_differs(self, reference: np.ndarray, cropped: np.ndarray) -> bool:
+        started = time.perf_counter()
+        similarity = VideoProcessor.compare_frames(reference, cropped)
+        self.processor.metrics.add_time(STAGE_COMPARE, time.perf_counter() - started)
+        return similarity < self.coarse_threshold
+
+    def fine_pass(self, fine: FinePass, samples: List[Tuple[np.ndarray, int]]):
+        """
+        Точный проход: окна по грубым кадрам, отличающимся от эталона, и фиксированные окна
+
+        Для каждого промежутка (предыдущий грубый кадр, грубый кадр]: сначала
+        фиксированные окна в нём, затем сравнение грубого кадра с эталоном.
+        Если после выдержки он отличается (или отличался предыдущий - ещё в
+        выдержке), промежуток проходится заново целиком от начала выдержки или
+        последнего принятого слайда.
+        """
+        fixed = merge_windows(self.fixed_windows())
+        first_number = fine.reference_number
+        previous_number, previous_differs = first_number, False
+        for cropped, frame_number in samples:
+            self.processor._check_cancelled()
+            while fixed and fixed[0][0] <= frame_number:
+                start, end = fixed[0]
+                fine.decode(start, min(end, frame_number + 1))
+                if end <= frame_number + 1:
+                    fixed.pop(0)
+                else:
+                    break
+
+            differs = self._coarse_differs(fine.coarse_reference, cropped)
+            hold_end = fine.hold_end
+            if frame_number >= hold_end and (differs or (previous_differs and previous_number < hold_end)):
+                start = max(previous_number, first_number, fine.reference_number)
+                fine.rollback(start)
+                reference_number = fine.reference_number
+                if fine.decode(start + 1, self.window_end(frame_number)):
+                    self.coarse_windows += 1
+                if fine.reference_number != reference_number:
+                    differs = self._coarse_differs(fine.coarse_reference, cropped)
+            previous_number, previous_differs = frame_number, differs
+
+        for start, end in fixed:
+            fine.decode(start, end)
+
+    def extract_frames(self) -> List[Tuple[np.ndarray, float, int]]:
+        """
+        Кадры для detect_slide_changes: первый кадр отрезка и частая сетка внутри окон
+
+        Returns:
+            Список кортежей (ПОЛНЫЙ_кадр, время, номер_кадра), как VideoProcessor.extract_frames()
+        """
+        processor = self.processor
+        metrics = processor.metrics
+        fps = processor.fps
+
+        logger.info(f"{self.name.capitalize()}: {self.describe()}")
+
+        first = next(processor.iter_range(processor.start_frame, processor.end_frame), None)
+        if first is None:
+            return []
+        first_frame, first_time, first_number = first
+        first_frame = first_frame.copy()
+
+        samples = self.coarse_pass(first_frame, first_number)
+        fine = FinePass(self, first_frame, first_time, first_number)
+        self.fine_pass(fine, samples)
+
+        frames = fine.frames
+        windows = merge_windows(fine.windows)
+        windowed = sum(end - start for start, end in windows)
+        logger.info(f"Грубый проход: {len(samples)} кадров, окон: {len(windows)} "
+                    f"({windowed / fps:.1f}s из {(processor.end_frame - first_number) / fps:.1f}s)")
+
+        metrics.count('two_pass_windows', len(windows))
+        metrics.info[self.report_key] = {
+            **self.coarse_report(),
+            'coarse_width': self.coarse_width,
+            'coarse_threshold': self.coarse_threshold,
+            'coarse_frames': len(samples),
+            'fine_frames': len(frames),
+            'windows': [[round(start / fps, 3), round(end / fps, 3)] for start, end in windows]
+        }
+        logger.info(f"Точный проход: {len(frames)} кадров в окнах")
+        return frames
@@ -0,0 +1,228 @@
+"""
+Модуль двухфазного детектирования смены слайдов (--compare-workers)
+
+Обычный детектор сравнивает каждый кадр с последним принятым слайдом, и
+этот эталон меняется по ходу - поэтому цикл последовательный. Двухфазный
+детектор даёт те же слайды, но выносит тяжёлую работу в пул потоков:
+
+1. Подписи кадров (серая размытая обрезка - всё, что нужно метрикам)
+   считаются в пуле с опережением, вместе с хешем подписи - сходством с
+   предыдущим кадром в единственной точной форме "совпадает целиком".
+   Настоящий SSIM с предыдущим кадром решения не даёт: сходство не
+   транзитивно, и кадр, похожий на соседа, может уже не походить на эталон -
+   его пришлось бы сравнивать с эталоном всё равно.
+2. Решения принимаются последовательно по тому же правилу, что в
+   VideoProcessor.is_slide_change, а считается только то, без чего
+   решение неизвестно:
+   - кадр ближе MIN_SLIDE_DURATION к эталону - не новый слайд без сравнения;
+   - процент совпадающих пикселей не ниже порога - не новый слайд без SSIM
+     (итоговое сходство - максимум из SSIM и этой метрики); он считается
+     сразу для всего окна опережения одной пачкой (batch_compare.py);
+   - для остальных SSIM с эталоном считается в пуле сразу для нескольких
+     кадров подряд; если первый из них оказался новым слайдом, результаты
+     для последующих отбрасываются и пересчитываются с новым эталоном;
+   - кадр, совпадающий с предыдущим кадром того же окна, получает его
+     решение: сходство с тем же эталоном то же, SSIM не считается.
+"""
+
+import hashlib
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Tuple
+import logging
+
+import numpy as np
+
+from .batch_compare import BatchComparator
+from .config import MIN_SLIDE_DURATION, MEMORY_CHECK_EVERY, TIME_BUDGET_CHECK_EVERY, TWO_PHASE_LOOKAHEAD
+from .metrics import STAGE_CROP, STAGE_COMPARE
+from .video_processor import Slide, VideoProcessor
+
+logger = logging.getLogger(__name__)
+
+
+class TwoPhaseDetector:
+    """Детектор смены слайдов с параллельным расчётом сходства и точным последовательным решением"""
+
+    def __init__(self, processor: VideoProcessor, workers: int):
+        """
+        Args:
+            processor: VideoProcessor, чьи порог, область анализа и метрики используются
+            workers: Количество потоков пула
+        """
+        self.processor = processor
+        self.workers = workers
+        self.lookahead = max(TWO_PHASE_LOOKAHEAD, 2 * workers)
+        self.comparator = None
+
+    def _signature(self, frame: np.ndarray) -> Tuple[np.ndarray, bytes]:
+        """Подпись кадра (серая размытая обрезка области анализа) и её хеш"""
+        prepared = VideoProcessor.prepare_frame(self.processor._crop_frame_region(frame))
+        return prepared, hashlib.blake2b(prepared.tobytes(), digest_size=16).digest()
+
+    def detect(self, frames: List[Tuple[np.ndarray, float, int]]) -> List[Slide]:
+        """
+        Обнаруживает смену слайдов (результат тот же, что у VideoProcessor.detect_slide_changes)
+
+        Args:
+            frames: Список ПОЛНЫХ кадров из extract_frames()
+
+        Returns:
+            Список уникальных слайдов (с ПОЛНЫМИ кадрами)
+        """
+        if not frames:
+            return []
+
+        processor = self.processor
+        metrics = processor.metrics
+        threshold = processor.threshold
+        count = len(frames)
+
+        logger.info(f"Детектирование смены слайдов (порог SSIM: {threshold}, потоков: {self.workers})...")
+        logger.info(f"Анализ области: {processor.get_region_description()}")
+
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            # Фаза 1: подписи считаются в пуле с опережением
+            signatures = {}
+            submitted = 0
+
+            def prefetch(index: int):
+                nonlocal submitted
+                while submitted < min(count, index + self.lookahead):
+                    signatures[submitted] = pool.submit(self._signature, frames[submitted][0])
+                    submitted += 1
+
+            def signature(index: int, digest: bool = False):
+                prefetch(index)
+                started = time.perf_counter()
+                prepared, signature_digest = signatures[index].result()
+                metrics.add_time(STAGE_CROP, time.perf_counter() - started)
+                return signature_digest if digest else prepared
+
+            # Фаза 2: последовательное решение
+            first_frame, first_time, first_num = frames[0]
+            slides = [Slide(first_frame.copy(), first_time, first_num)]
+            reference = signature(0)
+            self.comparator = BatchComparator(reference.shape, self.lookahead)
+            self.comparator.set_reference(reference, prepared=True)
+
+            index = 1
+            while index < count:
+                processor._check_cancelled()
+                position = index
+                if frames[index][1] - slides[-1].timestamp < MIN_SLIDE_DURATION:
+                    # Раньше минимальной длительности новый слайд невозможен - сравнение не нужно
+                    prefetch(index)
+                    metrics.count('comparisons_skipped')
+                    index += 1
+                else:
+                    index, accepted = self._decide_from(index, frames, signature, reference, slides, pool)
+                    if accepted:
+                        reference = signature(index - 1)
+                        self.comparator.set_reference(reference, prepared=True)
+
+                # Подписи пройденных кадров больше не нужны
+                for passed in [key for key in signatures if key < index]:
+                    del signatures[passed]
+
+                for checked in range(position + 1, index + 1):
+                    if checked % MEMORY_CHECK_EVERY == 0:
+                        metrics.check_memory()
+                        logger.info(f"Проанализировано: {checked}/{count} кадров")
+                    if processor.time_budget is not None and checked % TIME_BUDGET_CHECK_EVERY == 0:
+                        processor._check_compare_budget(count - checked, frames[checked - 1][1])
+
+            for future in signatures.values():
+                future.cancel()
+
+        logger.info(f"Всего найдено уникальных слайдов: {len(slides)}")
+        return slides
+
+    def _decide_from(self, index: int, frames: list, signature, reference: np.ndarray,
+                     slides: List[Slide], pool: ThreadPoolExecutor) -> Tuple[int, bool]:
+        """
+        Решает судьбу кадров, начиная с index, пока эталон не сменится или не наберётся пачка кандидатов
+
+        Процент совпадающих пикселей считается пачкой для всего окна; кадры, у
+        которых он не ниже порога, - не новые слайды, для остальных (кандидатов)
+        SSIM считается в пуле. Принятый слайд добавляется в slides.
+
+        Returns:
+            (индекс первого кадра, о котором ещё нет решения; принят ли новый слайд -
+            тогда он на предыдущем индексе)
+        """
+        processor = self.processor
+        metrics = processor.metrics
+
+        limit = min(len(frames), index + self.lookahead)
+        window = [signature(position) for position in range(index, limit)]
+        started = time.perf_counter()
+        pixels = self.comparator.pixel_similarity(self.comparator.load(window, prepared=True))
+        metrics.add_time(STAGE_COMPARE, time.perf_counter() - started, calls=len(window))
+
+        candidates = []
+        scanned = index
+        while scanned < limit and len(candidates) < self.workers:
+            pixel = pixels[scanned - index]
+            metrics.count('comparisons')
+            if pixel >= processor.threshold:
+                metrics.count('ssim_skipped')
+            elif scanned > index and signature(scanned, digest=True) == signature(scanned - 1, digest=True):
+                # Тот же кадр, что предыдущий, и тот же эталон: решение предыдущего
+                # (если он окажется новым слайдом, этот кадр пересмотрят с новым эталоном)
+                metrics.count('ssim_skipped')
+                metrics.count('ssim_reused')
+            else:
+                candidates.append((scanned, window[scanned - index], pixel))
+            scanned += 1
+
+        accepted = self._first_change(pool, reference, candidates, frames)
+        if accepted is None:
+            return scanned, False
+
+        accepted_index, similarity = accepted
+        current_frame, current_time, current_num = frames[accepted_index]
+        slides.append(Slide(current_frame.copy(), current_time, current_num))
+        logger.info(f"Найден новый слайд #{len(slides)} на {current_time:.2f}s (SSIM: {similarity:.3f})")
+        # Кадры после принятого пересматриваются с новым эталоном
+        metrics.count('comparisons_discarded', scanned - accepted_index - 1)
+        return accepted_index + 1, True
+
+    def _first_change(self, pool: ThreadPoolExecutor, reference: np.ndarray, candidates: list, frames: list):
+        """
+        Считает сходство кандидатов с эталоном в пуле и находит первый новый слайд
+
+        Returns:
+            (индекс, сходство) первого кадра со сходством ниже порога или None
+        """
+        if not candidates:
+            return None
+        processor = self.processor
+        metrics = processor.metrics
+
+        started = time.perf_counter()
+        results = None
+        if processor._comparator is processor.compare_frames_fast:
+            # Бюджет времени переключил на быстрое сравнение - SSIM не считаем
+            scores = [pixel for _, _, pixel in candidates]
+        elif processor.tile_comparator is not None:
+            # SSIM по плиткам - до тех пор, пока исход не гарантирован
+            futures = [pool.submit(processor.tile_comparator.compare, reference, current)
+                       for _, current, _ in candidates]
+            results = [future.result() for future in futures]
+            scores = [result.similarity for result in results]
+            for result in results:
+                metrics.count('tiles_evaluated', result.tiles_evaluated)
+                metrics.count('tiles_total', result.tiles_total)
+        else:
+            futures = [pool.submit(VideoProcessor.structural_similarity, reference, current)
+                       for _, current, _ in candidates]
+            scores = [max(future.result(), pixel) for future, (_, _, pixel) in zip(futures, candidates)]
+        metrics.add_time(STAGE_COMPARE, time.perf_counter() - started)
+
+        for position, ((candidate, _, _), similarity) in enumerate(zip(candidates, scores)):
+            if similarity < processor.threshold:
+                if results is not None:
+                    processor.record_tile_change(frames[candidate][1], results[position])
+                return candidate, similarity
+        return None
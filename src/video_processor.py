@@ -3,9 +3,11 @@
 """
 
 import cv2
+import multiprocessing
 import numpy as np
+import time
 from pathlib import Path
-from typing import List, Tuple, Optional
+from typing import Callable, Iterator, List, Tuple, Optional
 from skimage.metrics import structural_similarity as ssim
 import logging
 
@@ -18,13 +20,125 @@ from .config import (
     CROP_REGION_CENTER,
     DEFAULT_CROP_REGION,
     CROP_SIZE_CORNER,
-    CROP_SIZE_CENTER
+    CROP_SIZE_CENTER,
+    MEMORY_CHECK_EVERY,
+    TIME_BUDGET_CHECK_EVERY,
+    DEFAULT_DECODER,
+    DEFAULT_COMPARE_WORKERS,
+    DEFAULT_ANALYSIS_WIDTH
 )
+from .decoders import FrameDecoder, OpenCVDecoder, create_decoder
+from .frame_ring import SharedMemoryDecoder
+from .metrics import RunMetrics, STAGE_DECODE, STAGE_CROP, STAGE_COMPARE, STAGE_SAVE
+from .tile_compare import TileComparator, TileResult
+from .time_budget import TimeBudget
 
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
+def crop_rect(width: int, height: int, crop_region: str) -> Tuple[int, int, int, int]:
+    """
+    Прямоугольник области анализа в кадре width x height
+    
+    Args:
+        width: Ширина кадра
+        height: Высота кадра
+        crop_region: Область ('bottom_left', 'bottom_right', 'top_right', 'top_left', 'center')
+    
+    Returns:
+        Кортеж (x, y, ширина, высота)
+    """
+    if crop_region == CROP_REGION_BOTTOM_LEFT:
+        # Левый нижний угол: 30% ширины, 30% высоты
+        crop_width = int(width * CROP_SIZE_CORNER)
+        crop_height = int(height * CROP_SIZE_CORNER)
+        x_start = 0
+        y_start = height - crop_height
+        
+    elif crop_region == CROP_REGION_BOTTOM_RIGHT:
+        # Правый нижний угол: 30% ширины, 30% высоты
+        crop_width = int(width * CROP_SIZE_CORNER)
+        crop_height = int(height * CROP_SIZE_CORNER)
+        x_start = width - crop_width
+        y_start = height - crop_height
+        
+    elif crop_region == CROP_REGION_TOP_RIGHT:
+        # Правый верхний угол: 30% ширины, 30% высоты
+        crop_width = int(width * CROP_SIZE_CORNER)
+        crop_height = int(height * CROP_SIZE_CORNER)
+        x_start = width - crop_width
+        y_start = 0
+        
+    elif crop_region == CROP_REGION_TOP_LEFT:
+        # Левый верхний угол: 30% ширины, 30% высоты
+        crop_width = int(width * CROP_SIZE_CORNER)
+        crop_height = int(height * CROP_SIZE_CORNER)
+        x_start = 0
+        y_start = 0
+        
+    elif crop_region == CROP_REGION_CENTER:
+        # Центр: 50% ширины, 50% высоты (чтобы лектор не попал)
+        crop_width = int(width * CROP_SIZE_CENTER)
+        crop_height = int(height * CROP_SIZE_CENTER)
+        x_start = (width - crop_width) // 2
+        y_start = (height - crop_height) // 2
+        
+    else:
+        # По умолчанию левый нижний угол
+        crop_width = int(width * CROP_SIZE_CORNER)
+        crop_height = int(height * CROP_SIZE_CORNER)
+        x_start = 0
+        y_start = height - crop_height
+    
+    return x_start, y_start, crop_width, crop_height
+
+
+def analysis_size(crop_width: int, crop_height: int, analysis_width: Optional[int]) -> Optional[Tuple[int, int]]:
+    """
+    Размер, к которому уменьшается обрезка перед анализом
+    
+    Args:
+        crop_width: Ширина обрезки в исходном разрешении
+        crop_height: Высота обрезки
+        analysis_width: Ширина анализа (None - исходное разрешение)
+    
+    Returns:
+        (ширина, высота) с сохранением пропорций или None, если уменьшать не нужно
+    """
+    if analysis_width is None or crop_width <= analysis_width:
+        return None
+    return analysis_width, max(1, int(round(crop_height * analysis_width / crop_width)))
+
+
+def normalize_crop(cropped: np.ndarray, analysis_width: Optional[int]) -> np.ndarray:
+    """Уменьшает обрезку до ширины анализа (INTER_AREA - усреднение, без алиасинга)"""
+    size = analysis_size(cropped.shape[1], cropped.shape[0], analysis_width)
+    if size is None:
+        return cropped
+    return cv2.resize(cropped, size, interpolation=cv2.INTER_AREA)
+
+
+def crop_frame_region(frame: np.ndarray, crop_region: str, analysis_width: Optional[int] = None) -> np.ndarray:
+    """
+    Вырезает область кадра для анализа в зависимости от выбранной области
+    
+    Args:
+        frame: Исходный кадр
+        crop_region: Область ('bottom_left', 'bottom_right', 'top_right', 'top_left', 'center')
+        analysis_width: Уменьшить обрезку до этой ширины (None - исходное разрешение)
+    
+    Returns:
+        Обрезанный кадр для анализа
+    """
+    height, width = frame.shape[:2]
+    x_start, y_start, crop_width, crop_height = crop_rect(width, height, crop_region)
+    return normalize_crop(frame[y_start:y_start+crop_height, x_start:x_start+crop_width], analysis_width)
+
+
+class ExtractionCancelled(Exception):
+    """Обработка отменена по запросу (should_cancel вернул True)"""
+
+
 class Slide:
     """Класс для хранения информации о слайде"""
     
@@ -38,14 +152,39 @@ class Slide:
 
 
 class VideoProcessor:
-    """Обработчик видео для извлечения слайдов"""
+    """
+    Обработчик видео для извлечения слайдов
+    
+    Видео открывается в конструкторе; используйте как контекстный менеджер
+    (или вызовите close()), чтобы освободить его сразу после обработки:
+    
+        with VideoProcessor("lecture.mp4") as processor:
+            slides = processor.process("slides")
+    """
     
     def __init__(
         self,
         video_path: str,
         sample_rate: float = 1.0,
         threshold: float = 0.85,
-        crop_region: str = DEFAULT_CROP_REGION
+        crop_region: str = DEFAULT_CROP_REGION,
+        start_time: float = 0.0,
+        end_time: Optional[float] = None,
+        metrics: Optional[RunMetrics] = None,
+        on_progress: Optional[Callable[[float, float], None]] = None,
+        on_slide: Optional[Callable[[int, str, float], None]] = None,
+        should_cancel: Optional[Callable[[], bool]] = None,
+        time_budget: Optional[float] = None,
+        luma_decode: bool = False,
+        decoder: str = DEFAULT_DECODER,
+        decode_process: bool = False,
+        compare_workers: int = DEFAULT_COMPARE_WORKERS,
+        tile_compare: bool = False,
+        analysis_width: Optional[int] = DEFAULT_ANALYSIS_WIDTH,
+        two_pass: bool = False,
+        keyframes: bool = False,
+        packet_prefilter: bool = False,
+        seek_index: bool = False
     ):
         """
         Args:
@@ -53,28 +192,179 @@ class VideoProcessor:
             sample_rate: Частота анализа кадров (секунды между кадрами)
             threshold: Порог SSIM для детектирования смены (0-1)
             crop_region: Область для анализа ('bottom_left', 'bottom_right', 'top_right', 'top_left', 'center')
+            start_time: Начало обрабатываемого отрезка в секундах
+            end_time: Конец отрезка в секундах (None - до конца видео)
+            metrics: Общий накопитель метрик запуска (None - свой)
+            on_progress: Вызывается при извлечении кадров: (время_кадра, конец_отрезка) в секундах
+            on_slide: Вызывается после сохранения каждого слайда: (номер, путь, время)
+            should_cancel: Проверяется на каждом кадре; True - обработка прерывается
+                исключением ExtractionCancelled
+            time_budget: Бюджет времени на обработку в секундах (None - без ограничения):
+                при нехватке времени анализируемые кадры прореживаются, затем
+                включается быстрое сравнение
+            luma_decode: Анализировать яркостную плоскость (Y) декодированного кадра без
+                преобразования в BGR; в BGR заново читаются только принятые слайды.
+                Если бэкенд не отдаёт кадры в исходном формате - обычное декодирование
+            decoder: Декодер кадров: 'opencv' (по умолчанию) или 'ffmpeg' (серые обрезки
+                области анализа из процесса ffmpeg, см. decoders.py)
+            decode_process: Декодировать в отдельном процессе, передавая серые обрезки
+                через разделяемую память (см. frame_ring.py)
+            compare_workers: Потоков для сравнения кадров; больше 1 - двухфазный детектор
+                с теми же результатами (см. two_phase.py)
+            tile_compare: Сравнивать по сетке плиток с ранним выходом, как только
+                решение гарантировано (те же решения, см. tile_compare.py)
+            analysis_width: Ширина анализа в пикселях: обрезка уменьшается до неё сразу
+                после декодирования, до любых метрик, поэтому работа и пороги не
+                зависят от разрешения видео (None - исходное разрешение обрезки)
+            two_pass: Двухпроходное детектирование: грубый просмотр находит окна смены
+                слайдов, частая сетка декодируется только в них (см. two_pass.py)
+            keyframes: Искать смены слайдов по ключевым кадрам видео и декодировать частую
+                сетку только в GOP со сменой (см. keyframes.py); без PyAV и ffprobe -
+                обычный просмотр сетки
+            packet_prefilter: Декодировать частую сетку в основном у всплесков размеров
+                пакетов и реже - в страховочных кадрах (см. prefilter.py); без ffprobe
+                и PyAV - обычный просмотр сетки
+            seek_index: Индекс ключевых кадров рядом с видео ({видео}.seekindex.json,
+                строится при первом запуске): перемотка OpenCV точная - к ключевому
+                кадру и дальше счётом кадров, внутри GOP не повторяется (см. seek_index.py)
         """
         self.video_path = video_path
         self.sample_rate = sample_rate
         self.threshold = threshold
         self.crop_region = crop_region
+        self.start_time = start_time
+        self.end_time = end_time
+        self.saved_slides: List[Tuple[str, float, int]] = []  # (путь, время, номер кадра) последних сохранённых слайдов
+        self.metrics = metrics if metrics is not None else RunMetrics()
+        self.on_progress = on_progress
+        self.on_slide = on_slide
+        self.should_cancel = should_cancel
+        self.compare_workers = compare_workers
+        self.analysis_width = analysis_width
+        self.two_pass = two_pass
+        self.keyframes = keyframes
+        self.packet_prefilter = packet_prefilter
+        self.tile_comparator = TileComparator(threshold) if tile_compare else None
+        self._tile_reference: Optional[Tuple[np.ndarray, np.ndarray]] = None  # (обрезка эталона, размытая)
+        self.time_budget = TimeBudget(time_budget) if time_budget else None
+        self.sampling_factor = 1                   # Прореживание сетки кадров (меняет бюджет времени)
+        self._comparator = self.compare_frames     # Метод сравнения (бюджет может переключить на быстрый)
+        self._skip_seconds = 0.0                   # Время на пропуск кадров (grab) - для прогноза бюджета
+        self._slide_decoder: Optional[OpenCVDecoder] = None  # Чтение слайдов в BGR, если кадры анализа не BGR
+        
+        if decode_process and multiprocessing.current_process().daemon:
+            # Процессы пула multiprocessing не могут запускать свои процессы
+            logger.warning("⚠ Декодирование в отдельном процессе недоступно внутри процесса пула - декодируем здесь")
+            decode_process = False
         
         # Откроем видео для получения метаданных
-        self.cap = cv2.VideoCapture(video_path)
-        if not self.cap.isOpened():
-            raise ValueError(f"Не удалось открыть видеофайл: {video_path}")
+        if decode_process:
+            self.decoder: FrameDecoder = SharedMemoryDecoder(decoder, video_path, luma=luma_decode)
+        else:
+            self.decoder = create_decoder(decoder, video_path, luma=luma_decode)
+        self.decode_process = decode_process
         
-        self.fps = self.cap.get(cv2.CAP_PROP_FPS)
-        self.total_frames = int(self.cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        self.fps = self.decoder.fps
+        self.total_frames = self.decoder.total_frames
         self.duration = self.total_frames / self.fps if self.fps > 0 else 0
+        self.width = self.decoder.width
+        self.height = self.decoder.height
+        self.luma_decode = getattr(self.decoder, 'luma', False)
+        
+        self.decoder.set_analysis(self.frame_interval, crop_rect(self.width, self.height, crop_region), analysis_width)
+        
+        self.seek_index = None
+        if seek_index:
+            from .seek_index import load_seek_index
+            with self.metrics.stage(STAGE_DECODE):
+                self.seek_index = load_seek_index(video_path, self.fps)
+            if isinstance(self.decoder, OpenCVDecoder):
+                self.decoder.seek_index = self.seek_index
+        
+        # Границы отрезка в кадрах: [start_frame, end_frame)
+        self.start_frame = min(int(round(start_time * self.fps)), self.total_frames)
+        if end_time is None:
+            self.end_frame = self.total_frames
+        else:
+            self.end_frame = min(int(round(end_time * self.fps)), self.total_frames)
+        
+        self.metrics.info.update({
+            'video': str(video_path),
+            'fps': self.fps,
+            'total_frames': self.total_frames,
+            'width': self.width,
+            'height': self.height,
+            'decoder': self.decoder.name,
+            'decode_process': self.decode_process,
+            'compare_workers': compare_workers,
+            'tile_compare': tile_compare,
+            'analysis_width': analysis_width,
+            'two_pass': two_pass,
+            'keyframes': keyframes,
+            'packet_prefilter': packet_prefilter,
+            'seek_index': self.seek_index is not None,
+            'luma_decode': self.luma_decode,
+            'sample_rate': sample_rate,
+            'threshold': threshold,
+            'crop_region': crop_region,
+            'range_frames': [self.start_frame, self.end_frame]
+        })
         
         logger.info(f"Видео загружено: {video_path}")
         logger.info(f"FPS: {self.fps}, Всего кадров: {self.total_frames}, Длительность: {self.duration:.2f}s")
+        if self.start_frame > 0 or self.end_frame < self.total_frames:
+            logger.info(f"Обрабатываемый отрезок: {self.start_frame / self.fps:.2f}s - {self.end_frame / self.fps:.2f}s")
+    
+    @property
+    def frame_interval(self) -> int:
+        """Интервал между анализируемыми кадрами (в кадрах)"""
+        return max(1, int(self.fps * self.sample_rate))
+    
+    def close(self):
+        """Освобождает видео (повторный вызов безопасен)"""
+        if hasattr(self, 'decoder'):
+            self.decoder.close()
+        if getattr(self, '_slide_decoder', None) is not None:
+            self._slide_decoder.close()
+            self._slide_decoder = None
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+        return False
     
     def __del__(self):
-        """Закрываем видео при удалении объекта"""
-        if hasattr(self, 'cap') and self.cap.isOpened():
-            self.cap.release()
+        """Подстраховка: закрываем видео, если close() не вызвали"""
+        self.close()
+    
+    def _read_bgr_frame(self, frame_number: int) -> Optional[np.ndarray]:
+        """
+        Читает кадр frame_number в BGR (для сохранения слайда, если кадры анализа не BGR)
+        
+        Слайды читаются по возрастанию номеров, поэтому после неудачной
+        перемотки достаточно докрутить кадры вперёд.
+        """
+        if self._slide_decoder is None:
+            self._slide_decoder = OpenCVDecoder(self.video_path)
+            self._slide_decoder.seek_index = self.seek_index
+        decoder = self._slide_decoder
+        
+        position = decoder.seek(frame_number)
+        while position < frame_number:
+            if not decoder.grab():
+                return None
+            position += 1
+        
+        ret, frame = decoder.read()
+        return frame if ret else None
+    
+    def _check_cancelled(self):
+        """Прерывает обработку, если её отменили"""
+        if self.should_cancel is not None and self.should_cancel():
+            logger.warning("⚠ Обработка отменена")
+            raise ExtractionCancelled(self.video_path)
     
     def _crop_frame_region(self, frame: np.ndarray) -> np.ndarray:
         """
@@ -84,53 +374,12 @@ class VideoProcessor:
             frame: Исходный кадр
         
         Returns:
-            Обрезанный кадр для анализа
+            Обрезанный кадр для анализа, уменьшенный до analysis_width (декодер может
+            отдавать уже обрезанные кадры)
         """
-        height, width = frame.shape[:2]
-        
-        if self.crop_region == CROP_REGION_BOTTOM_LEFT:
-            # Левый нижний угол: 30% ширины, 30% высоты
-            crop_width = int(width * CROP_SIZE_CORNER)
-            crop_height = int(height * CROP_SIZE_CORNER)
-            x_start = 0
-            y_start = height - crop_height
-            
-        elif self.crop_region == CROP_REGION_BOTTOM_RIGHT:
-            # Правый нижний угол: 30% ширины, 30% высоты
-            crop_width = int(width * CROP_SIZE_CORNER)
-            crop_height = int(height * CROP_SIZE_CORNER)
-            x_start = width - crop_width
-            y_start = height - crop_height
-            
-        elif self.crop_region == CROP_REGION_TOP_RIGHT:
-            # Правый верхний угол: 30% ширины, 30% высоты
-            crop_width = int(width * CROP_SIZE_CORNER)
-            crop_height = int(height * CROP_SIZE_CORNER)
-            x_start = width - crop_width
-            y_start = 0
-            
-        elif self.crop_region == CROP_REGION_TOP_LEFT:
-            # Левый верхний угол: 30% ширины, 30% высоты
-            crop_width = int(width * CROP_SIZE_CORNER)
-            crop_height = int(height * CROP_SIZE_CORNER)
-            x_start = 0
-            y_start = 0
-            
-        elif self.crop_region == CROP_REGION_CENTER:
-            # Центр: 50% ширины, 50% высоты (чтобы лектор не попал)
-            crop_width = int(width * CROP_SIZE_CENTER)
-            crop_height = int(height * CROP_SIZE_CENTER)
-            x_start = (width - crop_width) // 2
-            y_start = (height - crop_height) // 2
-            
-        else:
-            # По умолчанию левый нижний угол
-            crop_width = int(width * CROP_SIZE_CORNER)
-            crop_height = int(height * CROP_SIZE_CORNER)
-            x_start = 0
-            y_start = height - crop_height
-        
-        return frame[y_start:y_start+crop_height, x_start:x_start+crop_width]
+        if self.decoder.crops_region:
+            return normalize_crop(frame, self.analysis_width)
+        return crop_frame_region(frame, self.crop_region, self.analysis_width)
     
     def get_region_description(self) -> str:
         """Возвращает описание выбранной области для логирования"""
@@ -143,44 +392,145 @@ class VideoProcessor:
         }
         return descriptions.get(self.crop_region, "неизвестная область")
     
-    def compare_frames(self, frame1: np.ndarray, frame2: np.ndarray) -> float:
+    @staticmethod
+    def prepare_frame(frame: np.ndarray, shape: Optional[Tuple[int, int]] = None) -> np.ndarray:
         """
-        Сравнивает два кадра с помощью комбинации метрик
+        Готовит обрезку к сравнению: оттенки серого и размытие
         
         Args:
-            frame1: Первый кадр
-            frame2: Второй кадр
+            frame: Обрезанный кадр (BGR или уже серый)
+            shape: Привести к размеру (высота, ширина), если кадр другого размера
         
         Returns:
-            Коэффициент сходства (0-1, где 1 - идентичные)
+            Размытый серый кадр - с ним работают метрики сходства
         """
-        # Конвертируем в grayscale для более быстрого сравнения
-        gray1 = cv2.cvtColor(frame1, cv2.COLOR_BGR2GRAY)
-        gray2 = cv2.cvtColor(frame2, cv2.COLOR_BGR2GRAY)
+        # Конвертируем в grayscale для более быстрого сравнения (кадры luma_decode уже серые)
+        gray = frame if frame.ndim == 2 else cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
         
         # Приводим к одному размеру на случай разных размеров
-        if gray1.shape != gray2.shape:
-            gray2 = cv2.resize(gray2, (gray1.shape[1], gray1.shape[0]))
+        if shape is not None and gray.shape != shape:
+            gray = cv2.resize(gray, (shape[1], shape[0]))
         
         # Применяем размытие для уменьшения влияния шума/сжатия/антиалиасинга
-        gray1_blur = cv2.GaussianBlur(gray1, (5, 5), 0)
-        gray2_blur = cv2.GaussianBlur(gray2, (5, 5), 0)
-        
-        # Метрика 1: SSIM с правильным data_range
-        ssim_value, _ = ssim(gray1_blur, gray2_blur, full=True, data_range=255)
+        return cv2.GaussianBlur(gray, (5, 5), 0)
+    
+    @staticmethod
+    def pixel_similarity(blurred1: np.ndarray, blurred2: np.ndarray) -> float:
+        """
+        Процент пикселей, которые отличаются меньше чем на 3 единицы
         
-        # Метрика 2: Процент пикселей, которые отличаются меньше чем на 3 единицы
-        # Это более мягкая метрика, которая игнорирует мелкие различия
-        diff = np.abs(gray1_blur.astype(np.float32) - gray2_blur.astype(np.float32))
+        Это более мягкая метрика, которая игнорирует мелкие различия. Она не
+        больше итогового сходства compare_frames, поэтому если она уже не ниже
+        порога - кадр точно не новый слайд.
+        """
+        diff = np.abs(blurred1.astype(np.float32) - blurred2.astype(np.float32))
         similar_pixels = np.sum(diff < 3.0)  # Пиксели с разницей < 3
-        total_pixels = gray1_blur.size
-        pixel_similarity = similar_pixels / total_pixels
+        return similar_pixels / blurred1.size
+    
+    @staticmethod
+    def structural_similarity(blurred1: np.ndarray, blurred2: np.ndarray) -> float:
+        """SSIM с правильным data_range"""
+        ssim_value, _ = ssim(blurred1, blurred2, full=True, data_range=255)
+        return ssim_value
+    
+    @staticmethod
+    def compare_frames(frame1: np.ndarray, frame2: np.ndarray) -> float:
+        """
+        Сравнивает два кадра с помощью комбинации метрик
+        
+        Args:
+            frame1: Первый кадр
+            frame2: Второй кадр
+        
+        Returns:
+            Коэффициент сходства (0-1, где 1 - идентичные)
+        """
+        blurred1 = VideoProcessor.prepare_frame(frame1)
+        blurred2 = VideoProcessor.prepare_frame(frame2, blurred1.shape)
         
         # Комбинируем метрики: берем максимум из SSIM и pixel_similarity
         # Это позволяет учитывать как структурное сходство, так и процент совпадающих пикселей
-        similarity = max(ssim_value, pixel_similarity)
+        return max(VideoProcessor.structural_similarity(blurred1, blurred2),
+                   VideoProcessor.pixel_similarity(blurred1, blurred2))
+    
+    @staticmethod
+    def compare_frames_fast(frame1: np.ndarray, frame2: np.ndarray) -> float:
+        """
+        Быстрое сравнение: только процент совпадающих пикселей, без SSIM
         
-        return similarity
+        Не больше результата compare_frames, поэтому может принять за смену
+        слайда то, что SSIM счёл бы тем же слайдом. Используется, когда не
+        хватает бюджета времени.
+        
+        Returns:
+            Коэффициент сходства (0-1, где 1 - идентичные)
+        """
+        blurred1 = VideoProcessor.prepare_frame(frame1)
+        blurred2 = VideoProcessor.prepare_frame(frame2, blurred1.shape)
+        return VideoProcessor.pixel_similarity(blurred1, blurred2)
+    
+    def iter_frames(self) -> Iterator[Tuple[np.ndarray, float, int]]:
+        """
+        Последовательно выдаёт кадры отрезка [start_time, end_time) с заданной частотой
+        
+        Кадры берутся по сетке от начала видео (номер кадра кратен интервалу),
+        поэтому отрезки, обработанные по отдельности, вместе дают те же кадры,
+        что и обработка всего видео.
+        
+        Yields:
+            Кортежи (ПОЛНЫЙ_кадр, время, номер_кадра); при luma_decode кадр -
+            плоскость Y (height x width)
+        """
+        yield from self.iter_range(self.start_frame, self.end_frame)
+    
+    def iter_range(self, start_frame: int, end_frame: int,
+                   interval: Optional[int] = None) -> Iterator[Tuple[np.ndarray, float, int]]:
+        """
+        Выдаёт кадры сетки из [start_frame, end_frame), перематывая к start_frame
+        
+        Args:
+            start_frame: Первый кадр диапазона
+            end_frame: Конец диапазона (не включается)
+            interval: Шаг сетки в кадрах (None - сетка анализа с учётом прореживания);
+                должен быть кратен frame_interval
+        
+        Yields:
+            Кортежи (ПОЛНЫЙ_кадр, время, номер_кадра), как iter_frames()
+        """
+        metrics = self.metrics
+        started = time.perf_counter()
+        frame_number = self.decoder.seek(start_frame)
+        
+        # Если перемотка встала раньше цели - докручиваем без преобразования в BGR
+        while frame_number < start_frame:
+            if not self.decoder.grab():
+                metrics.add_time(STAGE_DECODE, time.perf_counter() - started)
+                return
+            metrics.count('frames_skipped')
+            frame_number += 1
+        metrics.add_time(STAGE_DECODE, time.perf_counter() - started)
+        
+        while frame_number < end_frame:
+            started = time.perf_counter()
+            # Берём кадры с заданным интервалом (бюджет времени может проредить сетку)
+            if frame_number % (interval or self.frame_interval * self.sampling_factor) == 0:
+                ret, frame = self.decoder.read()
+                metrics.add_time(STAGE_DECODE, time.perf_counter() - started)
+                if not ret:
+                    break
+                metrics.count('frames_decoded')
+                # Отдаём ПОЛНЫЙ кадр (обрезку делаем только для анализа)
+                yield frame, frame_number / self.fps, frame_number
+            else:
+                grabbed = self.decoder.grab()
+                elapsed = time.perf_counter() - started
+                metrics.add_time(STAGE_DECODE, elapsed)
+                self._skip_seconds += elapsed
+                if not grabbed:
+                    break
+                metrics.count('frames_skipped')
+            
+            frame_number += 1
     
     def extract_frames(self) -> List[Tuple[np.ndarray, float, int]]:
         """
@@ -190,31 +540,117 @@ class VideoProcessor:
             Список кортежей (ПОЛНЫЙ_кадр, время, номер_кадра)
         """
         frames = []
-        frame_interval = int(self.fps * self.sample_rate)
         
-        logger.info(f"Извлечение кадров с интервалом {self.sample_rate}s (каждый {frame_interval} кадр)")
+        logger.info(f"Извлечение кадров с интервалом {self.sample_rate}s (каждый {self.frame_interval} кадр)")
         
-        frame_number = 0
+        end_time = self.end_frame / self.fps if self.fps > 0 else 0.0
+        extraction_started = time.perf_counter()
+        compare_cost = 0.0
         
-        while True:
-            ret, frame = self.cap.read()
-            if not ret:
-                break
+        for frame, timestamp, frame_number in self.iter_frames():
+            self._check_cancelled()
+            # Сохраняем ПОЛНЫЙ кадр (обрезку делаем только для анализа)
+            frames.append((frame.copy(), timestamp, frame_number))
             
-            # Берём кадры с заданным интервалом
-            if frame_number % frame_interval == 0:
-                timestamp = frame_number / self.fps
-                # Сохраняем ПОЛНЫЙ кадр (обрезку делаем только для анализа)
-                frames.append((frame.copy(), timestamp, frame_number))
-                
-                if len(frames) % 100 == 0:
-                    logger.info(f"Обработано кадров: {len(frames)} (время: {timestamp:.1f}s)")
+            if self.time_budget is not None:
+                if len(frames) == 1:
+                    compare_cost = self._calibrate_compare_cost(frame)
+                elif len(frames) % TIME_BUDGET_CHECK_EVERY == 0:
+                    self._adjust_sampling(frames, frame_number, extraction_started, compare_cost)
+                self.time_budget.mark_position(timestamp)
             
-            frame_number += 1
+            if self.on_progress is not None:
+                self.on_progress(timestamp, end_time)
+            
+            if len(frames) % MEMORY_CHECK_EVERY == 1:
+                # Все кадры отрезка копятся в памяти - прогнозируем, сколько ещё займут оставшиеся
+                remaining = (self.end_frame - frame_number - 1) // self.frame_interval
+                self.metrics.check_memory(projected_bytes=remaining * frame.nbytes)
+            
+            if len(frames) % 100 == 0:
+                logger.info(f"Обработано кадров: {len(frames)} (время: {timestamp:.1f}s)")
         
+        if self.time_budget is not None:
+            self.time_budget.mark_position(end_time)
         logger.info(f"Всего извлечено кадров: {len(frames)}")
         return frames
     
+    def _calibrate_compare_cost(self, frame: np.ndarray) -> float:
+        """Время одного полного сравнения на кадрах этого видео (для прогноза бюджета)"""
+        cropped = self._crop_frame_region(frame)
+        self.compare_frames(cropped, cropped)  # Первый вызов - прогрев
+        started = time.perf_counter()
+        self.compare_frames(cropped, cropped)
+        return time.perf_counter() - started
+    
+    def _adjust_sampling(self, frames: list, frame_number: int, extraction_started: float, compare_cost: float):
+        """Пересматривает прореживание сетки, чтобы оставшаяся часть уложилась в бюджет времени"""
+        skipped = self.metrics.counters.get('frames_skipped', 0)
+        skip_cost = self._skip_seconds / skipped if skipped else 0.0
+        # Время на анализируемый кадр: чтение и копирование (всё, кроме пропусков) плюс будущее сравнение
+        sample_cost = (time.perf_counter() - extraction_started - self._skip_seconds) / len(frames) + compare_cost
+        
+        factor = self.time_budget.choose_factor(
+            self.end_frame - frame_number - 1, self.frame_interval, skip_cost, sample_cost
+        )
+        if factor != self.sampling_factor:
+            self.time_budget.set_factor(factor, frames[-1][1], self.frame_interval * factor / self.fps)
+            self.sampling_factor = factor
+    
+    def is_slide_change(
+        self,
+        frame_cropped: np.ndarray,
+        timestamp: float,
+        reference_cropped: np.ndarray,
+        reference_time: float
+    ) -> Tuple[bool, float]:
+        """
+        Решает, является ли кадр новым слайдом относительно последнего принятого
+        
+        Args:
+            frame_cropped: Обрезанный текущий кадр
+            timestamp: Время текущего кадра
+            reference_cropped: Обрезанный кадр последнего принятого слайда
+            reference_time: Время последнего принятого слайда
+        
+        Returns:
+            Кортеж (новый_слайд, сходство)
+        """
+        started = time.perf_counter()
+        if self.tile_comparator is not None:
+            result = self._compare_tiles(reference_cropped, frame_cropped)
+            similarity = result.similarity
+        else:
+            similarity = self._comparator(reference_cropped, frame_cropped)
+        self.metrics.add_time(STAGE_COMPARE, time.perf_counter() - started)
+        self.metrics.count('comparisons')
+        
+        # Новый слайд: сходство ниже порога и прошла минимальная длительность слайда
+        is_new = similarity < self.threshold and timestamp - reference_time >= MIN_SLIDE_DURATION
+        if is_new and self.tile_comparator is not None:
+            self.record_tile_change(timestamp, result)
+        return is_new, similarity
+    
+    def _compare_tiles(self, reference_cropped: np.ndarray, frame_cropped: np.ndarray) -> TileResult:
+        """Сравнение по плиткам; размытый эталон запоминается до смены эталона"""
+        if self._tile_reference is None or self._tile_reference[0] is not reference_cropped:
+            self._tile_reference = (reference_cropped, self.prepare_frame(reference_cropped))
+        reference = self._tile_reference[1]
+        frame = self.prepare_frame(frame_cropped, reference.shape)
+        result = self.tile_comparator.compare(reference, frame, fast=self._comparator is self.compare_frames_fast)
+        self.metrics.count('tiles_evaluated', result.tiles_evaluated)
+        self.metrics.count('tiles_total', result.tiles_total)
+        return result
+    
+    def record_tile_change(self, timestamp: float, result: TileResult):
+        """Записывает в метрики, какие плитки изменились у принятого слайда (для диагностики)"""
+        self.metrics.info.setdefault('tile_changes', []).append({
+            'timestamp': round(timestamp, 3),
+            'changed_tiles': [list(tile) for tile in result.changed_tiles],
+            'tiles_evaluated': result.tiles_evaluated
+        })
+        logger.debug(f"Изменившиеся плитки на {timestamp:.2f}s: {result.changed_tiles}")
+    
     def detect_slide_changes(self, frames: List[Tuple[np.ndarray, float, int]]) -> List[Slide]:
         """
         Обнаруживает смену слайдов путём сравнения соседних кадров
@@ -228,6 +664,10 @@ class VideoProcessor:
         if not frames:
             return []
         
+        if self.compare_workers > 1:
+            from .two_phase import TwoPhaseDetector
+            return TwoPhaseDetector(self, self.compare_workers).detect(frames)
+        
         slides = []
         
         # Первый кадр всегда добавляем (ПОЛНЫЙ!)
@@ -238,25 +678,34 @@ class VideoProcessor:
         logger.info(f"Анализ области: {self.get_region_description()}")
         
         # Для сравнения обрезаем первый кадр
-        prev_frame_cropped = self._crop_frame_region(first_frame)
+        with self.metrics.stage(STAGE_CROP):
+            prev_frame_cropped = self._crop_frame_region(first_frame)
         
         for i in range(1, len(frames)):
+            self._check_cancelled()
             current_frame, current_time, current_num = frames[i]
             
             # Для сравнения обрезаем текущий кадр
+            started = time.perf_counter()
             current_frame_cropped = self._crop_frame_region(current_frame)
+            self.metrics.add_time(STAGE_CROP, time.perf_counter() - started)
             
             # Сравниваем ОБРЕЗАННЫЕ кадры (без лектора)
-            similarity = self.compare_frames(prev_frame_cropped, current_frame_cropped)
+            is_new, similarity = self.is_slide_change(
+                current_frame_cropped, current_time, prev_frame_cropped, slides[-1].timestamp
+            )
+            
+            if is_new:
+                # Сохраняем ПОЛНЫЙ кадр!
+                slides.append(Slide(current_frame.copy(), current_time, current_num))
+                logger.info(f"Найден новый слайд #{len(slides)} на {current_time:.2f}s (SSIM: {similarity:.3f})")
+                prev_frame_cropped = current_frame_cropped
             
-            # Если сходство ниже порога - это новый слайд
-            if similarity < self.threshold:
-                # Проверяем минимальную длительность слайда
-                if current_time - slides[-1].timestamp >= MIN_SLIDE_DURATION:
-                    # Сохраняем ПОЛНЫЙ кадр!
-                    slides.append(Slide(current_frame.copy(), current_time, current_num))
-                    logger.info(f"Найден новый слайд #{len(slides)} на {current_time:.2f}s (SSIM: {similarity:.3f})")
-                    prev_frame_cropped = current_frame_cropped
+            if i % MEMORY_CHECK_EVERY == 0:
+                self.metrics.check_memory()
+            
+            if self.time_budget is not None and i % TIME_BUDGET_CHECK_EVERY == 0:
+                self._check_compare_budget(len(frames) - i, current_time)
             
             if i % 100 == 0:
                 logger.info(f"Проанализировано: {i}/{len(frames)} кадров")
@@ -264,6 +713,19 @@ class VideoProcessor:
         logger.info(f"Всего найдено уникальных слайдов: {len(slides)}")
         return slides
     
+    def _check_compare_budget(self, remaining_comparisons: int, timestamp: float):
+        """Переключает на быстрое сравнение, если полным не успеть в бюджет времени"""
+        if self._comparator is not self.compare_frames:
+            return
+        calls = self.metrics.stage_calls.get(STAGE_COMPARE, 0)
+        if not calls:
+            return
+        compare_cost = self.metrics.stage_seconds[STAGE_COMPARE] / calls
+        if self.time_budget.need_fast_compare(remaining_comparisons, compare_cost):
+            logger.warning(f"⚠ Бюджет времени: с {timestamp:.1f}s включено быстрое сравнение (без SSIM)")
+            self.time_budget.fast_compare_from = timestamp
+            self._comparator = self.compare_frames_fast
+    
     def save_slides(self, slides: List[Slide], output_dir: str) -> List[Tuple[str, float]]:
         """
         Сохраняет слайды в файлы
@@ -279,18 +741,32 @@ class VideoProcessor:
         output_path.mkdir(parents=True, exist_ok=True)
         
         saved_slides = []
+        self.saved_slides = []
         
         logger.info(f"Сохранение {len(slides)} слайдов в {output_dir}...")
         
         for i, slide in enumerate(slides, start=1):
+            self._check_cancelled()
             filename = f"slide_{i:03d}.png"
             filepath = output_path / filename
             
             # Сохраняем ПОЛНЫЙ кадр (высокое качество)
-            cv2.imwrite(str(filepath), slide.frame, [cv2.IMWRITE_PNG_COMPRESSION, 3])
+            with self.metrics.stage(STAGE_SAVE):
+                frame = slide.frame
+                if self.decoder.analysis_only:
+                    # Кадры анализа не BGR (плоскость Y, серая обрезка) - цветной кадр читаем заново
+                    frame = self._read_bgr_frame(slide.frame_number)
+                    if frame is None:
+                        raise ValueError(f"Не удалось прочитать кадр {slide.frame_number} для слайда {i}")
+                cv2.imwrite(str(filepath), frame, [cv2.IMWRITE_PNG_COMPRESSION, 3])
+            self.metrics.count('slides_saved')
+            self.metrics.count('bytes_written', filepath.stat().st_size)
             
             saved_slides.append((str(filepath), slide.timestamp))
+            self.saved_slides.append((str(filepath), slide.timestamp, slide.frame_number))
             logger.info(f"Сохранён слайд {i}/{len(slides)}: {filename} (время: {slide.timestamp:.2f}s)")
+            if self.on_slide is not None:
+                self.on_slide(i, str(filepath), slide.timestamp)
         
         logger.info("✓ Все слайды сохранены")
         return saved_slides
@@ -310,16 +786,36 @@ class VideoProcessor:
         logger.info("=" * 60)
         
         # Извлечение кадров
-        frames = self.extract_frames()
+        with self.metrics.memory_stage('extract_frames'):
+            scanner = None
+            if self.keyframes:
+                from .keyframes import keyframe_scanner
+                scanner = keyframe_scanner(self)
+            elif self.packet_prefilter:
+                from .prefilter import packet_prefilter
+                scanner = packet_prefilter(self)
+            elif self.two_pass:
+                from .two_pass import TwoPassScanner
+                scanner = TwoPassScanner(self)
+            frames = scanner.extract_frames() if scanner is not None else self.extract_frames()
         
         # Детектирование смены слайдов
-        slides = self.detect_slide_changes(frames)
+        with self.metrics.memory_stage('detect_slide_changes'):
+            slides = self.detect_slide_changes(frames)
         
         # Сохранение слайдов
-        saved_slides = self.save_slides(slides, output_dir)
-        
-        # Освобождаем память
-        self.cap.release()
+        with self.metrics.memory_stage('save_slides'):
+            saved_slides = self.save_slides(slides, output_dir)
+        
+        # Освобождаем видео
+        self.close()
+        
+        if self.time_budget is not None:
+            report = self.time_budget.report()
+            self.metrics.info['time_budget'] = report
+            status = "уложились" if report['met'] else "⚠ не уложились"
+            logger.info(f"Бюджет времени {report['budget_s']:.0f}s: {status} ({report['elapsed_s']:.1f}s), "
+                        f"участков с пониженной плотностью: {len(report['reduced_density'])}")
         
         logger.info("=" * 60)
         logger.info("ОБРАБОТКА ЗАВЕРШЕНА")
@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+Тестирование фиксированного разрешения анализа (analysis_width)
+"""
+
+import logging
+import sys
+import tempfile
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).parent / 'src'))
+
+from benchmarks.synthetic import SyntheticLectureSpec, generate_lecture_video
+from src.video_processor import VideoProcessor, analysis_size, crop_frame_region, normalize_crop
+
+
+def test_analysis_size():
+    """Уменьшается только обрезка шире ширины анализа, пропорции сохраняются"""
+    assert analysis_size(1152, 648, 320) == (320, 180)
+    assert analysis_size(384, 216, None) is None
+    assert analysis_size(300, 200, 320) is None
+    crop = np.zeros((648, 1152, 3), dtype=np.uint8)
+    assert normalize_crop(crop, 320).shape == (180, 320, 3)
+    assert crop_frame_region(np.zeros((2160, 3840), dtype=np.uint8), 'bottom_left', 320).shape == (180, 320)
+    print("  ✓ Размер анализа")
+
+
+def _similarities(video: str, analysis_width):
+    with VideoProcessor(video, analysis_width=analysis_width) as processor:
+        crops = [processor._crop_frame_region(frame).copy() for frame, _, _ in processor.iter_frames()]
+    return np.array([VideoProcessor.compare_frames(previous, current)
+                     for previous, current in zip(crops, crops[1:])])
+
+
+def test_scores_consistent_across_resolutions():
+    """Сходства соседних кадров одной лекции в 720p и 1080p почти совпадают при одной ширине анализа"""
+    logging.getLogger().setLevel(logging.WARNING)
+    with tempfile.TemporaryDirectory() as tmp:
+        videos = []
+        for width, height in ((1280, 720), (1920, 1080)):
+            video = str(Path(tmp) / f"lecture_{height}.mp4")
+            generate_lecture_video(SyntheticLectureSpec(duration=100, width=width, height=height, fps=1, seed=3), video)
+            videos.append(video)
+
+        native = [_similarities(video, None) for video in videos]
+        normalized = [_similarities(video, 320) for video in videos]
+        native_gap = np.abs(native[0] - native[1]).max()
+        normalized_gap = np.abs(normalized[0] - normalized[1]).max()
+        assert normalized_gap < 0.02 and normalized_gap < native_gap, (normalized_gap, native_gap)
+
+        slides = []
+        for video in videos:
+            with VideoProcessor(video, analysis_width=320) as processor:
+                slides.append([slide.timestamp for slide in processor.detect_slide_changes(processor.extract_frames())])
+        assert slides[0] == slides[1]
+        print(f"  ✓ Разница сходств 720p/1080p: {native_gap:.3f} -> {normalized_gap:.3f}, слайдов: {len(slides[0])}")
+
+
+if __name__ == "__main__":
+    test_analysis_size()
+    test_scores_consistent_across_resolutions()
+    print("✓ Все тесты разрешения анализа прошли успешно!")
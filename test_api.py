@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Тестирование программного интерфейса extract_lecture
+"""
+
+import logging
+import sys
+import tempfile
+import threading
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent / 'src'))
+
+from benchmarks.synthetic import SyntheticLectureSpec, generate_lecture_video
+from src.api import ExtractionCancelled, ExtractionOptions, extract_lecture
+from src.video_processor import VideoProcessor
+
+SPEC = SyntheticLectureSpec(duration=150, width=320, height=180, fps=5)
+
+
+def _make_lecture(tmp: Path):
+    video = tmp / "lecture.mp4"
+    truth = generate_lecture_video(SPEC, str(video))
+    transcript = tmp / "lecture.txt"
+    transcript.write_text(
+        "".join(f"|({int(t) // 60}:{int(t) % 60:02d} - {int(t + 20) // 60}:{int(t + 20) % 60:02d})\n|Фрагмент {i}\n"
+                for i, t in enumerate(range(0, 140, 20))),
+        encoding='utf-8'
+    )
+    return video, transcript, truth
+
+
+def test_extract_lecture():
+    """Структурированный результат, события по слайдам, Markdown со ссылками относительно документа"""
+    logging.getLogger().setLevel(logging.WARNING)
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        video, transcript, truth = _make_lecture(tmp)
+
+        events = []
+        progress = []
+        result = extract_lecture(
+            str(video), str(transcript),
+            {'slides_dir': str(tmp / "out" / "slides"), 'output_path': str(tmp / "out" / "lecture.md")},
+            on_slide=events.append,
+            on_progress=lambda current, total: progress.append((current, total))
+        )
+
+        assert [slide.index for slide in events] == list(range(1, len(truth['change_times']) + 1))
+        assert events == result.slides
+        assert len(progress) == 150 and progress[-1] == (149.0, 150.0)
+        assert all(slide.text for slide in result.slides)
+        assert result.transcript_segments == 7
+        assert result.metrics['counters']['slides_saved'] == len(result.slides)
+        markdown = (tmp / "out" / "lecture.md").read_text(encoding='utf-8')
+        assert "(<./slides/slide_001.png>)" in markdown
+        print(f"  ✓ Слайдов: {len(result.slides)}, {result.slides[0]}")
+
+
+def test_cancel_and_context_manager():
+    """Отмена прерывает обработку; видео освобождается и при отмене, и после with"""
+    logging.getLogger().setLevel(logging.ERROR)
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        video, _, _ = _make_lecture(tmp)
+
+        cancel = threading.Event()
+        seen = []
+
+        def on_progress(current, total):
+            seen.append(current)
+            if current >= 20:
+                cancel.set()
+
+        try:
+            extract_lecture(str(video), options=ExtractionOptions(slides_dir=str(tmp / "slides")),
+                            on_progress=on_progress, cancel_event=cancel)
+            assert False, "ожидалось ExtractionCancelled"
+        except ExtractionCancelled:
+            pass
+        assert seen[-1] == 20.0
+        assert not (tmp / "slides").exists()
+
+        with VideoProcessor(str(video)) as processor:
+            assert processor.decoder.is_opened()
+        assert not processor.decoder.is_opened()
+
+        try:
+            extract_lecture(str(video), options={'threshold': 2.0})
+            assert False, "ожидалось ValueError"
+        except ValueError:
+            pass
+        print("  ✓ Отмена и освобождение видео")
+
+
+def test_options_share_one_validator():
+    """API, командная строка и сервер проверяют параметры одними правилами"""
+    import os
+    from src.main import parse_arguments, validate_processing_options
+    from src.options import validate_options
+
+    path, argv = os.environ.get('PATH', ''), sys.argv
+    os.environ['PATH'] = ''   # ffmpeg не найти
+    try:
+        try:
+            ExtractionOptions(decoder='ffmpeg').validate()
+            assert False, "ожидалось ValueError"
+        except ValueError as e:
+            assert 'ffmpeg' in str(e)
+        sys.argv = ['main.py', '--video', 'lecture.mp4', '--decoder', 'ffmpeg']
+        assert any('ffmpeg' in error for error in validate_processing_options(parse_arguments()))
+    finally:
+        os.environ['PATH'], sys.argv = path, argv
+
+    assert validate_options({'threshold': 'high', 'compare_workers': 1.5}) == [
+        "threshold должен быть числом, получено: 'high'",
+        "compare_workers должен быть целым числом, получено: 1.5"
+    ]
+    assert validate_options({'crop_region': 'middle'})
+    assert validate_options({'two_pass': True, 'keyframes': True}, cli=True) == ["two-pass и keyframes нельзя указывать вместе"]
+    assert validate_options(ExtractionOptions().to_dict()) == []
+    print("  ✓ Одни правила проверки для API, командной строки и сервера")
+
+
+if __name__ == "__main__":
+    test_extract_lecture()
+    test_cancel_and_context_manager()
+    test_options_share_one_validator()
+    print("✓ Все тесты API прошли успешно!")
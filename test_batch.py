@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+Тестирование пакетного режима (поиск пар видео/транскрипт и планирование)
+"""
+
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).parent / 'src'))
+
+from src.batch import BatchJob, FolderWatcher, discover_jobs, probe_duration, schedule_longest_first
+
+
+def _touch(path: Path):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text("")
+
+
+def test_discover_jobs():
+    """Поиск всех пар видео/транскрипт в дереве папок"""
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        # Одно видео и транскрипт с другим именем
+        _touch(root / "week1" / "lecture.mp4")
+        _touch(root / "week1" / "transcript.txt")
+        # Несколько видео в одной папке - транскрипты по имени
+        _touch(root / "week2" / "a.mp4")
+        _touch(root / "week2" / "a.txt")
+        _touch(root / "week2" / "b.MOV")
+        _touch(root / "week2" / "b.txt")
+        _touch(root / "week2" / "c.mkv")  # Без транскрипта
+        # Папка со слайдами не должна сканироваться
+        _touch(root / "week1" / "lecture_slides" / "old.mp4")
+
+        jobs = discover_jobs(root)
+        found = {(job.video_path.name, job.transcript_path.name) for job in jobs}
+
+        assert found == {
+            ("lecture.mp4", "transcript.txt"),
+            ("a.mp4", "a.txt"),
+            ("b.MOV", "b.txt"),
+        }, found
+        print(f"  ✓ Найдено пар: {len(jobs)}")
+
+
+def test_schedule_longest_first():
+    """Планирование: длинные видео первыми"""
+    jobs = [
+        BatchJob(Path("short.mp4"), Path("short.txt"), duration=60),
+        BatchJob(Path("long.mp4"), Path("long.txt"), duration=5400),
+        BatchJob(Path("mid.mp4"), Path("mid.txt"), duration=1800),
+    ]
+    order = [job.video_path.stem for job in schedule_longest_first(jobs)]
+    assert order == ["long", "mid", "short"], order
+    print(f"  ✓ Порядок: {order}")
+
+
+def test_probe_duration():
+    """Длительность по метаданным видео"""
+    with tempfile.TemporaryDirectory() as tmp:
+        video_path = Path(tmp) / "clip.mp4"
+        writer = cv2.VideoWriter(str(video_path), cv2.VideoWriter_fourcc(*'mp4v'), 10, (64, 48))
+        for _ in range(30):
+            writer.write(np.zeros((48, 64, 3), dtype=np.uint8))
+        writer.release()
+
+        duration = probe_duration(video_path)
+        assert abs(duration - 3.0) < 0.2, duration
+        assert probe_duration(Path(tmp) / "missing.mp4") == 0.0
+        print(f"  ✓ Длительность: {duration:.2f}s")
+
+
+def test_folder_watcher_waits_for_stable_size():
+    """Режим наблюдения: видео выдаётся только после того, как размер перестал меняться"""
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        video = root / "new" / "lecture.mp4"
+        _touch(root / "new" / "lecture.txt")
+        video.write_bytes(b"x" * 10)
+
+        watcher = FolderWatcher(root, stable_polls=2)
+        assert watcher.poll() == []  # Первое наблюдение
+        video.write_bytes(b"x" * 20)  # Файл ещё копируется
+        assert watcher.poll() == []
+        assert watcher.poll() == []  # 1 опрос без изменений
+        ready = watcher.poll()       # 2 опроса без изменений
+        assert [job.video_path for job in ready] == [video], ready
+        assert watcher.poll() == []  # Повторно не выдаётся
+
+        # Уже обработанные видео не выдаются
+        other = root / "done" / "old.mp4"
+        _touch(root / "done" / "old.txt")
+        other.write_bytes(b"x")
+        _touch(root / "done" / "old.md")
+        for _ in range(4):
+            assert watcher.poll() == []
+        print("  ✓ Видео выдано после стабилизации размера")
+
+
+def test_folder_watcher_retries_failed_and_replaced():
+    """Неудачное видео выдаётся снова (до max_attempts), заменённое видео - тоже"""
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        video = root / "new" / "lecture.mp4"
+        _touch(root / "new" / "lecture.txt")
+        video.write_bytes(b"x" * 10)
+
+        watcher = FolderWatcher(root, stable_polls=1, max_attempts=2)
+        assert watcher.poll() == []
+        [job] = watcher.poll()
+        watcher.failed(job)                    # Например, транскрипт ещё дописывался
+        assert watcher.poll() == []            # Снова ждём стабилизации
+        [job] = watcher.poll()
+        watcher.failed(job)                    # Попытки кончились
+        for _ in range(3):
+            assert watcher.poll() == []
+
+        video.write_bytes(b"y" * 30)           # Видео заменили
+        assert watcher.poll() == []
+        assert [job.video_path for job in watcher.poll()] == [video]
+
+        # Успешно обработанное видео заменили: результат старше видео - выдаётся снова
+        _touch(job.output_md)
+        os.utime(job.output_md, (1, 1))
+        video.write_bytes(b"z" * 40)
+        assert watcher.poll() == []
+        assert [job.video_path for job in watcher.poll()] == [video]
+        print("  ✓ Неудачное и заменённое видео выдаются повторно")
+
+
+def test_partial_runs_skip_preview_output():
+    """Частичная обработка пропускает видео по {видео}_preview.md, а не по полному результату"""
+    from auto_process import process_tree
+
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        _touch(root / "week1" / "lecture.txt")
+        (root / "week1" / "lecture.mp4").write_bytes(b"x")
+        job = discover_jobs(root)[0]
+        assert job.output_md_for(partial=True) == root / "week1" / "lecture_preview.md"
+        assert job.output_md_for(partial=False) == job.output_md
+
+        # Только полный результат: предпросмотр ещё не сделан - видео планируется
+        _touch(job.output_md)
+        settings = {'start_time': 0.0, 'end_time': 60.0, 'crop_region': 'center'}
+        watcher = FolderWatcher(root, stable_polls=0, partial=True)
+        assert [found.video_path for found in watcher.poll()] == [job.video_path]
+        assert not process_tree(root, settings, workers=1)  # Не видео - ошибка обработки
+
+        # Предпросмотр уже есть - пропускается
+        _touch(job.output_md_for(partial=True))
+        assert FolderWatcher(root, stable_polls=0, partial=True).poll() == []
+        assert process_tree(root, settings, workers=1)
+        print("  ✓ Частичная обработка проверяет {видео}_preview.md")
+
+
+if __name__ == "__main__":
+    test_discover_jobs()
+    test_schedule_longest_first()
+    test_probe_duration()
+    test_folder_watcher_waits_for_stable_size()
+    test_folder_watcher_retries_failed_and_replaced()
+    test_partial_runs_skip_preview_output()
+    print("✓ Все тесты пакетного режима прошли успешно!")
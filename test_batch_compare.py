@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Тестирование пакетного сравнения кадров (BatchComparator)
+"""
+
+import sys
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).parent / 'src'))
+
+from src.batch_compare import BatchComparator
+from src.video_processor import VideoProcessor
+
+
+def _noisy_crops(reference: np.ndarray, rng) -> np.ndarray:
+    crops = [np.clip(reference.astype(int) + rng.integers(-noise, noise + 1, reference.shape), 0, 255)
+             for noise in range(0, 100, 5)]
+    crops.append(rng.integers(0, 255, reference.shape))
+    crops.append(np.zeros(reference.shape))
+    return np.stack(crops).astype(np.uint8)
+
+
+def test_batch_matches_compare_frames():
+    """Сходства пачки совпадают с compare_frames / compare_frames_fast для каждой пары"""
+    rng = np.random.default_rng(0)
+    reference = rng.integers(0, 255, (54, 96), dtype=np.uint8)
+    crops = _noisy_crops(reference, rng)
+
+    comparator = BatchComparator(reference.shape, capacity=len(crops))
+    comparator.set_reference(reference)
+    scores = comparator.compare(crops)
+    fast = comparator.compare(crops, fast=True)
+
+    expected = [VideoProcessor.compare_frames(reference, crop) for crop in crops]
+    expected_fast = [VideoProcessor.compare_frames_fast(reference, crop) for crop in crops]
+    assert np.allclose(scores, expected, rtol=0, atol=1e-12)
+    assert np.array_equal(fast, expected_fast)
+    print(f"  ✓ {len(crops)} кадров: max |разница| {np.abs(scores - expected).max():.1e}")
+
+
+def test_prepared_frames_and_reuse():
+    """Размытые заранее кадры дают то же; буферы переиспользуются для пачек меньшего размера"""
+    rng = np.random.default_rng(1)
+    reference = rng.integers(0, 255, (40, 70), dtype=np.uint8)
+    crops = _noisy_crops(reference, rng)
+
+    comparator = BatchComparator(reference.shape, capacity=len(crops))
+    comparator.set_reference(VideoProcessor.prepare_frame(reference), prepared=True)
+    prepared = [VideoProcessor.prepare_frame(crop) for crop in crops]
+    whole = comparator.compare(prepared, prepared=True)
+    part = comparator.compare(crops[3:7])
+    assert np.array_equal(whole[3:7], part)
+
+    try:
+        comparator.compare(np.concatenate([crops, crops]))
+        assert False, "пачка больше capacity должна отклоняться"
+    except ValueError:
+        pass
+    print("  ✓ Подготовленные кадры и повторное использование буферов")
+
+
+if __name__ == "__main__":
+    test_batch_matches_compare_frames()
+    test_prepared_frames_and_reuse()
+    print("✓ Все тесты пакетного сравнения прошли успешно!")
@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+"""
+Тестирование синтетического бенчмарка: генератор и оценка точности
+"""
+
+import logging
+import sys
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent / 'src'))
+
+from benchmarks.synthetic import SyntheticLectureSpec, get_or_generate, match_detections
+from src.config import PROCESSING_MODES, CROP_REGION_BOTTOM_LEFT
+from src.video_processor import VideoProcessor
+
+
+def test_match_detections():
+    """Совпадения в пределах допуска, ранние и лишние срабатывания - ложные"""
+    result = match_detections([0.0, 41.0, 44.0, 79.0, 120.0], [0.0, 40.0, 80.0, 121.0], tolerance=2.0)
+    assert result['true_positives'] == 2
+    assert result['false'] == [44.0, 79.0, 120.0]
+    assert result['missed'] == [80.0, 121.0]
+    print("  ✓ Сопоставление с эталоном")
+
+
+def test_synthetic_video_detection():
+    """На синтетическом видео режим по умолчанию находит все смены слайдов"""
+    logging.getLogger().setLevel(logging.WARNING)
+    spec = SyntheticLectureSpec(duration=150, width=480, height=270, fps=5)
+    with tempfile.TemporaryDirectory() as tmp:
+        video_path, truth = get_or_generate(spec, tmp)
+        assert truth['total_frames'] == 750
+        assert len(truth['change_times']) >= 2
+
+        params = PROCESSING_MODES['balanced']
+        processor = VideoProcessor(video_path, crop_region=CROP_REGION_BOTTOM_LEFT, **params)
+        slides = processor.process(str(Path(tmp) / "slides"))
+
+        accuracy = match_detections([t for _, t in slides], truth['change_times'],
+                                    tolerance=params['sample_rate'] + 1.0 / spec.fps)
+        assert accuracy['recall'] == 1.0 and accuracy['precision'] == 1.0, accuracy
+        print(f"  ✓ Найдены все {len(truth['change_times'])} слайда")
+
+
+if __name__ == "__main__":
+    test_match_detections()
+    test_synthetic_video_detection()
+    print("✓ Все тесты бенчмарка прошли успешно!")
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Тестирование декодеров кадров (opencv / ffmpeg)
+"""
+
+import logging
+import os
+import shutil
+import sys
+import tempfile
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).parent / 'src'))
+
+from benchmarks.synthetic import SyntheticLectureSpec, generate_lecture_video
+from src.config import DECODER_FFMPEG, FFMPEG_BINARY
+from src.decoders import FFmpegDecoder, OpenCVDecoder, create_decoder
+from src.video_processor import VideoProcessor
+
+
+def test_opencv_decoder():
+    """Метаданные, перемотка и чтение кадров; неизвестный декодер отклоняется"""
+    logging.getLogger().setLevel(logging.WARNING)
+    with tempfile.TemporaryDirectory() as tmp:
+        video = Path(tmp) / "lecture.mp4"
+        generate_lecture_video(SyntheticLectureSpec(duration=10, width=320, height=180, fps=5), str(video))
+
+        decoder = create_decoder("opencv", str(video))
+        assert isinstance(decoder, OpenCVDecoder) and decoder.is_opened()
+        assert (decoder.width, decoder.height, decoder.fps) == (320, 180, 5)
+        assert not decoder.analysis_only and not decoder.grid_only
+        assert decoder.seek(20) == 20
+        ok, frame = decoder.read()
+        assert ok and frame.shape == (180, 320, 3)
+        decoder.close()
+        assert not decoder.is_opened()
+
+        try:
+            create_decoder("gstreamer", str(video))
+            assert False, "ожидалась ошибка"
+        except ValueError:
+            pass
+        print("  ✓ OpenCVDecoder")
+
+
+def test_ffmpeg_decoder_matches_opencv():
+    """Те же кадры сетки, те же слайды и PNG, что с декодером opencv"""
+    if shutil.which(FFMPEG_BINARY) is None:
+        print("  - ffmpeg не найден в PATH, пропущено")
+        return
+    logging.getLogger().setLevel(logging.WARNING)
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        video = tmp / "lecture.mp4"
+        generate_lecture_video(SyntheticLectureSpec(duration=150, width=320, height=180, fps=5), str(video))
+
+        with VideoProcessor(str(video), start_time=20, luma_decode=True) as processor:
+            expected = [frame_number for _, _, frame_number in processor.iter_frames()]
+            opencv = processor.process(str(tmp / "opencv"))
+
+        with VideoProcessor(str(video), start_time=20, decoder=DECODER_FFMPEG) as processor:
+            assert processor.metrics.info['decoder'] == DECODER_FFMPEG
+            frames = list(processor.iter_frames())
+            assert [frame_number for _, _, frame_number in frames] == expected
+            x, y, w, h = processor.decoder.crop
+            assert frames[0][0].shape == (h, w) and frames[0][0].dtype == np.uint8
+        with VideoProcessor(str(video), start_time=20, decoder=DECODER_FFMPEG) as processor:
+            ffmpeg = processor.process(str(tmp / "ffmpeg"))
+
+        assert [timestamp for _, timestamp in ffmpeg] == [timestamp for _, timestamp in opencv]
+        for (ffmpeg_path, _), (opencv_path, _) in zip(ffmpeg, opencv):
+            assert np.array_equal(cv2.imread(ffmpeg_path), cv2.imread(opencv_path)), ffmpeg_path
+        print(f"  ✓ Кадров сетки: {len(expected)}, слайдов: {len(ffmpeg)}, совпадают с opencv")
+
+
+def test_ffmpeg_command():
+    """Ширина анализа - фильтр scale, для ffmpeg старше 5.1 - -vsync вместо -fps_mode"""
+    if os.name == 'nt':
+        print("  - поддельный ffmpeg - shell-скрипт, пропущено")
+        return
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        video = tmp / "lecture.mp4"
+        generate_lecture_video(SyntheticLectureSpec(duration=5, width=640, height=360, fps=5), str(video))
+        path = os.environ.get('PATH', '')
+        try:
+            for version, option in (("4.4.2", '-vsync'), ("6.1.1", '-fps_mode'), ("N-112345-g0a1b2c3", '-fps_mode')):
+                # Поддельный ffmpeg: из него читается только версия
+                binary = tmp / version / FFMPEG_BINARY
+                binary.parent.mkdir()
+                binary.write_text(f"#!/bin/sh\necho 'ffmpeg version {version} Copyright (c) 2000-2023'\n")
+                binary.chmod(0o755)
+                os.environ['PATH'] = f"{binary.parent}{os.pathsep}{path}"
+
+                decoder = FFmpegDecoder(str(video))
+                decoder.set_analysis(5, (0, 0, 320, 180), analysis_width=160)
+                command = decoder._command(10)
+                assert command[command.index('passthrough') - 1] == option, (version, command)
+                assert "crop=320:180:0:0,scale=160:90:flags=area,format=gray" in command[command.index('-vf') + 1]
+                assert decoder._buffers[0].shape == (90, 160)
+
+                decoder.set_analysis(5, (0, 0, 320, 180), analysis_width=None)
+                command = decoder._command(0)
+                assert ",scale=" not in command[command.index('-vf') + 1]
+                decoder.close()
+        finally:
+            os.environ['PATH'] = path
+        print("  ✓ Команда ffmpeg: scale и -vsync/-fps_mode по версии")
+
+
+if __name__ == "__main__":
+    test_opencv_decoder()
+    test_ffmpeg_decoder_matches_opencv()
+    test_ffmpeg_command()
+    print("✓ Все тесты декодеров прошли успешно!")
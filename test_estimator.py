@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""
+Тестирование предварительной оценки стоимости обработки (--estimate)
+"""
+
+import json
+import logging
+import sys
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent / 'src'))
+
+from benchmarks.synthetic import SyntheticLectureSpec, generate_lecture_video
+from src.estimator import estimate_video
+from src.video_processor import VideoProcessor
+from auto_process import estimate_tree
+
+
+def test_estimate_video():
+    """Прогноз числа кадров совпадает с обработкой, время и память растут с частотой анализа"""
+    logging.getLogger().setLevel(logging.WARNING)
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        video = tmp / "lecture.mp4"
+        generate_lecture_video(SyntheticLectureSpec(duration=120, width=320, height=180, fps=5), str(video))
+
+        estimate = estimate_video(str(video), sample_rate=1.0, start_time=10, end_time=100, calibration_seconds=4)
+        assert estimate.calibration_frames == 20
+        assert estimate.read_cost > 0 and estimate.compare_cost > 0
+        assert estimate.frame_bytes == 320 * 180 * 3
+
+        with VideoProcessor(str(video), sample_rate=0.6, start_time=10, end_time=100) as processor:
+            processor.extract_frames()
+        assert estimate.predict(0.6)['frames_analyzed'] == processor.metrics.counters['frames_decoded']
+
+        report = estimate.to_dict()
+        modes = report['modes']
+        assert modes['precise']['frames_analyzed'] > modes['balanced']['frames_analyzed'] > modes['fast']['frames_analyzed']
+        assert modes['precise']['runtime_s'] >= modes['fast']['runtime_s']
+        assert modes['precise']['peak_memory_mb'] > modes['fast']['peak_memory_mb']
+        assert report['estimate'] == modes['balanced']
+        print(f"  ✓ Прогноз: {report['estimate']}")
+
+        transcript = tmp / "lecture.txt"
+        transcript.write_text("|(0:00 - 2:00)\n|Текст\n", encoding='utf-8')
+        assert estimate_tree(tmp, {'sample_rate': 1.0, 'crop_region': 'center'})
+        saved = json.loads((tmp / "lecture.estimate.json").read_text(encoding='utf-8'))
+        assert saved['estimate']['frames_analyzed'] == 120
+        assert not (tmp / "lecture.md").exists()
+        print("  ✓ Оценка пакета записана в lecture.estimate.json")
+
+
+if __name__ == "__main__":
+    test_estimate_video()
+    print("✓ Все тесты оценки прошли успешно!")
@@ -57,7 +57,7 @@ def test_fixed_ssim():
     print(f"7 vs 8 >= порог: {sim_7_8 >= threshold} ({'✅ ОДИНАКОВЫЕ' if sim_7_8 >= threshold else '❌ РАЗНЫЕ'})")
     print(f"6 vs 8 >= порог: {sim_6_8 >= threshold} ({'✅ ОДИНАКОВЫЕ' if sim_6_8 >= threshold else '❌ РАЗНЫЕ'})")
     
-    processor.cap.release()
+    processor.close()
     
     print("\n" + "=" * 80)
 
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Тестирование передачи кадров через разделяемую память (decode_process)
+"""
+
+import logging
+import multiprocessing
+import sys
+import tempfile
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).parent / 'src'))
+
+from benchmarks.synthetic import SyntheticLectureSpec, generate_lecture_video
+from src.frame_ring import FrameRing, SharedMemoryDecoder
+from src.video_processor import VideoProcessor, crop_frame_region
+
+
+def _fill_slot(ring_name: str, slot: int, value: int):
+    ring = FrameRing(4, (3, 5), name=ring_name)
+    ring.slot(slot)[...] = value
+    ring.close()
+
+
+def test_ring_shared_between_processes():
+    """Слот, записанный другим процессом, виден без копирования"""
+    ring = FrameRing(4, (3, 5))
+    try:
+        process = multiprocessing.get_context('spawn').Process(target=_fill_slot, args=(ring.name, 2, 42))
+        process.start()
+        process.join(timeout=60)
+        assert process.exitcode == 0
+        assert (ring.slot(2) == 42).all() and (ring.slot(1) == 0).all()
+    finally:
+        ring.close()
+    print("  ✓ Кольцо видно из другого процесса")
+
+
+def test_decode_process_matches_in_process():
+    """Те же кадры сетки (серые обрезки), те же слайды и PNG, что без отдельного процесса"""
+    logging.getLogger().setLevel(logging.WARNING)
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        video = tmp / "lecture.mp4"
+        generate_lecture_video(SyntheticLectureSpec(duration=150, width=320, height=180, fps=5), str(video))
+
+        with VideoProcessor(str(video), start_time=20) as processor:
+            expected = [(cv2.cvtColor(crop_frame_region(frame, processor.crop_region), cv2.COLOR_BGR2GRAY), number)
+                        for frame, _, number in processor.iter_frames()]
+        with VideoProcessor(str(video), start_time=20) as processor:
+            direct = processor.process(str(tmp / "direct"))
+
+        with VideoProcessor(str(video), start_time=20, decode_process=True) as processor:
+            assert processor.metrics.info['decode_process']
+            frames = [(frame.copy(), number) for frame, _, number in processor.iter_frames()]
+        assert [number for _, number in frames] == [number for _, number in expected]
+        for (frame, number), (reference, _) in zip(frames, expected):
+            assert np.array_equal(frame, reference), number
+
+        with VideoProcessor(str(video), start_time=20, decode_process=True) as processor:
+            shared = processor.process(str(tmp / "shared"))
+        assert [timestamp for _, timestamp in shared] == [timestamp for _, timestamp in direct]
+        for (shared_path, _), (direct_path, _) in zip(shared, direct):
+            assert np.array_equal(cv2.imread(shared_path), cv2.imread(direct_path)), shared_path
+        print(f"  ✓ Кадров сетки: {len(frames)}, слайдов: {len(shared)}, совпадают с декодированием в процессе")
+
+
+def test_decode_process_errors():
+    """Ошибка процесса-декодера - исключение, а не конец видео; неудачный запуск не мешает close()"""
+    logging.getLogger().setLevel(logging.WARNING)
+    with tempfile.TemporaryDirectory() as tmp:
+        video = Path(tmp) / "lecture.mp4"
+        generate_lecture_video(SyntheticLectureSpec(duration=10, width=320, height=180, fps=5), str(video))
+
+        decoder = SharedMemoryDecoder('opencv', str(video))
+        decoder.set_analysis(5, (0, 0, 160, 90))
+        decoder._start = lambda: setattr(decoder, '_process', object())
+        decoder._next_ready = lambda: (None, "ValueError: битый кадр")
+        try:
+            decoder.read()
+            assert False, "ошибка декодера проглочена"
+        except RuntimeError as e:
+            assert "битый кадр" in str(e)
+        decoder._next_ready = lambda: (None, None)
+        assert decoder.read() == (False, None)
+        decoder._process = None
+
+        class FailingContext:
+            def __getattr__(self, name):
+                return getattr(context, name)
+
+            def Process(self, *args, **kwargs):
+                process = context.Process(*args, **kwargs)
+
+                def start():
+                    raise OSError("нет ресурсов")
+                process.start = start
+                return process
+
+        context = decoder._context
+        decoder._context = FailingContext()
+        del decoder._start
+        try:
+            decoder.read()
+            assert False, "ошибка запуска проглочена"
+        except OSError:
+            pass
+        decoder.close()
+        print("  ✓ Ошибка декодера и неудачный запуск процесса не маскируются")
+
+
+if __name__ == "__main__":
+    test_ring_shared_between_processes()
+    test_decode_process_matches_in_process()
+    test_decode_process_errors()
+    print("✓ Все тесты разделяемой памяти прошли успешно!")
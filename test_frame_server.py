@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Тестирование произвольного доступа к кадрам (frame_server)
+"""
+
+import logging
+import sys
+import tempfile
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).parent / 'src'))
+
+from benchmarks.synthetic import SyntheticLectureSpec, generate_lecture_video
+from src.frame_server import FrameCache, FrameServer
+from src.packets import load_packets
+from src.seek_index import seek_index_path
+from src.video_processor import VideoProcessor, crop_frame_region
+
+
+def test_cache_budget():
+    """LRU-кэш вытесняет давно не использованные массивы, не выходя за бюджет"""
+    cache = FrameCache(max_bytes=3000)
+    for key in range(3):
+        cache.put(key, np.zeros(1000, dtype=np.uint8))
+    assert cache.get(0) is not None        # 0 - теперь самый свежий
+    cache.put(3, np.zeros(1000, dtype=np.uint8))
+    assert cache.get(1) is None            # вытеснен
+    assert cache.get(0) is not None and cache.get(2) is not None
+    assert cache.nbytes == 3000 and len(cache) == 3
+    assert not cache.get(3).flags.writeable
+
+    big = cache.put(4, np.zeros(5000, dtype=np.uint8))
+    assert big is not None and cache.get(4) is None and cache.nbytes == 3000
+    assert cache.hits == 4 and cache.misses == 2
+    print("  ✓ LRU-кэш с бюджетом в байтах")
+
+
+def test_frames_match_sequential_read():
+    """Кадры в произвольном порядке совпадают с последовательным чтением, повторы - из кэша"""
+    logging.getLogger().setLevel(logging.WARNING)
+    with tempfile.TemporaryDirectory() as tmp:
+        video = Path(tmp) / "lecture.mp4"
+        generate_lecture_video(SyntheticLectureSpec(duration=60, width=320, height=180, fps=5, seed=2), str(video))
+        cap = cv2.VideoCapture(str(video))
+        expected = []
+        while True:
+            ret, frame = cap.read()
+            if not ret:
+                break
+            expected.append(frame)
+        cap.release()
+
+        targets = [150, 3, 4, 5, 299, 0, 77, 150, 3]
+        with FrameServer(str(video), crop_region="center") as server:
+            for target in targets:
+                frame = server.frame(target)
+                assert np.array_equal(frame, expected[target]), target
+                assert np.array_equal(server.crop(target), crop_frame_region(expected[target], "center"))
+            assert np.array_equal(server.frame_at(30.0), expected[150])
+            assert server.frame(len(expected) + 10) is None
+            # Повторные 150 и 3: кадр и обрезка из кэша
+            assert server.cache.hits >= 4
+        print(f"  ✓ {len(targets)} кадров вразнобой совпадают с последовательным чтением")
+
+
+def test_profile_finds_slide_change():
+    """Провал сходства в профиле - там же, где детектор нашёл смену слайда"""
+    logging.getLogger().setLevel(logging.WARNING)
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        video = tmp / "lecture.mp4"
+        generate_lecture_video(SyntheticLectureSpec(duration=200, width=320, height=180, fps=4, seed=3), str(video))
+        with VideoProcessor(str(video), sample_rate=0.5, threshold=0.92) as processor:
+            slides = processor.process(str(tmp / "slides"))
+        assert len(slides) > 1
+        change = slides[1][1]
+
+        with FrameServer(str(video), analysis_width=None) as server:
+            profile = server.profile(change, radius=2.0, step=0.5)
+            drops = [timestamp for timestamp, similarity in profile if similarity < 0.92]
+            assert drops == [change], (drops, change)
+            misses = server.cache.misses
+            server.profile(change, radius=2.0, step=0.5)
+            assert server.cache.misses == misses
+        print(f"  ✓ Смена в профиле на {change:.1f}s, повторный профиль - целиком из кэша")
+
+
+def test_seek_index_is_built_only_on_request():
+    """Без seek_index индекс только читается; построить и записать его - по запросу"""
+    logging.getLogger().setLevel(logging.WARNING)
+    with tempfile.TemporaryDirectory() as tmp:
+        video = Path(tmp) / "lecture.mp4"
+        generate_lecture_video(SyntheticLectureSpec(duration=30, width=320, height=180, fps=5, seed=2), str(video))
+        sidecar = seek_index_path(str(video))
+
+        with FrameServer(str(video)) as server:
+            assert server.decoder.seek_index is None
+        assert not sidecar.exists()
+        if load_packets(str(video), 5.0) is None:
+            print("  - Нет ни ffprobe, ни PyAV, пропущено")
+            return
+
+        with FrameServer(str(video), seek_index=True) as server:
+            assert server.decoder.seek_index is not None
+        assert sidecar.exists()
+        with FrameServer(str(video)) as server:
+            assert server.decoder.seek_index is not None   # Готовый индекс читается
+        print("  ✓ Индекс перемотки пишется только с seek_index=True")
+
+
+if __name__ == "__main__":
+    test_cache_budget()
+    test_frames_match_sequential_read()
+    test_profile_finds_slide_change()
+    test_seek_index_is_built_only_on_request()
+    print("✓ Все тесты произвольного доступа к кадрам прошли успешно!")
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Тестирование времени запуска: CLI не должен загружать cv2 и scikit-image,
+пока не началась обработка видео
+"""
+
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).parent
+HEAVY_MODULES = ('cv2', 'skimage', 'scipy')
+
+# Порог с большим запасом: без тяжёлых зависимостей --help занимает ~0.1s,
+# с ними - больше 0.5s даже на быстрой машине
+HELP_TIME_LIMIT = 1.0
+
+
+def _loaded_heavy_modules(code: str) -> list:
+    """Выполняет код в чистом интерпретаторе и возвращает загруженные тяжёлые модули"""
+    probe = code + "\nimport sys\nprint(','.join(m for m in %r if m in sys.modules))" % (HEAVY_MODULES,)
+    result = subprocess.run([sys.executable, '-c', probe], cwd=ROOT, capture_output=True, text=True, check=True)
+    output = result.stdout.strip().splitlines()
+    return [m for m in output[-1].split(',') if m] if output else []
+
+
+def test_cli_modules_import_without_heavy_deps():
+    """Импорт CLI и вспомогательных модулей не тянет cv2/scikit-image"""
+    loaded = _loaded_heavy_modules("import src, src.main, src.batch, src.job_queue, src.metrics, auto_process")
+    assert loaded == [], loaded
+    print("  ✓ src.main, auto_process: тяжёлые зависимости не загружены")
+
+
+def test_validation_error_does_not_load_video_stack():
+    """Ошибка в аргументах обнаруживается до загрузки cv2"""
+    loaded = _loaded_heavy_modules(
+        "import runpy, sys\n"
+        "sys.argv = ['main', '--video', 'missing.mp4', '--transcript', 'missing.txt']\n"
+        "try:\n"
+        "    runpy.run_module('src.main', run_name='__main__')\n"
+        "except SystemExit as e:\n"
+        "    assert e.code == 1\n"
+    )
+    assert loaded == [], loaded
+    print("  ✓ Проверка аргументов без загрузки cv2")
+
+
+def test_help_is_fast():
+    """--help не платит за импорт тяжёлых зависимостей"""
+    for command in ([sys.executable, '-m', 'src.main', '--help'], [sys.executable, 'auto_process.py', '--help']):
+        started = time.perf_counter()
+        subprocess.run(command, cwd=ROOT, capture_output=True, check=True)
+        elapsed = time.perf_counter() - started
+        assert elapsed < HELP_TIME_LIMIT, (command, elapsed)
+        print(f"  ✓ {' '.join(command[1:])}: {elapsed:.2f}s")
+
+
+if __name__ == "__main__":
+    test_cli_modules_import_without_heavy_deps()
+    test_validation_error_does_not_load_video_stack()
+    test_help_is_fast()
+    print("✓ Все тесты времени запуска прошли успешно!")
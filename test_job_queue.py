@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+"""
+Тестирование общей очереди заданий (захват, аренда, повторные попытки)
+"""
+
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent / 'src'))
+
+from src.batch import BatchJob, range_key
+from src.job_queue import JobQueue
+
+
+def _make_job(root: Path, name: str, duration: float = 0.0) -> BatchJob:
+    folder = root / name
+    folder.mkdir(parents=True, exist_ok=True)
+    (folder / f"{name}.mp4").write_bytes(b"")
+    (folder / f"{name}.txt").write_text("")
+    return BatchJob(folder / f"{name}.mp4", folder / f"{name}.txt", duration)
+
+
+def test_enqueue_and_exclusive_claim():
+    """Задание добавляется один раз и захватывается только одним узлом"""
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        node_a = JobQueue(root)
+        node_b = JobQueue(root)
+        node_b.worker_id = "node-b"
+
+        assert node_a.enqueue(_make_job(root, "short", 60))
+        assert node_a.enqueue(_make_job(root, "long", 3600))
+        assert not node_b.enqueue(_make_job(root, "long", 3600))  # Повторно не добавляется
+
+        claim_a = node_a.claim_next()
+        claim_b = node_b.claim_next()
+        assert claim_a.job.video_path.stem == "long"  # Длинные первыми
+        assert claim_b.job.video_path.stem == "short"
+        assert node_a.claim_next() is None  # Всё разобрано
+
+        claim_a.complete(True)
+        claim_b.complete(True)
+        assert not node_a.has_unfinished()
+        assert node_a.status() == {'total': 2, 'claimed': 0, 'done': 2, 'failed': 0}
+        print("  ✓ Задания разобраны узлами без пересечений")
+
+
+def test_stale_claim_is_reclaimed():
+    """Брошенный захват (нет heartbeat) забирает другой узел"""
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        crashed = JobQueue(root, lease_seconds=0.2)
+        crashed.enqueue(_make_job(root, "lecture"))
+
+        assert crashed.claim_next() is not None  # Узел "упал", не завершив задание
+
+        survivor = JobQueue(root, lease_seconds=0.2)
+        assert survivor.claim_next() is None  # Аренда ещё действует
+        time.sleep(0.3)
+        claim = survivor.claim_next()
+        assert claim is not None and claim.job.video_path.stem == "lecture"
+        claim.complete(True)
+        print("  ✓ Просроченный захват забран")
+
+
+def test_heartbeat_keeps_claim():
+    """Heartbeat продлевает аренду, пока задание обрабатывается"""
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        worker = JobQueue(root, lease_seconds=0.3, heartbeat_interval=0.05)
+        worker.enqueue(_make_job(root, "lecture"))
+
+        other = JobQueue(root, lease_seconds=0.3)
+        with worker.claim_next() as claim:
+            time.sleep(0.6)  # Дольше срока аренды
+            assert other.claim_next() is None
+            assert not claim.lost
+            claim.complete(True)
+        print("  ✓ Аренда продлевается heartbeat")
+
+
+def test_failed_job_is_retried_then_marked():
+    """Неудачное задание повторяется до max_attempts, затем помечается ошибкой"""
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        queue = JobQueue(root, max_attempts=2)
+        queue.enqueue(_make_job(root, "broken"))
+
+        queue.claim_next().complete(False)
+        assert queue.has_unfinished()
+        queue.claim_next().complete(False)
+        assert not queue.has_unfinished()
+        assert queue.claim_next() is None
+        assert queue.status()['failed'] == 1
+        print("  ✓ Ошибочное задание помечено после 2 попыток")
+
+
+def test_lost_claim_does_not_complete():
+    """Узел, у которого перехватили аренду, не пишет ни результат, ни попытку"""
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        slow = JobQueue(root, lease_seconds=0.2, heartbeat_interval=10)
+        slow.enqueue(_make_job(root, "lecture"))
+        stalled = slow.claim_next()   # Завис дольше срока аренды
+        time.sleep(0.3)
+        assert not slow._renew(stalled)  # Просроченную аренду не продлевает
+
+        other = JobQueue(root, lease_seconds=0.2)
+        other.worker_id = "node-b"
+        claim = other.claim_next()
+        assert claim is not None
+
+        assert not stalled.complete(False)
+        assert not slow._renew(stalled)
+        assert other._owns(claim)
+        job = other.jobs_dir / f"{claim.job_id}.json"
+        assert '"attempts": 0' in job.read_text()
+        assert other.status()['failed'] == 0 and other.status()['done'] == 0
+
+        assert claim.complete(True)
+        assert other.status()['done'] == 1
+        print("  ✓ Потерянная аренда не завершает чужое задание")
+
+
+def test_force_requeues_finished_job():
+    """Готовое задание повторно не добавляется, а с force - возвращается в очередь"""
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        queue = JobQueue(root)
+        job = _make_job(root, "lecture")
+        queue.enqueue(job)
+        queue.claim_next().complete(True)
+
+        assert not queue.enqueue(job) and queue.is_enqueued(job)
+        assert queue.claim_next() is None
+        assert queue.enqueue(job, force=True)
+        assert queue.status() == {'total': 1, 'claimed': 0, 'done': 0, 'failed': 0}
+        claim = queue.claim_next()
+        assert claim is not None
+        assert not queue.enqueue(job, force=True)  # Задание в работе - не трогаем
+        claim.complete(True)
+        print("  ✓ force возвращает готовое задание в очередь")
+
+
+def test_partial_range_is_separate_job():
+    """Предпросмотр и полная обработка видео - разные задания, каждая очередь берёт только свои"""
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        preview = JobQueue(root, scope=range_key(0.0, 60.0))
+        full = JobQueue(root)
+        job = _make_job(root, "lecture")
+
+        assert preview.enqueue(job)
+        assert full.claim_next() is None and not full.has_unfinished()
+        preview.claim_next().complete(True)
+
+        assert not full.is_enqueued(job)
+        assert full.enqueue(job)
+        claim = full.claim_next()
+        assert claim is not None and claim.job.video_path == job.video_path
+        claim.complete(True)
+        assert preview.status()['done'] == 1 and full.status()['done'] == 1
+        print("  ✓ Предпросмотр не помечает видео обработанным целиком")
+
+
+def test_failed_job_can_be_retried():
+    """Задание с ошибкой возвращается по force; заменённое видео - новое задание"""
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        queue = JobQueue(root, max_attempts=1)
+        job = _make_job(root, "broken")
+        queue.enqueue(job)
+        queue.claim_next().complete(False)
+        assert queue.status()['failed'] == 1
+
+        assert queue.enqueue(job, force=True)
+        assert queue.status()['failed'] == 0
+        queue.claim_next().complete(False)
+        assert queue.status()['failed'] == 1
+
+        # Видео заменили: новое задание, старая ошибка в его сводку не входит
+        old_id = queue.job_id(job)
+        job.video_path.write_bytes(b"fixed")
+        assert queue.job_id(job) != old_id
+        assert queue.enqueue(job)
+        assert queue.status([queue.job_id(job)]) == {'total': 1, 'claimed': 0, 'done': 0, 'failed': 0}
+        print("  ✓ Ошибочное задание можно повторить")
+
+
+def test_worker_skips_existing_output():
+    """Рабочий процесс не тратит попытку на видео, результат которого уже записан"""
+    from auto_process import _run_queue_worker
+
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        queue = JobQueue(root)
+        job = _make_job(root, "lecture")
+        queue.enqueue(job)
+        job.output_md.write_text("")  # Записал другой узел после добавления в очередь
+
+        assert _run_queue_worker(root, None, {'crop_region': 'center'}) == 0
+        assert queue.status() == {'total': 1, 'claimed': 0, 'done': 1, 'failed': 0}
+        print("  ✓ Готовый результат завершает задание успешно")
+
+
+if __name__ == "__main__":
+    test_enqueue_and_exclusive_claim()
+    test_stale_claim_is_reclaimed()
+    test_heartbeat_keeps_claim()
+    test_failed_job_is_retried_then_marked()
+    test_lost_claim_does_not_complete()
+    test_force_requeues_finished_job()
+    test_partial_range_is_separate_job()
+    test_failed_job_can_be_retried()
+    test_worker_skips_existing_output()
+    print("✓ Все тесты очереди заданий прошли успешно!")
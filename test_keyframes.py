@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Тестирование поиска смен слайдов по ключевым кадрам (keyframes)
+"""
+
+import logging
+import sys
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent / 'src'))
+
+from benchmarks.synthetic import SyntheticLectureSpec, generate_lecture_video
+from src import packets
+from src.keyframes import KeyframeIndex, load_keyframe_index
+from src.video_processor import VideoProcessor
+
+
+def test_keyframe_index():
+    """Выборка ключевых кадров отрезка и поиск предыдущего ключевого кадра"""
+    index = KeyframeIndex([24, 0, 12, 12, 36], packets.BACKEND_PYAV)
+    assert index.frames == [0, 12, 24, 36]
+    assert index.between(10, 36) == [12, 24]
+    assert index.preceding(23) == 12 and index.preceding(24) == 24
+    assert KeyframeIndex([5], packets.BACKEND_FFPROBE).preceding(4) is None
+    print("  ✓ KeyframeIndex")
+
+
+def test_keyframes_match_full_scan():
+    """Те же слайды, что при полном просмотре частой сетки; читаются только ключевые кадры и GOP со сменой"""
+    logging.getLogger().setLevel(logging.WARNING)
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        video = tmp / "lecture.mp4"
+        generate_lecture_video(SyntheticLectureSpec(duration=300, width=640, height=360, fps=4, seed=5), str(video))
+
+        with VideoProcessor(str(video), sample_rate=0.5, threshold=0.95) as processor:
+            if load_keyframe_index(str(video), processor.fps) is None:
+                print("  - Нет ни PyAV, ни ffprobe, пропущено")
+                return
+            expected = processor.process(str(tmp / "full"))
+            full_frames = processor.metrics.counters['frames_decoded']
+        with VideoProcessor(str(video), sample_rate=0.5, threshold=0.95, keyframes=True) as processor:
+            slides = processor.process(str(tmp / "keyframes"))
+            scan = processor.metrics.info['keyframe_scan']
+
+        assert [timestamp for _, timestamp in slides] == [timestamp for _, timestamp in expected]
+        assert len(scan['windows']) == len(slides) - 1
+        assert scan['fine_frames'] * 4 < full_frames
+        print(f"  ✓ Слайдов: {len(slides)}, ключевых кадров: {scan['keyframes']} ({scan['backend']}), "
+              f"кадров частой сетки: {scan['fine_frames']} из {full_frames}")
+
+
+def test_keyframes_fallback():
+    """Без PyAV и ffprobe - обычный просмотр сетки с теми же слайдами"""
+    logging.getLogger().setLevel(logging.ERROR)
+    saved = packets.av, packets.FFPROBE_BINARY
+    packets.av, packets.FFPROBE_BINARY = None, "ffprobe-not-installed"
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            tmp = Path(tmp)
+            video = tmp / "lecture.mp4"
+            generate_lecture_video(SyntheticLectureSpec(duration=150, width=320, height=180, fps=5), str(video))
+
+            with VideoProcessor(str(video)) as processor:
+                expected = processor.process(str(tmp / "full"))
+            with VideoProcessor(str(video), keyframes=True) as processor:
+                slides = processor.process(str(tmp / "keyframes"))
+                assert 'keyframe_scan' not in processor.metrics.info
+        assert [timestamp for _, timestamp in slides] == [timestamp for _, timestamp in expected]
+        print(f"  ✓ Без индекса ключевых кадров: {len(slides)} слайдов, как при обычном просмотре")
+    finally:
+        packets.av, packets.FFPROBE_BINARY = saved
+
+
+if __name__ == "__main__":
+    test_keyframe_index()
+    test_keyframes_match_full_scan()
+    test_keyframes_fallback()
+    print("✓ Все тесты поиска по ключевым кадрам прошли успешно!")
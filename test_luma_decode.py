@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Тестирование анализа по яркостной плоскости (luma_decode)
+"""
+
+import logging
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).parent / 'src'))
+
+from benchmarks.synthetic import SyntheticLectureSpec, generate_lecture_video
+from src.decoders import OpenCVDecoder
+from src.video_processor import VideoProcessor
+
+
+def test_luma_decode_matches_bgr():
+    """Те же слайды и те же PNG, что при обычном декодировании; кадры анализа - только Y"""
+    logging.getLogger().setLevel(logging.WARNING)
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        video = tmp / "lecture.mp4"
+        generate_lecture_video(SyntheticLectureSpec(duration=150, width=320, height=180, fps=5), str(video))
+
+        with VideoProcessor(str(video), start_time=20) as processor:
+            bgr = processor.process(str(tmp / "bgr"))
+
+        with VideoProcessor(str(video), start_time=20, luma_decode=True) as processor:
+            assert processor.luma_decode and processor.metrics.info['luma_decode']
+            frame, _, _ = next(processor.iter_frames())
+            assert frame.shape == (180, 320)
+        with VideoProcessor(str(video), start_time=20, luma_decode=True) as processor:
+            luma = processor.process(str(tmp / "luma"))
+
+        assert [timestamp for _, timestamp in luma] == [timestamp for _, timestamp in bgr]
+        for (luma_path, _), (bgr_path, _) in zip(luma, bgr):
+            assert np.array_equal(cv2.imread(luma_path), cv2.imread(bgr_path)), luma_path
+        print(f"  ✓ Слайдов: {len(luma)}, PNG совпадают с обычным декодированием")
+
+
+def test_luma_plane_layouts():
+    """Плоскость Y берётся из планарных и упакованных форматов, неизвестные отклоняются"""
+    logging.getLogger().setLevel(logging.WARNING)
+    with tempfile.TemporaryDirectory() as tmp:
+        video = Path(tmp) / "lecture.mp4"
+        generate_lecture_video(SyntheticLectureSpec(duration=10, width=320, height=180, fps=5), str(video))
+        with VideoProcessor(str(video)) as processor:
+            i420 = np.arange(270 * 320, dtype=np.uint8).reshape(270, 320)
+            assert np.array_equal(processor.decoder.luma_plane(i420), i420[:180])
+            yuyv = np.zeros((180, 320, 2), dtype=np.uint8)
+            yuyv[:, :, 0] = 7
+            assert (processor.decoder.luma_plane(yuyv) == 7).all()
+            assert processor.decoder.luma_plane(np.zeros((180, 640), dtype=np.uint8)) is None
+            assert processor.decoder.luma_plane(np.zeros((180, 320), dtype=np.uint16)) is None
+        print("  ✓ Форматы кадров")
+
+
+def test_luma_read_is_quiet():
+    """Чтение плоскости Y не пишет в stderr предупреждение OpenCV на каждый кадр"""
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        video = tmp / "lecture.mp4"
+        generate_lecture_video(SyntheticLectureSpec(duration=10, width=320, height=180, fps=5), str(video))
+
+        log = tmp / "stderr.txt"
+        saved = os.dup(2)
+        with open(log, 'w') as f:
+            os.dup2(f.fileno(), 2)
+            try:
+                decoder = OpenCVDecoder(str(video), luma=True)
+                frames = sum(1 for _ in iter(lambda: decoder.read()[0], False))
+                decoder.close()
+            finally:
+                os.dup2(saved, 2)
+                os.close(saved)
+        assert frames > 0
+        assert "unsupported picture format" not in log.read_text(errors='replace')
+        print(f"  ✓ {frames} кадров Y без предупреждений OpenCV")
+
+
+if __name__ == "__main__":
+    test_luma_decode_matches_bgr()
+    test_luma_plane_layouts()
+    test_luma_read_is_quiet()
+    print("✓ Все тесты luma_decode прошли успешно!")
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Тестирование метрик обработки: счётчики этапов и отчёт
+"""
+
+import json
+import logging
+import sys
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent / 'src'))
+
+from benchmarks.synthetic import SyntheticLectureSpec, generate_lecture_video
+from src.metrics import RunMetrics, current_rss_bytes, metrics_path_for, MB
+from src.video_processor import VideoProcessor
+from src.transcript_parser import TranscriptParser
+from src.markdown_generator import MarkdownGenerator
+
+
+def test_pipeline_metrics_report():
+    """Один накопитель на весь запуск: счётчики согласованы, отчёт пишется рядом с результатом"""
+    logging.getLogger().setLevel(logging.WARNING)
+    spec = SyntheticLectureSpec(duration=90, width=320, height=180, fps=5)
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        video = tmp / "lecture.mp4"
+        generate_lecture_video(spec, str(video))
+        transcript = tmp / "lecture.txt"
+        transcript.write_text("|(0:00 - 1:00)\n|Текст первой части\n|(1:00 - 1:30)\n|Текст второй части\n",
+                              encoding='utf-8')
+
+        metrics = RunMetrics()
+        processor = VideoProcessor(str(video), sample_rate=1.0, threshold=0.92, metrics=metrics)
+        slides = processor.process(str(tmp / "slides"))
+        parser = TranscriptParser(metrics)
+        entries = parser.parse_transcript(str(transcript))
+        output = tmp / "lecture.md"
+        MarkdownGenerator(parser).generate_markdown(slides, entries, str(output))
+        metrics.write(metrics_path_for(str(output)))
+
+        report = json.loads((tmp / "lecture.metrics.json").read_text(encoding='utf-8'))
+        counters = report['counters']
+        assert counters['frames_decoded'] + counters['frames_skipped'] == 450
+        assert counters['frames_decoded'] == 90
+        assert counters['comparisons'] == 89
+        assert counters['slides_saved'] == len(slides)
+        assert counters['transcript_entries'] == 2
+        png_bytes = sum(Path(path).stat().st_size for path, _ in slides)
+        assert counters['bytes_written'] == png_bytes + output.stat().st_size
+        assert list(report['stages']) == ['decode', 'crop', 'compare', 'save_slides', 'transcript', 'markdown']
+        print(f"  ✓ Отчёт: {counters}")
+
+
+def test_memory_budget_warning():
+    """Учёт памяти по этапам; прогноз по оставшимся кадрам предупреждает до превышения бюджета"""
+    logging.getLogger().setLevel(logging.ERROR)
+    spec = SyntheticLectureSpec(duration=90, width=320, height=180, fps=5)
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        video = tmp / "lecture.mp4"
+        generate_lecture_video(spec, str(video))
+
+        relaxed = RunMetrics(memory_budget_mb=100000)
+        VideoProcessor(str(video), metrics=relaxed).process(str(tmp / "relaxed"))
+        memory = relaxed.to_dict()['memory']
+        assert not memory['budget_warning']
+        assert list(memory['stages']) == ['extract_frames', 'detect_slide_changes', 'save_slides']
+        # 90 кадров 320x180 копятся в памяти целиком (~15 МБ)
+        assert memory['stages']['extract_frames']['numpy_retained_mb'] >= 0.99 * 90 * 320 * 180 * 3 / MB
+
+        # Бюджет чуть выше текущего RSS: все кадры в него не поместятся
+        tight = RunMetrics(memory_budget_mb=current_rss_bytes() / MB + 5)
+        VideoProcessor(str(video), metrics=tight).process(str(tmp / "tight"))
+        assert tight.to_dict()['memory']['budget_warning']
+        assert RunMetrics().to_dict()['memory'] is None
+        print("  ✓ Предупреждение о бюджете памяти")
+
+
+if __name__ == "__main__":
+    test_pipeline_metrics_report()
+    test_memory_budget_warning()
+    print("✓ Все тесты метрик прошли успешно!")
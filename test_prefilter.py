@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Тестирование фильтра смен слайдов по размерам пакетов (packet_prefilter)
+"""
+
+import logging
+import sys
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent / 'src'))
+
+from benchmarks.synthetic import SyntheticLectureSpec, generate_lecture_video
+from src import packets, prefilter
+from src.packets import PacketIndex, load_packets
+from src.prefilter import burst_windows
+from src.video_processor import VideoProcessor
+
+
+def test_burst_windows():
+    """Всплеск разностного пакета и резкая смена размера ключевого кадра"""
+    fps = 10.0
+    times, sizes, keyframes = [], [], []
+    for frame_number in range(600):
+        key = frame_number % 12 == 0
+        if key:
+            size = 90000 if frame_number < 300 else 70000
+        else:
+            size = 3000 + (frame_number * 37) % 500
+        if frame_number == 153:
+            size = 60000
+        times.append(frame_number / fps)
+        sizes.append(size)
+        keyframes.append(key)
+    index = PacketIndex(times, sizes, keyframes, fps, packets.BACKEND_FFPROBE)
+    assert index.keyframe_numbers()[:3] == [0, 12, 24]
+    # 153 - всплеск (шаг сетки до и после), 300 - первый ключевой кадр меньшего размера (GOP перед ним)
+    assert burst_windows(index, 5, fps) == [(148, 159), (288, 306)]
+    print("  ✓ Всплески: разностный пакет и ключевой кадр")
+
+
+def _process(video: Path, output: Path, **kwargs):
+    with VideoProcessor(str(video), sample_rate=0.5, threshold=0.95, **kwargs) as processor:
+        slides = processor.process(str(output))
+        return [timestamp for _, timestamp in slides], processor.metrics
+
+
+def test_prefilter_matches_full_scan():
+    """Те же слайды, что при полном просмотре частой сетки, декодируется малая часть кадров"""
+    logging.getLogger().setLevel(logging.WARNING)
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        video = tmp / "lecture.mp4"
+        generate_lecture_video(SyntheticLectureSpec(duration=300, width=640, height=360, fps=4, seed=5), str(video))
+        if load_packets(str(video), 4.0) is None:
+            print("  - Нет ни ffprobe, ни PyAV, пропущено")
+            return
+
+        expected, full = _process(video, tmp / "full")
+        slides, metrics = _process(video, tmp / "prefilter", packet_prefilter=True)
+        report = metrics.info['packet_prefilter_scan']
+        assert slides == expected
+        assert metrics.counters['frames_decoded'] * 4 < full.counters['frames_decoded']
+        print(f"  ✓ Слайдов: {len(slides)}, всплесков: {report['bursts']}, декодировано кадров: "
+              f"{metrics.counters['frames_decoded']} из {full.counters['frames_decoded']}")
+
+        # Без всплесков смены находят страховочные кадры
+        saved = prefilter.PACKET_BURST_FACTOR, prefilter.PACKET_KEYFRAME_CHANGE
+        prefilter.PACKET_BURST_FACTOR, prefilter.PACKET_KEYFRAME_CHANGE = float('inf'), float('inf')
+        try:
+            slides, metrics = _process(video, tmp / "safety", packet_prefilter=True)
+        finally:
+            prefilter.PACKET_BURST_FACTOR, prefilter.PACKET_KEYFRAME_CHANGE = saved
+        report = metrics.info['packet_prefilter_scan']
+        assert report['bursts'] == 0
+        assert report['safety_windows'] == len(slides) - 1
+        assert slides == expected
+        print(f"  ✓ Без всплесков: {report['safety_windows']} окон страховочных кадров, слайды те же")
+
+
+def test_prefilter_short_slides():
+    """Слайды короче MIN_SLIDE_DURATION: решения те же, что у детектора с его выдержкой"""
+    logging.getLogger().setLevel(logging.WARNING)
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        video = tmp / "lecture.mp4"
+        generate_lecture_video(SyntheticLectureSpec(duration=240, width=640, height=360, fps=4,
+                                                    min_slide_duration=12, max_slide_duration=20, seed=1), str(video))
+        if load_packets(str(video), 4.0) is None:
+            print("  - Нет ни ffprobe, ни PyAV, пропущено")
+            return
+
+        for sample_rate, threshold in ((1.0, 0.92), (0.5, 0.95)):
+            with VideoProcessor(str(video), sample_rate=sample_rate, threshold=threshold) as processor:
+                expected = [timestamp for _, timestamp in processor.process(str(tmp / "full"))]
+            with VideoProcessor(str(video), sample_rate=sample_rate, threshold=threshold,
+                                packet_prefilter=True) as processor:
+                slides = [timestamp for _, timestamp in processor.process(str(tmp / "prefilter"))]
+            assert slides == expected, (sample_rate, slides, expected)
+            print(f"  ✓ Шаг {sample_rate}s, порог {threshold}: {len(slides)} слайдов, как при полном просмотре")
+
+
+def test_prefilter_disabled_without_backend():
+    """Без ffprobe и PyAV - обычный просмотр сетки"""
+    logging.getLogger().setLevel(logging.ERROR)
+    saved = packets.av, packets.FFPROBE_BINARY
+    packets.av, packets.FFPROBE_BINARY = None, "ffprobe-not-installed"
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            tmp = Path(tmp)
+            video = tmp / "lecture.mp4"
+            generate_lecture_video(SyntheticLectureSpec(duration=60, width=320, height=180, fps=5), str(video))
+            with VideoProcessor(str(video), packet_prefilter=True) as processor:
+                processor.process(str(tmp / "slides"))
+                assert 'packet_prefilter_scan' not in processor.metrics.info
+                assert processor.metrics.counters['frames_decoded'] == 60
+        print("  ✓ Без ffprobe и PyAV фильтр отключён")
+    finally:
+        packets.av, packets.FFPROBE_BINARY = saved
+
+
+if __name__ == "__main__":
+    test_burst_windows()
+    test_prefilter_matches_full_scan()
+    test_prefilter_short_slides()
+    test_prefilter_disabled_without_backend()
+    print("✓ Все тесты фильтра по размерам пакетов прошли успешно!")
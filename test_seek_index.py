@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""
+Тестирование индекса перемотки (seek_index)
+"""
+
+import logging
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).parent / 'src'))
+
+from benchmarks.synthetic import SyntheticLectureSpec, generate_lecture_video
+from src import packets
+from src.decoders import OpenCVDecoder
+from src.seek_index import (IndexedFrameReader, load_seek_index, read_seek_index, seek_index_path)
+from src.video_processor import VideoProcessor
+
+
+def _video(tmp: Path, duration: int = 120, fps: int = 5) -> Path:
+    video = tmp / "lecture.mp4"
+    generate_lecture_video(SyntheticLectureSpec(duration=duration, width=320, height=180, fps=fps, seed=3), str(video))
+    return video
+
+
+def _sequential_frames(video: Path) -> list:
+    cap = cv2.VideoCapture(str(video))
+    frames = []
+    while True:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        frames.append(frame)
+    cap.release()
+    return frames
+
+
+def test_sidecar_roundtrip():
+    """Индекс пишется рядом с видео, читается обратно и строится заново, если видео изменилось"""
+    logging.getLogger().setLevel(logging.WARNING)
+    with tempfile.TemporaryDirectory() as tmp:
+        video = _video(Path(tmp))
+        index = load_seek_index(str(video), 5.0)
+        if index is None:
+            print("  - Нет ни PyAV, ни ffprobe, пропущено")
+            return
+        path = seek_index_path(str(video))
+        assert path == Path(tmp) / "lecture.seekindex.json" and path.exists()
+        assert index.frames[0] == 0 and len(index) > 1
+
+        saved = read_seek_index(str(video))
+        assert saved.frames == index.frames
+        assert all(saved.time_of(frame) == index.time_of(frame) for frame in index.frames)
+
+        # Другое время изменения файла - индекс устарел
+        stat = os.stat(video)
+        os.utime(video, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+        assert read_seek_index(str(video)) is None
+        assert load_seek_index(str(video), 5.0).frames == index.frames
+        assert read_seek_index(str(video)) is not None
+        print(f"  ✓ Индекс: {len(index)} ключевых кадров ({index.backend}), устаревший строится заново")
+
+
+def test_reader_exact():
+    """Произвольные кадры через индекс совпадают с последовательным чтением (PyAV и OpenCV)"""
+    logging.getLogger().setLevel(logging.WARNING)
+    with tempfile.TemporaryDirectory() as tmp:
+        video = _video(Path(tmp))
+        index = load_seek_index(str(video), 5.0)
+        if index is None:
+            print("  - Нет ни PyAV, ни ffprobe, пропущено")
+            return
+        expected = _sequential_frames(video)
+        targets = [370, 5, 6, 7, 299, 0, 598, 123, 124, 125, 40]
+
+        saved = packets.av
+        modes = [('OpenCV', None)] + ([('PyAV', saved)] if saved is not None else [])
+        try:
+            for name, av in modes:
+                packets.av = av
+                with IndexedFrameReader(str(video), index) as reader:
+                    for target in targets:
+                        frame = reader.read(target)
+                        # Цвета PyAV и OpenCV могут расходиться на единицу округления
+                        assert frame is not None and frame.shape == expected[target].shape
+                        assert np.abs(frame.astype(np.int16) - expected[target]).max() <= 3, (name, target)
+                    # Соседние кадры одного GOP читаются без перемотки
+                    assert reader.seeks < len(targets)
+                print(f"  ✓ {name}: {len(targets)} кадров точно, перемоток: {reader.seeks}")
+        finally:
+            packets.av = saved
+
+
+def test_decoder_stays_in_gop():
+    """OpenCVDecoder с индексом перематывает к ключевому кадру и не перематывает внутри GOP"""
+    logging.getLogger().setLevel(logging.WARNING)
+    with tempfile.TemporaryDirectory() as tmp:
+        video = _video(Path(tmp))
+        index = load_seek_index(str(video), 5.0)
+        if index is None:
+            print("  - Нет ни PyAV, ни ffprobe, пропущено")
+            return
+        keyframe = index.frames[1]
+        decoder = OpenCVDecoder(str(video))
+        decoder.seek_index = index
+        try:
+            assert decoder.seek(keyframe) == keyframe
+            decoder.read()
+            # Цель в том же GOP: позиция остаётся, кадры докручиваются
+            assert decoder.seek(keyframe + 2) == keyframe + 1
+            # Цель за следующим ключевым кадром: перемотка к нему, дальше - счёт кадров
+            target = index.frames[2] + 3
+            position = decoder.seek(target)
+            assert position == index.frames[2]
+            while position < target:
+                assert decoder.grab()
+                position += 1
+            ret, frame = decoder.read()
+        finally:
+            decoder.close()
+
+        cap = cv2.VideoCapture(str(video))
+        for _ in range(target):
+            cap.grab()
+        _, expected = cap.read()
+        cap.release()
+        assert ret and np.array_equal(frame, expected)
+        print("  ✓ Перемотка к ключевому кадру, внутри GOP - без перемотки, кадр точный")
+
+
+def test_same_slides():
+    """С индексом перемотки слайды те же"""
+    logging.getLogger().setLevel(logging.WARNING)
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        video = _video(tmp, duration=200, fps=4)
+        with VideoProcessor(str(video), sample_rate=0.5, threshold=0.95, two_pass=True) as processor:
+            expected = processor.process(str(tmp / "plain"))
+        with VideoProcessor(str(video), sample_rate=0.5, threshold=0.95, two_pass=True,
+                            seek_index=True) as processor:
+            slides = processor.process(str(tmp / "indexed"))
+            indexed = processor.metrics.info['seek_index']
+        assert [timestamp for _, timestamp in slides] == [timestamp for _, timestamp in expected]
+        print(f"  ✓ Слайдов: {len(slides)}, индекс {'использован' if indexed else 'недоступен'}")
+
+
+if __name__ == "__main__":
+    test_sidecar_roundtrip()
+    test_reader_exact()
+    test_decoder_stays_in_gop()
+    test_same_slides()
+    print("✓ Все тесты индекса перемотки прошли успешно!")
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Тестирование HTTP-сервера на localhost: постановка задания, поток статусов, результат
+"""
+
+import json
+import logging
+import sys
+import tempfile
+import threading
+import urllib.error
+import urllib.request
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent / 'src'))
+
+from benchmarks.synthetic import SyntheticLectureSpec, generate_lecture_video
+from src.server import LectureServer
+
+
+def _request(url: str, payload=None):
+    data = json.dumps(payload).encode('utf-8') if payload is not None else None
+    request = urllib.request.Request(url, data=data, headers={'Content-Type': 'application/json'})
+    try:
+        with urllib.request.urlopen(request, timeout=60) as response:
+            return response.status, json.loads(response.read())
+    except urllib.error.HTTPError as e:
+        return e.code, json.loads(e.read())
+
+
+def test_server_job_lifecycle():
+    """Задание проходит queued -> running -> done, поток событий завершается результатом"""
+    logging.getLogger().setLevel(logging.WARNING)
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        video = tmp / "lecture.mp4"
+        truth = generate_lecture_video(SyntheticLectureSpec(duration=120, width=320, height=180, fps=5), str(video))
+        transcript = tmp / "lecture.txt"
+        transcript.write_text("|(0:00 - 1:00)\n|Первая часть\n|(1:00 - 2:00)\n|Вторая часть\n", encoding='utf-8')
+
+        server = LectureServer(port=0, workers=1, progress_interval=0.0)
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        try:
+            status, job = _request(f"{server.url}/jobs", {'video': str(video), 'transcript': str(transcript)})
+            assert status == 202 and job['state'] in ('queued', 'running'), (status, job)
+
+            # Поток статусов до завершения
+            with urllib.request.urlopen(f"{server.url}/jobs/{job['id']}/events", timeout=60) as response:
+                events = [json.loads(line) for line in response if line.strip()]
+            states = [event['state'] for event in events]
+            assert states[-1] == 'done', events[-1]
+            assert 'running' in states
+            progress = [event['progress'] for event in events]
+            assert progress == sorted(progress)
+
+            status, final = _request(f"{server.url}/jobs/{job['id']}")
+            result = final['result']
+            assert len(result['slides']) == len(truth['change_times'])
+            assert result['markdown_path'] == str(video.with_suffix('.md'))
+            assert Path(result['markdown_path']).exists()
+            assert all(Path(slide['path']).exists() for slide in result['slides'])
+
+            # Запоздавшее событие из процесса пула не возвращает задание в running
+            assert not server._update(server.jobs[job['id']], state='running')
+            assert server.status(job['id'])['state'] == 'done'
+
+            status, _ = _request(f"{server.url}/jobs", {'video': str(tmp / "missing.mp4")})
+            assert status == 400
+            status, _ = _request(f"{server.url}/jobs", {'video': str(video), 'options': {'threshold': 5}})
+            assert status == 400
+            for payload in ({'video': 5}, {'video': str(video), 'transcript': 7},
+                            {'video': str(video), 'options': [1]}, [1]):
+                status, _ = _request(f"{server.url}/jobs", payload)
+                assert status == 400, payload
+            status, health = _request(f"{server.url}/health")
+            assert health['done'] == 1 and health['workers'] == 1
+
+            # Завершённые задания сверх лимита удаляются
+            server.max_finished_jobs = 0
+            with server._changed:
+                server._evict_finished()
+            status, _ = _request(f"{server.url}/jobs/{job['id']}")
+            assert status == 404 and server.jobs == {}
+            print(f"  ✓ Задание выполнено, событий: {len(events)}, слайдов: {len(result['slides'])}")
+        finally:
+            server.shutdown()
+
+
+if __name__ == "__main__":
+    test_server_job_lifecycle()
+    print("✓ Все тесты сервера прошли успешно!")
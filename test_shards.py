@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+"""
+Тестирование обработки по шардам: объединение должно совпадать с обработкой целого видео
+"""
+
+import logging
+import sys
+import tempfile
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).parent / 'src'))
+
+from src.video_processor import VideoProcessor
+from src.shards import build_shard_manifest, merge_shards, write_shard_manifest
+
+FPS = 5
+SIZE = (320, 180)
+CHANGES = [0, 45, 100, 160]  # Время смены слайдов, секунды
+DURATION = 220
+
+
+def _make_video(path: Path):
+    """Видео со слайдами разной яркости и текстурой, меняющимися в моменты CHANGES"""
+    writer = cv2.VideoWriter(str(path), cv2.VideoWriter_fourcc(*'mp4v'), FPS, SIZE)
+    rng = np.random.default_rng(0)
+    slides = []
+    for _ in CHANGES:
+        slide = np.full((SIZE[1], SIZE[0], 3), rng.integers(40, 220), dtype=np.uint8)
+        for _ in range(6):
+            x, y = rng.integers(0, SIZE[0] - 60), rng.integers(0, SIZE[1] - 30)
+            cv2.rectangle(slide, (int(x), int(y)), (int(x) + 60, int(y) + 30), tuple(int(c) for c in rng.integers(0, 255, 3)), -1)
+        slides.append(slide)
+    for frame_number in range(DURATION * FPS):
+        t = frame_number / FPS
+        index = max(i for i, change in enumerate(CHANGES) if t >= change)
+        writer.write(slides[index])
+    writer.release()
+
+
+def _run(video: Path, slides_dir: Path, start=0.0, end=None):
+    processor = VideoProcessor(str(video), sample_rate=1.0, threshold=0.92, crop_region="center",
+                               start_time=start, end_time=end)
+    slides = processor.process(str(slides_dir))
+    return processor, slides
+
+
+def _make_shards(video: Path, tmp: Path, bounds) -> list:
+    manifests = []
+    for index, (start, end) in enumerate(bounds):
+        slides_dir = tmp / f"part_{start}_{end}"
+        processor, _ = _run(video, slides_dir, start, end)
+        manifest_path = tmp / f"part_{start}_{end}.json"
+        write_shard_manifest(processor, str(slides_dir), str(manifest_path))
+        manifests.append(str(manifest_path))
+    return manifests
+
+
+def test_merge_matches_single_run():
+    """Шарды со стыками посреди слайда объединяются в тот же результат, что и целое видео"""
+    logging.getLogger().setLevel(logging.WARNING)
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        video = tmp / "lecture.mp4"
+        _make_video(video)
+
+        _, full = _run(video, tmp / "full")
+        expected = [t for _, t in full]
+
+        # Стыки внутри слайдов: шарды начинают с "дубля", а смена на 45s попадает
+        # в MIN_SLIDE_DURATION от начала второго шарда и шардом пропускается
+        manifests = _make_shards(video, tmp, [(0, 40), (40, 130), (130, None)])
+        merged = merge_shards(list(reversed(manifests)), str(tmp / "merged"))
+
+        assert [t for _, t in merged] == expected, (merged, full)
+        for (merged_path, _), (full_path, _) in zip(merged, full):
+            assert Path(merged_path).name == Path(full_path).name
+            assert np.array_equal(cv2.imread(merged_path), cv2.imread(full_path))
+        print(f"  ✓ Слайды совпадают: {expected}")
+
+
+def test_merge_without_video_drops_seam_duplicates():
+    """Без доступа к видео дубли на стыках убираются по сохранённым слайдам"""
+    logging.getLogger().setLevel(logging.WARNING)
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        video = tmp / "lecture.mp4"
+        _make_video(video)
+
+        _, full = _run(video, tmp / "full")
+        manifests = _make_shards(video, tmp, [(0, 60), (60, 130), (130, None)])
+
+        merged = merge_shards(manifests, str(tmp / "merged"), video_path=str(tmp / "missing.mp4"))
+        assert [t for _, t in merged] == [t for _, t in full], merged
+        print("  ✓ Дубли на стыках убраны")
+
+
+def test_merge_rejects_changed_seam_reference():
+    """PNG эталона на стыке перезаписан после шарда - объединение отказывается, а не теряет слайды"""
+    logging.getLogger().setLevel(logging.WARNING)
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        video = tmp / "lecture.mp4"
+        _make_video(video)
+        manifests = _make_shards(video, tmp, [(0, 60), (60, None)])
+
+        first = sorted((tmp / "part_0_60").glob("slide_*.png"))
+        first[-1].write_bytes(sorted((tmp / "part_60_None").glob("slide_*.png"))[-1].read_bytes())
+        try:
+            merge_shards(manifests, str(tmp / "merged"))
+            assert False, "ожидалась ошибка"
+        except ValueError as e:
+            assert first[-1].name in str(e)
+        print("  ✓ Изменённый эталон стыка обнаружен по подписи")
+
+
+def test_time_range_seeks_and_keeps_absolute_time():
+    """Отрезок: перемотка к началу, время слайдов - абсолютное время видео"""
+    logging.getLogger().setLevel(logging.WARNING)
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        video = tmp / "lecture.mp4"
+        _make_video(video)
+
+        processor = VideoProcessor(str(video), sample_rate=1.0, threshold=0.92, crop_region="center",
+                                   start_time=101.5, end_time=170)
+        frames = processor.extract_frames()
+        timestamps = [timestamp for _, timestamp, _ in frames]
+        assert timestamps[0] == 102.0 and timestamps[-1] == 169.0, timestamps
+
+        # Кадр после перемотки совпадает с кадром при чтении с начала
+        full = VideoProcessor(str(video), sample_rate=1.0, threshold=0.92, crop_region="center")
+        reference = {frame_number: frame for frame, _, frame_number in full.extract_frames()}
+        for frame, _, frame_number in frames:
+            assert np.array_equal(frame, reference[frame_number]), frame_number
+        print(f"  ✓ Отрезок {timestamps[0]}s - {timestamps[-1]}s, кадры совпадают с полным чтением")
+
+
+def test_shards_reject_scanner_modes():
+    """two-pass, keyframes и packet-prefilter не сочетаются с шардами: стык сводится по полной сетке"""
+    from src.main import parse_arguments, validate_arguments
+
+    logging.getLogger().setLevel(logging.WARNING)
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        video = tmp / "lecture.mp4"
+        _make_video(video)
+
+        argv = sys.argv
+        try:
+            for flag in ('--two-pass', '--keyframes', '--packet-prefilter'):
+                sys.argv = ['main.py', '--video', str(video), '--shard-manifest', str(tmp / "part.json"), flag]
+                assert any('shard-manifest' in error for error in validate_arguments(parse_arguments())), flag
+                sys.argv = sys.argv[:-1]
+                assert validate_arguments(parse_arguments()) == []
+        finally:
+            sys.argv = argv
+
+        processor = VideoProcessor(str(video), sample_rate=1.0, threshold=0.92, crop_region="center",
+                                   end_time=60, two_pass=True)
+        processor.process(str(tmp / "slides"))
+        try:
+            build_shard_manifest(processor, str(tmp / "slides"))
+            assert False, "ожидалась ошибка"
+        except ValueError:
+            pass
+        print("  ✓ Режимы с выборочным просмотром кадров отклонены для шардов")
+
+
+if __name__ == "__main__":
+    test_merge_matches_single_run()
+    test_merge_without_video_drops_seam_duplicates()
+    test_merge_rejects_changed_seam_reference()
+    test_time_range_seeks_and_keeps_absolute_time()
+    test_shards_reject_scanner_modes()
+    print("✓ Все тесты шардов прошли успешно!")
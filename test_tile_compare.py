@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Тестирование сравнения по сетке плиток с ранним выходом (tile_compare)
+"""
+
+import logging
+import sys
+import tempfile
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).parent / 'src'))
+
+from benchmarks.synthetic import SyntheticLectureSpec, generate_lecture_video
+from src.tile_compare import TileComparator, coarse_to_fine_order
+from src.video_processor import VideoProcessor
+
+
+def _pairs():
+    rng = np.random.default_rng(0)
+    reference = cv2.GaussianBlur(rng.integers(0, 255, (120, 200), dtype=np.uint8), (15, 15), 0)
+    yield "тот же", reference, reference.copy()
+    yield "шум", reference, np.clip(reference.astype(int) + rng.integers(-6, 7, reference.shape), 0, 255)
+    yield "новый", reference, rng.integers(0, 255, reference.shape)
+    yield "половина", reference, np.where(np.arange(120)[:, None] < 50, 255 - reference, reference)
+    yield "угол", reference, np.where((np.arange(120)[:, None] < 30) & (np.arange(200) < 40), 0, reference)
+
+
+def test_coarse_to_fine_order():
+    """Сначала разреженная подсетка по всей обрезке, каждая плитка ровно один раз"""
+    order = coarse_to_fine_order(4, 4)
+    assert order[:4] == [(0, 0), (0, 2), (2, 0), (2, 2)]
+    assert sorted(order) == [(row, col) for row in range(4) for col in range(4)]
+    print("  ✓ Порядок плиток от грубого к мелкому")
+
+
+def test_decisions_match_compare_frames():
+    """Решение при любом пороге то же, что у compare_frames; без раннего выхода - то же сходство"""
+    for name, reference, frame in _pairs():
+        frame = frame.astype(np.uint8)
+        expected = VideoProcessor.compare_frames(reference, frame)
+        blurred_reference = VideoProcessor.prepare_frame(reference)
+        blurred_frame = VideoProcessor.prepare_frame(frame)
+        for threshold in (0.5, 0.85, 0.92, 0.95, 0.99):
+            comparator = TileComparator(threshold)
+            result = comparator.compare(blurred_reference, blurred_frame)
+            assert result.is_change == (expected < threshold), (name, threshold, result, expected)
+            full = comparator.compare(blurred_reference, blurred_frame, early_exit=False)
+            assert full.exact and abs(full.similarity - expected) < 1e-12, (name, full, expected)
+            assert set(result.changed_tiles) <= set(full.changed_tiles)
+        print(f"  ✓ {name}: сходство {expected:.3f}")
+
+
+def test_early_exit_on_new_slide():
+    """Полностью новый кадр решается по нескольким плиткам; изменённый угол попадает в плитки"""
+    rng = np.random.default_rng(1)
+    reference = VideoProcessor.prepare_frame(rng.integers(0, 255, (120, 200), dtype=np.uint8))
+    frame = VideoProcessor.prepare_frame(rng.integers(0, 255, (120, 200), dtype=np.uint8))
+    result = TileComparator(0.92).compare(reference, frame)
+    assert result.is_change and result.tiles_evaluated < result.tiles_total // 2, result
+
+    corner = reference.copy()
+    corner[:30, :50] = 0
+    full = TileComparator(0.99).compare(reference, corner, early_exit=False)
+    assert (0, 0) in full.changed_tiles and (3, 3) not in full.changed_tiles, full
+    print(f"  ✓ Новый слайд решён по {result.tiles_evaluated}/{result.tiles_total} плиткам")
+
+
+def test_tile_compare_process_matches():
+    """Полная обработка синтетической лекции: те же слайды, изменившиеся плитки в метриках"""
+    logging.getLogger().setLevel(logging.WARNING)
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        video = tmp / "lecture.mp4"
+        generate_lecture_video(SyntheticLectureSpec(duration=150, width=320, height=180, fps=5), str(video))
+
+        with VideoProcessor(str(video), crop_region='center') as processor:
+            expected = processor.process(str(tmp / "full"))
+        for workers in (1, 3):
+            with VideoProcessor(str(video), crop_region='center', tile_compare=True,
+                                compare_workers=workers) as processor:
+                slides = processor.process(str(tmp / f"tiles{workers}"))
+                changes = processor.metrics.info.get('tile_changes', [])
+            assert [timestamp for _, timestamp in slides] == [timestamp for _, timestamp in expected]
+            assert len(changes) == len(slides) - 1
+        print(f"  ✓ Слайдов: {len(slides)}, совпадают с полным сравнением")
+
+
+if __name__ == "__main__":
+    test_coarse_to_fine_order()
+    test_decisions_match_compare_frames()
+    test_early_exit_on_new_slide()
+    test_tile_compare_process_matches()
+    print("✓ Все тесты сравнения по плиткам прошли успешно!")
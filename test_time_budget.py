@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Тестирование бюджета времени: выбор прореживания и отчёт об участках с пониженной плотностью
+"""
+
+import logging
+import sys
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent / 'src'))
+
+from benchmarks.synthetic import SyntheticLectureSpec, generate_lecture_video
+from src.time_budget import TimeBudget
+from src.video_processor import VideoProcessor
+
+
+def test_choose_factor():
+    """Выбирается наименьшее прореживание, при котором остаток укладывается в бюджет"""
+    budget = TimeBudget(100.0, reserve=0.0)
+    # 1000 анализируемых кадров по 0.05s = 50s - укладываемся без прореживания
+    assert budget.choose_factor(25000, 25, 0.0, 0.05) == 1
+    # По 0.15s = 150s - нужен каждый второй кадр
+    assert budget.choose_factor(25000, 25, 0.0, 0.15) == 2
+    # Одни пропуски уже дольше бюджета - максимальное прореживание
+    assert budget.choose_factor(25000, 25, 0.01, 0.15) == 16
+
+    budget.set_factor(2, 10.0, 2.0)
+    budget.mark_position(30.0)
+    budget.set_factor(1, 40.0, 1.0)
+    report = budget.report()
+    assert report['reduced_density'] == [{'start': 10.0, 'end': 40.0, 'factor': 2, 'interval_s': 2.0}]
+    print("  ✓ Выбор прореживания и участки отчёта")
+
+
+def test_processor_time_budget():
+    """Недостижимо малый бюджет прореживает сетку и попадает в отчёт; без бюджета отчёта нет"""
+    logging.getLogger().setLevel(logging.ERROR)
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        video = tmp / "lecture.mp4"
+        generate_lecture_video(SyntheticLectureSpec(duration=150, width=320, height=180, fps=5), str(video))
+
+        with VideoProcessor(str(video)) as processor:
+            full = processor.process(str(tmp / "full"))
+        assert 'time_budget' not in processor.metrics.info
+        assert processor.metrics.counters['frames_decoded'] == 150
+
+        with VideoProcessor(str(video), time_budget=0.001) as processor:
+            reduced = processor.process(str(tmp / "reduced"))
+        report = processor.metrics.info['time_budget']
+        assert not report['met']
+        assert report['reduced_density'] and report['reduced_density'][-1]['end'] == 150.0
+        assert processor.metrics.counters['frames_decoded'] < 150
+        assert reduced[0][1] == full[0][1] == 0.0
+        print(f"  ✓ Прочитано кадров: {processor.metrics.counters['frames_decoded']} из 150, "
+              f"участков: {len(report['reduced_density'])}")
+
+
+if __name__ == "__main__":
+    test_choose_factor()
+    test_processor_time_budget()
+    print("✓ Все тесты бюджета времени прошли успешно!")
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Тестирование двухпроходного детектирования (two_pass)
+"""
+
+import logging
+import sys
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent / 'src'))
+
+from benchmarks.synthetic import SyntheticLectureSpec, generate_lecture_video
+from src.two_pass import merge_windows
+from src.video_processor import VideoProcessor
+
+
+def test_merge_windows():
+    """Пересекающиеся и соседние окна объединяются"""
+    assert merge_windows([(50, 60), (10, 20), (20, 30), (55, 70)]) == [(10, 30), (50, 70)]
+    assert merge_windows([]) == []
+    print("  ✓ Объединение окон")
+
+
+def test_two_pass_matches_full_scan():
+    """Те же слайды, что при полном просмотре частой сетки, при гораздо меньшем числе кадров"""
+    logging.getLogger().setLevel(logging.WARNING)
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        video = tmp / "lecture.mp4"
+        generate_lecture_video(SyntheticLectureSpec(duration=300, width=640, height=360, fps=4, seed=5), str(video))
+
+        with VideoProcessor(str(video), sample_rate=0.5, threshold=0.95) as processor:
+            expected = processor.process(str(tmp / "full"))
+            full_frames = processor.metrics.counters['frames_decoded']
+        with VideoProcessor(str(video), sample_rate=0.5, threshold=0.95, two_pass=True) as processor:
+            slides = processor.process(str(tmp / "two_pass"))
+            scan = processor.metrics.info['two_pass_scan']
+
+        assert [timestamp for _, timestamp in slides] == [timestamp for _, timestamp in expected]
+        assert len(scan['windows']) == len(slides) - 1
+        assert scan['fine_frames'] * 4 < full_frames
+        print(f"  ✓ Слайдов: {len(slides)}, кадров частой сетки: {scan['fine_frames']} из {full_frames}")
+
+
+def test_two_pass_short_slides():
+    """Слайды короче MIN_SLIDE_DURATION: решения те же, что у детектора с его выдержкой"""
+    logging.getLogger().setLevel(logging.WARNING)
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        video = tmp / "lecture.mp4"
+        generate_lecture_video(SyntheticLectureSpec(duration=240, width=640, height=360, fps=4,
+                                                    min_slide_duration=12, max_slide_duration=20, seed=1), str(video))
+
+        for sample_rate, threshold in ((1.0, 0.92), (0.5, 0.95)):
+            with VideoProcessor(str(video), sample_rate=sample_rate, threshold=threshold) as processor:
+                expected = [timestamp for _, timestamp in processor.process(str(tmp / "full"))]
+            with VideoProcessor(str(video), sample_rate=sample_rate, threshold=threshold, two_pass=True) as processor:
+                slides = [timestamp for _, timestamp in processor.process(str(tmp / "two_pass"))]
+            assert slides == expected, (sample_rate, slides, expected)
+            print(f"  ✓ Шаг {sample_rate}s, порог {threshold}: {len(slides)} слайдов, как при полном просмотре")
+
+
+if __name__ == "__main__":
+    test_merge_windows()
+    test_two_pass_matches_full_scan()
+    test_two_pass_short_slides()
+    print("✓ Все тесты двухпроходного детектирования прошли успешно!")
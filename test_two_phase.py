@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Тестирование двухфазного детектора (compare_workers)
+"""
+
+import logging
+import sys
+import tempfile
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).parent / 'src'))
+
+from benchmarks.synthetic import SyntheticLectureSpec, generate_lecture_video
+from src.metrics import RunMetrics
+from src.video_processor import VideoProcessor
+
+
+def _detect(video: str, frames: list, threshold: float, compare_workers: int):
+    metrics = RunMetrics()
+    with VideoProcessor(video, threshold=threshold, metrics=metrics, compare_workers=compare_workers) as processor:
+        slides = processor.detect_slide_changes(frames)
+    return [(slide.timestamp, slide.frame_number) for slide in slides], metrics
+
+
+def test_pixel_similarity_bounds_combined_similarity():
+    """Процент совпадающих пикселей не больше итогового сходства - на этом держится пропуск SSIM"""
+    rng = np.random.default_rng(0)
+    base = rng.integers(0, 255, (60, 80, 3), dtype=np.uint8)
+    for noise in (0, 2, 10, 60):
+        other = np.clip(base.astype(int) + rng.integers(-noise, noise + 1, base.shape), 0, 255).astype(np.uint8)
+        blurred1 = VideoProcessor.prepare_frame(base)
+        blurred2 = VideoProcessor.prepare_frame(other, blurred1.shape)
+        assert VideoProcessor.pixel_similarity(blurred1, blurred2) <= VideoProcessor.compare_frames(base, other)
+    print("  ✓ pixel_similarity <= compare_frames")
+
+
+def test_two_phase_matches_sequential():
+    """Те же слайды, что у последовательного детектора, при любом числе потоков и пороге"""
+    rng = np.random.default_rng(1)
+    frames = []
+    slide = rng.integers(0, 255, (90, 160, 3), dtype=np.uint8)
+    for i in range(120):
+        if i % 9 == 0:
+            slide = rng.integers(0, 255, (90, 160, 3), dtype=np.uint8)
+        elif i % 4 == 0:
+            # Частичные изменения - сходство около порога
+            slide = slide.copy()
+            slide[: 30 + i % 40] = rng.integers(0, 255, (30 + i % 40, 160, 3), dtype=np.uint8)
+        noise = rng.integers(-3, 4, slide.shape)
+        frames.append((np.clip(slide.astype(int) + noise, 0, 255).astype(np.uint8), i * 6.0, i * 150))
+
+    logging.getLogger().setLevel(logging.WARNING)
+    with tempfile.TemporaryDirectory() as tmp:
+        video = str(Path(tmp) / "lecture.mp4")
+        generate_lecture_video(SyntheticLectureSpec(duration=10, width=320, height=180, fps=5), video)
+        for threshold in (0.6, 0.85, 0.95):
+            expected, _ = _detect(video, frames, threshold, 1)
+            for workers in (2, 4):
+                slides, metrics = _detect(video, frames, threshold, workers)
+                assert slides == expected, (threshold, workers)
+            print(f"  ✓ Порог {threshold}: {len(expected)} слайдов совпадают, "
+                  f"SSIM пропущен для {metrics.counters.get('ssim_skipped', 0)} кадров")
+
+
+def test_two_phase_reuses_identical_frames():
+    """Кадр, совпадающий с предыдущим, получает его решение без SSIM - слайды те же"""
+    rng = np.random.default_rng(2)
+    frames = []
+    slide = rng.integers(0, 255, (90, 160, 3), dtype=np.uint8)
+    for i in range(80):
+        if i % 10 == 0:
+            slide = rng.integers(0, 255, (90, 160, 3), dtype=np.uint8)
+        elif i % 5 == 0:
+            slide = slide.copy()
+            slide[:40] = rng.integers(0, 255, (40, 160, 3), dtype=np.uint8)
+        # Статичный слайд без шума: кодировщик повторяет кадр бит в бит
+        frames.append((slide, i * 6.0, i * 150))
+
+    logging.getLogger().setLevel(logging.WARNING)
+    with tempfile.TemporaryDirectory() as tmp:
+        video = str(Path(tmp) / "lecture.mp4")
+        generate_lecture_video(SyntheticLectureSpec(duration=10, width=320, height=180, fps=5), video)
+        for threshold in (0.7, 0.95, 1.0):
+            expected, _ = _detect(video, frames, threshold, 1)
+            slides, metrics = _detect(video, frames, threshold, 4)
+            assert slides == expected, threshold
+        assert metrics.counters.get('ssim_reused', 0) > 0
+        print(f"  ✓ Слайды совпадают, решений по предыдущему кадру: {metrics.counters['ssim_reused']}")
+
+
+def test_two_phase_process_matches():
+    """Полная обработка синтетической лекции: те же PNG и время слайдов"""
+    logging.getLogger().setLevel(logging.WARNING)
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        video = tmp / "lecture.mp4"
+        generate_lecture_video(SyntheticLectureSpec(duration=150, width=320, height=180, fps=5), str(video))
+
+        with VideoProcessor(str(video)) as processor:
+            sequential = processor.process(str(tmp / "sequential"))
+        with VideoProcessor(str(video), compare_workers=4) as processor:
+            assert processor.metrics.info['compare_workers'] == 4
+            parallel = processor.process(str(tmp / "parallel"))
+        assert [timestamp for _, timestamp in parallel] == [timestamp for _, timestamp in sequential]
+        print(f"  ✓ Слайдов: {len(parallel)}, совпадают с последовательным детектором")
+
+
+if __name__ == "__main__":
+    test_pixel_similarity_bounds_combined_similarity()
+    test_two_phase_matches_sequential()
+    test_two_phase_reuses_identical_frames()
+    test_two_phase_process_matches()
+    print("✓ Все тесты двухфазного детектора прошли успешно!")